@@ -0,0 +1,53 @@
+"""add global_records table
+
+Revision ID: 003_add_global_records_table
+Revises: 002_add_unique_record_id_archive
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003_add_global_records_table'
+down_revision = '002_add_unique_record_id_archive'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Durable global library (GlobalLibraryService SQL backend)
+    op.create_table(
+        'global_records',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('metadata', sa.JSON(), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=True),
+        sa.Column('fields', sa.JSON(), nullable=True),
+        sa.Column('search_text', sa.Text(), nullable=False, server_default=''),
+        sa.Column('created_at', sa.Float(), nullable=False),
+        # Backs INSERT ... ON CONFLICT (fingerprint)
+        sa.UniqueConstraint('fingerprint', name='uq_global_records_fingerprint'),
+    )
+
+    # Postgres: trigram index so search_text LIKE '%q%' does not scan.
+    # CREATE EXTENSION needs elevated privileges; run it in a SAVEPOINT so
+    # a failure rolls back only these statements, not the migration
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        savepoint = bind.begin_nested()
+        try:
+            op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            op.execute(
+                'CREATE INDEX ix_global_records_search_trgm '
+                'ON global_records USING gin (search_text gin_trgm_ops)'
+            )
+            savepoint.commit()
+        except sa.exc.DBAPIError:
+            # Search still works without the index (sequential scan)
+            savepoint.rollback()
+
+
+def downgrade() -> None:
+    op.drop_table('global_records')
@@ -0,0 +1,45 @@
+"""add jobs table
+
+Revision ID: 004_add_jobs_table
+Revises: 003_add_global_records_table
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_add_jobs_table'
+down_revision = '003_add_global_records_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Durable job queue (backend.core.job_queue)
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(length=36), primary_key=True),
+        sa.Column('queue', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('dedupe_key', sa.String(length=255), nullable=True),
+        sa.Column('state', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('available_at', sa.Float(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=100), nullable=True),
+        sa.Column('lease_expires_at', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.Column('finished_at', sa.Float(), nullable=True),
+        # Backs INSERT ... ON CONFLICT (dedupe_key)
+        sa.UniqueConstraint('dedupe_key'),
+    )
+    op.create_index('ix_jobs_queue_state_available', 'jobs', ['queue', 'state', 'available_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_queue_state_available', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,34 @@
+"""add archive_enrichments table
+
+Revision ID: 005_add_archive_enrichments_table
+Revises: 004_add_jobs_table
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005_add_archive_enrichments_table'
+down_revision = '004_add_jobs_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Post-archive enrichment results (backend.services.archive_enrichment)
+    op.create_table(
+        'archive_enrichments',
+        sa.Column('record_id', sa.String(length=64), primary_key=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('started_at', sa.Float(), nullable=False),
+        sa.Column('finished_at', sa.Float(), nullable=True),
+        sa.Column('providers', sa.JSON(), nullable=False),
+        sa.Column('enrichment', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archive_enrichments')
@@ -0,0 +1,57 @@
+"""add market_prices and price_lookups tables
+
+Revision ID: 006_add_market_prices_tables
+Revises: 005_add_archive_enrichments_table
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_market_prices_tables'
+down_revision = '005_add_archive_enrichments_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Persistent market prices (backend.services.price_store)
+    op.create_table(
+        'market_prices',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('release_id', sa.String(length=32), nullable=False),
+        sa.Column('condition', sa.String(length=8), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('price_min', sa.Float(), nullable=True),
+        sa.Column('price_median', sa.Float(), nullable=True),
+        sa.Column('price_max', sa.Float(), nullable=True),
+        sa.Column('sample_size', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=True),
+        sa.Column('fetched_at', sa.Float(), nullable=True),
+        sa.Column('last_viewed_at', sa.Float(), nullable=True),
+        sa.Column('listed', sa.Boolean(), nullable=False),
+        sa.Column('refresh_error', sa.Text(), nullable=True),
+        sa.Column('next_refresh_at', sa.Float(), nullable=True),
+        # Backs INSERT ... ON CONFLICT and the read lookup
+        sa.UniqueConstraint('release_id', 'condition', 'currency',
+                            name='uq_market_prices_release_condition_currency'),
+    )
+    op.create_index('ix_market_prices_fetched_at', 'market_prices', ['fetched_at'])
+
+    # Normalized "artist|album|catalog" -> Discogs release id
+    op.create_table(
+        'price_lookups',
+        sa.Column('lookup_key', sa.String(length=255), primary_key=True),
+        sa.Column('release_id', sa.String(length=32), nullable=False),
+        sa.Column('created_at', sa.Float(), nullable=False),
+    )
+    op.create_index('ix_price_lookups_release_id', 'price_lookups', ['release_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_lookups_release_id', table_name='price_lookups')
+    op.drop_table('price_lookups')
+    op.drop_index('ix_market_prices_fetched_at', table_name='market_prices')
+    op.drop_table('market_prices')
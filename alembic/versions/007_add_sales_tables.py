@@ -0,0 +1,77 @@
+"""add sales, sales_listings and sales_rollups tables
+
+Revision ID: 007_add_sales_tables
+Revises: 006_add_market_prices_tables
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_sales_tables'
+down_revision = '006_add_market_prices_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Sales history and dashboard rollups (backend.services.commerce.sales_store)
+    op.create_table(
+        'sales',
+        sa.Column('id', sa.String(length=36), primary_key=True),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('record_id', sa.String(length=64), nullable=False),
+        sa.Column('channel', sa.String(length=32), nullable=False),
+        sa.Column('listing_id', sa.String(length=128), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('sold_at', sa.Float(), nullable=False),
+        sa.Column('days_to_sale', sa.Float(), nullable=True),
+    )
+    # Covering: the dashboard's top-records scan reads only the index
+    op.create_index('ix_sales_user_sold_at', 'sales', ['user_id', 'sold_at', 'record_id', 'price'])
+    op.create_index('ix_sales_channel_sold_at', 'sales', ['channel', 'sold_at', 'record_id', 'price'])
+    # One sale per listing: repeated sale events are dropped on conflict
+    op.create_index('uq_sales_channel_listing', 'sales', ['channel', 'listing_id'], unique=True)
+
+    op.create_table(
+        'sales_listings',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('record_id', sa.String(length=64), nullable=False),
+        sa.Column('channel', sa.String(length=32), nullable=False),
+        sa.Column('listing_id', sa.String(length=128), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('listed_at', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('sold_at', sa.Float(), nullable=True),
+        sa.UniqueConstraint('channel', 'listing_id', name='uq_sales_listings_channel_listing'),
+    )
+    op.create_index('ix_sales_listings_record_status', 'sales_listings', ['record_id', 'status'])
+
+    op.create_table(
+        'sales_rollups',
+        sa.Column('period', sa.String(length=5), nullable=False),
+        sa.Column('period_start', sa.String(length=10), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('channel', sa.String(length=32), nullable=False),
+        sa.Column('sales', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('listings', sa.Integer(), nullable=False),
+        sa.Column('days_to_sale_total', sa.Float(), nullable=False),
+        sa.Column('days_to_sale_count', sa.Integer(), nullable=False),
+        # Backs INSERT ... ON CONFLICT on the rollup key
+        sa.PrimaryKeyConstraint('period', 'period_start', 'user_id', 'channel'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sales_rollups')
+    op.drop_index('ix_sales_listings_record_status', table_name='sales_listings')
+    op.drop_table('sales_listings')
+    op.drop_index('uq_sales_channel_listing', table_name='sales')
+    op.drop_index('ix_sales_channel_sold_at', table_name='sales')
+    op.drop_index('ix_sales_user_sold_at', table_name='sales')
+    op.drop_table('sales')
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import logging
-from fastapi import Header, HTTPException, Depends
+from fastapi import Header, HTTPException, Depends, Query
 from typing import Optional
 from sqlalchemy.orm import Session
 
@@ -401,6 +401,20 @@ def get_current_user(
     return user
 
 
+def get_current_user_stream(
+    authorization: Optional[str] = Header(None, alias="Authorization"),
+    access_token: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    get_current_user for EventSource / WebSocket clients, which cannot set
+    an Authorization header: also accepts the JWT as ?access_token=.
+    """
+    if not authorization and access_token:
+        authorization = f"Bearer {access_token}"
+    return get_current_user(authorization=authorization, db=db)
+
+
 def get_current_admin(user: User = Depends(get_current_user)) -> User:
     if not user.is_admin:
         raise HTTPException(
@@ -2,6 +2,7 @@
 # UTF-8, English only
 # Commerce automation endpoints
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from fastapi.responses import JSONResponse
 import logging
@@ -34,7 +35,7 @@ async def sync_stock(
         }
     """
     try:
-        result = stock_sync_service.handle_sale(
+        result = await stock_sync_service.handle_sale(
             record_id=sale_event.get("record_id"),
             sold_on_platform=sale_event.get("sold_on_platform"),
             listing_ids=sale_event.get("listing_ids", {})
@@ -63,10 +64,11 @@ async def optimize_prices(
         }
     """
     try:
-        result = auto_pricing_service.optimize_prices(
+        result = await auto_pricing_service.optimize_prices(
             records=records,
             competitor_prices=competitor_prices,
-            sales_metrics=sales_metrics
+            sales_metrics=sales_metrics,
+            user_id=str(user.id)
         )
         return JSONResponse(status_code=200, content=result)
     except Exception as e:
@@ -109,7 +111,9 @@ async def get_dashboard_metrics(
     Get sales analytics dashboard metrics.
     """
     try:
-        result = sales_analytics_service.get_dashboard_metrics(days=days)
+        result = await asyncio.to_thread(
+            sales_analytics_service.get_dashboard_metrics, days=days, user_id=str(user.id)
+        )
         return JSONResponse(status_code=200, content=result)
     except Exception as e:
         logger.error(f"Analytics failed: {e}", exc_info=True)
@@ -133,11 +137,12 @@ async def handle_sale_event(
         }
     """
     try:
-        result = event_trigger_service.handle_sale_event(
+        result = await event_trigger_service.handle_sale_event(
             record_id=event.get("record_id"),
             sold_on_platform=event.get("sold_on_platform"),
             listing_ids=event.get("listing_ids", {}),
-            price=event.get("price", 0.0)
+            price=event.get("price", 0.0),
+            user_id=str(user.id)
         )
         return JSONResponse(status_code=200, content=result)
     except Exception as e:
@@ -206,15 +211,19 @@ async def handle_high_views_event(
 @router.post("/events/nightly-optimization")
 async def process_nightly_optimization(
     records: List[Dict[str, Any]] = Body(...),
+    run_id: Optional[str] = Query(None, description="Checkpoint name; rerun to resume (default: nightly-<date>)"),
     user = Depends(get_current_user)
 ):
     """
     Process nightly optimization for all active listings.
     
-    Uses OpenAI to make intelligent pricing decisions.
+    Rules for the long tail, OpenAI in parallel chunks for the rest;
+    checkpointed per run_id.
     """
     try:
-        result = event_trigger_service.process_nightly_optimization(records=records)
+        result = await event_trigger_service.process_nightly_optimization(
+            records=records, run_id=run_id, user_id=str(user.id)
+        )
         return JSONResponse(status_code=200, content=result)
     except Exception as e:
         logger.error(f"Nightly optimization failed: {e}", exc_info=True)
@@ -0,0 +1,99 @@
+"""
+Media Router - Image derivatives
+Resized WebP / JPEG copies of stored images for grids and detail views,
+rendered on first request and served from the content-addressed cache.
+
+Caching:
+- Strong ETag per derivative (hash of source content + width + format)
+- If-None-Match answered with 304 before anything is rendered
+- URLs carrying the current source version (`v`, see
+  DerivativeService.url) are immutable for a year; unversioned URLs
+  revalidate (no-cache) so a replaced source is picked up
+- POST /derivative-urls returns versioned URLs for a page of stored
+  images, so clients can request the immutable form
+"""
+import asyncio
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from backend.core.executors import IMAGE_POOL, run_in_pool
+from backend.services.derivative_service import DerivativeError, derivative_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/media", tags=["Media"])
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+# Stored images per /derivative-urls request
+MAX_URL_BATCH = 500
+
+
+class DerivativeUrlsRequest(BaseModel):
+    paths: List[str] = Field(..., max_length=MAX_URL_BATCH, description="Stored image paths, e.g. /storage/archive/12/abc.jpg")
+    widths: List[int] = Field(default_factory=lambda: [320, 640], min_length=1, max_length=8)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@router.get("/derivative")
+async def get_derivative(
+    request: Request,
+    path: str = Query(..., description="Stored image path, e.g. archive/12/abc.jpg or /storage/archive/12/abc.jpg"),
+    w: int = Query(320, ge=1, le=10000, description="Width in px (snapped up to a configured width)"),
+    format: str = Query("auto", pattern="^(auto|webp|jpeg)$"),
+    v: Optional[str] = Query(None, description="Source version from DerivativeService.url"),
+):
+    """
+    Resized image. `format=auto` picks WebP when the Accept header allows it.
+    """
+    fmt = format
+    if fmt == "auto":
+        fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+
+    try:
+        source = await asyncio.to_thread(derivative_service.resolve_source, path)
+        derivative = await asyncio.to_thread(derivative_service.describe, source, w, fmt)
+    except DerivativeError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    headers = {
+        "ETag": derivative.etag,
+        "Cache-Control": IMMUTABLE if v == derivative.source_version else REVALIDATE,
+    }
+    if format == "auto":
+        headers["Vary"] = "Accept"
+
+    if _etag_matches(request.headers.get("if-none-match"), derivative.etag):
+        return Response(status_code=304, headers=headers)
+
+    if derivative.path.exists():
+        derivative = await asyncio.to_thread(derivative_service.get, source, w, fmt)
+    else:
+        # Rendering is CPU work: bounded pool, 429 when saturated
+        derivative = await run_in_pool(IMAGE_POOL, derivative_service.get, source, w, fmt)
+
+    return FileResponse(derivative.path, media_type=derivative.content_type, headers=headers)
+
+
+@router.post("/derivative-urls")
+async def get_derivative_urls(payload: DerivativeUrlsRequest):
+    """
+    Versioned derivative URLs, {"urls": {path: {width: url} | null}}.
+    Paths that are not stored images map to null (use them unchanged).
+    """
+    # Hashing sources reads files: keep it off the event loop
+    urls = await run_in_pool(IMAGE_POOL, derivative_service.urls, payload.paths, payload.widths)
+    return {"urls": urls}
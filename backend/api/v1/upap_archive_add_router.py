@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from backend.db import get_db
 from backend.api.v1.auth_middleware import get_current_user
 from backend.models.user import User
 from backend.services.upap.engine.upap_engine import upap_engine
+from backend.services.archive_enrichment import MODES as ENRICHMENT_MODES, archive_enrichment
 
 router = APIRouter(prefix="/api/v1/upap", tags=["UPAP"])
 
@@ -27,27 +29,58 @@ class ArchiveAddRequest(BaseModel):
 @router.post("/archive/add")
 async def add_to_archive(
     payload: ArchiveAddRequest,
+    enrich: str = Query("background", description="background | sync | none"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Add record to archive using UPAP archive stage.
     Requires authentication.
+
+    Pricing, lyrics and sheet music lookups run concurrently after the
+    save. enrich=background (default) returns right away with the pending
+    enrichment state (poll GET /archive/{record_id}/enrichment or listen
+    for the "enrichment" preview event); enrich=sync waits for them.
     """
     # Use record_id or preview_id
     record_id = payload.record_id or payload.preview_id
     
     if not record_id:
         raise HTTPException(status_code=400, detail="record_id or preview_id is required")
+    if enrich not in ENRICHMENT_MODES:
+        raise HTTPException(status_code=400, detail=f"enrich must be one of {', '.join(ENRICHMENT_MODES)}")
     
     try:
         # Use UPAP engine to archive the record
         result = upap_engine.run_archive(record_id)
-        return {
-            "status": "ok",
-            "message": "Record added to archive",
-            "record_id": record_id,
-            "archive_result": result
-        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to archive record: {str(e)}")
+
+    fields = payload.model_dump(exclude_none=True)
+    if enrich == "sync":
+        enrichment = await archive_enrichment.enrich(record_id, fields)
+    elif enrich == "background":
+        enrichment = archive_enrichment.start(record_id, fields)
+    else:
+        enrichment = None
+
+    return {
+        "status": "ok",
+        "message": "Record added to archive",
+        "record_id": record_id,
+        "archive_result": result,
+        "enrichment": enrichment
+    }
+
+
+@router.get("/archive/{record_id}/enrichment")
+async def get_archive_enrichment(
+    record_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Enrichment state of an archived record: per-provider status and results."""
+    # Falls back to the persisted state (other worker / before a restart)
+    state = await asyncio.to_thread(archive_enrichment.get, record_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="No enrichment for this record")
+    return state
@@ -18,6 +18,7 @@ from backend.models.user import User
 from backend.models.preview_record_db import PreviewRecordDB
 from backend.models.record_state import RecordState
 from backend.models.archive_record_db_v2 import ArchiveRecordDB
+from backend.services.preview_events import publish_preview_event
 
 logger = logging.getLogger(__name__)
 
@@ -121,6 +122,7 @@ async def archive_v2(
     db.delete(preview)
     
     db.commit()
+    publish_preview_event(preview_id, "state", {"state": RecordState.ARCHIVED.value, "record_id": record_id})
     
     # Log archive
     logger.info(f"[ARCHIVE_V2] Record archived: record_id={record_id}, preview_id={preview_id}, user_id={current_user.id}")
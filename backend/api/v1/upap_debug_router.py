@@ -2,6 +2,7 @@
 UPAP Debug Router - Runtime Proof Verification
 CEO-level accountability: Prove AI pipeline executed
 """
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
@@ -12,6 +13,20 @@ from backend.api.v1.auth_middleware import get_current_user
 from backend.models.user import User
 from backend.models.preview_record_db import PreviewRecordDB
 from backend.services.pipeline_logger import pipeline_logger
+from backend.core.executors import executor_stats
+from backend.services.recognition_cache import recognition_cache
+from backend.services.openai_gateway import openai_gateway
+from backend.services.near_duplicate_index import near_duplicate_index
+from backend.services.ai_pipeline_worker import ai_pipeline_queue
+from backend.core.event_bus import event_bus
+from backend.services.derivative_service import derivative_service
+from backend.core.stage_metrics import stage_metrics
+from backend.services.discogs_client import discogs_client
+from backend.services.archive_enrichment import archive_enrichment
+from backend.services.price_store import price_store
+from backend.services.price_refresh import price_refresh_scheduler
+from backend.services.enrichment_engine import enrichment_engine
+from backend.services.commerce.stock_sync_service import stock_sync_service
 
 logger = logging.getLogger(__name__)
 
@@ -83,3 +98,123 @@ async def get_preview_status(
     }
     
     return response
+
+
+@router.get("/executors")
+async def get_executor_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Executor pool utilization (in-flight, queued, rejected).
+    Used to tune UPAP_*_WORKERS / UPAP_*_QUEUE on Cloud Run.
+    """
+    return {"pools": executor_stats()}
+
+
+@router.get("/recognition-cache")
+async def get_recognition_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Recognition cache effectiveness (hits, misses, hit_rate, evictions).
+    Counters are shared by all workers on the instance.
+    """
+    return recognition_cache.stats()
+
+
+@router.get("/openai-gateway")
+async def get_openai_gateway_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    OpenAI gateway counters (upstream calls, coalesced, retries,
+    rate limits, remaining TPM and retry budget) for this worker.
+    """
+    return openai_gateway.stats()
+
+
+@router.get("/near-duplicates")
+async def get_near_duplicate_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Near-duplicate cover index size (records indexed, log bytes)."""
+    return near_duplicate_index.stats()
+
+
+@router.get("/jobs")
+async def get_job_queue_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """AI pipeline job queue: counts per state, oldest queued age, recent dead letters."""
+    stats = await asyncio.to_thread(ai_pipeline_queue.stats)
+    stats["dead_letters"] = await asyncio.to_thread(ai_pipeline_queue.dead_letters, 10)
+    return stats
+
+
+@router.get("/event-bus")
+async def get_event_bus_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Preview status push: backend, open streams, events published/delivered."""
+    return event_bus.stats()
+
+
+@router.get("/derivatives")
+async def get_derivative_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Image derivative cache: hits, generated, coalesced renders, in flight."""
+    return derivative_service.stats()
+
+
+@router.get("/discogs")
+async def get_discogs_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Discogs client: upstream calls, cache hits, revalidations, coalesced, rate-limit waits."""
+    return discogs_client.stats()
+
+
+@router.get("/enrichment")
+async def get_enrichment_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Archive enrichment: records by status (complete / partial / pending), running."""
+    return archive_enrichment.stats()
+
+
+@router.get("/stage-metrics")
+async def get_stage_metrics(
+    histograms: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Per-stage wall/CPU time, RSS, I/O and external calls (p50/p90/p99/p99.9).
+    histograms=true adds raw bucket counts (input for the stage_metrics CLI).
+    """
+    return stage_metrics.snapshot(include_histograms=histograms)
+
+
+@router.get("/price-store")
+async def get_price_store_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Price store: stored / due / failing releases; refresh scheduler runs and Discogs requests spent."""
+    store = await asyncio.to_thread(price_store.stats)
+    return {"store": store, "refresh": price_refresh_scheduler.stats()}
+
+
+@router.get("/enrichment-engine")
+async def get_enrichment_engine_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Metadata enrichment: queue depth, interactive / backfill processed, per-source calls and cache hits."""
+    return await asyncio.to_thread(enrichment_engine.stats)
+
+
+@router.get("/stock-sync")
+async def get_stock_sync_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Cross-channel delisting: outbox depth and dead letters, attempts / timeouts, time to fully delisted."""
+    return await asyncio.to_thread(stock_sync_service.stats)
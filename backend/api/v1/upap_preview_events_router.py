@@ -0,0 +1,195 @@
+"""
+UPAP Preview Events Router - Server-push preview status
+Replaces polling GET /preview/{id}: one auth + one DB read per connection,
+then state transitions are pushed from the event bus.
+
+- SSE:       GET /api/v1/upap/preview/{preview_id}/events
+- WebSocket: /api/v1/upap/preview/{preview_id}/ws
+
+EventSource and WebSocket clients cannot set headers, so both accept the
+JWT as ?access_token=. Reconnecting SSE clients send Last-Event-ID
+(WebSocket: ?last_event_id=) and receive the events they missed, or a
+fresh snapshot when those are no longer buffered.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+
+from backend.db import get_db
+from backend.api.v1.auth_middleware import get_current_user_stream
+from backend.core.event_bus import Subscription, SubscriptionClosed, SubscriptionLimitExceeded, event_bus
+from backend.models.user import User
+from backend.models.preview_record_db import PreviewRecordDB
+from backend.services.preview_events import TERMINAL_STATES, preview_state_data, preview_topic
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/upap", tags=["UPAP"])
+
+HEARTBEAT_SECONDS = float(os.getenv("PREVIEW_EVENTS_HEARTBEAT_SECONDS", "15"))
+# Streams are recycled periodically; clients reconnect with Last-Event-ID
+MAX_STREAM_SECONDS = float(os.getenv("PREVIEW_EVENTS_MAX_STREAM_SECONDS", "900"))
+SSE_RETRY_MS = int(os.getenv("PREVIEW_EVENTS_RETRY_MS", "3000"))
+
+# (event id or None, event type, data); None for a heartbeat
+StreamItem = Optional[Tuple[Optional[str], str, Dict]]
+
+
+def _open_stream(preview_id: str, user_id: str, last_event_id: Optional[str], db: Session):
+    """
+    Subscribe, then check ownership and read the snapshot (in that order, so
+    a transition between the two is not missed). Releases the DB session:
+    the stream may stay open for minutes.
+
+    Raises:
+        HTTPException: 429 over the connection limit, 404 unknown preview
+    """
+    try:
+        sub = event_bus.subscribe(preview_topic(preview_id), last_event_id=last_event_id, owner=user_id)
+    except SubscriptionLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    try:
+        preview = db.query(PreviewRecordDB).filter(
+            PreviewRecordDB.preview_id == preview_id,
+            PreviewRecordDB.user_id == user_id
+        ).first()
+        snapshot = preview_state_data(preview) if preview else None
+    except Exception:
+        sub.close()
+        raise
+    finally:
+        db.close()
+
+    if snapshot is None:
+        sub.close()
+        raise HTTPException(status_code=404, detail=f"Preview record not found: {preview_id}")
+    return sub, snapshot
+
+
+async def _status_stream(sub: Subscription, snapshot: Dict) -> AsyncIterator[StreamItem]:
+    """Replay or snapshot, then live events and heartbeats until a terminal state."""
+    if sub.replay is None:
+        yield None, "state", snapshot
+        if snapshot.get("state") in TERMINAL_STATES:
+            return
+    else:
+        for event in sub.replay:
+            yield event.id, event.type, event.data
+            if event.type == "state" and event.data.get("state") in TERMINAL_STATES:
+                return
+
+    deadline = time.monotonic() + MAX_STREAM_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            event = await sub.next(min(HEARTBEAT_SECONDS, max(deadline - time.monotonic(), 0.01)))
+        except SubscriptionClosed:
+            return
+        if event is None:
+            yield None
+            continue
+        yield event.id, event.type, event.data
+        if event.type == "state" and event.data.get("state") in TERMINAL_STATES:
+            return
+
+
+@router.get("/preview/{preview_id}/events")
+async def stream_preview_events(
+    preview_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: User = Depends(get_current_user_stream),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of preview status.
+
+    Events:
+        state    {"preview_id", "state", "confidence", "artist", "album", ...}
+        progress {"preview_id", "stage"}
+        error    {"preview_id", "error"} (the job is retried)
+    Comment lines (": ping") are heartbeats. The stream ends after a
+    terminal state (archived).
+    """
+    sub, snapshot = _open_stream(preview_id, str(current_user.id), last_event_id, db)
+
+    async def sse() -> AsyncIterator[str]:
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            async for item in _status_stream(sub, snapshot):
+                if item is None:
+                    if await request.is_disconnected():
+                        return
+                    yield ": ping\n\n"
+                    continue
+                event_id, event_type, data = item
+                id_line = f"id: {event_id}\n" if event_id else ""
+                yield f"{id_line}event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(sub.close),
+    )
+
+
+@router.websocket("/preview/{preview_id}/ws")
+async def preview_events_ws(
+    websocket: WebSocket,
+    preview_id: str,
+    access_token: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    WebSocket variant of /events. Messages are JSON:
+    {"id", "type", "data"} for events, {"type": "ping"} for heartbeats.
+    """
+    try:
+        user = get_current_user_stream(
+            authorization=websocket.headers.get("authorization"), access_token=access_token, db=db
+        )
+        sub, snapshot = _open_stream(preview_id, str(user.id), last_event_id, db)
+    except HTTPException as e:
+        db.close()
+        # 1008 policy violation (auth / not found), 1013 try again later (limit)
+        await websocket.close(code=1013 if e.status_code == 429 else 1008, reason=str(e.detail)[:120])
+        return
+
+    await websocket.accept()
+    # Client messages are ignored; reading surfaces disconnects promptly
+    reader = asyncio.create_task(_drain(websocket))
+    try:
+        async for item in _status_stream(sub, snapshot):
+            if reader.done():
+                return
+            if item is None:
+                await websocket.send_json({"type": "ping"})
+                continue
+            event_id, event_type, data = item
+            await websocket.send_json({"id": event_id, "type": event_type, "data": data})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
+        sub.close()
+
+
+async def _drain(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
@@ -1,12 +1,15 @@
 # backend/api/v1/upap_preview_router.py
 # UTF-8, English only
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Depends
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Depends, Header
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from typing import List, Optional, Union
 from datetime import datetime
+from pathlib import Path
+import asyncio
+import json
 import uuid
-import zipfile
-import io
 import os
 
 # UPAP Pipeline imports
@@ -17,10 +20,13 @@ from backend.services.novarchive_gpt_service import novarchive_gpt_service
 from backend.services.video_processing_service import video_processing_service
 from backend.services.multi_record_detection_service import multi_record_detection_service
 from backend.models.preview_record import PreviewRecord
-from backend.api.v1.auth_middleware import get_current_user
+from backend.api.v1.auth_middleware import get_current_user, get_current_user_stream
+from backend.services.zip_ingestion import ZipBatch, ZipLimitExceeded, scan_members, spool_upload, zip_batches
 
 router = APIRouter(prefix="/upap/process", tags=["UPAP Preview"])
 
+VIDEO_MAX_UPLOAD_BYTES = int(os.getenv("VIDEO_MAX_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024)))  # 2 GB
+
 # NOTE: Direct stage instantiation for preview flow (bypasses engine)
 # This is intentional - preview flow needs fine-grained control
 # Production archive flow uses engine.run_stage() methods
@@ -29,6 +35,11 @@ process_stage = ProcessStage()
 
 
 async def process_single_file(file_bytes: bytes, filename: str, user_email: str, detect_multiple: bool = True) -> dict:
+    """Run process_file_sync off the event loop (stages and GPT calls block)."""
+    return await asyncio.to_thread(process_file_sync, file_bytes, filename, user_email, detect_multiple)
+
+
+def process_file_sync(file_bytes: bytes, filename: str, user_email: str, detect_multiple: bool = True) -> dict:
     """
     UPAP V2 Compliance: Process file through Upload → Process stages.
     Authentication required - user must be logged in.
@@ -59,16 +70,18 @@ async def process_single_file(file_bytes: bytes, filename: str, user_email: str,
             )
             
             # If multiple records detected, process each separately
+            # (concurrently, bounded per image; crops come from memory)
             if len(detections) > 1:
-                results = []
-                for detection in detections:
+                def process_detection(detection: dict) -> dict:
                     crop_path = detection.get("crop_path", saved_path)
                     if crop_path != saved_path:
                         # Process cropped record
-                        with open(crop_path, 'rb') as f:
-                            crop_bytes = f.read()
+                        crop_bytes = detection.pop("crop_bytes", None)
+                        if crop_bytes is None:
+                            with open(crop_path, 'rb') as f:
+                                crop_bytes = f.read()
                         crop_filename = os.path.basename(crop_path)
-                        result = await process_single_file(
+                        result = process_file_sync(
                             crop_bytes, 
                             crop_filename, 
                             user_email, 
@@ -80,16 +93,16 @@ async def process_single_file(file_bytes: bytes, filename: str, user_email: str,
                             "confidence": detection.get("confidence", 0.5),
                             "detection_method": detection.get("detection_method", "unknown")
                         }
-                        results.append(result)
-                    else:
-                        # Use original file for single record
-                        result = await process_single_file(
-                            file_bytes,
-                            filename,
-                            user_email,
-                            detect_multiple=False
-                        )
-                        results.append(result)
+                        return result
+                    # Use original file for single record
+                    return process_file_sync(
+                        file_bytes,
+                        filename,
+                        user_email,
+                        detect_multiple=False
+                    )
+                
+                results = multi_record_detection_service.map_concurrent(process_detection, detections)
                 
                 # Return combined results
                 return {
@@ -219,17 +232,22 @@ async def process_single_file(file_bytes: bytes, filename: str, user_email: str,
         }
 
 
-async def process_video_file(file_bytes: bytes, filename: str, user_email: str) -> dict:
+async def process_video_file(video: Union[bytes, Path], filename: str, user_email: str) -> dict:
     """
     Extract best frame from video and process it as JPEG.
     Video is converted to JPEG (best frame) for archive storage.
+    `video` is the upload's bytes or the path it was spooled to.
     """
     try:
-        # Extract best frame from video and convert to JPEG
-        jpeg_path, video_metadata = video_processing_service.extract_best_frame(
-            video_bytes=file_bytes,
-            video_filename=filename
-        )
+        # Extract best frame from video and convert to JPEG (seeks, blocking)
+        if isinstance(video, Path):
+            jpeg_path, video_metadata = await asyncio.to_thread(
+                video_processing_service.extract_best_frame_from_path, video, filename
+            )
+        else:
+            jpeg_path, video_metadata = await asyncio.to_thread(
+                video_processing_service.extract_best_frame, video, filename
+            )
         
         # Read JPEG file bytes
         with open(jpeg_path, 'rb') as f:
@@ -249,25 +267,32 @@ async def process_video_file(file_bytes: bytes, filename: str, user_email: str)
     except Exception as e:
         # Fallback: process video file directly if frame extraction fails
         print(f"[VideoProcessing] Frame extraction failed: {e}")
+        file_bytes = await asyncio.to_thread(video.read_bytes) if isinstance(video, Path) else video
         return await process_single_file(file_bytes, filename, user_email)
 
 
-async def extract_zip_files(zip_bytes: bytes, user_email: str) -> List[dict]:
+async def extract_zip_files(zip_path: Path, user_email: str) -> List[dict]:
     """
-    Extract files from ZIP and process each image through UPAP pipeline.
+    Process every image in a spooled ZIP through the UPAP pipeline, members
+    decompressed one at a time and processed in parallel (bounded pool).
+    Results are returned in archive order.
     """
-    results = []
-    
     try:
-        with zipfile.ZipFile(io.BytesIO(zip_bytes), 'r') as zip_ref:
-            for file_info in zip_ref.filelist:
-                if file_info.filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                    file_bytes = zip_ref.read(file_info.filename)
-                    result = await process_single_file(file_bytes, file_info.filename, user_email)
-                    results.append(result)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"ZIP extraction failed: {str(e)}")
-    
+        members = await asyncio.to_thread(scan_members, zip_path)
+        batch = ZipBatch(id=str(uuid.uuid4()), owner=user_email, archive_name=zip_path.name,
+                         path=zip_path, members=members)
+        await batch.run(lambda data, name: process_file_sync(data, name, user_email))
+    except ZipLimitExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    finally:
+        zip_path.unlink(missing_ok=True)
+
+    results = []
+    for item in sorted(batch.results, key=lambda item: item["index"]):
+        if item["status"] == "ok":
+            results.append(item["result"])
+        else:
+            results.append({"status": "error", "filename": item["member"], "error": item["error"]})
     return results
 
 
@@ -294,7 +319,8 @@ async def upload_preview(
     # Collect all files from form
     files_to_process = []
     for key, value in form.items():
-        if isinstance(value, UploadFile):
+        # request.form() yields starlette UploadFiles (fastapi's UploadFile is a subclass)
+        if isinstance(value, StarletteUploadFile):
             files_to_process.append(value)
     
     if not files_to_process:
@@ -304,20 +330,35 @@ async def upload_preview(
         if not file.filename:
             continue
             
-        file_bytes = await file.read()
         filename = file.filename.lower()
         
         # Determine file type
         if filename.endswith('.zip'):
-            # Process ZIP file
-            zip_results = await extract_zip_files(file_bytes, user_email)
+            # Process ZIP file (spooled to disk, never fully in memory)
+            try:
+                zip_path = await spool_upload(file)
+            except ZipLimitExceeded as e:
+                raise HTTPException(status_code=e.status_code, detail=str(e))
+            zip_results = await extract_zip_files(zip_path, user_email)
             results.extend(zip_results)
-        elif file.content_type and file.content_type.startswith('video/'):
-            # Process video
-            result = await process_video_file(file_bytes, file.filename, user_email)
+            continue
+        
+        if file.content_type and file.content_type.startswith('video/'):
+            # Process video (spooled to disk; frames are sampled by seeking)
+            try:
+                video_path = await spool_upload(
+                    file, max_bytes=VIDEO_MAX_UPLOAD_BYTES, suffix=Path(filename).suffix or ".mp4"
+                )
+            except ZipLimitExceeded as e:
+                raise HTTPException(status_code=e.status_code, detail=str(e))
+            try:
+                result = await process_video_file(video_path, file.filename, user_email)
+            finally:
+                video_path.unlink(missing_ok=True)
             results.append(result)
         elif file.content_type and file.content_type.startswith('image/'):
             # Process image
+            file_bytes = await file.read()
             result = await process_single_file(file_bytes, file.filename, user_email)
             results.append(result)
         else:
@@ -333,3 +374,93 @@ async def upload_preview(
         "results": results,
         "timestamp": datetime.utcnow().isoformat()
     }
+
+
+@router.post("/process/preview/zip", status_code=202)
+async def upload_preview_zip(
+    file: UploadFile = File(...),
+    user = Depends(get_current_user)
+):
+    """
+    Streaming ZIP ingestion: returns a batch id immediately and processes
+    the archive's images in the background, in parallel.
+
+    Per-item results: GET /upap/process/process/preview/batch/{batch_id}/events
+    (Server-Sent Events, resumable with Last-Event-ID) or poll
+    GET /upap/process/process/preview/batch/{batch_id}.
+    """
+    if not file.filename or not file.filename.lower().endswith('.zip'):
+        raise HTTPException(status_code=400, detail="A .zip file is required")
+
+    try:
+        zip_path = await spool_upload(file)
+    except ZipLimitExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    user_email = user.email
+    try:
+        members = await asyncio.to_thread(scan_members, zip_path)
+        if not members:
+            raise ZipLimitExceeded("ZIP contains no images")
+        batch = zip_batches.start(
+            owner=user_email,
+            archive_name=file.filename,
+            path=zip_path,
+            members=members,
+            processor=lambda data, name: process_file_sync(data, name, user_email),
+        )
+    except ZipLimitExceeded as e:
+        zip_path.unlink(missing_ok=True)
+        headers = {"Retry-After": "30"} if e.status_code == 429 else None
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+    base = f"{router.prefix}/process/preview/batch/{batch.id}"
+    return {
+        "status": "accepted",
+        **batch.summary(),
+        "status_url": base,
+        "events_url": f"{base}/events",
+    }
+
+
+@router.get("/process/preview/batch/{batch_id}")
+async def get_preview_batch(
+    batch_id: str,
+    user = Depends(get_current_user)
+):
+    """Batch progress and the results completed so far (completion order)."""
+    batch = zip_batches.get(batch_id, owner=user.email)
+    if not batch:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+    return {**batch.summary(), "results": list(batch.results)}
+
+
+@router.get("/process/preview/batch/{batch_id}/events")
+async def stream_preview_batch(
+    batch_id: str,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    user = Depends(get_current_user_stream)
+):
+    """
+    Server-Sent Events: one "item" event per member as it completes
+    (id = position in completion order), then a "done" event with the
+    batch summary.
+    """
+    batch = zip_batches.get(batch_id, owner=user.email)
+    if not batch:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+    try:
+        after = int(last_event_id) if last_event_id is not None else -1
+    except ValueError:
+        after = -1
+
+    async def sse():
+        async for position, item in batch.stream(after=after):
+            yield f"id: {position}\nevent: item\ndata: {json.dumps(item, default=str)}\n\n"
+        yield f"event: done\ndata: {json.dumps(batch.summary())}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -11,6 +11,8 @@ from backend.api.v1.auth_middleware import get_current_user
 from backend.models.user import User
 from backend.services.novarchive_gpt_service import novarchive_gpt_service
 from backend.services.image_enhancement_service import image_enhancement_service
+from backend.services.near_duplicate_index import near_duplicate_index
+from backend.core.executors import ExecutorSaturated, IMAGE_POOL, OPENAI_POOL, run_in_pool
 from backend.core.file_validation import (
     sanitize_filename,
     validate_path_stays_in_directory,
@@ -455,12 +457,17 @@ async def upload(
             original_image_path = None
             
             # Optional: Image enhancement (if enabled)
+            # PIL/OpenCV work runs in the image pool so the event loop stays free
             try:
-                enhancement_result = image_enhancement_service.enhance_image(str(temp_file))
+                enhancement_result = await run_in_pool(
+                    IMAGE_POOL, image_enhancement_service.enhance_image, content, str(temp_file)
+                )
                 if enhancement_result and enhancement_result.get("enhanced"):
                     enhanced_image_path = enhancement_result.get("enhanced_image_path")
                     original_image_path = enhancement_result.get("original_image_path")
                     logger.info(f"[UPLOAD] Image enhancement completed: {enhanced_image_path}")
+            except ExecutorSaturated:
+                raise
             except Exception as enh_error:
                 logger.warning(f"[UPLOAD] Image enhancement skipped: {enh_error}")
                 enhancement_result = None
@@ -477,7 +484,9 @@ async def upload(
                 
                 # Convert to standard JPEG: {record_id}.jpg
                 # First convert to JPEG, then rename to standard format
-                converted_path = vision_engine.save_as_jpeg(
+                converted_path = await run_in_pool(
+                    IMAGE_POOL,
+                    vision_engine.save_as_jpeg,
                     file_path=temp_file,
                     target_dir=archive_dir
                 )
@@ -491,6 +500,8 @@ async def upload(
                     standard_jpeg_path = converted_path
                 
                 logger.info(f"[UPLOAD] Image converted to standard JPEG: {standard_jpeg_path}")
+            except ExecutorSaturated:
+                raise
             except Exception as conv_error:
                 # If conversion fails, use temp file (fallback)
                 logger.warning(f"[UPLOAD] JPEG conversion failed: {conv_error}, using temp file")
@@ -504,10 +515,40 @@ async def upload(
             # Use enhanced image bytes if available for recognition
             recognition_bytes = enhancement_result.get("enhanced_image_bytes") if enhancement_result and enhancement_result.get("enhanced") else content
             
-            recognition_result = novarchive_gpt_service.analyze_vinyl_record(
-                file_path=recognition_image_path,
-                raw_bytes=recognition_bytes
-            )
+            # Same cover already archived (perceptual hash of the upload)?
+            # Reuse its metadata and skip the AI call entirely. The index is
+            # an optimization: if it fails, recognize with GPT as before.
+            try:
+                upload_hashes, duplicate = await run_in_pool(
+                    IMAGE_POOL, near_duplicate_index.lookup, content
+                )
+            except Exception as index_error:
+                logger.warning(f"[UPLOAD] Near-duplicate lookup failed: {index_error}")
+                upload_hashes, duplicate = None, None
+            if duplicate:
+                logger.info(f"[UPLOAD] Near-duplicate of {duplicate['record_id']} (distance={duplicate['distance']}), skipping AI recognition")
+                recognition_result = {**duplicate["metadata"], "source": "near_duplicate"}
+                response["duplicate_of"] = {
+                    "record_id": duplicate["record_id"],
+                    "distance": duplicate["distance"],
+                }
+            else:
+                # Synchronous OpenAI call runs in the I/O pool
+                recognition_result = await run_in_pool(
+                    OPENAI_POOL,
+                    novarchive_gpt_service.analyze_vinyl_record,
+                    file_path=recognition_image_path,
+                    raw_bytes=recognition_bytes
+                )
+                if upload_hashes and recognition_result.get("source") != "fallback" and (
+                    recognition_result.get("artist") or recognition_result.get("album")
+                ):
+                    try:
+                        await run_in_pool(
+                            IMAGE_POOL, near_duplicate_index.add, record_id, upload_hashes, recognition_result
+                        )
+                    except Exception as index_error:
+                        logger.warning(f"[UPLOAD] Near-duplicate index update failed: {index_error}")
             
             logger.info(f"[UPLOAD] Recognition result: artist={recognition_result.get('artist')}, album={recognition_result.get('album')}, confidence={recognition_result.get('confidence')}")
             
@@ -593,6 +634,9 @@ async def upload(
             # Clean up temp file if needed (optional - can keep for preview)
             # temp_file.unlink()
             
+        except ExecutorSaturated:
+            # Backpressure: surfaced as 429 by the exception handler
+            raise
         except Exception as e:
             logger.error(f"[UPLOAD] Recognition failed: {e}", exc_info=True)
             # If recognition fails, return placeholder but don't break upload
@@ -4,7 +4,6 @@ Backend owns everything. Frontend only receives preview_id.
 """
 import uuid
 import logging
-import asyncio
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
@@ -20,7 +19,7 @@ from backend.models.user import User
 from backend.models.preview_record_db import PreviewRecordDB
 from backend.models.record_state import RecordState
 from backend.db import get_db
-from backend.services.ai_pipeline import ai_pipeline
+from backend.services.ai_pipeline_worker import enqueue_ai_pipeline
 from backend.core.file_validation import (
     sanitize_filename,
     validate_path_stays_in_directory,
@@ -173,25 +172,10 @@ async def upload_v2(
     logger.warning(f"[UPLOAD_V2] ⚡ AI PIPELINE TRIGGERED: preview_id={preview_id}")
     print(f"[UPLOAD_V2] ⚡ AI PIPELINE TRIGGERED: preview_id={preview_id}")
     
-    # Enqueue AI pipeline (async, non-blocking) with error handling
-    async def run_ai_with_proof(preview_id: str):
-        """Wrapper to ensure AI pipeline runs and logs proof."""
-        try:
-            logger.warning(f"[AI_PIPELINE] 🚀 STARTING: preview_id={preview_id}")
-            print(f"[AI_PIPELINE] 🚀 STARTING: preview_id={preview_id}")
-            result = await ai_pipeline.run_ai_pipeline(preview_id)
-            logger.warning(f"[AI_PIPELINE] ✅ COMPLETED: preview_id={preview_id}, state={result.get('state')}")
-            print(f"[AI_PIPELINE] ✅ COMPLETED: preview_id={preview_id}, state={result.get('state')}")
-            return result
-        except Exception as e:
-            logger.error(f"[AI_PIPELINE] ❌ FAILED: preview_id={preview_id}, error={e}", exc_info=True)
-            print(f"[AI_PIPELINE] ❌ FAILED: preview_id={preview_id}, error={e}")
-            raise
-    
-    # Create task and store reference for debugging
-    ai_task = asyncio.create_task(run_ai_with_proof(preview_id))
-    logger.warning(f"[UPLOAD_V2] 📋 AI TASK CREATED: preview_id={preview_id}, task={ai_task}")
-    print(f"[UPLOAD_V2] 📋 AI TASK CREATED: preview_id={preview_id}")
+    # Enqueue AI pipeline (durable job queue, idempotent per preview_id)
+    job_id = enqueue_ai_pipeline(preview_id)
+    logger.warning(f"[UPLOAD_V2] 📋 AI JOB QUEUED: preview_id={preview_id}, job_id={job_id}")
+    print(f"[UPLOAD_V2] 📋 AI JOB QUEUED: preview_id={preview_id}")
     
     # Log upload
     logger.info(f"[UPLOAD_V2] File uploaded: preview_id={preview_id}, user_id={current_user.id}, size={total_size}")
@@ -18,10 +18,13 @@ def get_market_prices(
     album: str = Query(...),
     catalog_number: Optional[str] = Query(None),
     label: Optional[str] = Query(None),
+    condition: Optional[str] = Query(None, description="Condition code: M, NM, VG+, VG, G+, G, P"),
+    currency: str = Query("USD"),
     user = Depends(get_current_user)
 ):
     """
-    Fetch market prices for a vinyl record from Discogs.
+    Fetch market prices for a vinyl record from the price store (Discogs).
+    Includes fetched_at / age_seconds / stale.
     Authentication required.
     """
     try:
@@ -29,7 +32,9 @@ def get_market_prices(
             artist=artist,
             album=album,
             catalog_number=catalog_number,
-            label=label
+            label=label,
+            condition=condition,
+            currency=currency
         )
         return {
             "status": "ok",
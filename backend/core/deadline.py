@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Request Deadlines
+Carries the HTTP request's deadline to downstream calls (OpenAI, etc.).
+
+The deadline is an absolute time.monotonic() value stored in a ContextVar,
+so it follows the request into awaited coroutines, tasks created from it
+and work submitted to the executor pools.
+
+Clients may shorten it with the X-Request-Timeout-Ms header; otherwise
+REQUEST_DEADLINE_SECONDS applies (Cloud Run's request timeout by default).
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "300"))
+DEADLINE_HEADER = b"x-request-timeout-ms"
+
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the remaining request budget cannot cover a call."""
+
+
+def set_deadline(seconds_from_now: Optional[float]):
+    """Set (or clear, with None) the deadline for the current context."""
+    if seconds_from_now is None:
+        return request_deadline.set(None)
+    return request_deadline.set(time.monotonic() + seconds_from_now)
+
+
+def remaining(deadline: Optional[float] = None) -> Optional[float]:
+    """Seconds left before the deadline (None = no deadline)."""
+    if deadline is None:
+        deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class RequestDeadlineMiddleware:
+    """
+    Pure ASGI middleware that starts the deadline clock for each request.
+
+    (Pure ASGI rather than BaseHTTPMiddleware so the ContextVar is set in
+    the same context the endpoint runs in.)
+    """
+
+    def __init__(self, app, default_seconds: float = DEFAULT_DEADLINE_SECONDS):
+        self.app = app
+        self.default_seconds = default_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        seconds = self.default_seconds
+        for name, value in scope.get("headers", []):
+            if name == DEADLINE_HEADER:
+                try:
+                    seconds = min(seconds, max(0.0, int(value) / 1000.0))
+                except ValueError:
+                    pass
+                break
+
+        token = set_deadline(seconds)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
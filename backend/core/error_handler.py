@@ -29,6 +29,8 @@ except ImportError:
             pass
     error_reporter = ErrorReporterStub()
 
+from backend.core.executors import ExecutorSaturated
+
 
 def register_exception_handlers(app):
 
@@ -77,6 +79,29 @@ def register_exception_handlers(app):
             headers={"X-Request-ID": request_id} if request_id else None,
         )
 
+    @app.exception_handler(ExecutorSaturated)
+    async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+        request_id = getattr(request.state, "request_id", None)
+        logger.warning(f"Backpressure: {exc}", extra={
+            "request_id": request_id,
+            "path": request.url.path,
+        })
+        headers = {"Retry-After": str(exc.retry_after)}
+        if request_id:
+            headers["X-Request-ID"] = request_id
+        return JSONResponse(
+            status_code=429,
+            content={
+                "status": "error",
+                "error_type": "server_busy",
+                "detail": f"Server busy ({exc.pool}). Retry later.",
+                "retry_after": exc.retry_after,
+                "path": request.url.path,
+                "request_id": request_id,
+            },
+            headers=headers,
+        )
+
     @app.exception_handler(Exception)
     async def unhandled_exc_handler(request: Request, exc: Exception):
         request_id = getattr(request.state, "request_id", None)
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Event Bus
+In-process publish/subscribe for server-push (SSE / WebSocket) with a
+pluggable transport so events published on one instance reach
+subscribers on every instance.
+
+Backends (EVENT_BUS_BACKEND):
+- local → deliver within this process only (default)
+- redis → Redis PUBLISH / SUBSCRIBE on EVENT_BUS_REDIS_URL; required when
+          pipeline workers run in a separate process or on other instances
+
+Each topic keeps its last EVENT_BUS_BUFFER_SIZE events so a reconnecting
+client can resume after its Last-Event-ID. Subscriptions are bounded per
+process and per owner; a subscriber that falls too far behind is dropped
+(it reconnects and resumes) instead of buffering without limit.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+BACKEND = os.getenv("EVENT_BUS_BACKEND", "local").lower()
+REDIS_URL = os.getenv("EVENT_BUS_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+REDIS_CHANNEL = os.getenv("EVENT_BUS_REDIS_CHANNEL", "records_ai:events")
+BUFFER_SIZE = int(os.getenv("EVENT_BUS_BUFFER_SIZE", "50"))
+MAX_TOPICS = int(os.getenv("EVENT_BUS_MAX_TOPICS", "10000"))
+MAX_SUBSCRIPTIONS = int(os.getenv("EVENT_BUS_MAX_SUBSCRIPTIONS", "1000"))
+MAX_SUBSCRIPTIONS_PER_OWNER = int(os.getenv("EVENT_BUS_MAX_SUBSCRIPTIONS_PER_OWNER", "5"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_BUS_SUBSCRIBER_QUEUE_SIZE", "100"))
+
+# Distinguishes event ids minted by different processes
+_NODE = uuid.uuid4().hex[:6]
+_SEQ = itertools.count(1)
+
+
+@dataclass
+class Event:
+    id: str
+    topic: str
+    type: str
+    data: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "topic": self.topic, "type": self.type, "data": self.data}
+
+    def to_sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class SubscriptionLimitExceeded(Exception):
+    """Raised when the process-wide or per-owner subscription limit is reached."""
+
+    def __init__(self, message: str, retry_after: int = 5):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class SubscriptionClosed(Exception):
+    """Raised by Subscription.next() after the bus dropped a slow subscriber."""
+
+
+@dataclass(eq=False)
+class Subscription:
+    """
+    One subscriber to a topic, bound to the event loop it was created on.
+
+    replay: events after the requested last_event_id, or None when that id
+    is no longer buffered (the caller should send a fresh snapshot).
+    """
+
+    bus: "EventBus"
+    topic: str
+    owner: Optional[str]
+    loop: asyncio.AbstractEventLoop
+    replay: Optional[List[Event]] = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+    dropped: bool = False
+
+    def _offer(self, event: Event):
+        # Runs on self.loop
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)  # wakes the consumer with SubscriptionClosed
+            logger.warning(f"[EventBus] Dropped slow subscriber on {self.topic}")
+
+    async def next(self, timeout: float) -> Optional[Event]:
+        """Next event, or None after `timeout` seconds (send a heartbeat)."""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is None:
+            raise SubscriptionClosed(self.topic)
+        return event
+
+    async def events(self, heartbeat: float) -> AsyncIterator[Optional[Event]]:
+        while True:
+            yield await self.next(heartbeat)
+
+    def close(self):
+        self.bus._unsubscribe(self)
+
+
+class LocalBackend:
+    """Delivers published events straight to this process's subscribers."""
+
+    name = "local"
+    cross_instance = False
+
+    def __init__(self, deliver: Callable[[Event], None]):
+        self._deliver = deliver
+
+    def publish(self, event: Event):
+        self._deliver(event)
+
+    def close(self):
+        pass
+
+
+class RedisBackend:
+    """
+    Fans events out through one Redis pub/sub channel. Every instance
+    (including the publisher) receives its own messages from a listener
+    thread, so delivery is the same path everywhere.
+    """
+
+    name = "redis"
+    cross_instance = True
+
+    def __init__(self, deliver: Callable[[Event], None], url: str = REDIS_URL, channel: str = REDIS_CHANNEL):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed")
+        self._deliver = deliver
+        self._channel = channel
+        self._client = redis.Redis.from_url(url, socket_timeout=5)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{channel: self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_message(self, message):
+        try:
+            payload = json.loads(message["data"])
+            self._deliver(Event(payload["id"], payload["topic"], payload["type"], payload["data"]))
+        except Exception as e:
+            logger.warning(f"[EventBus] Bad message on {self._channel}: {e}")
+
+    def publish(self, event: Event):
+        self._client.publish(self._channel, json.dumps(event.to_dict(), default=str))
+
+    def close(self):
+        self._thread.stop()
+        self._pubsub.close()
+
+
+class EventBus:
+    """Topic pub/sub with per-topic replay buffers and subscription limits."""
+
+    def __init__(
+        self,
+        backend: str = BACKEND,
+        buffer_size: int = BUFFER_SIZE,
+        max_topics: int = MAX_TOPICS,
+        max_subscriptions: int = MAX_SUBSCRIPTIONS,
+        max_per_owner: int = MAX_SUBSCRIPTIONS_PER_OWNER,
+    ):
+        self.buffer_size = buffer_size
+        self.max_topics = max_topics
+        self.max_subscriptions = max_subscriptions
+        self.max_per_owner = max_per_owner
+
+        self._lock = threading.Lock()
+        self._buffers: "OrderedDict[str, Deque[Event]]" = OrderedDict()
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._per_owner: Dict[str, int] = {}
+        self._count = 0
+        self._published = 0
+        self._delivered = 0
+
+        if backend == "redis":
+            try:
+                self.backend = RedisBackend(self._dispatch)
+            except Exception as e:
+                logger.error(f"[EventBus] Redis backend unavailable ({e}), events stay in-process")
+                self.backend = LocalBackend(self._dispatch)
+        else:
+            self.backend = LocalBackend(self._dispatch)
+
+    def publish(self, topic: str, event_type: str, data: Dict[str, Any]) -> Event:
+        """Publish from any thread. Never raises into the publisher."""
+        event = Event(f"{time.time_ns() // 1_000_000}-{_NODE}-{next(_SEQ)}", topic, event_type, data)
+        self._published += 1
+        try:
+            self.backend.publish(event)
+        except Exception as e:
+            logger.warning(f"[EventBus] Publish to {self.backend.name} failed: {e}")
+        return event
+
+    def _dispatch(self, event: Event):
+        """Buffer an incoming event and hand it to local subscribers (any thread)."""
+        with self._lock:
+            buffer = self._buffers.get(event.topic)
+            if buffer is None:
+                buffer = self._buffers[event.topic] = deque(maxlen=self.buffer_size)
+                while len(self._buffers) > self.max_topics:
+                    self._buffers.popitem(last=False)
+            else:
+                self._buffers.move_to_end(event.topic)
+            buffer.append(event)
+            subscribers = list(self._subscribers.get(event.topic, ()))
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, event)
+                self._delivered += 1
+            except RuntimeError:
+                pass  # loop closed; the subscription is being torn down
+
+    def subscribe(
+        self,
+        topic: str,
+        last_event_id: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> Subscription:
+        """
+        Register a subscriber on the running loop. Registration and replay
+        happen under one lock so no event is missed or delivered twice.
+
+        Raises:
+            SubscriptionLimitExceeded: too many open subscriptions
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._count >= self.max_subscriptions:
+                raise SubscriptionLimitExceeded("Too many open event streams on this instance")
+            if owner is not None and self._per_owner.get(owner, 0) >= self.max_per_owner:
+                raise SubscriptionLimitExceeded(f"At most {self.max_per_owner} open event streams per user")
+
+            replay = None
+            if last_event_id:
+                buffered = list(self._buffers.get(topic, ()))
+                ids = [e.id for e in buffered]
+                if last_event_id in ids:
+                    replay = buffered[ids.index(last_event_id) + 1:]
+
+            sub = Subscription(self, topic, owner, loop, replay=replay)
+            self._subscribers.setdefault(topic, []).append(sub)
+            self._count += 1
+            if owner is not None:
+                self._per_owner[owner] = self._per_owner.get(owner, 0) + 1
+        return sub
+
+    def _unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(sub.topic)
+            if not subscribers or sub not in subscribers:
+                return
+            subscribers.remove(sub)
+            if not subscribers:
+                del self._subscribers[sub.topic]
+            self._count -= 1
+            if sub.owner is not None:
+                remaining = self._per_owner.get(sub.owner, 1) - 1
+                if remaining:
+                    self._per_owner[sub.owner] = remaining
+                else:
+                    self._per_owner.pop(sub.owner, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.backend.name,
+                "cross_instance": self.backend.cross_instance,
+                "subscriptions": self._count,
+                "topics_buffered": len(self._buffers),
+                "published": self._published,
+                "delivered": self._delivered,
+            }
+
+
+# Global instance
+event_bus = EventBus()
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded Executors
+Runs blocking work (PIL/OpenCV, synchronous OpenAI calls) off the event loop.
+
+Pools:
+- image  → CPU-bound image work (enhancement, JPEG normalization)
+- openai → blocking network calls (OpenAI vision, pricing, etc.)
+- ocr    → label OCR (OpenCV preprocessing + tesseract), processes by default
+- enrichment → catalogue and post-archive lookups (Discogs / MusicBrainz
+           enrichment, pricing, lyrics, sheet music); kept apart from
+           "openai" so slow providers cannot starve recognition
+- delist → channel delist calls after a sale; a hanging connector keeps
+           its thread past the deadline, so it gets its own bound
+
+Each pool has a fixed number of workers and a bounded queue. When a pool is
+full, submit() raises ExecutorSaturated instead of queueing forever; the
+exception handler turns that into 429 + Retry-After (backpressure).
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+IMAGE_POOL = "image"
+OPENAI_POOL = "openai"
+OCR_POOL = "ocr"
+ENRICHMENT_POOL = "enrichment"
+DELIST_POOL = "delist"
+
+CPU_COUNT = os.cpu_count() or 2
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a pool has no free worker and its queue is full."""
+
+    def __init__(self, pool: str, in_flight: int, capacity: int, retry_after: int = 5):
+        self.pool = pool
+        self.in_flight = in_flight
+        self.capacity = capacity
+        self.retry_after = retry_after
+        super().__init__(
+            f"Executor pool '{pool}' saturated ({in_flight}/{capacity} in flight)"
+        )
+
+
+class BoundedExecutor:
+    """
+    Worker pool with a queue-depth limit.
+
+    Capacity = max_workers running + max_queue waiting. A slot is taken on
+    submit and released when the underlying future finishes (not when the
+    awaiting coroutine is cancelled), so the limit reflects real work.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        kind: str = "thread",
+        retry_after: int = 5
+    ):
+        """
+        Initialize pool.
+
+        Args:
+            name: Pool name (used in logs, stats and 429 responses)
+            max_workers: Number of worker threads/processes
+            max_queue: Number of submissions allowed to wait for a worker
+            kind: "thread" or "process"
+            retry_after: Seconds suggested to clients when saturated
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.capacity = self.max_workers + self.max_queue
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._executor: Executor = self._create_executor()
+
+    def _create_executor(self) -> Executor:
+        if self.kind == "process":
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"upap-{self.name}"
+        )
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise ExecutorSaturated(self.name, self._in_flight, self.capacity, self.retry_after)
+            self._in_flight += 1
+            self._submitted += 1
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs):
+        """
+        Submit work and return a concurrent.futures.Future.
+
+        Raises:
+            ExecutorSaturated: If the pool and its queue are full
+        """
+        self._acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+                self._failed += 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool and await the result.
+
+        Thread pools run fn in a copy of the caller's context (like
+        asyncio.to_thread), so context variables such as the request
+        deadline reach the worker.
+
+        Raises:
+            ExecutorSaturated: If the pool and its queue are full
+        """
+        if self.kind == "thread":
+            ctx = contextvars.copy_context()
+            fn = functools.partial(ctx.run, fn, *args, **kwargs)
+            args, kwargs = (), {}
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool counters."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid integer for {key}, using default {default}")
+        return default
+
+
+# Pool configuration (env overrides for Cloud Run tuning)
+POOL_CONFIG: Dict[str, Dict[str, Any]] = {
+    IMAGE_POOL: {
+        "max_workers": _env_int("UPAP_IMAGE_WORKERS", CPU_COUNT),
+        "max_queue": _env_int("UPAP_IMAGE_QUEUE", CPU_COUNT * 4),
+        # PIL and OpenCV release the GIL for the heavy parts, so threads
+        # are enough by default; "process" isolates pure-Python work.
+        "kind": os.getenv("UPAP_IMAGE_POOL_KIND", "thread"),
+    },
+    OPENAI_POOL: {
+        "max_workers": _env_int("UPAP_OPENAI_WORKERS", 16),
+        "max_queue": _env_int("UPAP_OPENAI_QUEUE", 64),
+        "kind": "thread",
+    },
+    OCR_POOL: {
+        "max_workers": _env_int("UPAP_OCR_WORKERS", CPU_COUNT),
+        "max_queue": _env_int("UPAP_OCR_QUEUE", CPU_COUNT * 4),
+        # Preprocessing holds the GIL in places and a stuck tesseract must
+        # not stall the API workers' threads
+        "kind": os.getenv("UPAP_OCR_POOL_KIND", "process"),
+    },
+    ENRICHMENT_POOL: {
+        "max_workers": _env_int("UPAP_ENRICHMENT_WORKERS", 8),
+        "max_queue": _env_int("UPAP_ENRICHMENT_QUEUE", 32),
+        "kind": "thread",
+    },
+    DELIST_POOL: {
+        "max_workers": _env_int("UPAP_DELIST_WORKERS", 8),
+        "max_queue": _env_int("UPAP_DELIST_QUEUE", 32),
+        "kind": "thread",
+    },
+}
+
+_pools: Dict[str, BoundedExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Get (or lazily create) the named pool."""
+    pool = _pools.get(name)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            config = POOL_CONFIG.get(name)
+            if config is None:
+                raise KeyError(f"Unknown executor pool: {name}")
+            pool = BoundedExecutor(name=name, **config)
+            _pools[name] = pool
+            logger.info(
+                f"Executor pool '{name}' created: kind={pool.kind}, "
+                f"workers={pool.max_workers}, queue={pool.max_queue}"
+            )
+        return pool
+
+
+async def run_in_pool(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run blocking fn in the named pool (shortcut for get_executor(name).run)."""
+    return await get_executor(name).run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every pool created so far."""
+    return {name: pool.stats() for name, pool in list(_pools.items())}
+
+
+def shutdown_executors(wait: bool = True):
+    """Shut down all pools (app shutdown / tests)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=wait)
+        _pools.clear()
@@ -0,0 +1,499 @@
+# backend/core/job_queue.py
+# UTF-8, English only
+
+"""
+Durable Job Queue
+Database-backed queue (jobs table on the shared engine) with leases, so
+background work survives restarts and scale-downs and can be processed by
+any instance or a dedicated worker process.
+
+- Claim: one UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING.
+  Postgres adds FOR UPDATE SKIP LOCKED to the subquery so concurrent
+  claimers never block on or double-claim a row; on SQLite the statement
+  runs under the database write lock, which gives the same guarantee.
+- Leases: a claimed job is invisible until lease_expires_at (visibility
+  timeout). Workers heartbeat to extend it; a crashed worker's job becomes
+  claimable again once the lease lapses.
+- Retries: failed jobs return to the queue after exponential backoff with
+  jitter; after max_attempts they move to the dead-letter state. Handlers
+  raise PermanentJobError for failures another attempt cannot fix, which
+  are dead-lettered at once.
+- JobWorkerPool: N asyncio workers per process (in the API process or
+  standalone, see backend.services.ai_pipeline_worker).
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, func, inspect, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.db import engine as default_engine
+from backend.models.job_db import JobDB
+
+logger = logging.getLogger(__name__)
+
+JOBS = JobDB.__table__
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+DEAD = "dead"
+
+_TABLE_LOCK = threading.Lock()
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler when retrying cannot help: dead-letter the job now."""
+
+
+@dataclass
+class Job:
+    id: str
+    queue: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lease_owner: str
+
+
+class JobQueue:
+    """
+    One named queue in the jobs table.
+
+    Args:
+        name: Queue name
+        engine: SQLAlchemy engine (defaults to backend.db.engine)
+        lease_seconds: Visibility timeout of a claimed job
+        max_attempts: Attempts before a job is dead-lettered
+        backoff_base / backoff_max: Retry delay bounds (seconds)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        engine: Optional[Engine] = None,
+        lease_seconds: float = 120.0,
+        max_attempts: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+    ):
+        self.name = name
+        self.engine = engine or default_engine
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._table_ready = False
+        self._listeners: List[Callable[[], None]] = []
+
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Unsupported database for job queue: {dialect}")
+        self._insert = insert
+        self._skip_locked = dialect == "postgresql"
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _ensure_table(self):
+        # init_db() creates it at startup; this covers worker processes and tools
+        if self._table_ready:
+            return
+        with _TABLE_LOCK:
+            if self._table_ready:
+                return
+            try:
+                JOBS.create(bind=self.engine, checkfirst=True)
+            except SQLAlchemyError:
+                if not inspect(self.engine).has_table(JOBS.name):
+                    raise
+            self._table_ready = True
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter (50-100% of the capped delay)."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Called (from any thread) after each enqueue in this process."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # ------------------------------------------------------------------
+    # Producer API
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        payload: Dict[str, Any],
+        dedupe_key: Optional[str] = None,
+        delay: float = 0.0,
+        max_attempts: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Add a job. With dedupe_key, a second enqueue of the same key is a
+        no-op (returns None) while the first job exists.
+
+        Returns:
+            Job id, or None if deduplicated
+        """
+        self._ensure_table()
+        now = time.time()
+        job_id = str(uuid.uuid4())
+        stmt = self._insert(JOBS).values(
+            id=job_id,
+            queue=self.name,
+            payload=payload,
+            dedupe_key=f"{self.name}:{dedupe_key}" if dedupe_key is not None else None,
+            state=QUEUED,
+            attempts=0,
+            max_attempts=max_attempts or self.max_attempts,
+            available_at=now + delay,
+            created_at=now,
+            updated_at=now,
+        ).on_conflict_do_nothing(index_elements=["dedupe_key"])
+        with self.engine.begin() as conn:
+            inserted = conn.execute(stmt).rowcount
+        if not inserted:
+            return None
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception:
+                pass
+        return job_id
+
+    # ------------------------------------------------------------------
+    # Worker API
+    # ------------------------------------------------------------------
+
+    def claim(self, owner: str, limit: int = 1, ids: Optional[Sequence[str]] = None) -> List[Job]:
+        """
+        Lease up to `limit` visible jobs: queued jobs whose backoff has
+        elapsed, and running jobs whose lease expired (crashed worker).
+        With ids, only those jobs and regardless of delay: a producer
+        running the first attempt of what it just enqueued with a delay
+        (the delay then only matters if the producer dies first).
+        """
+        self._ensure_table()
+        now = time.time()
+        queued = JOBS.c.state == QUEUED
+        if ids is None:
+            queued = and_(queued, JOBS.c.available_at <= now)
+        claimable = (
+            select(JOBS.c.id)
+            .where(
+                JOBS.c.queue == self.name,
+                JOBS.c.attempts < JOBS.c.max_attempts,
+                or_(queued, and_(JOBS.c.state == RUNNING, JOBS.c.lease_expires_at < now)),
+            )
+            .order_by(JOBS.c.available_at)
+            .limit(limit)
+        )
+        if ids is not None:
+            claimable = claimable.where(JOBS.c.id.in_(list(ids)))
+        if self._skip_locked:
+            claimable = claimable.with_for_update(skip_locked=True)
+
+        stmt = (
+            update(JOBS)
+            .where(JOBS.c.id.in_(claimable.scalar_subquery()))
+            .values(
+                state=RUNNING,
+                lease_owner=owner,
+                lease_expires_at=now + self.lease_seconds,
+                attempts=JOBS.c.attempts + 1,
+                updated_at=now,
+            )
+            .returning(JOBS.c.id, JOBS.c.queue, JOBS.c.payload, JOBS.c.attempts, JOBS.c.max_attempts)
+        )
+        with self.engine.begin() as conn:
+            rows = conn.execute(stmt).all()
+        return [
+            Job(row.id, row.queue, row.payload, row.attempts, row.max_attempts, owner)
+            for row in rows
+        ]
+
+    def _owned(self, job: Job):
+        return and_(JOBS.c.id == job.id, JOBS.c.state == RUNNING, JOBS.c.lease_owner == job.lease_owner)
+
+    def heartbeat(self, job: Job) -> bool:
+        """Extend the lease. False if the lease was lost (job reclaimed)."""
+        now = time.time()
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(JOBS).where(self._owned(job))
+                .values(lease_expires_at=now + self.lease_seconds, updated_at=now)
+            )
+        return result.rowcount == 1
+
+    def complete(self, job: Job) -> bool:
+        """Mark succeeded. False if the lease was lost (another worker owns it)."""
+        now = time.time()
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(JOBS).where(self._owned(job))
+                .values(state=SUCCEEDED, lease_owner=None, lease_expires_at=None,
+                        last_error=None, updated_at=now, finished_at=now)
+            )
+        return result.rowcount == 1
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> str:
+        """
+        Record a failed attempt: back to the queue after backoff, or to the
+        dead-letter state once attempts are exhausted (or right away with
+        retry=False, for errors another attempt cannot fix).
+
+        Returns:
+            New state (queued / dead), or "lost" if the lease was lost
+        """
+        now = time.time()
+        if not retry or job.attempts >= job.max_attempts:
+            values = {"state": DEAD, "finished_at": now}
+        else:
+            values = {"state": QUEUED, "available_at": now + self._retry_delay(job.attempts)}
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(JOBS).where(self._owned(job))
+                .values(lease_owner=None, lease_expires_at=None,
+                        last_error=error[:4000], updated_at=now, **values)
+            )
+        if result.rowcount != 1:
+            return "lost"
+        if values["state"] == DEAD:
+            logger.error(f"[JobQueue:{self.name}] Job {job.id} dead-lettered after {job.attempts} attempts: {error}")
+        return values["state"]
+
+    def reap(self) -> int:
+        """Dead-letter jobs whose lease expired on their final attempt."""
+        self._ensure_table()
+        now = time.time()
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(JOBS)
+                .where(
+                    JOBS.c.queue == self.name,
+                    JOBS.c.state == RUNNING,
+                    JOBS.c.lease_expires_at < now,
+                    JOBS.c.attempts >= JOBS.c.max_attempts,
+                )
+                .values(state=DEAD, lease_owner=None, lease_expires_at=None,
+                        last_error="lease expired on final attempt", updated_at=now, finished_at=now)
+            )
+        return result.rowcount
+
+    # ------------------------------------------------------------------
+    # Inspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(JOBS.c.state, func.count(), func.min(JOBS.c.created_at))
+                .where(JOBS.c.queue == self.name)
+                .group_by(JOBS.c.state)
+            ).all()
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, DEAD: 0}
+        oldest_queued = None
+        for state, count, oldest in rows:
+            counts[state] = count
+            if state == QUEUED:
+                oldest_queued = oldest
+        return {
+            "queue": self.name,
+            **counts,
+            "oldest_queued_age_seconds": round(time.time() - oldest_queued, 1) if oldest_queued else None,
+        }
+
+    def outstanding(self, dedupe_prefix: str) -> int:
+        """Jobs still to run (queued or running) whose dedupe_key starts with the prefix."""
+        return self._count(dedupe_prefix, (QUEUED, RUNNING))
+
+    def dead(self, dedupe_prefix: str) -> int:
+        """Dead-lettered jobs whose dedupe_key starts with the prefix."""
+        return self._count(dedupe_prefix, (DEAD,))
+
+    def _count(self, dedupe_prefix: str, states: Sequence[str]) -> int:
+        self._ensure_table()
+        prefix = f"{self.name}:{dedupe_prefix}"
+        for char in ("\\", "%", "_"):
+            prefix = prefix.replace(char, "\\" + char)
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(func.count())
+                .where(
+                    JOBS.c.queue == self.name,
+                    JOBS.c.dedupe_key.like(prefix + "%", escape="\\"),
+                    JOBS.c.state.in_(list(states)),
+                )
+            ).scalar_one()
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(JOBS.c.id, JOBS.c.payload, JOBS.c.attempts, JOBS.c.last_error, JOBS.c.finished_at)
+                .where(JOBS.c.queue == self.name, JOBS.c.state == DEAD)
+                .order_by(JOBS.c.finished_at.desc())
+                .limit(limit)
+            ).all()
+        return [dict(row._mapping) for row in rows]
+
+    def retry_dead(self, job_id: str) -> bool:
+        """Put a dead-lettered job back in the queue with a fresh attempt budget."""
+        now = time.time()
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(JOBS)
+                .where(JOBS.c.id == job_id, JOBS.c.queue == self.name, JOBS.c.state == DEAD)
+                .values(state=QUEUED, attempts=0, available_at=now, finished_at=None, updated_at=now)
+            )
+        return result.rowcount == 1
+
+
+class JobWorkerPool:
+    """
+    Runs `handler(payload)` for jobs of one queue with at most
+    `concurrency` jobs in flight in this process. `on_failed(job, state)`,
+    if given, runs after a failed attempt is settled ("queued" or "dead").
+
+    Database calls run in threads (asyncio.to_thread) so the event loop
+    stays free; handlers are coroutines.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        on_failed: Optional[Callable[[Job, str], Awaitable[Any]]] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.on_failed = on_failed
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.owner_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.processed = 0
+        self.failed = 0
+
+    def _notify(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self.queue.add_listener(self._notify)
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self.owner_prefix}:{n}"), name=f"{self.queue.name}-worker-{n}")
+            for n in range(self.concurrency)
+        ]
+        logger.info(f"[JobQueue:{self.queue.name}] {self.concurrency} workers started ({self.owner_prefix})")
+
+    async def stop(self, timeout: float = 30.0):
+        """Stop claiming; wait up to timeout for in-flight jobs (leases cover the rest)."""
+        if self._stopping is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self.queue.remove_listener(self._notify)
+        if self._tasks:
+            done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self):
+        """Start and run until cancelled (standalone worker process)."""
+        await self.start()
+        try:
+            await self._stopping.wait()
+        finally:
+            await self.stop()
+
+    async def _idle(self, owner: str):
+        if owner.endswith(":0"):
+            try:
+                reaped = await asyncio.to_thread(self.queue.reap)
+                if reaped:
+                    logger.warning(f"[JobQueue:{self.queue.name}] Dead-lettered {reaped} expired job(s)")
+            except Exception as e:
+                logger.warning(f"[JobQueue:{self.queue.name}] Reap failed: {e}")
+        self._wakeup.clear()
+        try:
+            # Jitter keeps idle workers from polling in lockstep
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval * random.uniform(0.5, 1.5))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _worker(self, owner: str):
+        while not self._stopping.is_set():
+            try:
+                jobs = await asyncio.to_thread(self.queue.claim, owner, 1)
+            except Exception as e:
+                logger.warning(f"[JobQueue:{self.queue.name}] Claim failed: {e}")
+                jobs = []
+            if not jobs:
+                await self._idle(owner)
+                continue
+            await self._run(jobs[0])
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                if not await asyncio.to_thread(self.queue.heartbeat, job):
+                    logger.warning(f"[JobQueue:{self.queue.name}] Lost lease on job {job.id}")
+                    return
+            except Exception as e:
+                logger.warning(f"[JobQueue:{self.queue.name}] Heartbeat failed for {job.id}: {e}")
+
+    async def _run(self, job: Job):
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await self.handler(job.payload)
+        except Exception as e:
+            self.failed += 1
+            state = await asyncio.to_thread(self.queue.fail, job, f"{type(e).__name__}: {e}",
+                                            not isinstance(e, PermanentJobError))
+            logger.warning(f"[JobQueue:{self.queue.name}] Job {job.id} attempt {job.attempts} failed -> {state}: {e}")
+            if self.on_failed is not None:
+                try:
+                    await self.on_failed(job, state)
+                except Exception as hook_error:
+                    logger.warning(f"[JobQueue:{self.queue.name}] on_failed hook failed for {job.id}: {hook_error}")
+        else:
+            self.processed += 1
+            if not await asyncio.to_thread(self.queue.complete, job):
+                logger.warning(f"[JobQueue:{self.queue.name}] Job {job.id} finished after its lease was lost")
+        finally:
+            heartbeat.cancel()
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+Stage Metrics
+Per-stage resource instrumentation for the UPAP pipeline.
+
+Each measured stage invocation records:
+- wall_ms          wall-clock time
+- cpu_ms           CPU time (calling thread for sync stages, whole process
+                   for async stages that hop threads)
+- rss_delta_kb     resident set change (psutil)
+- peak_rss_kb      growth of the process high-water mark during the stage
+- read_bytes / write_bytes   process I/O during the stage (psutil)
+- external_calls / external_ms   upstream calls (OpenAI, Discogs, ...)
+                   reported with record_external_call() while the stage runs
+
+Values go into in-process HDR-style histograms (log-linear buckets, ~1%
+relative error, fixed memory) per (component, stage). snapshot() feeds
+the debug endpoint; dump() / the CLI below turn it into a report:
+
+    python -m backend.core.stage_metrics --file stage_metrics.json
+    python -m backend.core.stage_metrics --url http://127.0.0.1:8000 --token TOKEN
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import psutil
+    _PROCESS = psutil.Process()
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    _PROCESS = None
+    PSUTIL_AVAILABLE = False
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+STAGE_METRICS_ENABLED = os.getenv("UPAP_STAGE_METRICS", "true").lower() != "false"
+
+METRICS = (
+    "wall_ms", "cpu_ms", "rss_delta_kb", "peak_rss_kb",
+    "read_bytes", "write_bytes", "external_calls", "external_ms",
+)
+# Histograms store integers; milliseconds are kept in microseconds
+_SCALE = {"wall_ms": 1000, "cpu_ms": 1000, "external_ms": 1000}
+PERCENTILES = (50, 90, 99, 99.9)
+
+_SUB_BUCKET_BITS = 8
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS     # exact below 256
+_HALF = _SUB_BUCKETS // 2                # 128 sub-buckets per power of two above
+
+
+class HdrHistogram:
+    """
+    Log-linear histogram of non-negative integers, HDR style: values below
+    256 are exact, above that every power of two is split into 128 buckets
+    (relative error < 1%). Counts are sparse, so memory stays small.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < _SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - _SUB_BUCKET_BITS
+        return _SUB_BUCKETS + (shift - 1) * _HALF + ((value >> shift) - _HALF)
+
+    @staticmethod
+    def _upper(index: int) -> int:
+        """Highest value that lands in bucket `index`."""
+        if index < _SUB_BUCKETS:
+            return index
+        shift, sub = divmod(index - _SUB_BUCKETS, _HALF)
+        shift += 1
+        return ((sub + _HALF + 1) << shift) - 1
+
+    def record(self, value: float):
+        value = max(0, int(round(value)))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, int(round(p / 100 * self.count + 0.5 - 1e-9)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def merge(self, other: "HdrHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for attr, pick in (("min", min), ("max", max)):
+            theirs = getattr(other, attr)
+            if theirs is not None:
+                mine = getattr(self, attr)
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+
+    def summary(self, scale: float = 1) -> Dict[str, Any]:
+        out = {
+            "count": self.count,
+            "mean": round(self.total / self.count / scale, 3) if self.count else 0,
+            "min": (self.min or 0) / scale,
+            "max": (self.max or 0) / scale,
+        }
+        for p in PERCENTILES:
+            out[f"p{p:g}"] = self.percentile(p) / scale
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": {str(k): v for k, v in self.counts.items()},
+                "count": self.count, "total": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HdrHistogram":
+        histogram = cls()
+        histogram.counts = {int(k): v for k, v in data["counts"].items()}
+        histogram.count, histogram.total = data["count"], data["total"]
+        histogram.min, histogram.max = data["min"], data["max"]
+        return histogram
+
+
+# ----------------------------------------------------------------------
+# External calls made while a stage runs
+
+class _ExternalCalls:
+    __slots__ = ("count", "ms", "lock", "parent")
+
+    def __init__(self, parent: Optional["_ExternalCalls"] = None):
+        self.count = 0
+        self.ms = 0.0
+        self.lock = threading.Lock()
+        self.parent = parent  # enclosing measured stage (totals include sub-steps)
+
+
+_current_calls: contextvars.ContextVar[Optional[_ExternalCalls]] = contextvars.ContextVar(
+    "upap_stage_external_calls", default=None
+)
+
+
+def record_external_call(kind: str, elapsed_ms: float):
+    """Count an upstream call against the stage running in this context (no-op outside one)."""
+    calls = _current_calls.get()
+    while calls is not None:
+        with calls.lock:
+            calls.count += 1
+            calls.ms += elapsed_ms
+        calls = calls.parent
+
+
+@contextlib.contextmanager
+def external_call(kind: str) -> Iterator[None]:
+    """Time an upstream call: `with external_call("discogs"): requests.get(...)`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_external_call(kind, (time.perf_counter() - started) * 1000)
+
+
+# ----------------------------------------------------------------------
+# Registry
+
+def _io_counters() -> Tuple[int, int]:
+    if not PSUTIL_AVAILABLE:
+        return 0, 0
+    try:
+        io = _PROCESS.io_counters()
+    except (AttributeError, psutil.Error):
+        return 0, 0
+    # read_chars / write_chars (Linux) include page-cache hits; read_bytes only disk
+    return getattr(io, "read_chars", io.read_bytes), getattr(io, "write_chars", io.write_bytes)
+
+
+def _rss_kb() -> int:
+    return _PROCESS.memory_info().rss // 1024 if PSUTIL_AVAILABLE else 0
+
+
+def _max_rss_kb() -> int:
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes elsewhere
+        return max_rss // 1024 if sys.platform == "darwin" else max_rss
+    if PSUTIL_AVAILABLE:
+        # Windows: peak working set
+        peak = getattr(_PROCESS.memory_info(), "peak_wset", None)
+        if peak is not None:
+            return peak // 1024
+    return 0
+
+
+class StageMetrics:
+    """Histograms per (component, stage, metric)."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], Dict[str, HdrHistogram]] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, component: str, stage: str, values: Dict[str, float], error: bool = False):
+        with self._lock:
+            histograms = self._histograms.setdefault((component, stage), {m: HdrHistogram() for m in METRICS})
+            for metric, value in values.items():
+                histograms[metric].record(value * _SCALE.get(metric, 1))
+            if error:
+                self._errors[(component, stage)] = self._errors.get((component, stage), 0) + 1
+
+    @contextlib.contextmanager
+    def measure(self, component: str, stage: str, process_cpu: bool = False) -> Iterator[None]:
+        """
+        Measure the enclosed block as one invocation of `stage`. Use
+        process_cpu=True for async code (CPU time then includes other work
+        the process does meanwhile).
+        """
+        if not STAGE_METRICS_ENABLED:
+            yield
+            return
+        cpu_clock = time.process_time if process_cpu else time.thread_time
+        calls = _ExternalCalls(parent=_current_calls.get())
+        token = _current_calls.set(calls)
+        read0, write0 = _io_counters()
+        rss0, max_rss0 = _rss_kb(), _max_rss_kb()
+        cpu0, wall0 = cpu_clock(), time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            wall = (time.perf_counter() - wall0) * 1000
+            cpu = (cpu_clock() - cpu0) * 1000
+            read1, write1 = _io_counters()
+            _current_calls.reset(token)
+            self.observe(component, stage, {
+                "wall_ms": wall,
+                "cpu_ms": cpu,
+                "rss_delta_kb": max(0, _rss_kb() - rss0),
+                "peak_rss_kb": _max_rss_kb() - max_rss0,
+                "read_bytes": read1 - read0,
+                "write_bytes": write1 - write0,
+                "external_calls": calls.count,
+                "external_ms": calls.ms,
+            }, error=failed)
+
+    def instrument(self, component: str, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """fn wrapped so each call is measured in the thread that runs it."""
+        def measured(*args, **kwargs):
+            with self.measure(component, stage):
+                return fn(*args, **kwargs)
+        return measured
+
+    def snapshot(self, include_histograms: bool = False) -> Dict[str, Any]:
+        """Summaries (count, mean, min, max, p50/p90/p99/p99.9) per stage and metric."""
+        with self._lock:
+            stages = []
+            for (component, stage), histograms in sorted(self._histograms.items()):
+                entry = {
+                    "component": component,
+                    "stage": stage,
+                    "errors": self._errors.get((component, stage), 0),
+                    "metrics": {m: h.summary(_SCALE.get(m, 1)) for m, h in histograms.items()},
+                }
+                if include_histograms:
+                    entry["histograms"] = {m: h.to_dict() for m, h in histograms.items()}
+                stages.append(entry)
+        return {"started_at": self.started_at, "psutil": PSUTIL_AVAILABLE, "stages": stages}
+
+    def dump(self, path: Path) -> Path:
+        """Write snapshot(include_histograms=True) as JSON (CI artifacts, CLI input)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(include_histograms=True), indent=2), encoding="utf-8")
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+            self.started_at = time.time()
+
+
+def format_report(snapshot: Dict[str, Any], metrics: Optional[List[str]] = None) -> str:
+    """Plain-text table of a snapshot: one row per stage and metric."""
+    metrics = list(metrics or METRICS)
+    header = f"{'component':<12} {'stage':<22} {'metric':<15} {'count':>7} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}"
+    lines = [header, "-" * len(header)]
+    for entry in snapshot["stages"]:
+        label = entry["stage"] + (f" ({entry['errors']} err)" if entry["errors"] else "")
+        for metric in metrics:
+            s = entry["metrics"][metric]
+            lines.append(f"{entry['component']:<12} {label:<22} {metric:<15} {s['count']:>7} "
+                         f"{s['p50']:>10.1f} {s['p90']:>10.1f} {s['p99']:>10.1f} {s['max']:>10.1f}")
+    return "\n".join(lines)
+
+
+# Global instance
+stage_metrics = StageMetrics()
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="UPAP per-stage metrics report")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSON written by stage_metrics.dump() or the debug endpoint")
+    source.add_argument("--url", help="API base URL; reads /api/v1/upap/debug/stage-metrics")
+    parser.add_argument("--token", help="Bearer token for --url")
+    parser.add_argument("--metrics", help=f"comma-separated subset of {','.join(METRICS)}")
+    parser.add_argument("--json", action="store_true", help="print the snapshot as JSON")
+    args = parser.parse_args()
+
+    if args.file:
+        snapshot = json.loads(Path(args.file).read_text(encoding="utf-8"))
+    else:
+        import httpx
+
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        response = httpx.get(f"{args.url.rstrip('/')}/api/v1/upap/debug/stage-metrics", headers=headers, timeout=10)
+        response.raise_for_status()
+        snapshot = response.json()
+
+    if args.json:
+        print(json.dumps(snapshot, indent=2))
+    else:
+        print(format_report(snapshot, args.metrics.split(",") if args.metrics else None))
+
+
+if __name__ == "__main__":
+    main()
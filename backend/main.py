@@ -108,6 +108,14 @@ try:
 except Exception as e:
     logger.warning(f"Logging middleware not available: {e}")
 
+# Request deadline (outermost, so every downstream call sees it)
+try:
+    from backend.core.deadline import RequestDeadlineMiddleware
+    app.add_middleware(RequestDeadlineMiddleware)
+    logger.info("Request deadline middleware registered")
+except Exception as e:
+    logger.warning(f"Request deadline middleware not available: {e}")
+
 # Database initialization - OPTIONAL (wrap to prevent crash)
 try:
     from backend.db import init_db
@@ -226,6 +234,67 @@ async def startup_event():
             pass
         # #endregion
 
+    # Durable AI pipeline queue: in-process workers (AI_PIPELINE_WORKERS=0 disables)
+    try:
+        from backend.services.ai_pipeline_worker import start_ai_pipeline_workers
+        await start_ai_pipeline_workers()
+    except Exception as e:
+        logger.error(f"AI pipeline workers failed to start: {e}", exc_info=True)
+
+    # Delist retries from the stock sync outbox (STOCK_DELIST_WORKERS=0 disables)
+    try:
+        from backend.services.commerce.stock_sync_service import start_stock_delist_workers
+        await start_stock_delist_workers()
+    except Exception as e:
+        logger.error(f"Stock delist workers failed to start: {e}", exc_info=True)
+
+    # Market price refresh (PRICE_REFRESH_INTERVAL=0 disables)
+    try:
+        from backend.services.price_refresh import start_price_refresh
+        await start_price_refresh()
+    except Exception as e:
+        logger.error(f"Price refresh failed to start: {e}", exc_info=True)
+
+# Shutdown: stop executor pools (blocking-work offload)
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain queue workers, release executor pools and the OpenAI gateway loop on shutdown."""
+    try:
+        from backend.services.ai_pipeline_worker import stop_ai_pipeline_workers
+        await stop_ai_pipeline_workers()
+    except Exception as e:
+        logger.warning(f"AI pipeline worker shutdown failed: {e}")
+    try:
+        from backend.services.commerce.stock_sync_service import stop_stock_delist_workers
+        await stop_stock_delist_workers()
+    except Exception as e:
+        logger.warning(f"Stock delist worker shutdown failed: {e}")
+    try:
+        from backend.services.price_refresh import stop_price_refresh
+        await stop_price_refresh()
+    except Exception as e:
+        logger.warning(f"Price refresh shutdown failed: {e}")
+    try:
+        from backend.services.enrichment_engine import enrichment_engine
+        await enrichment_engine.stop()
+    except Exception as e:
+        logger.warning(f"Enrichment engine shutdown failed: {e}")
+    try:
+        from backend.services.zip_ingestion import shutdown_pool
+        shutdown_pool()
+    except Exception as e:
+        logger.warning(f"ZIP ingestion pool shutdown failed: {e}")
+    try:
+        from backend.core.executors import shutdown_executors
+        shutdown_executors(wait=False)
+    except Exception as e:
+        logger.warning(f"Executor shutdown failed: {e}")
+    try:
+        from backend.services.openai_gateway import openai_gateway
+        openai_gateway.shutdown()
+    except Exception as e:
+        logger.warning(f"OpenAI gateway shutdown failed: {e}")
+
 # Health check endpoint - MUST remain JSON for monitoring
 @app.get("/health")
 def health():
@@ -345,6 +414,13 @@ try:
 except Exception as e:
     logger.error(f"Failed to load upap_archive_router_v2: {e}", exc_info=True)
 
+try:
+    from backend.api.v1.upap_preview_router import router as upap_preview_router
+    app.include_router(upap_preview_router)
+    ROUTERS_LOADED.append("upap_preview")
+except Exception as e:
+    logger.error(f"Failed to load upap_preview_router: {e}", exc_info=True)
+
 try:
     from backend.api.v1.upap_preview_router_v2 import router as upap_preview_router_v2
     app.include_router(upap_preview_router_v2)
@@ -352,6 +428,13 @@ try:
 except Exception as e:
     logger.error(f"Failed to load upap_preview_router_v2: {e}", exc_info=True)
 
+try:
+    from backend.api.v1.upap_preview_events_router import router as upap_preview_events_router
+    app.include_router(upap_preview_events_router)
+    ROUTERS_LOADED.append("upap_preview_events")
+except Exception as e:
+    logger.error(f"Failed to load upap_preview_events_router: {e}", exc_info=True)
+
 try:
     from backend.api.v1.upap_debug_router import router as upap_debug_router
     app.include_router(upap_debug_router)
@@ -359,6 +442,13 @@ try:
 except Exception as e:
     logger.error(f"Failed to load upap_debug_router: {e}", exc_info=True)
 
+try:
+    from backend.api.v1.media_router import router as media_router
+    app.include_router(media_router)
+    ROUTERS_LOADED.append("media")
+except Exception as e:
+    logger.error(f"Failed to load media_router: {e}", exc_info=True)
+
 try:
     from backend.api.v1.upap_publish_router import router as upap_publish_router
     app.include_router(upap_publish_router)
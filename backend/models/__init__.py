@@ -3,6 +3,11 @@
 from backend.models.record_state import RecordState
 from backend.models.preview_record_db import PreviewRecordDB
 from backend.models.archive_record_db_v2 import ArchiveRecordDB
+from backend.models.global_record_db import GlobalRecordDB
+from backend.models.job_db import JobDB
+from backend.models.market_price_db import MarketPriceDB, PriceLookupDB
+from backend.models.sales_db import SaleDB, SalesListingDB, SalesRollupDB
+from backend.models.archive_enrichment_db import ArchiveEnrichmentDB
 # UTF-8, English only
 # Final, law-compliant, book-compliant model export
 
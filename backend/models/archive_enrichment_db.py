@@ -0,0 +1,22 @@
+"""
+Archive Enrichment Database Model - Post-archive lookup results per record
+"""
+from sqlalchemy import Column, String, Float, JSON
+from backend.db import Base
+
+
+class ArchiveEnrichmentDB(Base):
+    """Latest enrichment of an archived record (pricing, lyrics, sheet music)."""
+    __tablename__ = "archive_enrichments"
+
+    record_id = Column(String(64), primary_key=True)
+    # pending / complete / partial
+    status = Column(String(16), nullable=False, default="pending")
+    # Epoch seconds
+    started_at = Column(Float, nullable=False)
+    finished_at = Column(Float, nullable=True)
+    # {provider: {"status": ..., "ms": ..., "error": ...}}
+    providers = Column(JSON, nullable=False, default=dict)
+    # {provider: result}
+    enrichment = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(Float, nullable=False)
@@ -0,0 +1,27 @@
+"""
+GlobalRecord Database Model - Global (deduplicated) vinyl library
+"""
+from sqlalchemy import Column, Integer, String, Float, Text, JSON, UniqueConstraint
+from backend.db import Base
+
+
+class GlobalRecordDB(Base):
+    """One row per unique release, keyed by GlobalLibraryService fingerprint."""
+    __tablename__ = "global_records"
+    # Inline constraint (part of CREATE TABLE) backs INSERT ... ON CONFLICT (fingerprint)
+    __table_args__ = (UniqueConstraint("fingerprint", name="uq_global_records_fingerprint"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # SHA-256 of the normalized core fields (GlobalLibraryService._build_fingerprint)
+    fingerprint = Column(String(64), nullable=False)
+
+    # "metadata" is reserved on declarative classes
+    record_metadata = Column("metadata", JSON, nullable=False)
+    source = Column(String(50), nullable=True)
+    # additional_fields merged by add_or_get (pricing_data, file_path, ...)
+    fields = Column(JSON, nullable=True)
+
+    # Normalized "artist album title label catalog_number barcode" for search_text
+    search_text = Column(Text, nullable=False, default="")
+
+    created_at = Column(Float, nullable=False)
@@ -0,0 +1,34 @@
+"""
+Job Database Model - Durable background job queue
+"""
+from sqlalchemy import Column, String, Integer, Float, Text, JSON, Index
+from backend.db import Base
+
+
+class JobDB(Base):
+    """One queued unit of background work (see backend.core.job_queue)."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim scan: next visible jobs of a queue
+        Index("ix_jobs_queue_state_available", "queue", "state", "available_at"),
+    )
+
+    id = Column(String(36), primary_key=True)
+    queue = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    # Idempotent enqueue: "<queue>:<key>" (e.g. ai_pipeline:<preview_id>)
+    dedupe_key = Column(String(255), nullable=True, unique=True)
+
+    # queued -> running -> succeeded | queued (retry) | dead
+    state = Column(String(20), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+
+    # Epoch seconds
+    available_at = Column(Float, nullable=False)      # not visible before this
+    lease_owner = Column(String(100), nullable=True)  # worker holding the job
+    lease_expires_at = Column(Float, nullable=True)   # visibility timeout
+    created_at = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+    finished_at = Column(Float, nullable=True)
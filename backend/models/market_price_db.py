@@ -0,0 +1,49 @@
+"""
+Market Price Database Models - Persistent Discogs price store
+"""
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, Index, UniqueConstraint
+from backend.db import Base
+
+
+class MarketPriceDB(Base):
+    """
+    Price statistics of one release per (condition, currency), refreshed in
+    the background by backend.services.price_refresh.
+    """
+    __tablename__ = "market_prices"
+    __table_args__ = (
+        # Inline constraint backs INSERT ... ON CONFLICT and the read lookup
+        UniqueConstraint("release_id", "condition", "currency", name="uq_market_prices_release_condition_currency"),
+        # Refresh scan: stale rows
+        Index("ix_market_prices_fetched_at", "fetched_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    release_id = Column(String(32), nullable=False)
+    # Goldmine code (M, NM, VG+, ...); "" = all conditions together
+    condition = Column(String(8), nullable=False, default="")
+    currency = Column(String(3), nullable=False, default="USD")
+
+    price_min = Column(Float, nullable=True)
+    price_median = Column(Float, nullable=True)
+    price_max = Column(Float, nullable=True)
+    sample_size = Column(Integer, nullable=False, default=0)
+    source = Column(String(20), nullable=True)
+
+    # Epoch seconds; fetched_at NULL = requested, never fetched
+    fetched_at = Column(Float, nullable=True)
+    last_viewed_at = Column(Float, nullable=True)
+    # Refresh priority inputs
+    listed = Column(Boolean, nullable=False, default=False)
+    # Failed refresh: error and when to try again
+    refresh_error = Column(Text, nullable=True)
+    next_refresh_at = Column(Float, nullable=True)
+
+
+class PriceLookupDB(Base):
+    """Normalized "artist|album|catalog" -> Discogs release id (saves the search call)."""
+    __tablename__ = "price_lookups"
+
+    lookup_key = Column(String(255), primary_key=True)
+    release_id = Column(String(32), nullable=False, index=True)
+    created_at = Column(Float, nullable=False)
@@ -0,0 +1,74 @@
+"""
+Sales Database Models - Sales, listings and pre-aggregated sales rollups
+"""
+from sqlalchemy import Column, Integer, String, Float, Index, UniqueConstraint
+from backend.db import Base
+
+
+class SaleDB(Base):
+    """One sale on one channel (append-only)."""
+    __tablename__ = "sales"
+    __table_args__ = (
+        # Per-user / per-channel windows; record_id and price make the
+        # dashboard's top-records scan index-only
+        Index("ix_sales_user_sold_at", "user_id", "sold_at", "record_id", "price"),
+        Index("ix_sales_channel_sold_at", "channel", "sold_at", "record_id", "price"),
+        # One sale per listing: a repeated sale event is a no-op (NULLs never collide)
+        Index("uq_sales_channel_listing", "channel", "listing_id", unique=True),
+    )
+
+    id = Column(String(36), primary_key=True)
+    # "" = not attributed to a user (imports, internal events)
+    user_id = Column(String(36), nullable=False, default="")
+    record_id = Column(String(64), nullable=False)
+    channel = Column(String(32), nullable=False)
+    listing_id = Column(String(128), nullable=True)
+    price = Column(Float, nullable=False)
+    currency = Column(String(3), nullable=False, default="USD")
+    # Epoch seconds (UTC)
+    sold_at = Column(Float, nullable=False)
+    # From the matched listing; NULL when the listing is unknown
+    days_to_sale = Column(Float, nullable=True)
+
+
+class SalesListingDB(Base):
+    """A listing of a record on a channel; marked sold by the matching sale."""
+    __tablename__ = "sales_listings"
+    __table_args__ = (
+        UniqueConstraint("channel", "listing_id", name="uq_sales_listings_channel_listing"),
+        # Sale without listing id: latest active listing of the record
+        Index("ix_sales_listings_record_status", "record_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(36), nullable=False, default="")
+    record_id = Column(String(64), nullable=False)
+    channel = Column(String(32), nullable=False)
+    listing_id = Column(String(128), nullable=False)
+    price = Column(Float, nullable=False)
+    # Epoch seconds (UTC)
+    listed_at = Column(Float, nullable=False)
+    status = Column(String(16), nullable=False, default="active")
+    sold_at = Column(Float, nullable=True)
+
+
+class SalesRollupDB(Base):
+    """
+    Sales and listing totals per (period, period_start, user, channel),
+    updated in the same transaction as each sale / listing.
+    """
+    __tablename__ = "sales_rollups"
+
+    # "day" / "week" (starting Monday) / "month"
+    period = Column(String(5), primary_key=True)
+    # ISO date (UTC) of the first day of the period
+    period_start = Column(String(10), primary_key=True)
+    user_id = Column(String(36), primary_key=True, default="")
+    channel = Column(String(32), primary_key=True)
+
+    sales = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    listings = Column(Integer, nullable=False, default=0)
+    # Average days to sale = total / count (sales with a known listing)
+    days_to_sale_total = Column(Float, nullable=False, default=0.0)
+    days_to_sale_count = Column(Integer, nullable=False, default=0)
@@ -3,6 +3,7 @@ AI Pipeline Orchestrator - Production AI Pipeline
 Cost-optimized, auditable, production-safe
 """
 import logging
+import re
 import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -13,10 +14,17 @@ from backend.models.preview_record_db import PreviewRecordDB
 from backend.models.record_state import RecordState
 from backend.db import SessionLocal
 from backend.services.pipeline_logger import pipeline_logger
+from backend.core.executors import IMAGE_POOL, OPENAI_POOL, run_in_pool
+from backend.core.stage_metrics import stage_metrics
+from backend.services.preview_events import publish_preview_event, publish_preview_state
 
 logger = logging.getLogger(__name__)
 
 
+class VisionAnalysisFailed(RuntimeError):
+    """Level 3 vision analysis returned no result (OpenAI unavailable or failed)."""
+
+
 class AIPipeline:
     """
     AI Pipeline Orchestrator
@@ -56,7 +64,14 @@ class AIPipeline:
                 "cost_estimate": 0.002,
                 "metadata": {...}
             }
+
+        Each run and its steps (level1_ocr, level3_vision, db_update) are
+        recorded in stage_metrics under component "ai_pipeline".
         """
+        with stage_metrics.measure("ai_pipeline", "total", process_cpu=True):
+            return await self._run_ai_pipeline(preview_id)
+
+    async def _run_ai_pipeline(self, preview_id: str) -> Dict[str, Any]:
         # RUNTIME PROOF: Log entry point
         logger.warning(f"[AI_PIPELINE] 🎯 ENTRY: run_ai_pipeline called with preview_id={preview_id}")
         print(f"[AI_PIPELINE] 🎯 ENTRY: run_ai_pipeline called with preview_id={preview_id}")
@@ -80,12 +95,15 @@ class AIPipeline:
                 logger.warning(f"Preview {preview_id} already processed, state: {preview.state}")
                 return self._build_response(preview)
             
+            publish_preview_event(preview_id, "progress", {"stage": "LEVEL_1_START"})
+            
             # Step 1: Level 1 - OCR + Text Extraction (cheap)
             logger.warning(f"[AI_PIPELINE] 🔍 LEVEL_1_START: preview_id={preview_id}")
             print(f"[AI_PIPELINE] 🔍 LEVEL_1_START: preview_id={preview_id}")
             self._log_step(preview_id, "LEVEL_1_START", {"model": "ocr+text"})
             pipeline_logger.log_step(preview_id, "UPLOADED", "LEVEL_1_START", {"model": "ocr+text"})
-            ocr_result = await self._extract_ocr_and_text(preview)
+            with stage_metrics.measure("ai_pipeline", "level1_ocr", process_cpu=True):
+                ocr_result = await self._extract_ocr_and_text(preview)
             logger.warning(f"[AI_PIPELINE] 📝 OCR extracted: preview_id={preview_id}, text_length={len(ocr_result.get('text', ''))}")
             print(f"[AI_PIPELINE] 📝 OCR extracted: preview_id={preview_id}, text_length={len(ocr_result.get('text', ''))}")
             
@@ -108,11 +126,13 @@ class AIPipeline:
                     "reason": f"confidence {confidence} < {self.HIGH_CONFIDENCE}",
                     "model": "gpt-4-vision"
                 })
-                vision_result = await self._advanced_vision_analysis(preview)
+                with stage_metrics.measure("ai_pipeline", "level3_vision", process_cpu=True):
+                    vision_result = await self._advanced_vision_analysis(preview)
                 metadata = self._merge_metadata(metadata, vision_result)
                 confidence = self._calculate_confidence(metadata)
-                model_used = "gpt-4-vision"
-                cost_estimate = 0.01  # More expensive
+                model_used = vision_result.get("model", "gpt-4-vision")
+                # Near-duplicate reuse costs nothing
+                cost_estimate = 0.0 if model_used == "near_duplicate" else 0.01
             
             # Step 4: Update preview record
             logger.warning(f"[AI_PIPELINE] 💾 Updating DB: preview_id={preview_id}, confidence={confidence}, artist={metadata.get('artist')}")
@@ -136,8 +156,10 @@ class AIPipeline:
             preview.format = metadata.get("format", "LP")
             preview.country = metadata.get("country")
             
-            db.commit()
-            db.refresh(preview)
+            with stage_metrics.measure("ai_pipeline", "db_update"):
+                db.commit()
+                db.refresh(preview)
+            publish_preview_state(preview)
             
             # RUNTIME PROOF: Verify database update
             logger.warning(f"[AI_PIPELINE] ✅ DB UPDATED: preview_id={preview_id}, state={preview.state}, artist={preview.artist}, album={preview.album}")
@@ -170,6 +192,7 @@ class AIPipeline:
         except Exception as e:
             logger.error(f"AI pipeline failed for {preview_id}: {e}", exc_info=True)
             self._log_step(preview_id, "AI_PIPELINE_ERROR", {"error": str(e)})
+            publish_preview_event(preview_id, "error", {"error": str(e)})
             raise
         finally:
             db.close()
@@ -184,14 +207,23 @@ class AIPipeline:
             if not image_path.exists():
                 raise FileNotFoundError(f"Image not found: {image_path}")
             
-            # OCR extraction
-            ocr_text = ocr_engine.run_ocr(str(image_path))
+            # Label OCR in the OCR process pool (per-image timeout)
+            ocr = await ocr_engine.recognize(str(image_path))
+            self._log_step(preview.preview_id, "LEVEL_1_OCR", {
+                "engine": ocr["engine"],
+                "tokens": len(ocr["tokens"]),
+                "mean_confidence": ocr["mean_confidence"],
+                "elapsed_ms": ocr["elapsed_ms"],
+                "timed_out": ocr["timed_out"]
+            })
             
             # Basic text detection (vision_engine doesn't have detect_text_regions, skip for now)
             text_regions = []
             
             return {
-                "text": ocr_text,
+                "text": ocr["text"],
+                "tokens": ocr["tokens"],
+                "mean_confidence": ocr["mean_confidence"],
                 "text_regions": text_regions,
                 "model": "ocr+text"
             }
@@ -207,24 +239,30 @@ class AIPipeline:
         
         # Simple pattern matching (can be enhanced)
         # This is Level 1 - cheap parsing
-        lines = text.split("\n")
-        if lines:
-            # First line often contains artist/album
-            first_line = lines[0].strip()
-            if first_line:
-                parts = first_line.split("-", 1)
-                if len(parts) == 2:
-                    metadata["artist"] = parts[0].strip()
-                    metadata["album"] = parts[1].strip()
+        lines = [line.strip() for line in text.split("\n") if line.strip()]
+        # "ARTIST - ALBUM": usually the first line, anywhere on a label
+        for line in lines:
+            parts = line.split("-", 1)
+            # Both sides need letters ("PCS-7027" is a catalog number)
+            if len(parts) == 2 and all(re.search(r'[A-Z]', part) for part in parts):
+                metadata["artist"] = parts[0].strip()
+                metadata["album"] = parts[1].strip()
+                break
+        
+        # Label imprint ("HARVEST RECORDS")
+        for line in lines:
+            label_match = re.search(r'\b([A-Z][A-Z&.\' ]{1,30}?)\s+(RECORDS|RECORDINGS)\b', line)
+            if label_match:
+                metadata["label"] = f"{label_match.group(1).strip()} {label_match.group(2)}".title()
+                break
         
         # Look for year (4 digits)
-        import re
         year_match = re.search(r'\b(19|20)\d{2}\b', text)
         if year_match:
             metadata["year"] = year_match.group()
         
-        # Look for catalog number patterns
-        catalog_match = re.search(r'\b[A-Z]{1,3}\d{3,6}\b', text)
+        # Look for catalog number patterns ("SHVL804", "SHVL 804", "PCS-7027")
+        catalog_match = re.search(r'\b[A-Z]{1,5}[ -]?(?!(?:19|20)\d{2}\b)\d{3,6}\b', text)
         if catalog_match:
             metadata["catalog_number"] = catalog_match.group()
         
@@ -248,31 +286,61 @@ class AIPipeline:
         return min(score, 1.0)
     
     async def _advanced_vision_analysis(self, preview: PreviewRecordDB) -> Dict[str, Any]:
-        """Level 3: Advanced vision analysis (expensive)."""
+        """
+        Level 3: Advanced vision analysis (expensive).
+
+        Raises:
+            ExecutorSaturated: If the OpenAI pool is full
+            VisionAnalysisFailed: If the model returned no result (fallback)
+        Both propagate out of run_ai_pipeline so the job queue retries the
+        preview with backoff instead of saving OCR-only metadata.
+        """
+        from backend.services.novarchive_gpt_service import novarchive_gpt_service
+        from backend.services.near_duplicate_index import near_duplicate_index
+        
+        image_path = preview.canonical_image_path
+        
+        # Same cover already recognized? Reuse it instead of calling GPT
         try:
-            from backend.services.novarchive_gpt_service import novarchive_gpt_service
-            
-            image_path = preview.canonical_image_path
-            result = novarchive_gpt_service.analyze_vinyl_record(
-                file_path=image_path,
-                raw_bytes=None  # Will read from file
-            )
-            
-            return {
-                "artist": result.get("artist"),
-                "album": result.get("album") or result.get("title"),
-                "title": result.get("title"),
-                "label": result.get("label"),
-                "year": result.get("year"),
-                "catalog_number": result.get("catalog_number"),
-                "country": result.get("country"),
-                "format": result.get("format", "LP"),
-                "confidence": result.get("confidence", 0.5),
-                "model": "gpt-4-vision"
-            }
-        except Exception as e:
-            logger.error(f"Advanced vision analysis failed: {e}")
-            return {}
+            hashes, duplicate = await run_in_pool(IMAGE_POOL, near_duplicate_index.lookup, image_path)
+        except Exception as index_error:
+            logger.warning(f"Near-duplicate lookup failed: {index_error}")
+            hashes, duplicate = None, None
+        if duplicate:
+            self._log_step(preview.preview_id, "NEAR_DUPLICATE", {
+                "duplicate_of": duplicate["record_id"],
+                "distance": duplicate["distance"]
+            })
+            return {**duplicate["metadata"], "model": "near_duplicate"}
+        
+        # Blocking OpenAI call: off the event loop, like the upload router
+        result = await run_in_pool(
+            OPENAI_POOL,
+            novarchive_gpt_service.analyze_vinyl_record,
+            file_path=image_path,
+            raw_bytes=None  # Will read from file
+        )
+        if result.get("source") == "fallback":
+            raise VisionAnalysisFailed(result.get("notes") or "Vision analysis returned no result")
+        
+        if hashes and (result.get("artist") or result.get("album")):
+            try:
+                await run_in_pool(IMAGE_POOL, near_duplicate_index.add, preview.preview_id, hashes, result)
+            except Exception as index_error:
+                logger.warning(f"Near-duplicate index update failed: {index_error}")
+        
+        return {
+            "artist": result.get("artist"),
+            "album": result.get("album") or result.get("title"),
+            "title": result.get("title"),
+            "label": result.get("label"),
+            "year": result.get("year"),
+            "catalog_number": result.get("catalog_number"),
+            "country": result.get("country"),
+            "format": result.get("format", "LP"),
+            "confidence": result.get("confidence", 0.5),
+            "model": "gpt-4-vision"
+        }
     
     def _merge_metadata(self, base: Dict[str, Any], enhancement: Dict[str, Any]) -> Dict[str, Any]:
         """Merge metadata, preferring enhancement values."""
@@ -0,0 +1,112 @@
+# backend/services/ai_pipeline_worker.py
+# UTF-8, English only
+
+"""
+AI Pipeline Worker
+Runs the v2 AI pipeline for uploaded previews from the durable job queue
+(backend.core.job_queue) instead of fire-and-forget tasks in the request
+handler: uploads survive restarts, failures are retried with backoff and
+end up dead-lettered instead of lost.
+
+- AI_PIPELINE_WORKERS: in-process workers started with the API
+  (0 = enqueue only; run a dedicated worker process instead)
+- Standalone: python -m backend.services.ai_pipeline_worker --workers 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Dict, Optional
+
+from backend.core.deadline import set_deadline
+from backend.core.job_queue import JobQueue, JobWorkerPool
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "ai_pipeline"
+WORKERS = int(os.getenv("AI_PIPELINE_WORKERS", "4"))
+LEASE_SECONDS = float(os.getenv("AI_PIPELINE_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.getenv("AI_PIPELINE_MAX_ATTEMPTS", "5"))
+POLL_INTERVAL = float(os.getenv("AI_PIPELINE_POLL_INTERVAL", "1.0"))
+
+
+async def run_ai_pipeline_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: run the pipeline for payload["preview_id"]."""
+    from backend.services.ai_pipeline import ai_pipeline
+
+    preview_id = payload["preview_id"]
+    # Not bound by the deadline of whichever request enqueued it
+    set_deadline(None)
+    logger.warning(f"[AI_PIPELINE] 🚀 STARTING: preview_id={preview_id}")
+    result = await ai_pipeline.run_ai_pipeline(preview_id)
+    logger.warning(f"[AI_PIPELINE] ✅ COMPLETED: preview_id={preview_id}, state={result.get('state')}")
+    return result
+
+
+def enqueue_ai_pipeline(preview_id: str) -> Optional[str]:
+    """Queue the pipeline for a preview (idempotent per preview_id)."""
+    return ai_pipeline_queue.enqueue({"preview_id": preview_id}, dedupe_key=preview_id)
+
+
+_pool: Optional[JobWorkerPool] = None
+
+
+async def start_ai_pipeline_workers(concurrency: int = WORKERS) -> Optional[JobWorkerPool]:
+    """Start in-process workers (API startup). No-op when concurrency is 0."""
+    global _pool
+    if concurrency <= 0 or _pool is not None:
+        return _pool
+    _pool = JobWorkerPool(
+        ai_pipeline_queue, run_ai_pipeline_job, concurrency=concurrency, poll_interval=POLL_INTERVAL
+    )
+    await _pool.start()
+    return _pool
+
+
+async def stop_ai_pipeline_workers(timeout: float = 30.0):
+    """Drain in-process workers (API shutdown); unfinished jobs are re-leased later."""
+    global _pool
+    if _pool is not None:
+        await _pool.stop(timeout=timeout)
+        _pool = None
+
+
+async def _run_standalone(concurrency: int):
+    from backend.core.event_bus import event_bus
+
+    if not event_bus.backend.cross_instance:
+        logger.warning("[AI_PIPELINE] EVENT_BUS_BACKEND is local: preview status events "
+                       "from this process will not reach API instances (set EVENT_BUS_BACKEND=redis)")
+    pool = JobWorkerPool(
+        ai_pipeline_queue, run_ai_pipeline_job, concurrency=concurrency, poll_interval=POLL_INTERVAL
+    )
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await pool.start()
+    await stop.wait()
+    logger.info("[AI_PIPELINE] Worker stopping, draining in-flight jobs")
+    await pool.stop()
+
+
+# Global instance
+ai_pipeline_queue = JobQueue(
+    QUEUE_NAME, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="AI pipeline job worker")
+    parser.add_argument("--workers", type=int, default=max(WORKERS, 1), help="Concurrent jobs in this process")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_standalone(args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,312 @@
+# backend/services/archive_enrichment.py
+# UTF-8, English only
+
+"""
+Archive Enrichment
+Fans out the per-record lookups that follow an archive save (market
+prices, lyrics, sheet music) concurrently, each with its own deadline.
+
+- Providers are blocking service calls run in their own "enrichment"
+  pool, so slow lookups cannot starve recognition in the "openai" pool; a
+  provider past its deadline is recorded as "timeout" and its late result
+  dropped, a full pool as "saturated"
+- Results are recorded per provider as they arrive, so a slow or failing
+  provider leaves the others' results available (status "partial")
+- start() schedules enrichment in the background and returns at once;
+  enrich() waits for it (sync mode)
+- Completion is published as an "enrichment" preview event
+
+State is persisted in the archive_enrichments table when enrichment
+starts, as each provider finishes and at the end, so results survive
+restarts and any worker can answer GET /archive/{id}/enrichment. The
+bounded in-memory copy serves the process running the enrichment.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.core.executors import ENRICHMENT_POOL, ExecutorSaturated, run_in_pool
+from backend.db import engine as default_engine
+from backend.models.archive_enrichment_db import ArchiveEnrichmentDB
+from backend.services.preview_events import publish_preview_event
+
+logger = logging.getLogger(__name__)
+
+PRICING_TIMEOUT = float(os.getenv("ENRICH_PRICING_TIMEOUT", "8"))
+LYRICS_TIMEOUT = float(os.getenv("ENRICH_LYRICS_TIMEOUT", "4"))
+SHEET_MUSIC_TIMEOUT = float(os.getenv("ENRICH_SHEET_MUSIC_TIMEOUT", "2"))
+MAX_RECORDS = int(os.getenv("ENRICH_MAX_RECORDS", "1000"))
+
+MODES = ("background", "sync", "none")
+
+ENRICHMENTS = ArchiveEnrichmentDB.__table__
+_TABLE_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class EnrichmentProvider:
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]   # blocking, gets the record fields
+    timeout: float
+    requires: Tuple[str, ...] = ("artist",)
+
+
+def _pricing(fields: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.vinyl_pricing_service import vinyl_pricing_service
+    return vinyl_pricing_service.get_market_prices(
+        fields["artist"], fields.get("album") or fields.get("title"),
+        catalog_number=fields.get("catalog_number"), label=fields.get("label"),
+    )
+
+
+def _lyrics(fields: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.lyrics_service import lyrics_service
+    return lyrics_service.get_lyrics_links(
+        fields["artist"], fields.get("title") or fields.get("album"), album=fields.get("album"),
+    )
+
+
+def _sheet_music(fields: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.services.sheet_music_service import sheet_music_service
+    return sheet_music_service.get_sheet_music_links(
+        fields["artist"], fields.get("title") or fields.get("album"), album=fields.get("album"),
+    )
+
+
+def default_providers() -> Tuple[EnrichmentProvider, ...]:
+    return (
+        EnrichmentProvider("pricing", _pricing, PRICING_TIMEOUT),
+        EnrichmentProvider("lyrics", _lyrics, LYRICS_TIMEOUT),
+        EnrichmentProvider("sheet_music", _sheet_music, SHEET_MUSIC_TIMEOUT),
+    )
+
+
+class ArchiveEnrichment:
+    """Concurrent, deadline-bounded enrichment of archived records."""
+
+    def __init__(
+        self,
+        providers: Optional[Tuple[EnrichmentProvider, ...]] = None,
+        max_records: int = MAX_RECORDS,
+        engine: Optional[Engine] = None
+    ):
+        self.providers = tuple(providers) if providers is not None else default_providers()
+        self.max_records = max_records
+        self.engine = engine or default_engine
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Unsupported database for archive enrichment: {dialect}")
+        self._insert = insert
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start(self, record_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Schedule enrichment on the running loop and return the pending
+        state. A record already being enriched is not started twice.
+        """
+        task = self._tasks.get(record_id)
+        if task is None or task.done():
+            self._begin(record_id, fields)
+            task = asyncio.get_running_loop().create_task(self._run(record_id, fields), name=f"enrich-{record_id}")
+            self._tasks[record_id] = task
+            task.add_done_callback(functools.partial(self._forget, record_id))
+        return self._snapshot(record_id)
+
+    async def enrich(self, record_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Enrich and wait; returns the final state (partial when a provider failed)."""
+        task = self._tasks.get(record_id)
+        if task is not None and not task.done():
+            await asyncio.shield(task)
+            return self._snapshot(record_id)
+        self._begin(record_id, fields)
+        await self._run(record_id, fields)
+        return self._snapshot(record_id)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Enrichment state of a record: this process's copy while it runs
+        here, else the persisted one (blocking read, use a thread).
+        """
+        state = self._snapshot(record_id)
+        if state is not None:
+            return state
+        return self._load(record_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for state in self._records.values():
+                statuses[state["status"]] = statuses.get(state["status"], 0) + 1
+        return {"records": sum(statuses.values()), "running": len(self._tasks), "by_status": statuses}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _ensure_table(self):
+        # init_db() creates it at startup; this covers workers and tools
+        if self._table_ready:
+            return
+        with _TABLE_LOCK:
+            if self._table_ready:
+                return
+            try:
+                ENRICHMENTS.create(bind=self.engine, checkfirst=True)
+            except SQLAlchemyError:
+                if not inspect(self.engine).has_table(ENRICHMENTS.name):
+                    raise
+            self._table_ready = True
+
+    def _persist(self, record_id: str):
+        """Upsert the current state; a failed write only costs durability."""
+        state = self._snapshot(record_id)
+        if state is None:
+            return
+        row = {
+            "record_id": record_id,
+            "status": state["status"],
+            "started_at": state["started_at"],
+            "finished_at": state["finished_at"],
+            "providers": state["providers"],
+            "enrichment": state["enrichment"],
+            "updated_at": time.time(),
+        }
+        stmt = self._insert(ENRICHMENTS).values(**row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["record_id"],
+            set_={key: stmt.excluded[key] for key in row if key != "record_id"},
+        )
+        try:
+            self._ensure_table()
+            with self.engine.begin() as conn:
+                conn.execute(stmt)
+        except SQLAlchemyError as e:
+            logger.warning(f"[ENRICHMENT] Failed to persist {record_id}: {e}")
+
+    def _load(self, record_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            self._ensure_table()
+            with self.engine.connect() as conn:
+                row = conn.execute(select(ENRICHMENTS).where(ENRICHMENTS.c.record_id == record_id)).first()
+        except SQLAlchemyError as e:
+            logger.warning(f"[ENRICHMENT] Failed to load {record_id}: {e}")
+            return None
+        if row is None:
+            return None
+        return {
+            "record_id": row.record_id,
+            "status": row.status,
+            "started_at": row.started_at,
+            "finished_at": row.finished_at,
+            "providers": dict(row.providers or {}),
+            "enrichment": dict(row.enrichment or {}),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _snapshot(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._records.get(record_id)
+            if state is None:
+                return None
+            return {
+                **state,
+                "providers": {name: dict(p) for name, p in state["providers"].items()},
+                "enrichment": dict(state["enrichment"]),
+            }
+
+    def _begin(self, record_id: str, fields: Dict[str, Any]):
+        providers = {}
+        for provider in self.providers:
+            missing = [key for key in provider.requires if not fields.get(key)]
+            providers[provider.name] = (
+                {"status": "skipped", "reason": f"missing {', '.join(missing)}"} if missing else {"status": "pending"}
+            )
+        with self._lock:
+            self._records[record_id] = {
+                "record_id": record_id,
+                "status": "pending",
+                "started_at": time.time(),
+                "finished_at": None,
+                "providers": providers,
+                "enrichment": {},
+            }
+            self._records.move_to_end(record_id)
+            while len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+
+    def _forget(self, record_id: str, task: asyncio.Task):
+        if self._tasks.get(record_id) is task:
+            del self._tasks[record_id]
+
+    async def _run(self, record_id: str, fields: Dict[str, Any]):
+        state = self._snapshot(record_id)
+        if state is None:
+            return
+        await asyncio.to_thread(self._persist, record_id)
+        runnable = [p for p in self.providers if state["providers"][p.name]["status"] == "pending"]
+        await asyncio.gather(*(self._run_provider(record_id, p, fields) for p in runnable))
+
+        with self._lock:
+            state = self._records.get(record_id)
+            if state is None:
+                return
+            statuses = [p["status"] for p in state["providers"].values()]
+            state["status"] = "complete" if all(s in ("ok", "skipped") for s in statuses) else "partial"
+            state["finished_at"] = time.time()
+            summary = {"status": state["status"], "providers": {n: p["status"] for n, p in state["providers"].items()}}
+        await asyncio.to_thread(self._persist, record_id)
+        logger.info(f"[ENRICHMENT] {record_id}: {summary}")
+        publish_preview_event(record_id, "enrichment", summary)
+
+    async def _run_provider(self, record_id: str, provider: EnrichmentProvider, fields: Dict[str, Any]):
+        started = time.perf_counter()
+        result, outcome = None, {"status": "ok"}
+        try:
+            result = await asyncio.wait_for(run_in_pool(ENRICHMENT_POOL, provider.fn, fields), provider.timeout)
+        except asyncio.TimeoutError:
+            outcome = {"status": "timeout", "error": f"no result within {provider.timeout}s"}
+        except ExecutorSaturated as e:
+            outcome = {"status": "saturated", "error": str(e)}
+        except Exception as e:
+            logger.warning(f"[ENRICHMENT] {provider.name} failed for {record_id}: {e}")
+            outcome = {"status": "error", "error": str(e)}
+        outcome["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        with self._lock:
+            state = self._records.get(record_id)
+            if state is None:
+                return
+            state["providers"][provider.name] = outcome
+            if result is not None:
+                state["enrichment"][provider.name] = result
+        await asyncio.to_thread(self._persist, record_id)
+
+
+# Global instance
+archive_enrichment = ArchiveEnrichment()
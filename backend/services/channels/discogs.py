@@ -71,6 +71,44 @@ class DiscogsConnector:
             "error": None
         }
 
+    def delist_listing(
+        self,
+        listing_id: str,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Remove a listing from Discogs (DELETE /marketplace/listings/{id}).
+        
+        Args:
+            listing_id: Discogs listing ID
+            idempotency_key: Stable key for this delist; retries send the same
+                key so a request that timed out but went through is not an error
+        
+        Returns:
+            {
+                "success": bool,
+                "listing_id": str,
+                "error": Optional[str],
+                "retryable": bool  # False: another attempt cannot succeed
+            }
+        """
+        if not self.enabled:
+            return {
+                "success": False,
+                "listing_id": listing_id,
+                "error": "Discogs connector not enabled - requires DISCOGS_TOKEN",
+                "retryable": False
+            }
+        
+        # Stub implementation
+        logger.info(f"Discogs delist (stub): {listing_id} key={idempotency_key}")
+        return {
+            "success": True,
+            "listing_id": listing_id,
+            "error": None,
+            "retryable": False
+        }
+
 
 # Singleton instance
 discogs_connector = DiscogsConnector()
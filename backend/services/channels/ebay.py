@@ -68,6 +68,44 @@ class eBayConnector:
             "error": None
         }
 
+    def delist_listing(
+        self,
+        listing_id: str,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Remove a listing from eBay (EndFixedPriceItem).
+        
+        Args:
+            listing_id: eBay listing ID
+            idempotency_key: Stable key for this delist; retries send the same
+                key so a request that timed out but went through is not an error
+        
+        Returns:
+            {
+                "success": bool,
+                "listing_id": str,
+                "error": Optional[str],
+                "retryable": bool  # False: another attempt cannot succeed
+            }
+        """
+        if not self.enabled:
+            return {
+                "success": False,
+                "listing_id": listing_id,
+                "error": "eBay connector not enabled - requires EBAY_API_KEY",
+                "retryable": False
+            }
+        
+        # Stub implementation
+        logger.info(f"eBay delist (stub): {listing_id} key={idempotency_key}")
+        return {
+            "success": True,
+            "listing_id": listing_id,
+            "error": None,
+            "retryable": False
+        }
+
 
 # Singleton instance
 ebay_connector = eBayConnector()
@@ -72,6 +72,44 @@ class EtsyConnector:
             "error": None
         }
 
+    def delist_listing(
+        self,
+        listing_id: str,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Remove a listing from Etsy (listing state inactive).
+        
+        Args:
+            listing_id: Etsy listing ID
+            idempotency_key: Stable key for this delist; retries send the same
+                key so a request that timed out but went through is not an error
+        
+        Returns:
+            {
+                "success": bool,
+                "listing_id": str,
+                "error": Optional[str],
+                "retryable": bool  # False: another attempt cannot succeed
+            }
+        """
+        if not self.enabled:
+            return {
+                "success": False,
+                "listing_id": listing_id,
+                "error": "Etsy connector not enabled - requires ETSY_API_KEY",
+                "retryable": False
+            }
+        
+        # Stub implementation
+        logger.info(f"Etsy delist (stub): {listing_id} key={idempotency_key}")
+        return {
+            "success": True,
+            "listing_id": listing_id,
+            "error": None,
+            "retryable": False
+        }
+
 
 # Singleton instance
 etsy_connector = EtsyConnector()
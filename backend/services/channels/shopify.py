@@ -73,6 +73,44 @@ class ShopifyConnector:
             "error": None
         }
 
+    def delist_listing(
+        self,
+        listing_id: str,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Remove a listing from Shopify (product status archived).
+        
+        Args:
+            listing_id: Shopify listing ID
+            idempotency_key: Stable key for this delist; retries send the same
+                key so a request that timed out but went through is not an error
+        
+        Returns:
+            {
+                "success": bool,
+                "listing_id": str,
+                "error": Optional[str],
+                "retryable": bool  # False: another attempt cannot succeed
+            }
+        """
+        if not self.enabled:
+            return {
+                "success": False,
+                "listing_id": listing_id,
+                "error": "Shopify connector not enabled - requires SHOPIFY_API_KEY and SHOPIFY_SHOP_DOMAIN",
+                "retryable": False
+            }
+        
+        # Stub implementation
+        logger.info(f"Shopify delist (stub): {listing_id} key={idempotency_key}")
+        return {
+            "success": True,
+            "listing_id": listing_id,
+            "error": None,
+            "retryable": False
+        }
+
 
 # Singleton instance
 shopify_connector = ShopifyConnector()
@@ -8,6 +8,8 @@ import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+from backend.services.openai_gateway import openai_gateway
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -18,6 +20,54 @@ except ImportError:
     logger.warning("OpenAI SDK not available")
 
 
+PROMPT_HEADER = (
+    "Optimize prices for vinyl records. Return JSON:\n"
+    '{"recommendations": [{"record_id": "id", "current_price": 25.00, "recommended_price": 27.50, '
+    '"reasoning": "brief reason", "strategy": "increase|decrease|hold"}]}\n\n'
+    "Records:\n"
+)
+PROMPT_RULES = (
+    "\nRules:\n"
+    "- Increase price if: high views, low days on market, rare item\n"
+    "- Decrease price if: slow sale (>30d), low views, common item\n"
+    "- Hold if: recent listing (<7d), balanced metrics\n"
+    "- Return ONLY JSON"
+)
+# Completion tokens: one recommendation object (~45 tokens) plus slack
+OUTPUT_TOKENS_PER_RECORD = int(os.getenv("AUTO_PRICING_OUTPUT_TOKENS_PER_RECORD", "60"))
+
+
+def output_token_budget(record_count: int) -> int:
+    return 50 + OUTPUT_TOKENS_PER_RECORD * record_count
+
+
+def record_line(
+    record: Dict[str, Any],
+    competitor_prices: Optional[Dict[str, Dict[str, float]]] = None,
+    sales_metrics: Optional[Dict[str, Dict[str, Any]]] = None
+) -> str:
+    """Prompt line(s) for one record."""
+    record_id = record.get("id", "unknown")
+    artist = record.get("artist", "Unknown")
+    album = record.get("album", "Unknown")
+    current_price = record.get("price", 0.0)
+    condition = record.get("condition", "VG+")
+    days_on_market = record.get("days_on_market", 0)
+    views = record.get("views", 0)
+    
+    line = f"- {record_id}: {artist} - {album} (${current_price}, {condition}, {days_on_market}d, {views} views)\n"
+    
+    # Add competitor prices if available
+    if competitor_prices and record_id in competitor_prices:
+        line += f"  Competitor prices: {competitor_prices[record_id]}\n"
+    
+    # Add sales metrics if available
+    if sales_metrics and record_id in sales_metrics:
+        line += f"  Metrics: {sales_metrics[record_id]}\n"
+    
+    return line
+
+
 class AutoPricingService:
     """
     OpenAI-powered auto pricing service.
@@ -32,28 +82,35 @@ class AutoPricingService:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
             self.enabled = True
             logger.info("AutoPricingService initialized with API key")
         else:
-            self.client = None
             self.enabled = False
         
         self.model = "gpt-4o-mini"  # Cheapest model
     
-    def optimize_prices(
+    async def optimize_prices(
         self,
         records: List[Dict[str, Any]],
         competitor_prices: Optional[Dict[str, Dict[str, float]]] = None,
-        sales_metrics: Optional[Dict[str, Dict[str, Any]]] = None
+        sales_metrics: Optional[Dict[str, Dict[str, Any]]] = None,
+        run_id: Optional[str] = None,
+        user_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Optimize prices for multiple records using OpenAI.
+        Optimize prices for any number of records.
+        
+        Clear-cut records are priced by deterministic rules; the rest go to
+        OpenAI in token-sized chunks, several at a time
+        (backend.services.commerce.batch_price_optimizer). With a run_id,
+        finished chunks are checkpointed and a rerun resumes.
         
         Args:
             records: List of records with current pricing
             competitor_prices: Optional competitor price data (record_id -> platform -> price)
             sales_metrics: Optional sales metrics (views, clicks, time_on_market, etc.)
+            run_id: Optional checkpoint name (e.g. "nightly-2026-01-31")
+            user_id: Owner of the records (checkpoints are per user)
         
         Returns:
             {
@@ -63,7 +120,8 @@ class AutoPricingService:
                         "current_price": float,
                         "recommended_price": float,
                         "reasoning": str,
-                        "strategy": str
+                        "strategy": str,
+                        "source": "rules" | "model"
                     }
                 ],
                 "summary": {
@@ -71,61 +129,68 @@ class AutoPricingService:
                     "price_increases": int,
                     "price_decreases": int,
                     "no_change": int
-                }
+                },
+                "stats": {... records_per_second, cost_per_1k_records ...},
+                "unoptimized": [record_id, ...],
+                "missing_id": [index, ...]  # records without "id", not priced
             }
         """
+        from backend.services.commerce.batch_price_optimizer import batch_price_optimizer
+        
+        result = await batch_price_optimizer.optimize(
+            records, competitor_prices=competitor_prices, sales_metrics=sales_metrics, run_id=run_id,
+            user_id=user_id
+        )
+        return {
+            **result,
+            "summary": self._calculate_summary(result["recommendations"]),
+            "generated_at": datetime.utcnow().isoformat()
+        }
+    
+    async def optimize_chunk(
+        self,
+        records: List[Dict[str, Any]],
+        competitor_prices: Optional[Dict[str, Dict[str, float]]] = None,
+        sales_metrics: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        One OpenAI call for a chunk of records (sized by the batch optimizer).
+        Raises on failure.
+        
+        Returns:
+            {"recommendations": [...], "usage": {"prompt_tokens": int, "completion_tokens": int}}
+        """
         if not self.enabled:
-            return {
-                "error": "OpenAI service not available - check OPENAI_API_KEY",
-                "recommendations": [],
-                "summary": {}
-            }
+            raise RuntimeError("OpenAI service not available - check OPENAI_API_KEY")
         
-        try:
-            # Build prompt with record data
-            prompt = self._build_pricing_prompt(records, competitor_prices, sales_metrics)
-            
-            # Call OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a pricing optimization expert. Return ONLY valid JSON, no markdown."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=300,  # More tokens for multiple records
-                temperature=0,
-                timeout=30.0
-            )
-            
-            # Parse response
-            content = response.choices[0].message.content
-            result = json.loads(content)
-            
-            # Normalize response
-            recommendations = result.get("recommendations", [])
-            summary = self._calculate_summary(recommendations)
-            
-            return {
-                "recommendations": recommendations,
-                "summary": summary,
-                "generated_at": datetime.utcnow().isoformat(),
-                "error": None
-            }
-            
-        except Exception as e:
-            logger.error(f"Auto pricing optimization failed: {e}")
-            return {
-                "error": str(e),
-                "recommendations": [],
-                "summary": {}
+        prompt = self._build_pricing_prompt(records, competitor_prices, sales_metrics)
+        response = await openai_gateway.chat_completion(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a pricing optimization expert. Return ONLY valid JSON, no markdown."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=output_token_budget(len(records)),
+            temperature=0,
+            timeout=60.0
+        )
+        
+        content = response.choices[0].message.content
+        usage = getattr(response, "usage", None)
+        return {
+            "recommendations": json.loads(content).get("recommendations", []),
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0
             }
+        }
     
     def _build_pricing_prompt(
         self,
@@ -133,39 +198,9 @@ class AutoPricingService:
         competitor_prices: Optional[Dict[str, Dict[str, float]]],
         sales_metrics: Optional[Dict[str, Dict[str, Any]]]
     ) -> str:
-        """Build pricing optimization prompt."""
-        prompt = "Optimize prices for vinyl records. Return JSON:\n"
-        prompt += '{"recommendations": [{"record_id": "id", "current_price": 25.00, "recommended_price": 27.50, "reasoning": "brief reason", "strategy": "increase|decrease|hold"}]}\n\n'
-        prompt += "Records:\n"
-        
-        for record in records[:10]:  # Limit to 10 records per call
-            record_id = record.get("id", "unknown")
-            artist = record.get("artist", "Unknown")
-            album = record.get("album", "Unknown")
-            current_price = record.get("price", 0.0)
-            condition = record.get("condition", "VG+")
-            days_on_market = record.get("days_on_market", 0)
-            views = record.get("views", 0)
-            
-            prompt += f"- {record_id}: {artist} - {album} (${current_price}, {condition}, {days_on_market}d, {views} views)\n"
-            
-            # Add competitor prices if available
-            if competitor_prices and record_id in competitor_prices:
-                comp_prices = competitor_prices[record_id]
-                prompt += f"  Competitor prices: {comp_prices}\n"
-            
-            # Add sales metrics if available
-            if sales_metrics and record_id in sales_metrics:
-                metrics = sales_metrics[record_id]
-                prompt += f"  Metrics: {metrics}\n"
-        
-        prompt += "\nRules:\n"
-        prompt += "- Increase price if: high views, low days on market, rare item\n"
-        prompt += "- Decrease price if: slow sale (>30d), low views, common item\n"
-        prompt += "- Hold if: recent listing (<7d), balanced metrics\n"
-        prompt += "- Return ONLY JSON"
-        
-        return prompt
+        """Build pricing optimization prompt (every record given; callers chunk)."""
+        lines = "".join(record_line(record, competitor_prices, sales_metrics) for record in records)
+        return PROMPT_HEADER + lines + PROMPT_RULES
     
     def _calculate_summary(self, recommendations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate summary statistics."""
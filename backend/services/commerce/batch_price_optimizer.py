@@ -0,0 +1,325 @@
+# backend/services/commerce/batch_price_optimizer.py
+# UTF-8, English only
+
+"""
+Batch Price Optimizer
+Prices the whole inventory in one run (nightly optimization), instead of
+the first ten records of a single OpenAI prompt.
+
+- Deterministic rules price the long tail without the model: recent
+  listings, clear slow sellers / high-demand records (the EventTrigger
+  thresholds) and records below LONG_TAIL_PRICE
+- The remaining records are packed into chunks by estimated prompt and
+  completion tokens, and CONCURRENCY chunks run at a time through the
+  OpenAI gateway (which enforces the process-wide limits)
+- With a run_id, each finished chunk is appended to a JSONL checkpoint
+  named after the run, the user and a hash of the sorted record ids;
+  rerunning the same run on the same records skips records already
+  priced at their current price, so an interrupted nightly run resumes
+  where it stopped even though views and days on market moved on.
+  Records whose price changed are priced again; other users and other
+  record sets get their own checkpoint. Checkpoint I/O runs in a thread
+- Every record needs an "id"; records without one are reported in
+  "missing_id" and not priced
+- Stats: records/second, tokens, and cost per 1k records
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from backend.services.commerce.auto_pricing_service import (
+    OUTPUT_TOKENS_PER_RECORD, PROMPT_HEADER, PROMPT_RULES, record_line,
+)
+from backend.services.openai_gateway import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PROMPT_TOKENS = int(os.getenv("PRICE_OPT_CHUNK_PROMPT_TOKENS", "3000"))
+CHUNK_OUTPUT_TOKENS = int(os.getenv("PRICE_OPT_CHUNK_OUTPUT_TOKENS", "2400"))
+CONCURRENCY = int(os.getenv("PRICE_OPT_CONCURRENCY", "4"))
+CHECKPOINT_DIR = Path(os.getenv("PRICE_OPT_CHECKPOINT_DIR", str(Path("storage") / "checkpoints" / "price_optimization")))
+
+# gpt-4o-mini list prices, USD per 1M tokens
+INPUT_COST_PER_1M = float(os.getenv("PRICE_OPT_INPUT_COST_PER_1M", "0.15"))
+OUTPUT_COST_PER_1M = float(os.getenv("PRICE_OPT_OUTPUT_COST_PER_1M", "0.60"))
+
+# Rules (EventTriggerService thresholds)
+RECENT_DAYS = 7
+SLOW_SALE_DAYS = 30
+SLOW_SALE_MAX_VIEWS = int(os.getenv("PRICE_OPT_SLOW_SALE_MAX_VIEWS", "20"))
+HIGH_VIEWS = 100
+SLOW_SALE_REDUCTION = 0.07
+HIGH_VIEWS_INCREASE = 0.08
+# Below this price a model call costs more than it can gain
+LONG_TAIL_PRICE = float(os.getenv("PRICE_OPT_LONG_TAIL_PRICE", "15"))
+
+# complete_chunk(records, competitor_prices, sales_metrics) -> {"recommendations", "usage"}
+CompleteChunk = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+def checkpoint_name(run_id: str, user_id: Optional[str], records: List[Dict[str, Any]]) -> str:
+    """
+    <run_id>-<user>-<hash of the sorted record ids>: a resume only ever sees
+    its own run's output. Only the ids are hashed: views and days on market
+    change between a run and its resume.
+    """
+    ids = sorted(str(record["id"]) for record in records)
+    digest = hashlib.sha256(json.dumps(ids).encode("utf-8")).hexdigest()[:16]
+    user = hashlib.sha256(str(user_id or "").encode("utf-8")).hexdigest()[:12]
+    safe_run = "".join(c if c.isalnum() or c in "-_." else "_" for c in run_id)
+    return f"{safe_run}-{user}-{digest}"
+
+
+def _same_price(a: Any, b: Any) -> bool:
+    try:
+        return round(float(a or 0), 2) == round(float(b or 0), 2)
+    except (TypeError, ValueError):
+        return False
+
+
+def rule_recommendation(record: Dict[str, Any], metrics: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Deterministic recommendation, or None when the record needs the model."""
+    metrics = metrics or {}
+    try:
+        price = float(record.get("price") or 0)
+    except (TypeError, ValueError):
+        price = 0.0
+    days = int(metrics.get("days_on_market", record.get("days_on_market")) or 0)
+    views = int(metrics.get("views", record.get("views")) or 0)
+
+    def recommend(new_price: float, strategy: str, reasoning: str) -> Dict[str, Any]:
+        return {
+            "record_id": str(record.get("id")),
+            "current_price": price,
+            "recommended_price": round(new_price, 2),
+            "reasoning": reasoning,
+            "strategy": strategy,
+            "source": "rules",
+        }
+
+    if price <= 0:
+        return recommend(price, "hold", "no current price")
+    if days < RECENT_DAYS:
+        return recommend(price, "hold", f"recent listing ({days}d)")
+    if days >= SLOW_SALE_DAYS and views < SLOW_SALE_MAX_VIEWS:
+        return recommend(price * (1 - SLOW_SALE_REDUCTION), "decrease", f"slow sale: {days}d, {views} views")
+    if views >= HIGH_VIEWS and days < SLOW_SALE_DAYS:
+        return recommend(price * (1 + HIGH_VIEWS_INCREASE), "increase", f"high demand: {views} views in {days}d")
+    if price < LONG_TAIL_PRICE:
+        return recommend(price, "hold", f"long tail (< ${LONG_TAIL_PRICE:g})")
+    return None
+
+
+def chunk_records(
+    records: List[Dict[str, Any]],
+    competitor_prices: Optional[Dict[str, Dict[str, float]]] = None,
+    sales_metrics: Optional[Dict[str, Dict[str, Any]]] = None,
+    prompt_tokens: int = CHUNK_PROMPT_TOKENS,
+    output_tokens: int = CHUNK_OUTPUT_TOKENS,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Pack records (in order) into chunks whose estimated prompt stays within
+    prompt_tokens and whose expected answer fits output_tokens.
+    """
+    overhead = (len(PROMPT_HEADER) + len(PROMPT_RULES)) // CHARS_PER_TOKEN + 20  # + system message
+    max_records = max(1, (output_tokens - 50) // OUTPUT_TOKENS_PER_RECORD)
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = overhead
+    for record in records:
+        cost = len(record_line(record, competitor_prices, sales_metrics)) // CHARS_PER_TOKEN + 1
+        if current and (used + cost > prompt_tokens or len(current) >= max_records):
+            chunks.append(current)
+            current, used = [], overhead
+        current.append(record)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class Checkpoint:
+    """Append-only JSONL of finished chunks for one run."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def load(self) -> Dict[str, Any]:
+        done: Dict[str, Dict[str, Any]] = {}
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        if not self.path.exists():
+            return {"recommendations": done, "usage": usage}
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted run
+                for rec in entry.get("recommendations", []):
+                    done[str(rec["record_id"])] = rec
+                for key in usage:
+                    usage[key] += entry.get("usage", {}).get(key, 0)
+        return {"recommendations": done, "usage": usage}
+
+    def append(self, recommendations: List[Dict[str, Any]], usage: Dict[str, int]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({"at": time.time(), "recommendations": recommendations, "usage": usage}, default=str)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _cost(usage: Dict[str, int]) -> float:
+    return (usage["prompt_tokens"] * INPUT_COST_PER_1M + usage["completion_tokens"] * OUTPUT_COST_PER_1M) / 1_000_000
+
+
+class BatchPriceOptimizer:
+    """Rules + chunked, bounded-parallel model pricing with checkpoints."""
+
+    def __init__(self, complete_chunk: Optional[CompleteChunk] = None, concurrency: int = CONCURRENCY,
+                 prompt_tokens: int = CHUNK_PROMPT_TOKENS, output_tokens: int = CHUNK_OUTPUT_TOKENS,
+                 checkpoint_dir: Optional[Path] = None):
+        self._complete_chunk = complete_chunk
+        self.concurrency = max(concurrency, 1)
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.checkpoint_dir = Path(checkpoint_dir or CHECKPOINT_DIR)
+
+    @property
+    def complete_chunk(self) -> CompleteChunk:
+        if self._complete_chunk is None:
+            from backend.services.commerce.auto_pricing_service import auto_pricing_service
+            self._complete_chunk = auto_pricing_service.optimize_chunk
+        return self._complete_chunk
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def optimize(
+        self,
+        records: List[Dict[str, Any]],
+        competitor_prices: Optional[Dict[str, Dict[str, float]]] = None,
+        sales_metrics: Optional[Dict[str, Dict[str, Any]]] = None,
+        run_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recommendations for every record. Records of failed chunks are
+        listed in "unoptimized" (and retried when the run is rerun with
+        the same user and record ids).
+        """
+        started = time.perf_counter()
+        sales_metrics = sales_metrics or {}
+        missing_id = [index for index, record in enumerate(records) if record.get("id") is None]
+        records = [record for record in records if record.get("id") is not None]
+        checkpoint = None
+        if run_id:
+            checkpoint = Checkpoint(self.checkpoint_dir / f"{checkpoint_name(run_id, user_id, records)}.jsonl")
+        previous = await asyncio.to_thread(checkpoint.load) if checkpoint else {"recommendations": {}, "usage": {}}
+        # Priced at the record's current price: anything else is priced again
+        resumed = {}
+        for record in records:
+            rec = previous["recommendations"].get(str(record["id"]))
+            if rec is not None and _same_price(rec.get("current_price"), record.get("price")):
+                resumed[str(record["id"])] = rec
+
+        by_rules: List[Dict[str, Any]] = []
+        for_model: List[Dict[str, Any]] = []
+        for record in records:
+            rid = str(record["id"])
+            if rid in resumed:
+                continue
+            rec = rule_recommendation(record, sales_metrics.get(record.get("id")))
+            if rec is not None:
+                by_rules.append({**rec, "record_id": rid})
+            else:
+                for_model.append(record)
+
+        chunks = chunk_records(for_model, competitor_prices, sales_metrics, self.prompt_tokens, self.output_tokens)
+        state = {
+            "recommendations": [], "unoptimized": [], "errors": [],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0}, "chunks_done": 0, "chunks_failed": 0,
+        }
+        pending = iter(enumerate(chunks))
+
+        async def worker():
+            for index, chunk in pending:
+                await self._run_chunk(index, chunk, competitor_prices, sales_metrics, checkpoint, state)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(chunks)))))
+
+        elapsed = time.perf_counter() - started
+        processed = len(by_rules) + len(for_model)
+        cost = _cost(state["usage"])
+        recommendations = list(resumed.values()) + by_rules + state["recommendations"]
+        return {
+            "recommendations": recommendations,
+            "unoptimized": state["unoptimized"],
+            "missing_id": missing_id,
+            "error": "; ".join(state["errors"][:5]) or None,
+            "stats": {
+                "records": len(records) + len(missing_id),
+                "resumed": len(resumed),
+                "rules": len(by_rules),
+                "model": len(for_model) - len(state["unoptimized"]),
+                "unoptimized": len(state["unoptimized"]),
+                "chunks": len(chunks),
+                "chunks_failed": state["chunks_failed"],
+                "seconds": round(elapsed, 3),
+                "records_per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+                "prompt_tokens": state["usage"]["prompt_tokens"],
+                "completion_tokens": state["usage"]["completion_tokens"],
+                "cost_usd": round(cost, 6),
+                "cost_per_1k_records": round(cost / processed * 1000, 6) if processed else 0.0,
+                "run_id": run_id,
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _run_chunk(self, index, chunk, competitor_prices, sales_metrics, checkpoint, state):
+        ids: Set[str] = {str(record["id"]) for record in chunk}
+        try:
+            answer = await self.complete_chunk(chunk, competitor_prices, sales_metrics)
+        except Exception as e:
+            logger.warning(f"[PRICE_OPT] Chunk {index} ({len(chunk)} records) failed: {e}")
+            state["chunks_failed"] += 1
+            state["errors"].append(str(e))
+            state["unoptimized"].extend(sorted(ids))
+            return
+
+        prices = {str(record["id"]): record.get("price") for record in chunk}
+        accepted = []
+        for rec in answer.get("recommendations", []):
+            rid = str(rec.get("record_id"))
+            try:
+                recommended = round(float(rec.get("recommended_price")), 2)
+            except (TypeError, ValueError):
+                continue
+            if rid in ids:
+                ids.discard(rid)
+                accepted.append({**rec, "record_id": rid, "current_price": prices[rid],
+                                 "recommended_price": recommended, "source": "model"})
+        usage = {key: int(answer.get("usage", {}).get(key, 0)) for key in ("prompt_tokens", "completion_tokens")}
+        if checkpoint is not None:
+            await asyncio.to_thread(checkpoint.append, accepted, usage)
+
+        state["recommendations"].extend(accepted)
+        state["unoptimized"].extend(sorted(ids))  # left out of the answer
+        state["chunks_done"] += 1
+        for key in usage:
+            state["usage"][key] += usage[key]
+
+
+# Global instance
+batch_price_optimizer = BatchPriceOptimizer()
@@ -3,11 +3,12 @@
 # Competitor price scraper for eBay and Discogs
 
 import logging
-import requests
 import os
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+from backend.services.discogs_client import discogs_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -115,18 +116,13 @@ class CompetitorScraper:
             if catalog_number:
                 query += f" {catalog_number}"
             
-            url = "https://api.discogs.com/database/search"
-            headers = {
-                "Authorization": f"Discogs token={self.discogs_token}",
-                "User-Agent": "RecordsAI/1.0"
-            }
             params = {
                 "q": query,
                 "type": "release",
                 "per_page": 5
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            response = discogs_client.get("/database/search", params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -2,6 +2,7 @@
 # UTF-8, English only
 # Event trigger service for autonomous commerce actions
 
+import asyncio
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
@@ -25,12 +26,13 @@ class EventTriggerService:
     def __init__(self):
         logger.info("EventTriggerService initialized")
     
-    def handle_sale_event(
+    async def handle_sale_event(
         self,
         record_id: str,
         sold_on_platform: str,
         listing_ids: Dict[str, str],
-        price: float
+        price: float,
+        user_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Handle sale event: delist on all other platforms.
@@ -40,6 +42,7 @@ class EventTriggerService:
             sold_on_platform: Platform where item was sold
             listing_ids: Mapping of platform -> listing_id
             price: Sale price
+            user_id: Seller (sales analytics are per user)
         
         Returns:
             Event handling result
@@ -47,14 +50,17 @@ class EventTriggerService:
         logger.info(f"Handling sale event: {record_id} sold on {sold_on_platform}")
         
         # Record sale in analytics
-        sales_analytics_service.record_sale(
+        await asyncio.to_thread(
+            sales_analytics_service.record_sale,
             record_id=record_id,
             platform=sold_on_platform,
-            price=price
+            price=price,
+            listing_id=listing_ids.get(sold_on_platform),
+            user_id=user_id
         )
         
         # Sync stock (delist on all other platforms)
-        sync_result = stock_sync_service.handle_sale(
+        sync_result = await stock_sync_service.handle_sale(
             record_id=record_id,
             sold_on_platform=sold_on_platform,
             listing_ids=listing_ids
@@ -157,22 +163,31 @@ class EventTriggerService:
             "timestamp": datetime.utcnow().isoformat()
         }
     
-    def process_nightly_optimization(
+    async def process_nightly_optimization(
         self,
-        records: List[Dict[str, Any]]
+        records: List[Dict[str, Any]],
+        run_id: Optional[str] = None,
+        user_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process nightly optimization for all active listings.
         
-        Uses OpenAI to make intelligent pricing decisions.
+        Every record is priced: deterministic rules for the long tail,
+        OpenAI in parallel token-sized chunks for the rest. The run is
+        checkpointed under run_id (default: nightly-<UTC date>), the user
+        and the records, so calling again with the same records after an
+        interruption resumes instead of starting over.
         
         Args:
             records: List of active listings with metrics
+            run_id: Checkpoint name of this run
+            user_id: Owner of the listings
         
         Returns:
             Optimization results
         """
-        logger.info(f"Processing nightly optimization for {len(records)} records")
+        run_id = run_id or f"nightly-{datetime.utcnow().date().isoformat()}"
+        logger.info(f"Processing nightly optimization for {len(records)} records (run {run_id})")
         
         # Get competitor prices (stub - extend with actual scraping)
         competitor_prices = {}
@@ -187,11 +202,12 @@ class EventTriggerService:
                 "clicks": record.get("clicks", 0)
             }
         
-        # Use OpenAI to optimize prices
-        optimization_result = auto_pricing_service.optimize_prices(
+        optimization_result = await auto_pricing_service.optimize_prices(
             records=records,
             competitor_prices=competitor_prices,
-            sales_metrics=sales_metrics
+            sales_metrics=sales_metrics,
+            run_id=run_id,
+            user_id=user_id
         )
         
         return {
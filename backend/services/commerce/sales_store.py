@@ -0,0 +1,358 @@
+# backend/services/commerce/sales_store.py
+# UTF-8, English only
+
+"""
+Sales Store
+Sales and listings in SQL (sales / sales_listings tables) with
+pre-aggregated rollups (sales_rollups), so dashboard cost depends on the
+window, not on the length of the sales history.
+
+- Sales are indexed on (user_id, sold_at) and (channel, sold_at), both
+  covering record_id and price
+- One sale per (channel, listing_id): a repeated sale event for a
+  listing is a no-op and leaves the rollups alone
+- Every sale / listing updates its day, week (Monday) and month rollup
+  rows for (user, channel) in the same transaction: INSERT ... ON
+  CONFLICT DO UPDATE adding to the counters
+- Dashboards cover the window with as few rollup rows as possible (whole
+  months, then whole weeks, then days) and read only those; the top
+  records list is the one query on sales, a range scan of the window
+- Windows are whole UTC days: "last 30 days" = today and the 29 before
+- import_sales() loads history in batches with the rollups aggregated
+  per batch (migrations, benchmarks)
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, inspect, or_, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.db import engine as default_engine
+from backend.models.sales_db import SaleDB, SalesListingDB, SalesRollupDB
+
+logger = logging.getLogger(__name__)
+
+SALES = SaleDB.__table__
+LISTINGS = SalesListingDB.__table__
+ROLLUPS = SalesRollupDB.__table__
+
+ROLLUP_KEY = ["period", "period_start", "user_id", "channel"]
+COUNTERS = ("sales", "revenue", "listings", "days_to_sale_total", "days_to_sale_count")
+TOP_RECORDS = 10
+
+_TABLE_LOCK = threading.Lock()
+
+
+def utc_day(ts: float) -> date:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).date()
+
+
+def day_start(day: date) -> float:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+def period_starts(day: date) -> Dict[str, str]:
+    """First day of the day / week / month containing `day`."""
+    return {
+        "day": day.isoformat(),
+        "week": (day - timedelta(days=day.weekday())).isoformat(),
+        "month": day.replace(day=1).isoformat(),
+    }
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _cover_weeks(start: date, end: date) -> List[Tuple[str, str]]:
+    spans = []
+    day = start
+    while day <= end:
+        if day.weekday() == 0 and day + timedelta(days=6) <= end:
+            spans.append(("week", day.isoformat()))
+            day += timedelta(days=7)
+        else:
+            spans.append(("day", day.isoformat()))
+            day += timedelta(days=1)
+    return spans
+
+
+def cover(start: date, end: date) -> List[Tuple[str, str]]:
+    """
+    (period, period_start) rollups that exactly cover the days start..end:
+    the whole months inside, then weeks and days for the edges.
+    """
+    first = start if start.day == 1 else _next_month(start)
+    months = []
+    day = first
+    while _next_month(day) - timedelta(days=1) <= end:
+        months.append(("month", day.isoformat()))
+        day = _next_month(day)
+    if not months:
+        return _cover_weeks(start, end)
+    return _cover_weeks(start, first - timedelta(days=1)) + months + _cover_weeks(day, end)
+
+
+def _span_clause(spans: List[Tuple[str, str]]):
+    starts: Dict[str, List[str]] = defaultdict(list)
+    for period, start in spans:
+        starts[period].append(start)
+    return or_(*(and_(ROLLUPS.c.period == period, ROLLUPS.c.period_start.in_(values))
+                 for period, values in starts.items()))
+
+
+class SalesStore:
+    """sales / sales_listings / sales_rollups on the shared engine."""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self.engine = engine or default_engine
+        self._table_ready = False
+
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Unsupported database for sales store: {dialect}")
+        self._insert = insert
+
+        stmt = insert(ROLLUPS)
+        self._rollup_upsert = stmt.on_conflict_do_update(
+            index_elements=ROLLUP_KEY,
+            set_={name: ROLLUPS.c[name] + stmt.excluded[name] for name in COUNTERS},
+        )
+
+    def _ensure_tables(self):
+        # init_db() creates them at startup; this covers workers and tools
+        if self._table_ready:
+            return
+        with _TABLE_LOCK:
+            if self._table_ready:
+                return
+            for table in (SALES, LISTINGS, ROLLUPS):
+                try:
+                    table.create(bind=self.engine, checkfirst=True)
+                except SQLAlchemyError:
+                    if not inspect(self.engine).has_table(table.name):
+                        raise
+            self._table_ready = True
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record_listing(
+        self,
+        record_id: str,
+        channel: str,
+        listing_id: str,
+        price: float,
+        listed_at: Optional[float] = None,
+        user_id: str = "",
+    ) -> bool:
+        """Store a listing. False if (channel, listing_id) is already known."""
+        self._ensure_tables()
+        listed_at = listed_at or time.time()
+        with self.engine.begin() as conn:
+            inserted = conn.execute(
+                self._insert(LISTINGS).values(
+                    user_id=user_id, record_id=record_id, channel=channel, listing_id=listing_id,
+                    price=price, listed_at=listed_at, status="active",
+                ).on_conflict_do_nothing(index_elements=["channel", "listing_id"])
+            ).rowcount
+            if inserted:
+                self._add_rollups(conn, [{"user_id": user_id, "channel": channel, "at": listed_at, "listings": 1}])
+        return bool(inserted)
+
+    def record_sale(
+        self,
+        record_id: str,
+        channel: str,
+        price: float,
+        currency: str = "USD",
+        listing_id: Optional[str] = None,
+        user_id: str = "",
+        sold_at: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Store a sale, mark its listing sold (by listing_id, else the
+        record's latest active listing on the channel) and update the
+        rollups, all in one transaction.
+
+        Idempotent per (channel, listing_id): a sale already stored for the
+        listing is returned as is, with "duplicate": True.
+        """
+        self._ensure_tables()
+        sale = {
+            "id": str(uuid.uuid4()), "user_id": user_id, "record_id": record_id, "channel": channel,
+            "listing_id": listing_id, "price": float(price), "currency": currency,
+            "sold_at": sold_at or time.time(), "days_to_sale": None,
+        }
+        with self.engine.begin() as conn:
+            listing = self._match_listing(conn, record_id, channel, listing_id)
+            if listing is not None:
+                sale["listing_id"] = listing.listing_id
+                sale["days_to_sale"] = max(0.0, (sale["sold_at"] - listing.listed_at) / 86400)
+            inserted = conn.execute(
+                self._insert(SALES).values(**sale)
+                .on_conflict_do_nothing(index_elements=["channel", "listing_id"])
+            ).rowcount
+            if not inserted:
+                existing = conn.execute(
+                    select(SALES).where(SALES.c.channel == channel, SALES.c.listing_id == sale["listing_id"])
+                ).mappings().one()
+                return {**existing, "duplicate": True}
+            if listing is not None:
+                conn.execute(update(LISTINGS).where(LISTINGS.c.id == listing.id)
+                             .values(status="sold", sold_at=sale["sold_at"]))
+            self._add_rollups(conn, [self._sale_delta(sale)])
+        return {**sale, "duplicate": False}
+
+    def import_sales(self, sales: Iterable[Dict[str, Any]], batch_size: int = 10000) -> int:
+        """
+        Bulk-load historical sales ({record_id, channel, price, sold_at, ...};
+        listings are not matched). Rollups are aggregated per batch.
+        """
+        self._ensure_tables()
+        count = 0
+        batch: List[Dict[str, Any]] = []
+
+        def flush():
+            with self.engine.begin() as conn:
+                conn.execute(self._insert(SALES), batch)
+                self._add_rollups(conn, [self._sale_delta(sale) for sale in batch])
+
+        for sale in sales:
+            batch.append({
+                "id": sale.get("id") or str(uuid.uuid4()),
+                "user_id": sale.get("user_id") or "",
+                "record_id": sale["record_id"],
+                "channel": sale["channel"],
+                "listing_id": sale.get("listing_id"),
+                "price": float(sale["price"]),
+                "currency": sale.get("currency") or "USD",
+                "sold_at": sale["sold_at"],
+                "days_to_sale": sale.get("days_to_sale"),
+            })
+            if len(batch) >= batch_size:
+                flush()
+                count += len(batch)
+                batch = []
+        if batch:
+            flush()
+            count += len(batch)
+        return count
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def dashboard(self, days: int = 30, user_id: Optional[str] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """Dashboard metrics for the last `days` days (all users when user_id is None)."""
+        self._ensure_tables()
+        today = utc_day(now or time.time())
+        start = today - timedelta(days=days - 1)
+        previous_start = start - timedelta(days=days)
+
+        with self.engine.connect() as conn:
+            by_channel = self._totals(conn, cover(start, today), user_id)
+            previous = self._totals(conn, cover(previous_start, start - timedelta(days=1)), user_id)
+            top = self._top_records(conn, day_start(start), user_id, [c for c, t in by_channel.items() if t["sales"]])
+
+        total = {name: sum(t[name] for t in by_channel.values()) for name in COUNTERS}
+        previous_sales = sum(t["sales"] for t in previous.values())
+        trend = "up" if total["sales"] > previous_sales else "down" if total["sales"] < previous_sales else "flat"
+        return {
+            "total_sales": total["sales"],
+            "total_revenue": round(total["revenue"], 2),
+            "revenue_by_platform": {c: round(t["revenue"], 2) for c, t in sorted(by_channel.items()) if t["sales"]},
+            "average_sale_price": round(total["revenue"] / total["sales"], 2) if total["sales"] else 0.0,
+            "conversion_rate": round(total["sales"] / total["listings"] * 100, 2) if total["listings"] else 0.0,
+            "average_days_to_sale": (round(total["days_to_sale_total"] / total["days_to_sale_count"], 1)
+                                     if total["days_to_sale_count"] else 0.0),
+            "top_performing_records": top,
+            "sales_velocity": {
+                "total": total["sales"],
+                "per_day": total["sales"] / days if days > 0 else 0.0,
+                "previous_period": previous_sales,
+                "trend": trend,
+            },
+            "period_days": days,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _sale_delta(sale: Dict[str, Any]) -> Dict[str, Any]:
+        delta = {"user_id": sale["user_id"], "channel": sale["channel"], "at": sale["sold_at"],
+                 "sales": 1, "revenue": sale["price"]}
+        if sale.get("days_to_sale") is not None:
+            delta.update(days_to_sale_total=sale["days_to_sale"], days_to_sale_count=1)
+        return delta
+
+    def _add_rollups(self, conn: Connection, deltas: List[Dict[str, Any]]):
+        """Add counter deltas to the day / week / month rows (one row per key per statement)."""
+        rows: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        for delta in deltas:
+            for period, start in period_starts(utc_day(delta["at"])).items():
+                key = (period, start, delta["user_id"], delta["channel"])
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = dict(zip(ROLLUP_KEY, key), **{name: 0 for name in COUNTERS})
+                for name in COUNTERS:
+                    row[name] += delta.get(name, 0)
+        if rows:
+            conn.execute(self._rollup_upsert, list(rows.values()))
+
+    def _match_listing(self, conn: Connection, record_id: str, channel: str, listing_id: Optional[str]):
+        query = select(LISTINGS.c.id, LISTINGS.c.listing_id, LISTINGS.c.listed_at)
+        if listing_id:
+            query = query.where(LISTINGS.c.channel == channel, LISTINGS.c.listing_id == listing_id)
+        else:
+            query = (query.where(LISTINGS.c.record_id == record_id, LISTINGS.c.status == "active",
+                                 LISTINGS.c.channel == channel)
+                     .order_by(LISTINGS.c.listed_at.desc()).limit(1))
+        return conn.execute(query).first()
+
+    def _totals(self, conn: Connection, spans: List[Tuple[str, str]], user_id: Optional[str]) -> Dict[str, Dict[str, float]]:
+        query = (
+            select(ROLLUPS.c.channel, *(func.sum(ROLLUPS.c[name]).label(name) for name in COUNTERS))
+            .where(_span_clause(spans))
+            .group_by(ROLLUPS.c.channel)
+        )
+        if user_id is not None:
+            query = query.where(ROLLUPS.c.user_id == user_id)
+        return {row.channel: {name: row._mapping[name] or 0 for name in COUNTERS} for row in conn.execute(query)}
+
+    def _top_records(self, conn: Connection, since: float, user_id: Optional[str], channels: List[str]) -> List[Dict[str, Any]]:
+        if not channels:
+            return []
+        revenue = func.sum(SALES.c.price)
+        query = (
+            select(SALES.c.record_id, func.count().label("sales"), revenue.label("revenue"))
+            .where(SALES.c.sold_at >= since)
+            .group_by(SALES.c.record_id)
+            .order_by(revenue.desc(), SALES.c.record_id)
+            .limit(TOP_RECORDS)
+        )
+        if user_id is not None:
+            query = query.where(SALES.c.user_id == user_id)
+        else:
+            # Channels with sales in the window: lets the (channel, sold_at) index serve the range
+            query = query.where(SALES.c.channel.in_(channels))
+        return [{"record_id": row.record_id, "sales": row.sales, "revenue": round(row.revenue, 2)}
+                for row in conn.execute(query)]
+
+
+# Global instance
+sales_store = SalesStore()
@@ -2,9 +2,41 @@
 # UTF-8, English only
 # Stock synchronization service for multi-channel commerce
 
+"""
+Stock Sync Service
+When a record sells on one channel, delist it everywhere else - fast,
+because until then it can be bought twice.
+
+- Outbox: every delist is a job in the durable queue (backend.core.job_queue,
+  queue "stock_delist") before any connector is called, so a crash or a
+  failing channel never loses one. Failed attempts come back after
+  exponential backoff (workers started with the API, STOCK_DELIST_WORKERS);
+  non-retryable errors (connector disabled) are dead-lettered at once.
+- Fan-out: the sale handler runs the first attempt on all channels
+  concurrently, each bounded by STOCK_DELIST_DEADLINE_SECONDS, so a hanging
+  connector only delays its own channel. Calls run in the "delist" pool:
+  a hung call keeps its thread past the deadline, so stuck channels
+  exhaust that pool (later attempts fail fast and are retried) instead
+  of the recognition workers.
+- Idempotency: one key per (record, channel, listing). A repeated sale
+  event is a no-op, and retries send the same key to the connector.
+- Metric: time from sale to the last channel confirmed (stage_metrics
+  "commerce" / "time_to_fully_delisted"), recorded by whoever settles
+  the record's last delist, inline or on retry. A sale whose delists are
+  all settled but one or more dead-lettered is counted as
+  "dead_lettered" instead.
+"""
+
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import os
+import time
 from datetime import datetime
+from typing import Any, Dict, Optional
+
+from backend.core.executors import DELIST_POOL, run_in_pool
+from backend.core.job_queue import Job, JobQueue, JobWorkerPool, PermanentJobError
+from backend.core.stage_metrics import stage_metrics
 from backend.services.channels.ebay import ebay_connector
 from backend.services.channels.discogs import discogs_connector
 from backend.services.channels.shopify import shopify_connector
@@ -12,26 +44,53 @@ from backend.services.channels.etsy import etsy_connector
 
 logger = logging.getLogger(__name__)
 
+QUEUE_NAME = "stock_delist"
+DELIST_DEADLINE = float(os.getenv("STOCK_DELIST_DEADLINE_SECONDS", "5"))
+WORKERS = int(os.getenv("STOCK_DELIST_WORKERS", "2"))
+MAX_ATTEMPTS = int(os.getenv("STOCK_DELIST_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE = float(os.getenv("STOCK_DELIST_BACKOFF_BASE", "2.0"))
+POLL_INTERVAL = float(os.getenv("STOCK_DELIST_POLL_INTERVAL", "1.0"))
+
+
+def delist_key(record_id: str, platform: str, listing_id: str) -> str:
+    """Idempotency key of one delist (outbox dedupe key, sent to the connector)."""
+    return f"delist:{record_id}:{platform}:{listing_id}"
+
 
 class StockSyncService:
     """
     Stock synchronization service.
-    
+
     Rules:
     - If sold on any channel -> auto delist on all others
     - Maintains single source of truth for inventory
     """
-    
-    def __init__(self):
-        self.connectors = {
+
+    def __init__(
+        self,
+        connectors: Optional[Dict[str, Any]] = None,
+        outbox: Optional[JobQueue] = None,
+        deadline: float = DELIST_DEADLINE,
+        pool: str = DELIST_POOL
+    ):
+        self.connectors = connectors or {
             "ebay": ebay_connector,
             "discogs": discogs_connector,
             "shopify": shopify_connector,
             "etsy": etsy_connector
         }
+        self.outbox = outbox or JobQueue(
+            QUEUE_NAME, lease_seconds=max(30.0, deadline * 4), max_attempts=MAX_ATTEMPTS,
+            backoff_base=BACKOFF_BASE
+        )
+        self.deadline = deadline
+        self.pool = pool
+        self.counters = {"sales": 0, "duplicates": 0, "attempts": 0, "delisted": 0,
+                         "timeouts": 0, "failures": 0, "fully_delisted": 0,
+                         "dead_lettered": 0}
         logger.info("StockSyncService initialized")
-    
-    def handle_sale(
+
+    async def handle_sale(
         self,
         record_id: str,
         sold_on_platform: str,
@@ -39,77 +98,202 @@ class StockSyncService:
     ) -> Dict[str, Any]:
         """
         Handle sale event: delist on all other platforms.
-        
+
         Args:
             record_id: Internal record ID
             sold_on_platform: Platform where item was sold
             listing_ids: Mapping of platform -> listing_id for all active listings
-        
+
         Returns:
             {
                 "record_id": str,
                 "sold_on": str,
                 "delisted_platforms": List[str],
+                "pending_platforms": List[str],  # queued for retry
                 "results": Dict[str, Dict],
-                "success": bool
+                "success": bool,  # every other channel confirmed
+                "time_to_delisted_ms": Optional[float]
             }
         """
         logger.info(f"Handling sale for record {record_id} on {sold_on_platform}")
-        
-        delisted_platforms = []
-        results = {}
-        
-        # Delist on all platforms except the one where it was sold
+        sold_at = time.time()
+        self.counters["sales"] += 1
+
+        # Outbox first: nothing is lost if we crash past this point
+        jobs: Dict[str, str] = {}
+        results: Dict[str, Dict[str, Any]] = {}
         for platform, listing_id in listing_ids.items():
-            if platform == sold_on_platform:
-                continue  # Skip the platform where it was sold
-            
-            if not listing_id:
+            if platform == sold_on_platform or not listing_id:
                 continue
-            
-            try:
-                result = self._delist_item(platform, listing_id)
-                results[platform] = result
-                
-                if result.get("success"):
-                    delisted_platforms.append(platform)
-                    logger.info(f"Delisted {record_id} from {platform}")
-                else:
-                    logger.warning(f"Failed to delist {record_id} from {platform}: {result.get('error')}")
-            except Exception as e:
-                logger.error(f"Error delisting from {platform}: {e}")
-                results[platform] = {
-                    "success": False,
-                    "error": str(e)
-                }
-        
+            key = delist_key(record_id, platform, listing_id)
+            payload = {"record_id": record_id, "platform": platform, "listing_id": listing_id,
+                       "idempotency_key": key, "sold_at": sold_at}
+            # Delayed so retry workers leave it to the inline attempt below
+            job_id = await asyncio.to_thread(self.outbox.enqueue, payload, key, self.deadline * 2)
+            if job_id is None:
+                self.counters["duplicates"] += 1
+                results[platform] = {"success": False, "status": "duplicate", "listing_id": listing_id,
+                                     "error": "Delist already in the outbox for this sale"}
+            else:
+                jobs[job_id] = platform
+
+        # First attempt inline, all channels at once
+        claimed = []
+        if jobs:
+            claimed = await asyncio.to_thread(self.outbox.claim, f"sale:{record_id}", len(jobs), list(jobs))
+        attempts = await asyncio.gather(*(self._attempt(job) for job in claimed))
+        for job, result in zip(claimed, attempts):
+            results[jobs[job.id]] = result
+        # Not claimed: a worker got it after all (we were slower than the delay)
+        for job_id, platform in jobs.items():
+            results.setdefault(platform, {"success": False, "status": "queued", "listing_id": listing_ids[platform]})
+
+        delisted = [p for p, r in results.items() if r.get("success")]
+        pending = [p for p, r in results.items() if r.get("status") in ("queued", "retrying")]
+        time_to_delisted = await self._observe_if_fully_delisted(record_id, sold_at) if claimed else None
+
         return {
             "record_id": record_id,
             "sold_on": sold_on_platform,
-            "delisted_platforms": delisted_platforms,
+            "delisted_platforms": delisted,
+            "pending_platforms": pending,
             "results": results,
-            "success": len(delisted_platforms) == len(listing_ids) - 1,
+            "success": len(delisted) == len(results),
+            "time_to_delisted_ms": time_to_delisted,
             "timestamp": datetime.utcnow().isoformat()
         }
-    
-    def _delist_item(self, platform: str, listing_id: str) -> Dict[str, Any]:
-        """Delist item from specific platform."""
-        connector = self.connectors.get(platform.lower())
-        if not connector:
-            return {
-                "success": False,
-                "error": f"Unknown platform: {platform}"
-            }
-        
-        # Stub implementation - extend with actual API calls
-        logger.info(f"Delisting {listing_id} from {platform}")
+
+    async def run_delist_job(self, payload: Dict[str, Any]):
+        """
+        JobWorkerPool handler for retries: raises so the queue backs off, or
+        PermanentJobError (dead-lettered at once) for non-retryable results.
+        """
+        connector = self.connectors.get(payload["platform"].lower())
+        if connector is None:
+            raise PermanentJobError(f"Unknown platform: {payload['platform']}")
+        result = await self._call(connector, payload)
+        if not result.get("success"):
+            error = result.get("error") or "delist failed"
+            raise RuntimeError(error) if result.get("retryable", True) else PermanentJobError(error)
+        logger.info(f"Delisted {payload['record_id']} from {payload['platform']} on retry")
+        await self._observe_if_fully_delisted(payload["record_id"], payload["sold_at"], pending=1)
+
+    async def on_delist_failed(self, job: Job, state: str):
+        """JobWorkerPool on_failed hook: a dead-lettered retry may settle the record's last delist."""
+        if state == "dead":
+            await self._observe_if_fully_delisted(job.payload["record_id"], job.payload["sold_at"])
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = stage_metrics.snapshot()
+        latency = {
+            entry["stage"]: {"errors": entry["errors"], **entry["metrics"]["wall_ms"]}
+            for entry in snapshot["stages"] if entry["component"] == "commerce"
+            and (entry["stage"] == "time_to_fully_delisted" or entry["stage"].startswith("delist_"))
+        }
         return {
-            "success": True,
-            "listing_id": listing_id,
-            "platform": platform,
-            "message": f"Delisted from {platform}"
+            "deadline_seconds": self.deadline,
+            "workers": _pool.concurrency if _pool is not None else 0,
+            "counters": dict(self.counters),
+            "outbox": self.outbox.stats(),
+            "dead_letters": self.outbox.dead_letters(limit=20),
+            "latency_ms": latency,
         }
 
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _call(self, connector, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """One connector call under the per-connector deadline."""
+        self.counters["attempts"] += 1
+        started = time.perf_counter()
+        try:
+            # The thread of a timed-out call runs on; the retry reuses the key
+            result = await asyncio.wait_for(
+                run_in_pool(self.pool, connector.delist_listing, payload["listing_id"],
+                            idempotency_key=payload["idempotency_key"]),
+                self.deadline,
+            )
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            result = {"success": False, "error": f"Timed out after {self.deadline:g}s", "retryable": True}
+        except Exception as e:
+            result = {"success": False, "error": str(e), "retryable": True}
+        stage_metrics.observe("commerce", f"delist_{payload['platform']}",
+                              {"wall_ms": (time.perf_counter() - started) * 1000},
+                              error=not result.get("success"))
+        self.counters["delisted" if result.get("success") else "failures"] += 1
+        return result
+
+    async def _attempt(self, job: Job) -> Dict[str, Any]:
+        """Run one claimed outbox job and settle it (complete, retry later, or dead-letter)."""
+        payload = job.payload
+        platform, listing_id = payload["platform"], payload["listing_id"]
+        connector = self.connectors.get(platform.lower())
+        if connector is None:
+            result = {"success": False, "error": f"Unknown platform: {platform}", "retryable": False}
+        else:
+            result = await self._call(connector, payload)
+
+        if result.get("success"):
+            await asyncio.to_thread(self.outbox.complete, job)
+            logger.info(f"Delisted {payload['record_id']} from {platform}")
+            status = "delisted"
+        else:
+            state = await asyncio.to_thread(self.outbox.fail, job, result.get("error") or "delist failed",
+                                            result.get("retryable", True))
+            status = "retrying" if state == "queued" else state
+            logger.warning(f"Failed to delist {payload['record_id']} from {platform} ({status}): {result.get('error')}")
+        return {"success": bool(result.get("success")), "status": status, "listing_id": listing_id,
+                "error": result.get("error"), "attempts": job.attempts}
+
+    async def _observe_if_fully_delisted(self, record_id: str, sold_at: float, pending: int = 0) -> Optional[float]:
+        """
+        Record time-to-fully-delisted once no delist of the record is left
+        to run, or count the sale as dead-lettered if one of them is dead.
+        pending: jobs of this record still counted as running by the caller
+        (a worker handler completes its job only after returning).
+        """
+        prefix = f"delist:{record_id}:"
+        outstanding = await asyncio.to_thread(self.outbox.outstanding, prefix)
+        if outstanding > pending:
+            return None
+        if await asyncio.to_thread(self.outbox.dead, prefix):
+            self.counters["dead_lettered"] += 1
+            return None
+        elapsed_ms = round((time.time() - sold_at) * 1000, 1)
+        stage_metrics.observe("commerce", "time_to_fully_delisted", {"wall_ms": elapsed_ms})
+        self.counters["fully_delisted"] += 1
+        return elapsed_ms
+
 
 # Singleton instance
 stock_sync_service = StockSyncService()
+
+# ------------------------------------------------------------------
+# Retry workers
+# ------------------------------------------------------------------
+
+_pool: Optional[JobWorkerPool] = None
+
+
+async def start_stock_delist_workers(concurrency: int = WORKERS) -> Optional[JobWorkerPool]:
+    """Start in-process retry workers (API startup). No-op when concurrency is 0."""
+    global _pool
+    if concurrency <= 0 or _pool is not None:
+        return _pool
+    _pool = JobWorkerPool(
+        stock_sync_service.outbox, stock_sync_service.run_delist_job,
+        concurrency=concurrency, poll_interval=POLL_INTERVAL,
+        on_failed=stock_sync_service.on_delist_failed
+    )
+    await _pool.start()
+    return _pool
+
+
+async def stop_stock_delist_workers(timeout: float = 10.0):
+    """Drain retry workers (API shutdown); unfinished jobs are re-leased later."""
+    global _pool
+    if _pool is not None:
+        await _pool.stop(timeout=timeout)
+        _pool = None
@@ -0,0 +1,248 @@
+# backend/services/derivative_service.py
+# UTF-8, English only
+
+"""
+Image Derivative Service
+Resized WebP / JPEG copies of stored images (archive covers, uploads),
+generated on first request and kept in a content-addressed disk cache:
+
+    storage/derivatives/{key[:2]}/{key}.{webp|jpg}
+
+key = sha256(source content digest, width, format, quality, version), so
+a derivative never changes once written: it is safe to serve with a
+strong ETag and, when the URL carries the source version, as immutable.
+
+Concurrent requests for the same missing derivative are coalesced
+(single flight): one thread renders it, the others wait for its result.
+Files are written to a temp name and renamed, so other processes never
+see partial output.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# main.py mounts REPO_ROOT / "storage" at /storage: resolve from the repo
+# root, not the working directory
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SOURCE_ROOT = Path(os.getenv("DERIVATIVE_SOURCE_ROOT", str(REPO_ROOT / "storage")))
+CACHE_DIR = Path(os.getenv("DERIVATIVE_CACHE_DIR", str(REPO_ROOT / "storage" / "derivatives")))
+WIDTHS = tuple(sorted(int(w) for w in os.getenv("DERIVATIVE_WIDTHS", "160,320,640,1280").split(",")))
+WEBP_QUALITY = int(os.getenv("DERIVATIVE_WEBP_QUALITY", "80"))
+JPEG_QUALITY = int(os.getenv("DERIVATIVE_JPEG_QUALITY", "82"))
+SOURCE_DIGEST_CACHE_SIZE = int(os.getenv("DERIVATIVE_DIGEST_CACHE_SIZE", "10000"))
+# Bump to invalidate every derivative (rendering changes)
+RENDER_VERSION = 1
+
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+URL_PATH = "/api/v1/media/derivative"
+
+
+class DerivativeError(ValueError):
+    """Bad derivative request (routers map this to 400 / 404)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+@dataclass(frozen=True)
+class Derivative:
+    path: Path
+    etag: str               # quoted strong ETag
+    content_type: str
+    width: int
+    source_version: str     # short source digest, the `v` URL parameter
+
+
+class DerivativeService:
+    """Lazily rendered, content-addressed image derivatives."""
+
+    def __init__(self, source_root: Path = SOURCE_ROOT, cache_dir: Path = CACHE_DIR, widths: Tuple[int, ...] = WIDTHS):
+        self.source_root = Path(source_root)
+        self.cache_dir = Path(cache_dir)
+        self.widths = tuple(sorted(widths))
+        self._digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._digest_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._stats = {"hits": 0, "generated": 0, "coalesced": 0}
+
+    # ------------------------------------------------------------------
+    # Request normalisation
+
+    def resolve_source(self, path: str) -> Path:
+        """
+        Stored image for a /storage-relative path ("/storage/archive/u/r.jpg"
+        or "archive/u/r.jpg").
+
+        Raises:
+            DerivativeError: path escapes the storage root (400), is not an
+                image (400) or does not exist (404)
+        """
+        relative = path.replace("\\", "/").lstrip("/")
+        if relative.startswith("storage/"):
+            relative = relative[len("storage/"):]
+        root = self.source_root.resolve()
+        source = (root / relative).resolve()
+        if root not in source.parents:
+            raise DerivativeError("Invalid image path")
+        if source.suffix.lower() not in SOURCE_EXTENSIONS:
+            raise DerivativeError("Not an image")
+        if self.cache_dir.resolve() in source.parents:
+            raise DerivativeError("Derivatives cannot be derived again")
+        if not source.is_file():
+            raise DerivativeError("Image not found", status_code=404)
+        return source
+
+    def snap_width(self, width: int) -> int:
+        """Smallest configured width >= width (the largest one beyond that)."""
+        for candidate in self.widths:
+            if candidate >= width:
+                return candidate
+        return self.widths[-1]
+
+    # ------------------------------------------------------------------
+    # Keys
+
+    def source_digest(self, source: Path) -> str:
+        """sha256 of the source bytes, memoised by (path, size, mtime)."""
+        stat = source.stat()
+        memo_key = (str(source), stat.st_size, stat.st_mtime_ns)
+        with self._digest_lock:
+            digest = self._digests.get(memo_key)
+            if digest:
+                self._digests.move_to_end(memo_key)
+                return digest
+        sha = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with self._digest_lock:
+            self._digests[memo_key] = digest
+            while len(self._digests) > SOURCE_DIGEST_CACHE_SIZE:
+                self._digests.popitem(last=False)
+        return digest
+
+    def describe(self, source: Path, width: int, fmt: str) -> Derivative:
+        """Cache location and ETag for a derivative (nothing is rendered)."""
+        if fmt not in FORMATS:
+            raise DerivativeError(f"Unsupported format: {fmt}")
+        _, content_type, extension = FORMATS[fmt]
+        width = self.snap_width(width)
+        digest = self.source_digest(source)
+        quality = WEBP_QUALITY if fmt == "webp" else JPEG_QUALITY
+        key = hashlib.sha256(f"{digest}:{width}:{fmt}:{quality}:{RENDER_VERSION}".encode()).hexdigest()[:40]
+        return Derivative(
+            path=self.cache_dir / key[:2] / f"{key}.{extension}",
+            etag=f'"{key}"',
+            content_type=content_type,
+            width=width,
+            source_version=digest[:12],
+        )
+
+    def url(self, path: str, width: int, fmt: str = "auto") -> str:
+        """Versioned (cacheable as immutable) derivative URL for a stored image."""
+        source = self.resolve_source(path)
+        version = self.source_digest(source)[:12]
+        relative = source.relative_to(self.source_root.resolve()).as_posix()
+        return f"{URL_PATH}?" + urlencode({"path": relative, "w": self.snap_width(width), "format": fmt, "v": version})
+
+    def urls(self, paths: Iterable[str], widths: Iterable[int], fmt: str = "auto") -> Dict[str, Optional[Dict[int, str]]]:
+        """
+        Versioned URLs per stored path and width (hashes each source once,
+        run it in the image pool). None for paths that are not stored images.
+        """
+        result: Dict[str, Optional[Dict[int, str]]] = {}
+        for path in paths:
+            if path in result:
+                continue
+            try:
+                result[path] = {width: self.url(path, width, fmt) for width in widths}
+            except (DerivativeError, OSError):
+                result[path] = None
+        return result
+
+    # ------------------------------------------------------------------
+    # Rendering
+
+    def get(self, source: Path, width: int, fmt: str) -> Derivative:
+        """The derivative, rendered now if missing (single flight per key)."""
+        derivative = self.describe(source, width, fmt)
+        if derivative.path.exists():
+            self._stats["hits"] += 1
+            return derivative
+
+        with self._inflight_lock:
+            future = self._inflight.get(derivative.etag)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[derivative.etag] = future
+        if not leader:
+            self._stats["coalesced"] += 1
+            future.result()
+            return derivative
+
+        try:
+            if not derivative.path.exists():
+                self._render(source, derivative, fmt)
+                self._stats["generated"] += 1
+            future.set_result(True)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(derivative.etag, None)
+        return derivative
+
+    def _render(self, source: Path, derivative: Derivative, fmt: str):
+        started = time.perf_counter()
+        pil_format = FORMATS[fmt][0]
+        with Image.open(source) as img:
+            # JPEG: decode at a reduced DCT scale close to the target
+            img.draft("RGB", (derivative.width, derivative.width * 4))
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            if img.width > derivative.width:
+                height = max(1, round(img.height * derivative.width / img.width))
+                img = img.resize((derivative.width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+            derivative.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = derivative.path.with_name(f".{derivative.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                if pil_format == "WEBP":
+                    img.save(tmp_path, format="WEBP", quality=WEBP_QUALITY, method=4)
+                else:
+                    img.save(tmp_path, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                os.replace(tmp_path, derivative.path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+        logger.info(f"[DERIVATIVE] {source.name} -> {derivative.width}px {fmt} "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "inflight": len(self._inflight), "widths": list(self.widths)}
+
+
+# Global instance
+derivative_service = DerivativeService()
@@ -0,0 +1,171 @@
+# backend/services/detection_merge.py
+# UTF-8, English only
+
+"""
+Detection Merge Engine
+Deduplicates candidate boxes ({"x", "y", "width", "height"} bbox dicts,
+as produced by multi-record detection) in near-linear time:
+
+- BoxGrid: uniform grid over the image; a box is only compared with
+  boxes registered in the cells it covers
+- non_max_suppression: keep the best box of each overlap cluster
+- weighted_box_fusion: replace each cluster by its confidence-weighted
+  average box
+
+Clusters are formed greedily in a deterministic order: priority (higher
+first), then confidence (higher first), then input position. Equal
+inputs always give equal outputs.
+"""
+
+from __future__ import annotations
+
+import statistics
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+Bbox = Dict[str, float]
+Priority = Callable[[Dict], float]
+
+
+def _corners(bbox: Optional[Bbox]) -> Tuple[float, float, float, float]:
+    """(x1, y1, x2, y2); missing or negative sizes collapse to an empty box."""
+    bbox = bbox or {}
+    x = float(bbox.get("x", 0) or 0)
+    y = float(bbox.get("y", 0) or 0)
+    return x, y, x + max(0.0, float(bbox.get("width", 0) or 0)), y + max(0.0, float(bbox.get("height", 0) or 0))
+
+
+def _corners_iou(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> float:
+    inter_w = min(a[2], b[2]) - max(a[0], b[0])
+    inter_h = min(a[3], b[3]) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def iou(bbox1: Bbox, bbox2: Bbox) -> float:
+    """Intersection over union of two bbox dicts."""
+    return _corners_iou(_corners(bbox1), _corners(bbox2))
+
+
+def _confidence(detection: Dict) -> float:
+    try:
+        return float(detection.get("confidence", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class BoxGrid:
+    """Uniform grid of box keys; query returns keys whose cells intersect a box."""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = max(1.0, float(cell_size))
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+    def _span(self, corners: Tuple[float, float, float, float]) -> Iterator[Tuple[int, int]]:
+        x1, y1, x2, y2 = (int(v // self.cell_size) for v in corners)
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                yield cx, cy
+
+    def insert(self, key: int, corners: Tuple[float, float, float, float]):
+        for cell in self._span(corners):
+            self._cells[cell].append(key)
+
+    def query(self, corners: Tuple[float, float, float, float]) -> List[int]:
+        """Candidate keys in insertion order (a key spanning several cells is returned once)."""
+        found = set()
+        for cell in self._span(corners):
+            found.update(self._cells.get(cell, ()))
+        return sorted(found)
+
+
+def merge_order(detections: List[Dict], priority: Optional[Priority] = None) -> List[int]:
+    """Indices sorted by (priority desc, confidence desc, input position)."""
+    return sorted(
+        range(len(detections)),
+        key=lambda i: (-(priority(detections[i]) if priority else 0), -_confidence(detections[i]), i),
+    )
+
+
+def cluster_detections(
+    detections: List[Dict],
+    iou_threshold: float,
+    priority: Optional[Priority] = None,
+    cell_size: Optional[float] = None,
+) -> List[List[int]]:
+    """
+    Greedy overlap clusters: each detection joins the first-ranked leader
+    it overlaps with IoU > iou_threshold, or becomes a leader itself.
+    Returns clusters (leader first) in leader rank order.
+
+    cell_size defaults to the median box side, so a typical box touches
+    at most four cells and only nearby leaders are compared.
+    """
+    if not detections:
+        return []
+    corners = [_corners(d.get("bbox")) for d in detections]
+    if cell_size is None:
+        sides = [max(c[2] - c[0], c[3] - c[1]) for c in corners]
+        cell_size = statistics.median(sides) or 1.0
+    grid = BoxGrid(cell_size)
+
+    clusters: List[List[int]] = []
+    for index in merge_order(detections, priority):
+        box = corners[index]
+        # Leaders are inserted in rank order, so the first match is the best one
+        for leader in grid.query(box):
+            if _corners_iou(corners[clusters[leader][0]], box) > iou_threshold:
+                clusters[leader].append(index)
+                break
+        else:
+            grid.insert(len(clusters), box)
+            clusters.append([index])
+    return clusters
+
+
+def non_max_suppression(
+    detections: List[Dict],
+    iou_threshold: float = 0.3,
+    priority: Optional[Priority] = None,
+    cell_size: Optional[float] = None,
+) -> List[Dict]:
+    """Best-ranked detection of each overlap cluster, in rank order."""
+    return [
+        detections[cluster[0]]
+        for cluster in cluster_detections(detections, iou_threshold, priority, cell_size)
+    ]
+
+
+def weighted_box_fusion(
+    detections: List[Dict],
+    iou_threshold: float = 0.3,
+    priority: Optional[Priority] = None,
+    cell_size: Optional[float] = None,
+) -> List[Dict]:
+    """
+    One detection per overlap cluster: the leader's fields with the
+    confidence-weighted mean box and the members' mean confidence.
+    Fused detections carry fused_count and fused_methods.
+    """
+    fused = []
+    for cluster in cluster_detections(detections, iou_threshold, priority, cell_size):
+        leader = detections[cluster[0]]
+        if len(cluster) == 1:
+            fused.append(leader)
+            continue
+        weights = [_confidence(detections[i]) for i in cluster]
+        if sum(weights) <= 0:
+            weights = [1.0] * len(cluster)
+        total = sum(weights)
+        boxes = [_corners(detections[i].get("bbox")) for i in cluster]
+        x1, y1, x2, y2 = (sum(w * box[k] for w, box in zip(weights, boxes)) / total for k in range(4))
+        merged = dict(leader)
+        merged["bbox"] = {"x": round(x1), "y": round(y1), "width": round(x2 - x1), "height": round(y2 - y1)}
+        merged["confidence"] = round(sum(_confidence(detections[i]) for i in cluster) / len(cluster), 4)
+        merged["fused_count"] = len(cluster)
+        merged["fused_methods"] = sorted({str(detections[i].get("detection_method", "unknown")) for i in cluster})
+        fused.append(merged)
+    return fused
@@ -0,0 +1,352 @@
+# backend/services/discogs_client.py
+# UTF-8, English only
+
+"""
+Discogs Client
+Single HTTP entry point for every Discogs API call in the backend.
+
+- Pooling: one requests.Session with a keep-alive connection pool, so
+  calls reuse TLS connections instead of opening one each
+- Rate limit: token bucket sized from X-Discogs-Ratelimit (requests per
+  moving minute) and clamped to X-Discogs-Ratelimit-Remaining after every
+  response; callers wait for a token instead of sleeping blindly. A 429
+  empties the bucket and is retried after Retry-After
+- Cache: GET responses stored on disk with a per-endpoint TTL; stale
+  entries with an ETag / Last-Modified are revalidated (304 = reuse)
+- Single-flight: identical concurrent GETs share one upstream call
+- Async: aget() runs the same pipeline in a worker thread
+
+Responses are DiscogsResponse objects (status_code, json(), text) so
+existing call sites keep their shape.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from backend.core.stage_metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+DISCOGS_TOKEN = os.getenv("DISCOGS_TOKEN")
+DISCOGS_BASE_URL = os.getenv("DISCOGS_API_URL", "https://api.discogs.com")
+USER_AGENT = os.getenv("DISCOGS_USER_AGENT", "RecordsAI/1.0")
+CACHE_DIR = Path(os.getenv("DISCOGS_CACHE_DIR", "storage/cache/discogs"))
+POOL_SIZE = int(os.getenv("DISCOGS_POOL_SIZE", "10"))
+REQUEST_TIMEOUT = float(os.getenv("DISCOGS_TIMEOUT", "10"))
+# Longest a caller waits for a rate-limit token before giving up
+MAX_WAIT_SECONDS = float(os.getenv("DISCOGS_MAX_WAIT", "30"))
+MAX_RETRIES = int(os.getenv("DISCOGS_MAX_RETRIES", "2"))
+# Discogs defaults: 60 requests/minute authenticated, 25 anonymous
+DEFAULT_RATE_LIMIT = 60 if DISCOGS_TOKEN else 25
+
+# Cache TTL (seconds) by path prefix; first match wins, 0 = never cached
+CACHE_TTLS = (
+    ("/users/", 0),
+    ("/marketplace/listings/", 15 * 60),
+    ("/marketplace/stats/", 60 * 60),
+    ("/database/search", 6 * 60 * 60),
+    ("/releases/", 7 * 24 * 60 * 60),
+    ("/masters/", 7 * 24 * 60 * 60),
+    ("/artists/", 7 * 24 * 60 * 60),
+    ("/labels/", 7 * 24 * 60 * 60),
+)
+CACHED_HEADERS = ("ETag", "Last-Modified", "Content-Type")
+
+
+class DiscogsRateLimited(RuntimeError):
+    """No rate-limit token within the caller's wait budget."""
+
+
+@dataclass
+class DiscogsResponse:
+    status_code: int
+    content: bytes
+    headers: CaseInsensitiveDict = field(default_factory=CaseInsensitiveDict)
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class RateLimiter:
+    """
+    Token bucket refilled at limit/60 per second. observe() applies the
+    server's view (limit, remaining) so several processes sharing one
+    token converge on the real budget.
+    """
+
+    def __init__(self, limit: int = DEFAULT_RATE_LIMIT, window: float = 60.0):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(float(self.limit), self.tokens + (now - self._updated) * self.limit / self.window)
+        self._updated = now
+
+    def acquire(self, max_wait: float = MAX_WAIT_SECONDS) -> float:
+        """Take one token, waiting up to max_wait seconds. Returns seconds waited."""
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return time.monotonic() - started
+                wait = (1 - self.tokens) * self.window / self.limit
+                if time.monotonic() - started + wait > max_wait:
+                    raise DiscogsRateLimited(f"Discogs rate limit: no token within {max_wait}s")
+                self._cond.wait(wait)
+
+    def observe(self, headers: Dict[str, str]):
+        """Clamp the bucket to X-Discogs-Ratelimit / -Remaining from a response."""
+        with self._cond:
+            self._refill()
+            limit = headers.get("X-Discogs-Ratelimit")
+            if limit and limit.isdigit() and int(limit) > 0:
+                self.limit = int(limit)
+            remaining = headers.get("X-Discogs-Ratelimit-Remaining")
+            if remaining and remaining.isdigit():
+                self.tokens = min(self.tokens, float(remaining))
+
+    def exhaust(self):
+        """Server said 429: stop sending until the bucket refills."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+def cache_ttl(path: str) -> int:
+    for prefix, ttl in CACHE_TTLS:
+        if path.startswith(prefix):
+            return ttl
+    return 0
+
+
+class DiscogsClient:
+    """Pooled, rate-governed, cached Discogs API client (thread-safe)."""
+
+    def __init__(
+        self,
+        base_url: str = DISCOGS_BASE_URL,
+        token: Optional[str] = DISCOGS_TOKEN,
+        cache_dir: Optional[Path] = CACHE_DIR,
+        rate_limit: int = DEFAULT_RATE_LIMIT,
+        pool_size: int = POOL_SIZE,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_limit)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+        if token:
+            self.session.headers["Authorization"] = f"Discogs token={token}"
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Upstream requests sent by the current thread (see thread_upstream)
+        self._local = threading.local()
+        self._stats = {
+            "requests": 0, "upstream": 0, "cache_hits": 0, "revalidated": 0,
+            "coalesced": 0, "rate_limited": 0, "wait_seconds": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, ttl: Optional[int] = None,
+            max_wait: float = MAX_WAIT_SECONDS) -> DiscogsResponse:
+        """
+        GET base_url + path. Served from cache while fresh (ttl defaults
+        by endpoint, see CACHE_TTLS); identical concurrent calls coalesce.
+        """
+        ttl = cache_ttl(path) if ttl is None else ttl
+        key = self._cache_key(path, params)
+        self._count("requests")
+
+        entry = self._load(key) if ttl > 0 else None
+        if entry is not None and time.time() - entry["fetched_at"] < ttl:
+            self._count("cache_hits")
+            return self._from_entry(entry)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            self._count("coalesced")
+            return future.result()
+
+        try:
+            response = self._fetch(path, params, entry, key if ttl > 0 else None, max_wait)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def aget(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> DiscogsResponse:
+        """Async get(): same pool, limiter, cache and single-flight."""
+        return await asyncio.to_thread(self.get, path, params, **kwargs)
+
+    def request(self, method: str, path: str, max_wait: float = MAX_WAIT_SECONDS, **kwargs) -> DiscogsResponse:
+        """Uncached, uncoalesced call (POST / PUT / DELETE), still rate limited."""
+        self._count("requests")
+        return self._send(method, path, max_wait=max_wait, **kwargs)
+
+    def thread_upstream(self) -> int:
+        """
+        Upstream requests sent so far by the calling thread (retries and
+        revalidations included; coalesced waits are not). Callers take the
+        difference around their own calls to measure what they spent.
+        """
+        return getattr(self._local, "upstream", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "wait_seconds": round(self._stats["wait_seconds"], 3),
+                "in_flight_keys": len(self._inflight),
+                "rate_limit": self.limiter.limit,
+                "tokens": round(self.limiter.tokens, 2),
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _count(self, name: str, amount: float = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _fetch(self, path: str, params: Optional[Dict[str, Any]], entry: Optional[Dict[str, Any]],
+               key: Optional[str], max_wait: float) -> DiscogsResponse:
+        headers = {}
+        if entry is not None:
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        response = self._send("GET", path, params=params, headers=headers, max_wait=max_wait)
+        if response.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            entry["fetched_at"] = time.time()
+            self._store(key, entry)
+            return self._from_entry(entry)
+        if response.status_code == 200 and key is not None:
+            self._store(key, {
+                "fetched_at": time.time(),
+                "status_code": 200,
+                "headers": {k: response.headers[k] for k in CACHED_HEADERS if k in response.headers},
+                "body": response.text,
+            })
+        return response
+
+    def _send(self, method: str, path: str, max_wait: float, **kwargs) -> DiscogsResponse:
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        for attempt in range(MAX_RETRIES + 1):
+            self._count("wait_seconds", self.limiter.acquire(max_wait))
+            self._count("upstream")
+            self._local.upstream = self.thread_upstream() + 1
+            with external_call("discogs"):
+                raw = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            self.limiter.observe(raw.headers)
+            if raw.status_code != 429 or attempt == MAX_RETRIES:
+                return DiscogsResponse(raw.status_code, raw.content, raw.headers)
+            self._count("rate_limited")
+            self.limiter.exhaust()
+            delay = self._retry_after(raw.headers.get("Retry-After"))
+            logger.warning(f"[Discogs] 429 on {path}, retrying in {delay:.1f}s")
+            if delay > max_wait:
+                raise DiscogsRateLimited(f"Discogs asked to retry after {delay:.0f}s")
+            time.sleep(delay)
+
+    def _retry_after(self, value: Optional[str]) -> float:
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return self.limiter.window / self.limiter.limit
+
+    @staticmethod
+    def _cache_key(path: str, params: Optional[Dict[str, Any]]) -> str:
+        canonical = json.dumps([path, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache_dir is None:
+            return None
+        try:
+            return json.loads(self._cache_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: Optional[str], entry: Dict[str, Any]):
+        if self.cache_dir is None or key is None:
+            return
+        path = self._cache_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(entry), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"[Discogs] Cache write failed for {path}: {e}")
+
+    @staticmethod
+    def _from_entry(entry: Dict[str, Any]) -> DiscogsResponse:
+        return DiscogsResponse(entry["status_code"], entry["body"].encode("utf-8"),
+                               CaseInsensitiveDict(entry["headers"]), from_cache=True)
+
+
+# Global instance
+discogs_client = DiscogsClient()
@@ -5,10 +5,9 @@ Adds vinyl records to user's Discogs collection.
 """
 
 import os
-import requests
 import logging
 from typing import Dict, Optional, Any
-from backend.services.vinyl_pricing_service import DISCOGS_BASE_URL
+from backend.services.discogs_client import discogs_client
 
 logger = logging.getLogger(__name__)
 
@@ -23,13 +22,6 @@ class DiscogsCollectionService:
     Service for adding records to Discogs user collection.
     """
     
-    def __init__(self):
-        self.headers = {
-            "Authorization": f"Discogs token={DISCOGS_TOKEN}",
-            "User-Agent": "RecordsAI/1.0",
-            "Content-Type": "application/json"
-        }
-    
     def search_release(
         self,
         artist: str,
@@ -67,14 +59,7 @@ class DiscogsCollectionService:
             if catalog_number:
                 params["catno"] = catalog_number
             
-            url = f"{DISCOGS_BASE_URL}/database/search"
-            
-            response = requests.get(
-                url,
-                headers=self.headers,
-                params=params,
-                timeout=10
-            )
+            response = discogs_client.get("/database/search", params)
             
             if response.status_code != 200:
                 logger.error(f"Discogs search failed: {response.status_code} - {response.text}")
@@ -228,18 +213,13 @@ class DiscogsCollectionService:
         
         try:
             # Add release to collection
-            url = f"{DISCOGS_BASE_URL}/users/{discogs_username}/collection/folders/{folder_id}/releases/{release_id}"
+            path = f"/users/{discogs_username}/collection/folders/{folder_id}/releases/{release_id}"
             
             data = {}
             if notes:
                 data["notes"] = notes
             
-            response = requests.post(
-                url,
-                headers=self.headers,
-                json=data if data else None,
-                timeout=10
-            )
+            response = discogs_client.request("POST", path, json=data if data else None)
             
             if response.status_code == 201:
                 # Successfully added
@@ -285,13 +265,7 @@ class DiscogsCollectionService:
             }
         
         try:
-            url = f"{DISCOGS_BASE_URL}/users/{discogs_username}/collection/folders"
-            
-            response = requests.get(
-                url,
-                headers=self.headers,
-                timeout=10
-            )
+            response = discogs_client.get(f"/users/{discogs_username}/collection/folders")
             
             if response.status_code == 200:
                 folders = response.json().get("folders", [])
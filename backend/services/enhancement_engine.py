@@ -0,0 +1,215 @@
+# backend/services/enhancement_engine.py
+# UTF-8, English only
+
+"""
+Enhancement Engine
+Bounded-time image enhancement used by ImageEnhancementService:
+
+- decode_for_recognition: decode straight to the resolution the
+  recognition model consumes (JPEG DCT-domain reduction, then INTER_AREA),
+  so a 48MP photo never exists in memory at full size
+- plan_enhancement: the cheapest operation set for the measured
+  Laplacian variance (unsharp only for mild blur, bilateral denoise
+  only for severe blur, upscale only below the minimum resolution)
+- run_tiled: applies the plan in horizontal strips with enough overlap
+  that the output equals a whole-image pass, checking a cooperative
+  deadline before each strip
+- encode_jpeg: the single JPEG encode of the result
+"""
+
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from backend.core.deadline import DeadlineExceeded, remaining
+
+logger = logging.getLogger(__name__)
+
+# Longest side sent to recognition (GPT-4o vision downsizes to fit 2048x2048)
+MAX_OUTPUT_SIDE = int(os.getenv("ENHANCE_MAX_OUTPUT_SIDE", "2048"))
+TILE_ROWS = int(os.getenv("ENHANCE_TILE_ROWS", "256"))
+JPEG_QUALITY = int(os.getenv("ENHANCE_JPEG_QUALITY", "95"))
+# Below MIN_LAPLACIAN_VARIANCE * SEVERE_BLUR_RATIO blur is treated as severe (denoise + strong sharpen)
+SEVERE_BLUR_RATIO = 0.3
+
+_REDUCED_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+class EnhancementTimeout(DeadlineExceeded):
+    """The enhancement deadline passed between tiles."""
+
+
+def laplacian_variance(gray: np.ndarray) -> float:
+    """Focus measure; same value as Laplacian(CV_64F).var() without a float64 copy of the image."""
+    _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+    return float(stddev[0][0] ** 2)
+
+
+def deadline_after(seconds: float) -> float:
+    """Monotonic deadline: `seconds` from now, or sooner if the request's own deadline is closer."""
+    budget = seconds
+    left = remaining()
+    if left is not None:
+        budget = min(budget, left)
+    return time.monotonic() + budget
+
+
+def check_deadline(deadline: Optional[float], stage: str):
+    if deadline is not None and time.monotonic() >= deadline:
+        raise EnhancementTimeout(f"Enhancement deadline passed before {stage}")
+
+
+def decode_for_recognition(
+    data: bytes,
+    size: Tuple[int, int],
+    max_side: int = MAX_OUTPUT_SIDE
+) -> np.ndarray:
+    """
+    BGR image no larger than max_side. `size` is the (width, height) from
+    the header; JPEGs are decoded at 1/2, 1/4 or 1/8 scale when that still
+    covers max_side, and any remainder is an INTER_AREA resize.
+    """
+    longest = max(size)
+    factor = 1
+    for candidate in (8, 4, 2):
+        if longest / candidate >= max_side:
+            factor = candidate
+            break
+    buf = np.frombuffer(data, dtype=np.uint8)
+    image = cv2.imdecode(buf, _REDUCED_FLAGS[factor]) if factor > 1 else None
+    if image is None:
+        image = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image")
+    height, width = image.shape[:2]
+    if max(width, height) > max_side:
+        scale = max_side / max(width, height)
+        image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    return image
+
+
+@dataclass
+class EnhancementPlan:
+    """Operations to run, cheapest first; empty ops = nothing worth doing."""
+
+    scale: float = 1.0                  # upscale factor (1.0 = none)
+    denoise: bool = False               # bilateral filter (severe blur only)
+    sharpen_amount: float = 0.0         # unsharp mask weight (0 = none)
+    sharpen_sigma: float = 1.0
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def ops(self) -> List[str]:
+        names = []
+        if self.scale > 1.0:
+            names.append("upscale")
+        if self.denoise:
+            names.append("denoise")
+        if self.sharpen_amount > 0:
+            names.append("sharpen")
+        return names
+
+    @property
+    def margin(self) -> int:
+        """Rows of overlap a strip needs so filters see the same neighbourhood as a whole-image pass."""
+        rows = 0
+        if self.denoise:
+            rows += 4  # bilateral d=9
+        if self.sharpen_amount > 0:
+            rows += math.ceil(3 * self.sharpen_sigma) + 1
+        return rows
+
+
+def plan_enhancement(
+    width: int,
+    height: int,
+    laplacian_var: float,
+    min_resolution: int,
+    min_laplacian_variance: float,
+    max_side: int = MAX_OUTPUT_SIDE
+) -> EnhancementPlan:
+    """Cheapest plan for the measured resolution and blur."""
+    plan = EnhancementPlan()
+    if width < min_resolution:
+        plan.scale = min(2.0, max_side / max(width, height))
+        plan.sharpen_amount = 0.3
+        plan.reasons.append("resolution_too_low")
+    if laplacian_var < min_laplacian_variance * SEVERE_BLUR_RATIO:
+        plan.denoise = True
+        plan.sharpen_amount = 1.0
+        plan.sharpen_sigma = 1.5
+        plan.reasons.append("severe_blur")
+    elif laplacian_var < min_laplacian_variance:
+        plan.sharpen_amount = max(plan.sharpen_amount, 0.6)
+        plan.reasons.append("blur")
+    return plan
+
+
+def _denoise(tile: np.ndarray) -> np.ndarray:
+    return cv2.bilateralFilter(tile, d=9, sigmaColor=75, sigmaSpace=75)
+
+
+def _sharpener(amount: float, sigma: float) -> Callable[[np.ndarray], np.ndarray]:
+    def sharpen(tile: np.ndarray) -> np.ndarray:
+        blurred = cv2.GaussianBlur(tile, (0, 0), sigma)
+        return cv2.addWeighted(tile, 1.0 + amount, blurred, -amount, 0)
+    return sharpen
+
+
+def run_tiled(
+    image: np.ndarray,
+    plan: EnhancementPlan,
+    deadline: Optional[float] = None,
+    tile_rows: int = TILE_ROWS,
+    timings: Optional[Dict[str, float]] = None
+) -> np.ndarray:
+    """
+    Apply the plan to `image` (BGR) and return the result.
+
+    Raises:
+        EnhancementTimeout: the deadline passed before a strip started
+    """
+    timings = timings if timings is not None else {}
+
+    if plan.scale > 1.0:
+        check_deadline(deadline, "upscale")
+        started = time.perf_counter()
+        height, width = image.shape[:2]
+        image = cv2.resize(image, (round(width * plan.scale), round(height * plan.scale)), interpolation=cv2.INTER_LANCZOS4)
+        timings["upscale_ms"] = (time.perf_counter() - started) * 1000
+
+    steps = []
+    if plan.denoise:
+        steps.append(("denoise_ms", _denoise))
+    if plan.sharpen_amount > 0:
+        steps.append(("sharpen_ms", _sharpener(plan.sharpen_amount, plan.sharpen_sigma)))
+    if not steps:
+        return image
+
+    margin = plan.margin
+    height = image.shape[0]
+    out = np.empty_like(image)
+    for top in range(0, height, tile_rows):
+        check_deadline(deadline, f"tile at row {top}")
+        bottom = min(height, top + tile_rows)
+        start, end = max(0, top - margin), min(height, bottom + margin)
+        tile = image[start:end]
+        for name, step in steps:
+            started = time.perf_counter()
+            tile = step(tile)
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+        out[top:bottom] = tile[top - start:bottom - start]
+    return out
+
+
+def encode_jpeg(image: np.ndarray, quality: int = JPEG_QUALITY) -> bytes:
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return encoded.tobytes()
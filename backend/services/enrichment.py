@@ -2,34 +2,39 @@
 Enrichment Service - Cost-Optimized Metadata Enrichment
 Tries cheap sources first, escalates only when needed
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
+import os
+from typing import Dict, Any, List, Optional
 
 from backend.models.preview_record_db import PreviewRecordDB
 from backend.models.record_state import RecordState
 from backend.db import SessionLocal
+from backend.services.preview_events import publish_preview_state
+from backend.services.enrichment_engine import BACKFILL, INTERACTIVE, enrichment_engine
+from backend.core.executors import OPENAI_POOL, run_in_pool
 
 logger = logging.getLogger(__name__)
 
+# Records of one backfill in flight at a time (each may escalate to AI)
+BACKFILL_CONCURRENCY = int(os.getenv("ENRICHMENT_BACKFILL_CONCURRENCY", "8"))
+
 
 class EnrichmentService:
     """
     Enrichment Service
     
     Cost-optimized enrichment strategy:
-    1. Try cache (free, instant)
-    2. Try Discogs API (free, fast)
-    3. Only call AI if still missing (expensive)
+    1. Try catalogue sources via the enrichment engine (persistent cache,
+       Discogs + MusicBrainz in parallel; free)
+    2. Only call AI if still missing (expensive)
     """
     
-    def __init__(self):
-        self.cache = {}  # Simple in-memory cache (can be Redis in production)
-    
     async def enrich_metadata(
         self, 
         preview_id: str,
-        force_ai: bool = False
+        force_ai: bool = False,
+        priority: int = INTERACTIVE
     ) -> Dict[str, Any]:
         """
         Enrich metadata for a preview record.
@@ -37,15 +42,19 @@ class EnrichmentService:
         Args:
             preview_id: Preview record ID
             force_ai: Skip cache/Discogs and go straight to AI
+            priority: INTERACTIVE (user waiting) or BACKFILL (queued behind)
         
         Returns:
             {
                 "preview_id": "...",
                 "state": "ENRICHED",
-                "enrichment_source": "cache|discogs|ai",
+                "enrichment_source": "cache|discogs,musicbrainz|ai",
                 "metadata": {...}
             }
         """
+        # Read what the lookups need and release the connection before
+        # awaiting them: a backfill queues behind interactive work and
+        # must not hold a pooled connection while it waits
         db = SessionLocal()
         try:
             preview = db.query(PreviewRecordDB).filter(
@@ -58,126 +67,44 @@ class EnrichmentService:
             if preview.state != RecordState.USER_REVIEWED:
                 logger.warning(f"Preview {preview_id} not in USER_REVIEWED state: {preview.state}")
             
-            # Step 1: Check cache (free, instant)
-            if not force_ai:
-                cache_key = self._build_cache_key(preview)
-                cached = self._get_from_cache(cache_key)
-                if cached:
-                    logger.info(f"[ENRICHMENT] Cache hit for {preview_id}")
-                    return self._apply_enrichment(preview, cached, "cache", db)
-            
-            # Step 2: Try Discogs API (free, fast)
-            if not force_ai:
-                discogs_result = await self._try_discogs(preview)
-                if discogs_result:
-                    logger.info(f"[ENRICHMENT] Discogs hit for {preview_id}")
-                    # Cache the result
-                    self._set_cache(cache_key, discogs_result)
-                    return self._apply_enrichment(preview, discogs_result, "discogs", db)
-            
-            # Step 3: AI enrichment (expensive, last resort)
+            artist, album, catalog_number = preview.artist, preview.album or preview.title, preview.catalog_number
+            image_path = preview.canonical_image_path
+        finally:
+            db.close()
+        
+        try:
+            # Step 1: Catalogue sources (cached, free): Discogs + MusicBrainz in parallel
+            if not force_ai and (artist or album):
+                found = await enrichment_engine.enrich(artist, album, catalog_number, priority=priority)
+                if found["metadata"]:
+                    source = "cache" if all(
+                        s["status"].startswith("cached") for s in found["sources"].values()
+                    ) else ",".join(sorted(set(found["field_sources"].values())))
+                    logger.info(f"[ENRICHMENT] {source} hit for {preview_id}")
+                    return self._apply_enrichment(preview_id, found["metadata"], source)
+            
+            # Step 2: AI enrichment (expensive, last resort)
             logger.info(f"[ENRICHMENT] Escalating to AI for {preview_id}")
-            ai_result = await self._ai_enrichment(preview)
+            ai_result = await self._ai_enrichment(image_path)
             if ai_result:
-                # Cache the result
-                self._set_cache(cache_key, ai_result)
-                return self._apply_enrichment(preview, ai_result, "ai", db)
+                return self._apply_enrichment(preview_id, ai_result, "ai")
             
             # No enrichment found
             logger.warning(f"[ENRICHMENT] No enrichment found for {preview_id}")
-            preview.state = RecordState.ENRICHED
-            preview.enrichment_source = "none"
-            db.commit()
-            
-            return {
-                "preview_id": preview_id,
-                "state": preview.state.value,
-                "enrichment_source": "none",
-                "metadata": self._extract_metadata(preview)
-            }
+            return self._apply_enrichment(preview_id, {}, "none")
             
         except Exception as e:
             logger.error(f"Enrichment failed for {preview_id}: {e}", exc_info=True)
             raise
-        finally:
-            db.close()
-    
-    def _build_cache_key(self, preview: PreviewRecordDB) -> str:
-        """Build cache key from preview metadata."""
-        parts = [
-            preview.artist or "",
-            preview.album or preview.title or "",
-            preview.label or "",
-            preview.year or ""
-        ]
-        return "|".join(parts).lower().strip()
-    
-    def _get_from_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get enrichment from cache."""
-        return self.cache.get(cache_key)
-    
-    def _set_cache(self, cache_key: str, data: Dict[str, Any]):
-        """Store enrichment in cache."""
-        self.cache[cache_key] = data
-        # Simple cache eviction (keep last 1000 entries)
-        if len(self.cache) > 1000:
-            # Remove oldest entry (simple FIFO)
-            oldest_key = next(iter(self.cache))
-            del self.cache[oldest_key]
-    
-    async def _try_discogs(self, preview: PreviewRecordDB) -> Optional[Dict[str, Any]]:
-        """Try Discogs API for metadata enrichment."""
-        try:
-            # Check if Discogs token is available
-            import os
-            discogs_token = os.getenv("DISCOGS_TOKEN")
-            if not discogs_token:
-                logger.debug("Discogs token not configured, skipping")
-                return None
-            
-            from backend.services.vinyl_pricing_service import vinyl_pricing_service
-            
-            # Build search query
-            query_parts = []
-            if preview.artist:
-                query_parts.append(preview.artist)
-            if preview.album or preview.title:
-                query_parts.append(preview.album or preview.title)
-            
-            if not query_parts:
-                return None
-            
-            query = " ".join(query_parts)
-            
-            # Search Discogs
-            results = vinyl_pricing_service.search_discogs(query)
-            if results and len(results) > 0:
-                # Use first result
-                result = results[0]
-                return {
-                    "artist": result.get("artist") or preview.artist,
-                    "album": result.get("album") or preview.album or preview.title,
-                    "title": result.get("title") or preview.title,
-                    "label": result.get("label") or preview.label,
-                    "year": result.get("year") or preview.year,
-                    "catalog_number": result.get("catalog_number") or preview.catalog_number,
-                    "country": result.get("country") or preview.country,
-                    "format": result.get("format") or preview.format
-                }
-            
-            return None
-            
-        except Exception as e:
-            logger.warning(f"Discogs enrichment failed: {e}")
-            return None
     
-    async def _ai_enrichment(self, preview: PreviewRecordDB) -> Optional[Dict[str, Any]]:
+    async def _ai_enrichment(self, image_path: Optional[str]) -> Optional[Dict[str, Any]]:
         """AI-based enrichment (expensive, last resort)."""
         try:
             from backend.services.novarchive_gpt_service import novarchive_gpt_service
             
-            image_path = preview.canonical_image_path
-            result = novarchive_gpt_service.analyze_vinyl_record(
+            result = await run_in_pool(
+                OPENAI_POOL,
+                novarchive_gpt_service.analyze_vinyl_record,
                 file_path=image_path,
                 raw_bytes=None
             )
@@ -199,41 +126,69 @@ class EnrichmentService:
     
     def _apply_enrichment(
         self,
-        preview: PreviewRecordDB,
+        preview_id: str,
         enrichment: Dict[str, Any],
-        source: str,
-        db: Session
+        source: str
     ) -> Dict[str, Any]:
-        """Apply enrichment data to preview record."""
-        # Only fill missing fields
-        if not preview.artist and enrichment.get("artist"):
-            preview.artist = enrichment["artist"]
-        if not preview.album and enrichment.get("album"):
-            preview.album = enrichment["album"]
-        if not preview.title and enrichment.get("title"):
-            preview.title = enrichment["title"]
-        if not preview.label and enrichment.get("label"):
-            preview.label = enrichment["label"]
-        if not preview.year and enrichment.get("year"):
-            preview.year = enrichment["year"]
-        if not preview.catalog_number and enrichment.get("catalog_number"):
-            preview.catalog_number = enrichment["catalog_number"]
-        if not preview.country and enrichment.get("country"):
-            preview.country = enrichment["country"]
-        if not preview.format and enrichment.get("format"):
-            preview.format = enrichment["format"]
+        """Apply enrichment data to preview record (in a fresh, short session)."""
+        db = SessionLocal()
+        try:
+            preview = db.query(PreviewRecordDB).filter(
+                PreviewRecordDB.preview_id == preview_id
+            ).first()
+            if not preview:
+                raise ValueError(f"Preview record not found: {preview_id}")
+            
+            # Only fill missing fields
+            if not preview.artist and enrichment.get("artist"):
+                preview.artist = enrichment["artist"]
+            if not preview.album and enrichment.get("album"):
+                preview.album = enrichment["album"]
+            if not preview.title and enrichment.get("title"):
+                preview.title = enrichment["title"]
+            if not preview.label and enrichment.get("label"):
+                preview.label = enrichment["label"]
+            if not preview.year and enrichment.get("year"):
+                preview.year = enrichment["year"]
+            if not preview.catalog_number and enrichment.get("catalog_number"):
+                preview.catalog_number = enrichment["catalog_number"]
+            if not preview.country and enrichment.get("country"):
+                preview.country = enrichment["country"]
+            if not preview.format and enrichment.get("format"):
+                preview.format = enrichment["format"]
+            
+            preview.state = RecordState.ENRICHED
+            preview.enrichment_source = source
+            db.commit()
+            db.refresh(preview)
+            publish_preview_state(preview, enrichment_source=source)
+            
+            return {
+                "preview_id": preview.preview_id,
+                "state": preview.state.value,
+                "enrichment_source": source,
+                "metadata": self._extract_metadata(preview)
+            }
+        finally:
+            db.close()
+    
+    async def backfill(self, preview_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Enrich many records at BACKFILL priority: interactive requests
+        arriving meanwhile are served first. At most BACKFILL_CONCURRENCY
+        records are in flight at a time. Failures are returned per record.
+        """
+        gate = asyncio.Semaphore(BACKFILL_CONCURRENCY)
         
-        preview.state = RecordState.ENRICHED
-        preview.enrichment_source = source
-        db.commit()
-        db.refresh(preview)
+        async def one(pid: str) -> Dict[str, Any]:
+            async with gate:
+                return await self.enrich_metadata(pid, priority=BACKFILL)
         
-        return {
-            "preview_id": preview.preview_id,
-            "state": preview.state.value,
-            "enrichment_source": source,
-            "metadata": self._extract_metadata(preview)
-        }
+        results = await asyncio.gather(*(one(pid) for pid in preview_ids), return_exceptions=True)
+        return [
+            r if not isinstance(r, Exception) else {"preview_id": pid, "error": str(r)}
+            for pid, r in zip(preview_ids, results)
+        ]
     
     def _extract_metadata(self, preview: PreviewRecordDB) -> Dict[str, Any]:
         """Extract metadata dict from preview record."""
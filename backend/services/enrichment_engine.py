@@ -0,0 +1,535 @@
+# backend/services/enrichment_engine.py
+# UTF-8, English only
+
+"""
+Enrichment Engine
+Asyncio metadata enrichment from external catalogues (Discogs,
+MusicBrainz), replacing the single-threaded EnrichmentWorker that called
+them one after another.
+
+- Sources run in parallel for a record; each has its own concurrency
+  limit, request rate and deadline. Blocking calls run in the
+  "enrichment" pool: a call cut off at its deadline keeps its thread
+  until it returns, and must not hold one of the recognition ("openai")
+  workers meanwhile
+- Results are merged field by field: the first source in priority order
+  with a value wins (FIELD_PRIORITY overrides the order per field)
+- Persistent TTL cache (SQLite, WAL) per source, keyed by normalized
+  artist / title / catalog number; empty answers are cached shorter,
+  errors and timeouts not at all
+- Priority queue: interactive lookups are taken before queued backfill,
+  and admitted first at a busy source; identical lookups in flight share
+  one run
+"""
+
+import asyncio
+import functools
+import heapq
+import itertools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from backend.core.executors import ENRICHMENT_POOL, ExecutorSaturated, run_in_pool
+from backend.core.stage_metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKFILL = 10
+
+WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "8"))
+CACHE_PATH = Path(os.getenv("ENRICHMENT_CACHE_PATH", str(Path("storage") / "cache" / "enrichment_cache.sqlite3")))
+CACHE_TTL_SECONDS = float(os.getenv("ENRICHMENT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+EMPTY_TTL_SECONDS = float(os.getenv("ENRICHMENT_EMPTY_TTL_SECONDS", str(24 * 3600)))
+
+# Longest a Discogs lookup waits for a rate-limit token (below the source deadline)
+DISCOGS_MAX_WAIT = float(os.getenv("ENRICHMENT_DISCOGS_MAX_WAIT", "2"))
+
+MUSICBRAINZ_URL = os.getenv("MUSICBRAINZ_API_URL", "https://musicbrainz.org/ws/2")
+MUSICBRAINZ_USER_AGENT = os.getenv("MUSICBRAINZ_USER_AGENT", "RecordsAI/2.0 ( https://zyagrolia.com )")
+
+# Per-field source order where it differs from the source order
+FIELD_PRIORITY: Dict[str, Tuple[str, ...]] = {
+    "country": ("musicbrainz", "discogs"),
+}
+
+
+@dataclass(frozen=True)
+class EnrichmentSource:
+    name: str
+    fn: Callable[[Dict[str, str]], Optional[Dict[str, Any]]]   # blocking, gets the query
+    concurrency: int = 4
+    rate: float = 0.0          # requests per second, 0 = not limited here
+    timeout: float = 10.0
+    ttl: float = CACHE_TTL_SECONDS
+
+
+def normalize(text: Optional[Any]) -> str:
+    """Case, accents, punctuation and spacing folded away."""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def cache_key(artist: Optional[str], title: Optional[str], catalog_number: Optional[str] = None) -> str:
+    return "|".join((normalize(artist), normalize(title), normalize(catalog_number).replace(" ", "")))
+
+
+def merge(results: Dict[str, Optional[Dict[str, Any]]], order: Iterable[str],
+          field_priority: Optional[Dict[str, Tuple[str, ...]]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Merge per-source metadata: for each field, the first source (in
+    field_priority, else source order) with a non-empty value wins.
+    Returns (metadata, field -> source).
+    """
+    order = tuple(order)
+    field_priority = FIELD_PRIORITY if field_priority is None else field_priority
+    fields = {key for result in results.values() if result for key in result}
+    merged, sources = {}, {}
+    for key in sorted(fields):
+        preferred = field_priority.get(key, ())
+        for name in preferred + tuple(n for n in order if n not in preferred):
+            value = (results.get(name) or {}).get(key)
+            if value not in (None, "", [], {}):
+                merged[key], sources[key] = value, name
+                break
+    return merged, sources
+
+
+class RateLimiter:
+    """Async token bucket: `rate` requests per second, bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class PrioritySemaphore:
+    """Concurrency limit whose waiters are admitted by priority, then arrival."""
+
+    def __init__(self, limit: int):
+        self.limit = max(limit, 1)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int = INTERACTIVE):
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # admitted while being cancelled
+            raise
+
+    def release(self):
+        self._active -= 1
+        while self._waiters and self._active < self.limit:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self._active += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class EnrichmentCache:
+    """
+    Per-source results in SQLite (WAL, shared by the worker processes on
+    an instance); a new connection per operation, as in RecognitionCache.
+    """
+
+    def __init__(self, db_path: Optional[Path | str] = None):
+        self.db_path = Path(db_path or CACHE_PATH)
+        self.enabled = os.getenv("ENRICHMENT_CACHE_ENABLED", "true").lower() != "false"
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS enrichment_cache (
+                        source TEXT NOT NULL,
+                        cache_key TEXT NOT NULL,
+                        payload TEXT,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (source, cache_key)
+                    )
+                """)
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_enrichment_cache_expires_at ON enrichment_cache (expires_at)"
+                )
+            finally:
+                conn.close()
+            self._initialized = True
+
+    def get(self, source: str, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(hit, payload); a cached empty answer is (True, None)."""
+        if not self.enabled:
+            return False, None
+        try:
+            self._ensure_schema()
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT payload FROM enrichment_cache WHERE source = ? AND cache_key = ? AND expires_at > ?",
+                    (source, key, time.time())
+                ).fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"[EnrichmentCache] get failed: {e}")
+            return False, None
+        if row is None:
+            return False, None
+        return True, json.loads(row[0]) if row[0] is not None else None
+
+    def put(self, source: str, key: str, payload: Optional[Dict[str, Any]], ttl: float):
+        if not self.enabled or ttl <= 0:
+            return
+        now = time.time()
+        try:
+            data = json.dumps(payload, default=str) if payload is not None else None
+            self._ensure_schema()
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO enrichment_cache (source, cache_key, payload, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (source, key, data, now, now + ttl)
+                )
+                conn.execute("DELETE FROM enrichment_cache WHERE expires_at <= ?", (now,))
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"[EnrichmentCache] put failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            self._ensure_schema()
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT source, COUNT(*) FROM enrichment_cache WHERE expires_at > ? GROUP BY source",
+                    (time.time(),)
+                ).fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            return {"enabled": self.enabled, "error": str(e)}
+        return {"enabled": self.enabled, "path": str(self.db_path), "entries": dict(rows)}
+
+    def clear(self):
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM enrichment_cache")
+        finally:
+            conn.close()
+
+
+# ----------------------------------------------------------------------
+# Default sources
+# ----------------------------------------------------------------------
+
+def _discogs(query: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    from backend.services.discogs_client import discogs_client
+
+    params = {"type": "release", "per_page": 5}
+    if query.get("artist"):
+        params["artist"] = query["artist"]
+    if query.get("title"):
+        params["release_title"] = query["title"]
+    if query.get("catalog_number"):
+        params["catno"] = query["catalog_number"]
+    response = discogs_client.get("/database/search", params, max_wait=DISCOGS_MAX_WAIT)
+    if response.status_code != 200:
+        raise RuntimeError(f"Discogs search returned status {response.status_code}")
+    results = response.json().get("results") or []
+    if not results:
+        return None
+    first = results[0]
+    artist, _, album = (first.get("title") or "").partition(" - ")
+    return {
+        "artist": artist.strip() or None,
+        "album": album.strip() or None,
+        "label": (first.get("label") or [None])[0],
+        "year": str(first["year"]) if first.get("year") else None,
+        "catalog_number": first.get("catno"),
+        "country": first.get("country"),
+        "format": (first.get("format") or [None])[0],
+        "genre": ", ".join(first.get("genre") or []) or None,
+        "discogs_id": first.get("id"),
+    }
+
+
+_musicbrainz_session = requests.Session()
+_musicbrainz_session.headers.update({"User-Agent": MUSICBRAINZ_USER_AGENT, "Accept": "application/json"})
+
+
+def _musicbrainz(query: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    terms = []
+    for name, value in (("artist", query.get("artist")), ("release", query.get("title")),
+                        ("catno", query.get("catalog_number"))):
+        if value:
+            terms.append(f'{name}:"{value.replace(chr(34), "")}"')
+    with external_call("musicbrainz"):
+        response = _musicbrainz_session.get(
+            f"{MUSICBRAINZ_URL}/release/", params={"query": " AND ".join(terms), "fmt": "json", "limit": 5}, timeout=8
+        )
+    if response.status_code != 200:
+        raise RuntimeError(f"MusicBrainz search returned status {response.status_code}")
+    releases = response.json().get("releases") or []
+    if not releases:
+        return None
+    release = releases[0]
+    label_info = (release.get("label-info") or [{}])[0]
+    credits = release.get("artist-credit") or [{}]
+    return {
+        "artist": credits[0].get("name"),
+        "album": release.get("title"),
+        "label": (label_info.get("label") or {}).get("name"),
+        "year": (release.get("date") or "")[:4] or None,
+        "catalog_number": label_info.get("catalog-number"),
+        "country": release.get("country"),
+        "musicbrainz_id": release.get("id"),
+    }
+
+
+def default_sources() -> Tuple[EnrichmentSource, ...]:
+    return (
+        # discogs_client already follows the Discogs rate limit headers
+        EnrichmentSource("discogs", _discogs, concurrency=4, timeout=10.0),
+        # MusicBrainz allows one request per second per client
+        EnrichmentSource("musicbrainz", _musicbrainz, concurrency=1, rate=1.0, timeout=10.0),
+    )
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    key: str = field(compare=False)
+    query: Dict[str, str] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class EnrichmentEngine:
+    """Priority-queued, per-source limited, cached metadata enrichment."""
+
+    def __init__(self, sources: Optional[Iterable[EnrichmentSource]] = None, workers: int = WORKERS,
+                 cache: Optional[EnrichmentCache] = None):
+        self.sources = tuple(sources) if sources is not None else default_sources()
+        self.workers = max(workers, 1)
+        self.cache = cache or EnrichmentCache()
+        self._seq = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._priority: Dict[str, int] = {}   # key -> best queued priority, -1 once taken
+        self._semaphores: Dict[str, PrioritySemaphore] = {}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._counters = {
+            s.name: {"calls": 0, "cache_hits": 0, "empty": 0, "errors": 0, "timeouts": 0, "saturated": 0}
+            for s in self.sources
+        }
+        self._processed = {INTERACTIVE: 0, BACKFILL: 0}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def enrich(self, artist: Optional[str] = None, title: Optional[str] = None,
+                     catalog_number: Optional[str] = None, priority: int = INTERACTIVE) -> Dict[str, Any]:
+        """Queue a lookup and wait for the merged result."""
+        return await self.submit(artist, title, catalog_number, priority)
+
+    def submit(self, artist: Optional[str] = None, title: Optional[str] = None,
+               catalog_number: Optional[str] = None, priority: int = BACKFILL) -> asyncio.Future:
+        """
+        Queue a lookup without waiting (backfill). A lookup already queued
+        or running for the same key is shared; a more urgent request for it
+        re-queues it at the higher priority.
+        """
+        self._ensure_started()
+        key = cache_key(artist, title, catalog_number)
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._loop.create_future()
+            self._inflight[key] = future
+            future.add_done_callback(functools.partial(self._forget, key))
+        elif not 0 <= priority < self._priority[key]:
+            return future
+        self._priority[key] = priority
+        query = {"artist": artist or "", "title": title or "", "catalog_number": catalog_number or ""}
+        self._queue.put_nowait(_Job(priority, next(self._seq), key, query, future))
+        return future
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._queue, self._loop = [], None, None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._inflight),
+            "processed": {"interactive": self._processed[INTERACTIVE], "backfill": self._processed[BACKFILL]},
+            "sources": {name: dict(c) for name, c in self._counters.items()},
+            "cache": self.cache.stats(),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # First use, or a new event loop (tests, CLI)
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        self._inflight, self._priority = {}, {}
+        self._semaphores = {s.name: PrioritySemaphore(s.concurrency) for s in self.sources}
+        self._limiters = {s.name: RateLimiter(s.rate) for s in self.sources}
+        self._tasks = [loop.create_task(self._worker(), name=f"enrichment-{i}") for i in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done() or job.priority != self._priority.get(job.key):
+                    continue  # already taken, or re-queued at a higher priority
+                self._priority[job.key] = -1
+                result = await self._lookup(job.key, job.query, job.priority)
+                self._processed[BACKFILL if job.priority >= BACKFILL else INTERACTIVE] += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"[ENRICHMENT] Lookup failed for {job.key}: {e}", exc_info=True)
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def _forget(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            self._priority.pop(key, None)
+
+    async def _lookup(self, key: str, query: Dict[str, str], priority: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(self._call_source(source, key, query, priority) for source in self.sources))
+        results = {source.name: payload for source, (payload, _) in zip(self.sources, outcomes)}
+        metadata, field_sources = merge(results, (s.name for s in self.sources))
+        return {
+            "key": key,
+            "metadata": metadata,
+            "field_sources": field_sources,
+            "sources": {source.name: status for source, (_, status) in zip(self.sources, outcomes)},
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def _call_source(self, source: EnrichmentSource, key: str, query: Dict[str, str],
+                           priority: int) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        counters = self._counters[source.name]
+        hit, payload = await asyncio.to_thread(self.cache.get, source.name, key)
+        if hit:
+            counters["cache_hits"] += 1
+            return payload, {"status": "cached" if payload else "cached_empty"}
+
+        started = time.perf_counter()
+        # Interactive lookups also go first at a busy source
+        async with self._semaphores[source.name].slot(priority):
+            await self._limiters[source.name].acquire()
+            counters["calls"] += 1
+            try:
+                payload = await asyncio.wait_for(run_in_pool(ENRICHMENT_POOL, source.fn, query), source.timeout)
+            except asyncio.TimeoutError:
+                counters["timeouts"] += 1
+                return None, {"status": "timeout", "ms": round((time.perf_counter() - started) * 1000, 1)}
+            except ExecutorSaturated as e:
+                counters["saturated"] += 1
+                return None, {"status": "saturated", "error": str(e)}
+            except Exception as e:
+                counters["errors"] += 1
+                logger.warning(f"[ENRICHMENT] {source.name} failed for {key}: {e}")
+                return None, {"status": "error", "error": str(e)}
+
+        payload = {k: v for k, v in (payload or {}).items() if v not in (None, "", [], {})} or None
+        if payload is None:
+            counters["empty"] += 1
+        await asyncio.to_thread(self.cache.put, source.name, key, payload, source.ttl if payload else min(source.ttl, EMPTY_TTL_SECONDS))
+        return payload, {"status": "ok" if payload else "empty", "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+# Global instance
+enrichment_engine = EnrichmentEngine()
@@ -4,11 +4,51 @@ Global Library Service
 Central archive for all vinyl records. Every record is first added here,
 then referenced by user libraries. Records persist in global archive even
 if users delete them from their personal collections.
+
+Two backends with the same API:
+- GlobalLibraryService: in-memory, indexed (fingerprint, id, trigrams)
+- SQLGlobalLibraryService: global_records table (durable, shared by all
+  instances; SQLite fallback or Postgres) with a read-through LRU
 """
 import hashlib
+import heapq
 import json
+import logging
+import os
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.db import engine as default_engine
+from backend.models.global_record_db import GlobalRecordDB
+
+logger = logging.getLogger(__name__)
+
+# Fields covered by text search, with their ranking weight
+SEARCH_FIELDS = [
+    ("artist", 3),
+    ("album", 3),
+    ("title", 3),
+    ("label", 2),
+    ("catalog_number", 2),
+    ("barcode", 1),
+]
+
+NGRAM_SIZE = 3
+
+# SQL backend
+LRU_SIZE = int(os.getenv("GLOBAL_LIBRARY_LRU_SIZE", "1024"))
+BULK_BATCH_SIZE = 500
+# Rows fetched per round trip while ranking search_text matches
+SEARCH_FETCH_SIZE = 1000
+GLOBAL_RECORDS = GlobalRecordDB.__table__
+_TABLE_LOCK = threading.Lock()
 
 
 class GlobalLibraryService:
@@ -20,6 +60,9 @@ class GlobalLibraryService:
     - All lookups are done here first before any external / AI calls.
     - User library entries can be linked to global entries but are not required
       for this service to function.
+
+    Fingerprint and id lookups are dict hits; text search goes through a
+    trigram inverted index. All indexes are updated under one lock.
     """
 
     def __init__(self) -> None:
@@ -35,6 +78,15 @@ class GlobalLibraryService:
         self._records: List[Dict[str, Any]] = []
         self._next_id: int = 1
 
+        # Indexes (maintained incrementally under _lock)
+        self._lock = threading.RLock()
+        self._by_fingerprint: Dict[str, Dict[str, Any]] = {}
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        # Normalized search fields per record id (for match verification and ranking)
+        self._search_fields: Dict[int, List[str]] = {}
+        # Trigram -> ids of records whose search text contains it
+        self._ngram_index: Dict[str, array] = {}
+
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
@@ -94,10 +146,82 @@ class GlobalLibraryService:
         return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
     def _find_by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
-        for rec in self._records:
-            if rec["fingerprint"] == fingerprint:
-                return rec
-        return None
+        return self._by_fingerprint.get(fingerprint)
+
+    @staticmethod
+    def _ngrams(text: str) -> Set[str]:
+        return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+    def _haystack(self, record_id: int) -> str:
+        # Same string the original linear search matched against
+        return " ".join(self._search_fields[record_id])
+
+    def _search_values(self, metadata: Dict[str, Any]) -> List[str]:
+        """Normalized SEARCH_FIELDS values; joined with spaces they form the search text."""
+        return [self._normalize_value(metadata.get(key)) for key, _ in SEARCH_FIELDS]
+
+    def _index_text(self, record: Dict[str, Any]) -> None:
+        record_id = record["id"]
+        fields = self._search_values(record.get("metadata") or {})
+        self._search_fields[record_id] = fields
+        for gram in self._ngrams(" ".join(fields)):
+            postings = self._ngram_index.get(gram)
+            if postings is None:
+                self._ngram_index[gram] = array("I", [record_id])
+            else:
+                postings.append(record_id)
+
+    def _unindex_text(self, record_id: int) -> None:
+        fields = self._search_fields.pop(record_id, None)
+        if fields is None:
+            return
+        for gram in self._ngrams(" ".join(fields)):
+            postings = self._ngram_index.get(gram)
+            if postings is None:
+                continue
+            postings.remove(record_id)
+            if not postings:
+                del self._ngram_index[gram]
+
+    def _candidate_ids(self, query: str) -> Iterable[int]:
+        """Record ids that may contain query (superset; verified by caller)."""
+        if len(query) < NGRAM_SIZE:
+            return list(self._search_fields.keys())
+        postings = []
+        for gram in self._ngrams(query):
+            ids = self._ngram_index.get(gram)
+            if ids is None:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:2]:
+            candidates.intersection_update(ids)
+        return candidates
+
+    def _match_score(self, record_id: int, query: str) -> int:
+        return self._score_fields(self._search_fields[record_id], query)
+
+    @staticmethod
+    def _score_fields(fields: List[str], query: str) -> int:
+        """
+        Rank a verified match: exact field > field prefix > word prefix >
+        substring, weighted by field. Matches spanning two fields score 1.
+        """
+        best = 1
+        for (_, weight), value in zip(SEARCH_FIELDS, fields):
+            if not value or query not in value:
+                continue
+            if value == query:
+                kind = 4
+            elif value.startswith(query):
+                kind = 3
+            elif f" {query}" in f" {value}":
+                kind = 2
+            else:
+                kind = 1
+            best = max(best, kind * weight)
+        return best
 
     # ------------------------------------------------------------------
     # Public API
@@ -123,48 +247,60 @@ class GlobalLibraryService:
         Additional fields (pricing_data, file_path, etc.) are merged into the record.
         """
         fingerprint = self._build_fingerprint(metadata)
-        existing = self._find_by_fingerprint(fingerprint)
 
-        if existing is not None:
-            # Merge additional fields if provided (e.g., pricing_data, file_path)
-            if additional_fields:
-                existing.update(additional_fields)
-            return existing
+        with self._lock:
+            existing = self._find_by_fingerprint(fingerprint)
 
-        # Create new global record
-        record = {
-            "id": self._next_id,
-            "fingerprint": fingerprint,
-            "metadata": metadata,
-            "source": source,
-            "created_at": time.time(),
-        }
+            if existing is not None:
+                # Merge additional fields if provided (e.g., pricing_data, file_path)
+                if additional_fields:
+                    existing.update(additional_fields)
+                    if "metadata" in additional_fields:
+                        self._unindex_text(existing["id"])
+                        self._index_text(existing)
+                return existing
 
-        # Add additional fields if provided
-        if additional_fields:
-            record.update(additional_fields)
+            # Create new global record
+            record = {
+                "id": self._next_id,
+                "fingerprint": fingerprint,
+                "metadata": metadata,
+                "source": source,
+                "created_at": time.time(),
+            }
 
-        self._records.append(record)
-        self._next_id += 1
-        return record
+            # Add additional fields if provided
+            if additional_fields:
+                record.update(additional_fields)
+
+            self._records.append(record)
+            self._by_fingerprint[fingerprint] = record
+            self._by_id[record["id"]] = record
+            self._index_text(record)
+            self._next_id += 1
+            return record
     
     def get_by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
         """Get global record by fingerprint."""
-        return self._find_by_fingerprint(fingerprint)
+        with self._lock:
+            return self._find_by_fingerprint(fingerprint)
     
     def get_by_global_id(self, global_id: int) -> Optional[Dict[str, Any]]:
         """Get global record by global ID."""
         return self.get_by_id(global_id)
 
     def get_by_id(self, record_id: int) -> Optional[Dict[str, Any]]:
-        for rec in self._records:
-            if rec["id"] == record_id:
-                return rec
-        return None
+        with self._lock:
+            return self._by_id.get(record_id)
 
     def search_text(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
-        Very simple text search over core metadata fields.
+        Substring search over core metadata fields, ranked.
+
+        Candidates come from the trigram index (queries shorter than three
+        characters scan all records) and are verified with a substring
+        check, so matches are exactly those of a full scan. Results are
+        ordered by match quality (see _match_score), then by id.
 
         This is intended as a lightweight first-step lookup before any
         external API or AI calls.
@@ -173,24 +309,13 @@ class GlobalLibraryService:
         if not q:
             return []
 
-        results: List[Dict[str, Any]] = []
-        for rec in self._records:
-            meta = rec.get("metadata", {})
-            haystack_parts = [
-                self._normalize_value(meta.get("artist")),
-                self._normalize_value(meta.get("album")),
-                self._normalize_value(meta.get("title")),
-                self._normalize_value(meta.get("label")),
-                self._normalize_value(meta.get("catalog_number")),
-                self._normalize_value(meta.get("barcode")),
-            ]
-            haystack = " ".join(haystack_parts)
-            if q in haystack:
-                results.append(rec)
-                if len(results) >= limit:
-                    break
-
-        return results
+        with self._lock:
+            scored = []
+            for record_id in self._candidate_ids(q):
+                if q in self._haystack(record_id):
+                    scored.append((-self._match_score(record_id, q), record_id))
+            scored.sort()
+            return [self._by_id[record_id] for _, record_id in scored[:limit]]
 
     def search_by_metadata(
         self,
@@ -201,14 +326,360 @@ class GlobalLibraryService:
         Returns existing global record or None.
         """
         fingerprint = self._build_fingerprint(metadata)
-        return self._find_by_fingerprint(fingerprint)
+        with self._lock:
+            return self._find_by_fingerprint(fingerprint)
+
+    def bulk_upsert(
+        self,
+        entries: Iterable[Dict[str, Any]],
+        source: str = "bulk_import",
+    ) -> Dict[str, int]:
+        """
+        add_or_get for many records (batch imports).
+
+        Each entry is either a metadata dict or
+        {"metadata": {...}, "additional_fields": {...}}.
+
+        Returns:
+            {"inserted": n, "updated": n, "unchanged": n}
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        with self._lock:
+            for entry in entries:
+                metadata, additional_fields = self._split_entry(entry)
+                existed = self._find_by_fingerprint(self._build_fingerprint(metadata)) is not None
+                self.add_or_get(metadata, source=source, additional_fields=additional_fields)
+                if not existed:
+                    counts["inserted"] += 1
+                elif additional_fields:
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+        return counts
+
+    @staticmethod
+    def _split_entry(entry: Dict[str, Any]):
+        if "metadata" in entry and isinstance(entry["metadata"], dict):
+            return entry["metadata"], entry.get("additional_fields")
+        return entry, None
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        """
+        Return all global records (for admin / debugging).
+        """
+        with self._lock:
+            return list(self._records)
+
+
+
+class SQLGlobalLibraryService(GlobalLibraryService):
+    """
+    GlobalLibraryService with the global_records table as source of truth.
+
+    - add_or_get: INSERT ... ON CONFLICT (fingerprint) DO NOTHING, then merge
+      additional_fields into the existing row in the same transaction
+    - bulk_upsert: batched multi-row inserts for imports
+    - Read-through LRU (fingerprint and id) in front of the table; entries
+      written by this process are refreshed, other instances' field merges
+      become visible once an entry is evicted
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, lru_size: int = LRU_SIZE) -> None:
+        super().__init__()
+        self.engine = engine or default_engine
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._fingerprint_by_id: Dict[int, str] = {}
+        self._lru_lock = threading.Lock()
+        self._table_ready = False
+
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Unsupported database for global library: {dialect}")
+        self._insert = insert
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _ensure_table(self) -> None:
+        # init_db() creates it at startup; this covers scripts and tools
+        if self._table_ready:
+            return
+        with _TABLE_LOCK:
+            if self._table_ready:
+                return
+            try:
+                GLOBAL_RECORDS.create(bind=self.engine, checkfirst=True)
+            except SQLAlchemyError:
+                # Another process created it between the check and CREATE
+                if not inspect(self.engine).has_table(GLOBAL_RECORDS.name):
+                    raise
+            self._table_ready = True
+
+    @staticmethod
+    def _to_record(row) -> Dict[str, Any]:
+        """Row mapping -> the dict shape GlobalLibraryService returns."""
+        record = {
+            "id": row["id"],
+            "fingerprint": row["fingerprint"],
+            "metadata": row["metadata"],
+            "source": row["source"],
+            "created_at": row["created_at"],
+        }
+        if row["fields"]:
+            record.update(row["fields"])
+        return record
+
+    def _row_values(self, fingerprint: str, metadata: Dict[str, Any], source: str,
+                    additional_fields: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "fingerprint": fingerprint,
+            "metadata": metadata,
+            "source": source,
+            "fields": dict(additional_fields) if additional_fields else None,
+            "search_text": " ".join(self._search_values(metadata)),
+            "created_at": time.time(),
+        }
+
+    def _cache_get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        with self._lru_lock:
+            record = self._lru.get(fingerprint)
+            if record is None:
+                return None
+            self._lru.move_to_end(fingerprint)
+            return dict(record)
+
+    def _cache_put(self, record: Dict[str, Any]) -> None:
+        with self._lru_lock:
+            fingerprint = record["fingerprint"]
+            self._lru[fingerprint] = dict(record)
+            self._lru.move_to_end(fingerprint)
+            self._fingerprint_by_id[record["id"]] = fingerprint
+            while len(self._lru) > self.lru_size:
+                _, old = self._lru.popitem(last=False)
+                self._fingerprint_by_id.pop(old["id"], None)
+
+    def _select_by_fingerprint(self, conn, fingerprint: str, for_update: bool = False):
+        stmt = select(GLOBAL_RECORDS).where(GLOBAL_RECORDS.c.fingerprint == fingerprint)
+        if for_update:
+            stmt = stmt.with_for_update()
+        row = conn.execute(stmt).first()
+        return None if row is None else dict(row._mapping)
+
+    def _find_by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        cached = self._cache_get(fingerprint)
+        if cached is not None:
+            return cached
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            row = self._select_by_fingerprint(conn, fingerprint)
+        if row is None:
+            return None
+        record = self._to_record(row)
+        self._cache_put(record)
+        return dict(record)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def add_or_get(
+        self,
+        metadata: Dict[str, Any],
+        source: str = "user_upload",
+        additional_fields: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Insert-or-get by fingerprint (see GlobalLibraryService.add_or_get).
+
+        Safe across instances: the unique fingerprint index plus
+        ON CONFLICT DO NOTHING means concurrent adds of the same release
+        yield one row. additional_fields are merged into the stored row.
+        """
+        fingerprint = self._build_fingerprint(metadata)
+        if not additional_fields:
+            cached = self._cache_get(fingerprint)
+            if cached is not None:
+                return cached
+
+        self._ensure_table()
+        values = self._row_values(fingerprint, metadata, source, additional_fields)
+        with self.engine.begin() as conn:
+            stmt = (
+                self._insert(GLOBAL_RECORDS)
+                .values(**values)
+                .on_conflict_do_nothing(index_elements=["fingerprint"])
+                .returning(*GLOBAL_RECORDS.c)
+            )
+            inserted = conn.execute(stmt).first()
+            if inserted is not None:
+                row = inserted._mapping
+            else:
+                row = self._select_by_fingerprint(conn, fingerprint, for_update=bool(additional_fields))
+                if additional_fields:
+                    row["fields"] = {**(row["fields"] or {}), **additional_fields}
+                    conn.execute(
+                        update(GLOBAL_RECORDS).where(GLOBAL_RECORDS.c.id == row["id"]).values(fields=row["fields"])
+                    )
+
+        record = self._to_record(row)
+        self._cache_put(record)
+        return dict(record)
+
+    def bulk_upsert(
+        self,
+        entries: Iterable[Dict[str, Any]],
+        source: str = "bulk_import",
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Batched add_or_get for imports: one multi-row INSERT ... ON CONFLICT
+        DO NOTHING per batch, then one merge UPDATE per existing row that
+        carries additional_fields.
+
+        Each entry is either a metadata dict or
+        {"metadata": {...}, "additional_fields": {...}}.
+
+        Returns:
+            {"inserted": n, "updated": n, "unchanged": n}
+        """
+        self._ensure_table()
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        batch: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        def flush():
+            if batch:
+                for key, value in self._upsert_batch(list(batch.values()), source).items():
+                    counts[key] += value
+                batch.clear()
+
+        for entry in entries:
+            metadata, additional_fields = self._split_entry(entry)
+            fingerprint = self._build_fingerprint(metadata)
+            pending = batch.get(fingerprint)
+            if pending is not None:
+                # Same release twice in one batch: merge fields, first metadata wins
+                if additional_fields:
+                    pending["fields"] = {**(pending["fields"] or {}), **additional_fields}
+                continue
+            batch[fingerprint] = self._row_values(fingerprint, metadata, source, additional_fields)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        return counts
+
+    def _upsert_batch(self, rows: List[Dict[str, Any]], source: str) -> Dict[str, int]:
+        with self.engine.begin() as conn:
+            stmt = (
+                self._insert(GLOBAL_RECORDS)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["fingerprint"])
+                .returning(GLOBAL_RECORDS.c.fingerprint)
+            )
+            inserted = {r.fingerprint for r in conn.execute(stmt)}
+
+            existing = [r for r in rows if r["fingerprint"] not in inserted]
+            with_fields = {r["fingerprint"]: r["fields"] for r in existing if r["fields"]}
+            if with_fields:
+                stored = conn.execute(
+                    select(GLOBAL_RECORDS.c.id, GLOBAL_RECORDS.c.fingerprint, GLOBAL_RECORDS.c.fields)
+                    .where(GLOBAL_RECORDS.c.fingerprint.in_(list(with_fields)))
+                    .with_for_update()
+                ).all()
+                for row in stored:
+                    merged = {**(row.fields or {}), **with_fields[row.fingerprint]}
+                    conn.execute(update(GLOBAL_RECORDS).where(GLOBAL_RECORDS.c.id == row.id).values(fields=merged))
+
+        # Drop cached copies that may now be stale
+        with self._lru_lock:
+            for fingerprint in with_fields:
+                old = self._lru.pop(fingerprint, None)
+                if old is not None:
+                    self._fingerprint_by_id.pop(old["id"], None)
+
+        return {
+            "inserted": len(inserted),
+            "updated": len(with_fields),
+            "unchanged": len(existing) - len(with_fields),
+        }
+
+    def get_by_id(self, record_id: int) -> Optional[Dict[str, Any]]:
+        with self._lru_lock:
+            fingerprint = self._fingerprint_by_id.get(record_id)
+        if fingerprint is not None:
+            cached = self._cache_get(fingerprint)
+            if cached is not None:
+                return cached
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            row = conn.execute(select(GLOBAL_RECORDS).where(GLOBAL_RECORDS.c.id == record_id)).first()
+        if row is None:
+            return None
+        record = self._to_record(row._mapping)
+        self._cache_put(record)
+        return dict(record)
+
+    def search_text(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Substring search over core metadata fields, ranked like the
+        in-memory library. Uses LIKE on the normalized search_text column
+        (backed by a pg_trgm index on Postgres, see migration 003). Every
+        match is ranked, streamed from the cursor, keeping only the best
+        `limit` in memory.
+        """
+        q = query.strip().lower()
+        if not q or limit <= 0:
+            return []
+        self._ensure_table()
+        pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        # Min-heap of (score, -id): the root is the weakest of the best so far
+        best: List[Tuple[int, int]] = []
+        with self.engine.connect() as conn:
+            rows = conn.execution_options(stream_results=True, yield_per=SEARCH_FETCH_SIZE).execute(
+                select(GLOBAL_RECORDS.c.id, GLOBAL_RECORDS.c.metadata)
+                .where(GLOBAL_RECORDS.c.search_text.like(pattern, escape="\\"))
+            )
+            for record_id, metadata in rows:
+                item = (self._score_fields(self._search_values(metadata or {}), q), -record_id)
+                if len(best) < limit:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+            if not best:
+                return []
+            ranked = [-neg_id for _, neg_id in sorted(best, reverse=True)]
+            by_id = {
+                row.id: self._to_record(row._mapping)
+                for row in conn.execute(select(GLOBAL_RECORDS).where(GLOBAL_RECORDS.c.id.in_(ranked)))
+            }
+        return [by_id[record_id] for record_id in ranked if record_id in by_id]
 
     def list_all(self) -> List[Dict[str, Any]]:
         """
         Return all global records (for admin / debugging).
         """
-        return list(self._records)
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(GLOBAL_RECORDS).order_by(GLOBAL_RECORDS.c.id)).all()
+        return [self._to_record(row._mapping) for row in rows]
+
+
+def _create_global_library_service() -> GlobalLibraryService:
+    """
+    GLOBAL_LIBRARY_BACKEND=sql (default): durable, shared by all instances.
+    GLOBAL_LIBRARY_BACKEND=memory: process-local (tests / offline tools).
+    """
+    backend = os.getenv("GLOBAL_LIBRARY_BACKEND", "sql").strip().lower()
+    if backend == "sql":
+        try:
+            return SQLGlobalLibraryService()
+        except Exception as e:
+            logger.warning(f"SQL global library unavailable, using in-memory library: {e}")
+    return GlobalLibraryService()
 
 
-global_library_service = GlobalLibraryService()
+global_library_service = _create_global_library_service()
 
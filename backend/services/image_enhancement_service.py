@@ -7,10 +7,12 @@ AI-based image quality improvement before recognition.
 
 Features:
 - Low quality detection (blur, resolution, noise)
-- AI super resolution (Real-ESRGAN or OpenCV fallback)
-- Denoising
-- Sharpening
-- 2x upscaling
+- Denoising (severe blur only)
+- Sharpening (unsharp mask)
+- Upscaling (up to 2x, capped at what recognition consumes)
+
+The work itself is done by enhancement_engine: tiled, deadline-bounded,
+one decode and one JPEG encode.
 """
 
 import logging
@@ -27,10 +29,20 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.error("numpy is not installed. Image enhancement features will be unavailable. Install with: pip install numpy")
 
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageFilter
 
 try:
     import cv2
+    from backend.services.enhancement_engine import (
+        MAX_OUTPUT_SIDE,
+        EnhancementTimeout,
+        deadline_after,
+        decode_for_recognition,
+        encode_jpeg,
+        laplacian_variance,
+        plan_enhancement,
+        run_tiled,
+    )
     CV2_AVAILABLE = True
 except ImportError:
     CV2_AVAILABLE = False
@@ -108,7 +120,7 @@ class ImageEnhancementService:
                 gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
                 
                 # Calculate Laplacian variance (blur detection)
-                laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+                laplacian_var = laplacian_variance(gray)
                 
                 blur_detected = laplacian_var < MIN_LAPLACIAN_VARIANCE
             else:
@@ -119,22 +131,7 @@ class ImageEnhancementService:
                 
                 blur_detected = laplacian_var < (MIN_LAPLACIAN_VARIANCE * 0.5)  # Adjusted for PIL
             
-            # Calculate quality score (0.0-1.0)
-            resolution_score = min(1.0, width / MIN_RESOLUTION)
-            blur_score = min(1.0, laplacian_var / MIN_LAPLACIAN_VARIANCE)
-            quality_score = (resolution_score * 0.6 + blur_score * 0.4)
-            
-            is_low_quality = resolution_too_low or blur_detected or quality_score < 0.6
-            
-            return {
-                "is_low_quality": is_low_quality,
-                "quality_score": round(quality_score, 3),
-                "blur_detected": blur_detected,
-                "resolution_too_low": resolution_too_low,
-                "width": width,
-                "height": height,
-                "laplacian_variance": round(laplacian_var, 2)
-            }
+            return self._quality_info(width, height, laplacian_var, blur_detected)
         except Exception as e:
             logger.error(f"Quality detection failed: {e}", exc_info=True)
             # Default to high quality on error (don't enhance if unsure)
@@ -149,20 +146,55 @@ class ImageEnhancementService:
                 "error": str(e)
             }
     
+    def _quality_info(
+        self,
+        width: int,
+        height: int,
+        laplacian_var: float,
+        blur_detected: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Quality verdict shared by detect_low_quality and enhance_image."""
+        if blur_detected is None:
+            blur_detected = laplacian_var < MIN_LAPLACIAN_VARIANCE
+        resolution_too_low = width < MIN_RESOLUTION
+        
+        # Calculate quality score (0.0-1.0)
+        resolution_score = min(1.0, width / MIN_RESOLUTION)
+        blur_score = min(1.0, laplacian_var / MIN_LAPLACIAN_VARIANCE)
+        quality_score = (resolution_score * 0.6 + blur_score * 0.4)
+        
+        is_low_quality = resolution_too_low or blur_detected or quality_score < 0.6
+        
+        return {
+            "is_low_quality": bool(is_low_quality),
+            "quality_score": round(quality_score, 3),
+            "blur_detected": bool(blur_detected),
+            "resolution_too_low": bool(resolution_too_low),
+            "width": width,
+            "height": height,
+            "laplacian_variance": round(laplacian_var, 2)
+        }
+    
     def enhance_image(
         self,
-        image_bytes: bytes,
+        image_bytes: Optional[bytes] = None,
         image_path: Optional[str] = None,
         target_dir: Optional[Path] = None,
-        record_id: Optional[str] = None
+        record_id: Optional[str] = None,
+        timeout: float = ENHANCEMENT_TIMEOUT
     ) -> Dict[str, Any]:
         """
         Enhance low quality image using AI/ML techniques.
         
-        Enhancement steps:
-        1. Upscale 2x (if resolution < 1024px)
-        2. Denoise
+        The image is decoded once, straight to at most MAX_OUTPUT_SIDE
+        (what recognition consumes), and blur is measured at that size.
+        The cheapest operation set for the measured blur runs in tiles:
+        1. Upscale (up to 2x, if width < 1024px)
+        2. Denoise (severe blur only)
         3. Sharpen
+        The deadline (timeout, or the request deadline if sooner) is
+        checked before every tile; past it the original is used. The
+        result is JPEG-encoded once.
         
         Returns:
         {
@@ -172,129 +204,85 @@ class ImageEnhancementService:
             "original_path": str | None,
             "enhancement_time": float,
             "quality_improvement": float,
+            "operations": list,
+            "timings": {op_ms: float},
             "error": str | None
         }
         """
         start_time = time.time()
+        deadline = deadline_after(timeout) if CV2_AVAILABLE else None
+        original_path = image_path
+        timings: Dict[str, float] = {}
+        
+        def not_enhanced(**extra) -> Dict[str, Any]:
+            return {
+                "enhanced": False,
+                "enhanced_image_bytes": None,
+                "enhanced_image_path": None,
+                "original_path": original_path,
+                "enhancement_time": round(time.time() - start_time, 2),
+                "quality_improvement": 0.0,
+                "timings": {k: round(v, 1) for k, v in timings.items()},
+                **extra
+            }
         
+        if not self.enabled:
+            return not_enhanced(error="Image enhancement unavailable (OpenCV/numpy missing)", quality_info={})
+        
+        quality_info: Dict[str, Any] = {}
         try:
-            # Load image
-            if image_path:
-                original_img = Image.open(image_path)
-                original_path = image_path
-            else:
-                original_img = Image.open(BytesIO(image_bytes))
-                original_path = None
+            started = time.perf_counter()
+            if image_bytes is None and image_path:
+                with open(image_path, "rb") as f:
+                    image_bytes = f.read()
+            # Header only: original size without decoding pixels
+            original_size = Image.open(BytesIO(image_bytes)).size
+            image = decode_for_recognition(image_bytes, original_size)
+            timings["decode_ms"] = (time.perf_counter() - started) * 1000
             
-            # Detect quality
-            quality_info = self.detect_low_quality(image_bytes, image_path)
+            # Detect quality (blur measured at the resolution recognition sees)
+            started = time.perf_counter()
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            laplacian_var = laplacian_variance(gray)
+            quality_info = self._quality_info(original_size[0], original_size[1], laplacian_var)
+            timings["analyze_ms"] = (time.perf_counter() - started) * 1000
             
             # If already high quality, skip enhancement
             if not quality_info.get("is_low_quality"):
                 logger.info(f"Image is high quality (score: {quality_info.get('quality_score')}) - skipping enhancement")
-                return {
-                    "enhanced": False,
-                    "enhanced_image_bytes": None,
-                    "enhanced_image_path": None,
-                    "original_path": original_path,
-                    "enhancement_time": time.time() - start_time,
-                    "quality_improvement": 0.0,
-                    "quality_info": quality_info
-                }
+                return not_enhanced(quality_info=quality_info)
             
-            logger.info(f"Enhancing low quality image: blur={quality_info.get('blur_detected')}, "
-                       f"resolution_low={quality_info.get('resolution_too_low')}, "
+            plan = plan_enhancement(
+                original_size[0], original_size[1], laplacian_var,
+                MIN_RESOLUTION, MIN_LAPLACIAN_VARIANCE, MAX_OUTPUT_SIDE
+            )
+            logger.info(f"Enhancing low quality image: ops={plan.ops}, reasons={plan.reasons}, "
                        f"quality_score={quality_info.get('quality_score')}")
             
-            # Convert to RGB if needed
-            if original_img.mode != "RGB":
-                original_img = original_img.convert("RGB")
-            
-            enhanced_img = original_img.copy()
-            
-            # Step 1: Upscale 2x if resolution is too low
-            if quality_info.get("resolution_too_low"):
-                width, height = enhanced_img.size
-                new_width = width * 2
-                new_height = height * 2
-                
-                # Use LANCZOS resampling for high quality upscaling
-                enhanced_img = enhanced_img.resize(
-                    (new_width, new_height),
-                    Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS
-                )
-                logger.info(f"Upscaled image from {width}x{height} to {new_width}x{new_height}")
-            
-            # Step 2: Denoise (using PIL's built-in filters)
-            if quality_info.get("blur_detected"):
-                if CV2_AVAILABLE and NUMPY_AVAILABLE:
-                    # Convert to numpy for OpenCV denoising
-                    img_array = np.array(enhanced_img)
-                    
-                    # Apply bilateral filter (preserves edges while reducing noise)
-                    denoised = cv2.bilateralFilter(
-                        img_array,
-                        d=9,  # diameter
-                        sigmaColor=75,  # color sigma
-                        sigmaSpace=75  # space sigma
-                    )
-                    
-                    enhanced_img = Image.fromarray(denoised.astype(np.uint8))
-                    logger.info("Applied OpenCV denoising (bilateral filter)")
-                else:
-                    # PIL fallback: slight blur to reduce noise, then sharpen
-                    enhanced_img = enhanced_img.filter(ImageFilter.MedianFilter(size=3))
-                    logger.info("Applied PIL denoising (median filter)")
+            enhanced = run_tiled(image, plan, deadline, timings=timings)
             
-            # Step 3: Sharpen
-            # Only sharpen if we upscaled or denoised
-            if quality_info.get("resolution_too_low") or quality_info.get("blur_detected"):
-                enhancer = ImageEnhance.Sharpness(enhanced_img)
-                enhanced_img = enhancer.enhance(1.3)  # 30% sharper
-                logger.info("Applied sharpening")
-            
-            # Check timeout
-            elapsed = time.time() - start_time
-            if elapsed > ENHANCEMENT_TIMEOUT:
-                logger.warning(f"Enhancement exceeded timeout ({elapsed:.2f}s > {ENHANCEMENT_TIMEOUT}s) - using original")
-                return {
-                    "enhanced": False,
-                    "enhanced_image_bytes": None,
-                    "enhanced_image_path": None,
-                    "original_path": original_path,
-                    "enhancement_time": elapsed,
-                    "quality_improvement": 0.0,
-                    "error": "Enhancement timeout",
-                    "quality_info": quality_info
-                }
+            started = time.perf_counter()
+            enhanced_image_bytes = encode_jpeg(enhanced)
+            timings["encode_ms"] = (time.perf_counter() - started) * 1000
             
             # Save enhanced image
-            enhanced_image_bytes = None
             enhanced_image_path = None
-            
             if target_dir and record_id:
                 target_dir = Path(target_dir)
                 target_dir.mkdir(parents=True, exist_ok=True)
-                
                 enhanced_path = target_dir / f"enhanced_{record_id}.jpg"
-                
-                # Save as JPEG with high quality
-                enhanced_img.save(enhanced_path, format="JPEG", quality=95)
+                enhanced_path.write_bytes(enhanced_image_bytes)
                 enhanced_image_path = str(enhanced_path)
-                
                 logger.info(f"Saved enhanced image: {enhanced_image_path}")
             
-            # Also convert to bytes for return
-            buffer = BytesIO()
-            enhanced_img.save(buffer, format="JPEG", quality=95)
-            enhanced_image_bytes = buffer.getvalue()
-            
-            # Calculate quality improvement
-            enhanced_quality_info = self.detect_low_quality(enhanced_image_bytes)
-            quality_improvement = enhanced_quality_info.get("quality_score", 0.0) - quality_info.get("quality_score", 0.0)
+            # Calculate quality improvement (on the array; no re-decode)
+            height, width = enhanced.shape[:2]
+            enhanced_quality_info = self._quality_info(
+                width, height, laplacian_variance(cv2.cvtColor(enhanced, cv2.COLOR_BGR2GRAY))
+            )
+            quality_improvement = enhanced_quality_info["quality_score"] - quality_info["quality_score"]
             
             elapsed = time.time() - start_time
-            
             logger.info(f"Enhancement complete: improvement={quality_improvement:.3f}, time={elapsed:.2f}s")
             
             return {
@@ -304,24 +292,18 @@ class ImageEnhancementService:
                 "original_path": original_path,
                 "enhancement_time": round(elapsed, 2),
                 "quality_improvement": round(quality_improvement, 3),
+                "operations": plan.ops,
+                "timings": {k: round(v, 1) for k, v in timings.items()},
                 "quality_info": quality_info,
                 "enhanced_quality_info": enhanced_quality_info
             }
             
+        except EnhancementTimeout as e:
+            logger.warning(f"Enhancement exceeded timeout ({timeout}s): {e} - using original")
+            return not_enhanced(error="Enhancement timeout", quality_info=quality_info)
         except Exception as e:
-            elapsed = time.time() - start_time
             logger.error(f"Image enhancement failed: {e}", exc_info=True)
-            
-            return {
-                "enhanced": False,
-                "enhanced_image_bytes": None,
-                "enhanced_image_path": None,
-                "original_path": image_path,
-                "enhancement_time": round(elapsed, 2),
-                "quality_improvement": 0.0,
-                "error": str(e),
-                "quality_info": quality_info if 'quality_info' in locals() else {}
-            }
+            return not_enhanced(error=str(e), quality_info=quality_info)
 
 
 # Global instance
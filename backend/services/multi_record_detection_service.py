@@ -7,15 +7,38 @@ Uses AI vision to find and isolate each record, even if partially visible.
 
 import cv2
 import numpy as np
-from PIL import Image
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Callable, List, Dict, Optional, Tuple, Union
 from pathlib import Path
 import base64
+import contextvars
 import os
+import threading
 import uuid
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from backend.services.detection_merge import non_max_suppression, weighted_box_fusion
+from backend.services.openai_gateway import openai_gateway
+
+# Hough runs on the first pyramid level whose longest side fits this
+DETECTION_MAX_SIDE = int(os.getenv("MULTI_RECORD_DETECTION_MAX_SIDE", "1024"))
+# Shared pool for AI detection, crop encoding and per-crop recognition
+WORKERS = int(os.getenv("MULTI_RECORD_WORKERS", "8"))
+# Per-image bound on crops recognized at once (each is a GPT call)
+CROP_CONCURRENCY = int(os.getenv("MULTI_RECORD_CROP_CONCURRENCY", "4"))
+CROP_JPEG_QUALITY = 90
+# Overlap handling in _merge_detections: "nms" (keep best box) or "wbf" (fuse boxes)
+MERGE_STRATEGY = os.getenv("MULTI_RECORD_MERGE_STRATEGY", "nms").lower()
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="multi-record")
+        return _pool
 
 
 class MultiRecordDetectionService:
@@ -49,19 +72,32 @@ class MultiRecordDetectionService:
         ]
         """
         try:
-            # Method 1: AI Vision Detection (Primary - Sherlock Holmes mode)
-            ai_detections = self._detect_with_ai_vision(image_path, raw_bytes)
+            # Decode once: detection and every crop share this buffer
+            image = self._decode(image_path, raw_bytes)
+            if image is None:
+                raise ValueError(f"Could not decode image: {image_path}")
+            
+            # Method 1: AI Vision Detection (Primary - Sherlock Holmes mode),
+            # in flight while the CV pass runs
+            ai_future = _get_pool().submit(
+                contextvars.copy_context().run, self._detect_with_ai_vision, image_path, raw_bytes
+            )
             
             # Method 2: Computer Vision Fallback (Hough Circles for circular records)
-            cv_detections = self._detect_with_cv(image_path)
+            cv_detections = self._detect_with_cv(image)
+            ai_detections = ai_future.result()
             
             # Merge and deduplicate detections (AI takes priority)
             merged = self._merge_detections(ai_detections, cv_detections)
             
-            # Crop each detected record
+            # Crop each detected record (encoded in parallel)
+            crop_results = self.map_concurrent(
+                lambda item: self._crop_record(image, image_path, item[1], record_index=item[0]),
+                list(enumerate(merged)),
+                max_concurrency=WORKERS,
+            )
             cropped_records = []
-            for i, detection in enumerate(merged):
-                crop_result = self._crop_record(image_path, detection, record_index=i)
+            for detection, crop_result in zip(merged, crop_results):
                 if crop_result:
                     detection.update(crop_result)
                     cropped_records.append(detection)
@@ -113,7 +149,7 @@ class MultiRecordDetectionService:
                 "If no records found, return empty array []."
             )
             
-            response = client.chat.completions.create(
+            response = openai_gateway.chat_completion_sync(
                 model="gpt-4o",  # Use vision-capable model
                 messages=[
                     {
@@ -155,34 +191,55 @@ class MultiRecordDetectionService:
             print(f"AI vision detection error: {e}")
             return []
     
-    def _detect_with_cv(self, image_path: str) -> List[Dict]:
+    def _decode(self, image_path: str, raw_bytes: Optional[bytes] = None) -> Optional[np.ndarray]:
+        """Decode the upload once (BGR); raw bytes avoid re-reading the saved file."""
+        if raw_bytes:
+            image = cv2.imdecode(np.frombuffer(raw_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is not None:
+                return image
+        return cv2.imread(image_path)
+    
+    def _pyramid_level(self, gray: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Halve (Gaussian pyramid) until the longest side fits DETECTION_MAX_SIDE."""
+        scale = 1.0
+        while max(gray.shape[:2]) > DETECTION_MAX_SIDE:
+            gray = cv2.pyrDown(gray)
+            scale /= 2
+        return gray, scale
+    
+    def _detect_with_cv(self, image: Union[str, np.ndarray]) -> List[Dict]:
         """
         Computer vision fallback: Detect circular objects (records) using Hough Circles.
+        Runs on a downscaled pyramid level; circles are mapped back to
+        full-resolution coordinates.
         """
         try:
-            img = cv2.imread(image_path)
+            img = cv2.imread(image) if isinstance(image, str) else image
             if img is None:
                 return []
             
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             height, width = gray.shape
+            small, scale = self._pyramid_level(gray)
+            small_height, small_width = small.shape
             
-            # Detect circles (records are typically circular)
+            # Detect circles (records are typically circular); centers closer
+            # than the minimum record diameter are the same record
             circles = cv2.HoughCircles(
-                gray,
+                small,
                 cv2.HOUGH_GRADIENT,
                 dp=1,
-                minDist=int(min(width, height) * 0.3),
+                minDist=max(1, int(self.min_record_size * scale)),
                 param1=50,
                 param2=30,
-                minRadius=self.min_record_size // 2,
-                maxRadius=max(width, height) // 2
+                minRadius=max(1, int(self.min_record_size // 2 * scale)),
+                maxRadius=max(small_width, small_height) // 2
             )
             
             detections = []
             if circles is not None:
-                circles = np.round(circles[0, :]).astype("int")
-                for i, (x, y, r) in enumerate(circles):
+                circles = np.round(circles[0, :] / scale).astype("int")
+                for i, (x, y, r) in enumerate(circles.tolist()):
                     detections.append({
                         "record_id": f"cv-{i}",
                         "bbox": {
@@ -207,71 +264,43 @@ class MultiRecordDetectionService:
         cv_detections: List[Dict]
     ) -> List[Dict]:
         """
-        Merge AI and CV detections, removing overlaps.
-        AI detections take priority.
+        Merge AI and CV detections, removing overlaps (grid-indexed, near-linear).
+        AI detections take priority; duplicate circles from Hough are
+        suppressed too. MULTI_RECORD_MERGE_STRATEGY=wbf fuses each overlap
+        cluster into one weighted box instead of keeping the best one.
         """
-        merged = list(ai_detections)  # Start with AI detections
-        
-        # Add CV detections that don't overlap significantly with AI
-        for cv_det in cv_detections:
-            overlaps = False
-            for ai_det in ai_detections:
-                if self._bboxes_overlap(cv_det["bbox"], ai_det["bbox"], self.max_overlap_ratio):
-                    overlaps = True
-                    break
-            
-            if not overlaps:
-                merged.append(cv_det)
+        candidates = list(ai_detections) + list(cv_detections)
+        ai_ids = {id(d) for d in ai_detections}
+        merge = weighted_box_fusion if MERGE_STRATEGY == "wbf" else non_max_suppression
+        merged = merge(candidates, self.max_overlap_ratio, priority=lambda d: id(d) in ai_ids)
         
         # Sort by confidence (highest first)
         merged.sort(key=lambda x: x.get("confidence", 0), reverse=True)
         
         return merged
     
-    def _bboxes_overlap(self, bbox1: Dict, bbox2: Dict, max_ratio: float) -> bool:
-        """Check if two bounding boxes overlap by more than max_ratio."""
-        x1, y1, w1, h1 = bbox1["x"], bbox1["y"], bbox1["width"], bbox1["height"]
-        x2, y2, w2, h2 = bbox2["x"], bbox2["y"], bbox2["width"], bbox2["height"]
-        
-        # Calculate intersection
-        x_overlap = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
-        y_overlap = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
-        overlap_area = x_overlap * y_overlap
-        
-        # Calculate union
-        area1 = w1 * h1
-        area2 = w2 * h2
-        union_area = area1 + area2 - overlap_area
-        
-        if union_area == 0:
-            return False
-        
-        overlap_ratio = overlap_area / union_area
-        return overlap_ratio > max_ratio
-    
     def _crop_record(
         self, 
+        image: np.ndarray,
         image_path: str, 
         detection: Dict, 
         record_index: int
     ) -> Optional[Dict]:
         """
-        Crop a detected record from the image.
-        Returns dict with crop_path.
+        Crop a detected record from the decoded image (a view, no copy).
+        Returns dict with crop_path and the encoded crop_bytes.
         """
         try:
             bbox = detection.get("bbox")
             if not bbox:
                 return None
             
-            x = bbox.get("x", 0)
-            y = bbox.get("y", 0)
-            width = bbox.get("width", 0)
-            height = bbox.get("height", 0)
+            x = int(bbox.get("x", 0))
+            y = int(bbox.get("y", 0))
+            width = int(bbox.get("width", 0))
+            height = int(bbox.get("height", 0))
             
-            # Load image
-            img = Image.open(image_path).convert("RGB")
-            img_width, img_height = img.size
+            img_height, img_width = image.shape[:2]
             
             # Ensure bbox is within image bounds
             x = max(0, min(x, img_width))
@@ -282,22 +311,56 @@ class MultiRecordDetectionService:
             if width <= 0 or height <= 0:
                 return None
             
-            # Crop
-            cropped = img.crop((x, y, x + width, y + height))
+            # Crop + encode (cv2 releases the GIL while encoding)
+            ok, encoded = cv2.imencode(
+                ".jpg", image[y:y + height, x:x + width], [cv2.IMWRITE_JPEG_QUALITY, CROP_JPEG_QUALITY]
+            )
+            if not ok:
+                return None
+            crop_bytes = encoded.tobytes()
             
             # Save cropped image
             image_path_obj = Path(image_path)
             crop_path = image_path_obj.parent / f"{image_path_obj.stem}_record_{record_index}.jpg"
-            cropped.save(str(crop_path), "JPEG", quality=90)
+            crop_path.write_bytes(crop_bytes)
             
             return {
                 "crop_path": str(crop_path),
+                "crop_bytes": crop_bytes,
                 "crop_bbox": {"x": x, "y": y, "width": width, "height": height}
             }
             
         except Exception as e:
             print(f"Crop error: {e}")
             return None
+    
+    def map_concurrent(
+        self,
+        fn: Callable[[Any], Any],
+        items: List[Any],
+        max_concurrency: int = CROP_CONCURRENCY
+    ) -> List[Any]:
+        """
+        fn(item) for every item on the shared pool, at most max_concurrency
+        at a time for this call; results in input order. Used for per-crop
+        recognition so one image with 20 records cannot take every worker.
+        """
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        
+        window = threading.BoundedSemaphore(max(1, max_concurrency))
+        
+        def run(item):
+            try:
+                return fn(item)
+            finally:
+                window.release()
+        
+        futures = []
+        for item in items:
+            window.acquire()
+            futures.append(_get_pool().submit(contextvars.copy_context().run, run, item))
+        return [future.result() for future in futures]
 
 
 # Global instance
@@ -0,0 +1,168 @@
+# backend/services/near_duplicate_index.py
+# UTF-8, English only
+
+"""
+Near-Duplicate Image Index
+Finds archived records whose cover photo is perceptually the same as a
+new upload, so the upload path can reuse their metadata instead of paying
+for another AI recognition.
+
+- Hashes: pHash (BK-tree key), confirmed with dHash (see perceptual_hash)
+- Persistence: AppendOnlyStore next to the archive images
+  (storage/archive/near_duplicate_index.jsonl), one entry per record
+- Other processes' entries are picked up when the log grows
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services.perceptual_hash import BKTree, ImageHashes, ImageSource, compute_hashes, hamming_distance
+from backend.storage.append_only_store import AppendOnlyStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.getenv("NEAR_DUPLICATE_INDEX_PATH", "storage/archive/near_duplicate_index.jsonl")
+# pHash bits that may differ for two photos of the same sleeve
+MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "8"))
+# dHash confirmation threshold (cuts pHash false positives)
+MAX_DHASH_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DHASH_DISTANCE", "12"))
+ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Recognition fields copied from a matched record
+METADATA_FIELDS = (
+    "artist", "album", "title", "label", "catalog_number", "year",
+    "country", "format", "confidence", "ocr_text",
+)
+
+
+class NearDuplicateIndex:
+    """BK-tree over archived cover hashes, persisted as an append-only log."""
+
+    def __init__(self, path: Path | str = INDEX_PATH, enabled: bool = ENABLED):
+        self.store = AppendOnlyStore(path)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._tree = BKTree()
+        self._hashes: Dict[str, ImageHashes] = {}
+        self._synced_size = -1
+
+    def _sync(self):
+        """Load entries appended since the last sync (lazy, on first use)."""
+        try:
+            size = self.store.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size == self._synced_size:
+            return
+        for record_id in self.store.keys():
+            if record_id in self._hashes:
+                continue
+            entry = self.store.get(record_id)
+            if not entry:
+                continue
+            try:
+                hashes = ImageHashes.from_dict(entry["hashes"])
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"Skipping malformed near-duplicate entry: {record_id}")
+                continue
+            self._hashes[record_id] = hashes
+            self._tree.add(hashes.phash, record_id)
+        self._synced_size = size
+
+    def add(self, record_id: str, hashes: ImageHashes, metadata: Dict[str, Any]):
+        """Register a recognized record's cover hashes and metadata."""
+        entry = {
+            "hashes": hashes.to_dict(),
+            "metadata": {k: metadata.get(k) for k in METADATA_FIELDS if metadata.get(k) is not None},
+        }
+        with self._lock:
+            self._sync()
+            self.store.put(record_id, entry)
+            previous = self._hashes.get(record_id)
+            if previous is None or previous.phash != hashes.phash:
+                self._tree.add(hashes.phash, record_id)
+            self._hashes[record_id] = hashes
+            self._synced_size = self.store.path.stat().st_size
+
+    def find_similar(
+        self,
+        hashes: ImageHashes,
+        max_distance: int = MAX_DISTANCE,
+        max_dhash_distance: Optional[int] = MAX_DHASH_DISTANCE,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        Records whose pHash is within max_distance bits (and dHash within
+        max_dhash_distance, if given), nearest first.
+
+        Returns:
+            [{"record_id", "distance", "dhash_distance", "metadata"}, ...]
+        """
+        with self._lock:
+            self._sync()
+            candidates = self._tree.search(hashes.phash, max_distance)
+            matches = []
+            seen = set()
+            for distance, record_id in candidates:
+                stored = self._hashes.get(record_id)
+                if record_id in seen or stored is None or hamming_distance(stored.phash, hashes.phash) != distance:
+                    continue  # superseded tree node (record re-added with another image)
+                seen.add(record_id)
+                dhash_distance = hamming_distance(stored.dhash, hashes.dhash)
+                if max_dhash_distance is not None and dhash_distance > max_dhash_distance:
+                    continue
+                matches.append((distance, dhash_distance, record_id))
+                if len(matches) >= limit:
+                    break
+
+        results = []
+        for distance, dhash_distance, record_id in matches:
+            entry = self.store.get(record_id) or {}
+            results.append({
+                "record_id": record_id,
+                "distance": distance,
+                "dhash_distance": dhash_distance,
+                "metadata": entry.get("metadata", {}),
+            })
+        return results
+
+    def find_duplicate(self, hashes: ImageHashes) -> Optional[Dict[str, Any]]:
+        """Closest match with usable metadata (artist or album), or None."""
+        if not self.enabled:
+            return None
+        for match in self.find_similar(hashes):
+            meta = match["metadata"]
+            if meta.get("artist") or meta.get("album"):
+                return match
+        return None
+
+    def lookup(self, source: ImageSource) -> Tuple[Optional[ImageHashes], Optional[Dict[str, Any]]]:
+        """
+        Hash an upload and find its duplicate in one call (run it in the
+        image pool). Returns (hashes, match); hashes is None if the image
+        cannot be decoded, match is None if there is no usable duplicate.
+        """
+        hashes = self.hash_image(source)
+        if hashes is None:
+            return None, None
+        return hashes, self.find_duplicate(hashes)
+
+    def hash_image(self, source: ImageSource) -> Optional[ImageHashes]:
+        """compute_hashes, or None if the image cannot be decoded."""
+        try:
+            return compute_hashes(source)
+        except Exception as e:
+            logger.warning(f"Perceptual hashing failed: {e}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            return {"enabled": self.enabled, "records": len(self._hashes), **self.store.stats()}
+
+
+# Global instance
+near_duplicate_index = NearDuplicateIndex()
@@ -9,6 +9,9 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from backend.services.recognition_cache import recognition_cache, image_sha256
+from backend.services.openai_gateway import openai_gateway
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -24,24 +27,34 @@ class NovArchiveGPTService:
     Mimics the behavior of the NovArchive Vinyl Records GPT.
     """
     
+    MODEL = "gpt-4o-mini"
+    # Bump when the prompt or response normalization changes so cached
+    # results produced by the old prompt are no longer served.
+    PROMPT_VERSION = "v1"
+    
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
             self.enabled = True
         else:
-            self.client = None
             self.enabled = False
     
+    def _read_image(self, file_path: Path | str, raw_bytes: Optional[bytes] = None) -> bytes:
+        """Return image bytes (raw_bytes if given, otherwise read from disk)."""
+        if raw_bytes is not None:
+            return raw_bytes
+        with open(file_path, "rb") as f:
+            return f.read()
+    
     def _encode_image(self, file_path: Path | str, raw_bytes: Optional[bytes] = None) -> str:
         """Encode image to base64."""
-        if raw_bytes is not None:
-            data = raw_bytes
-        else:
-            with open(file_path, "rb") as f:
-                data = f.read()
+        data = self._read_image(file_path, raw_bytes)
         return base64.b64encode(data).decode("utf-8")
     
+    def cache_stats(self) -> Dict[str, Any]:
+        """Recognition cache counters (hits, misses, hit_rate, size)."""
+        return recognition_cache.stats()
+    
     def analyze_vinyl_record(
         self, 
         file_path: Optional[Path | str] = None,
@@ -50,15 +63,26 @@ class NovArchiveGPTService:
         """
         Analyze a vinyl record image using OpenAI Vision API.
         Returns structured metadata similar to NovArchive GPT.
+        
+        Results are cached by image sha256 + model + prompt version, so
+        re-uploads and retries of the same bytes skip the OpenAI call.
         """
         if not self.enabled:
             return self._get_fallback_result()
         
         try:
-            image_b64 = self._encode_image(file_path, raw_bytes) if file_path or raw_bytes else None
-            if not image_b64:
+            image_data = self._read_image(file_path, raw_bytes) if file_path or raw_bytes else None
+            if not image_data:
                 return self._get_fallback_result()
             
+            image_hash = image_sha256(image_data)
+            cached = recognition_cache.get(image_hash, self.MODEL, self.PROMPT_VERSION)
+            if cached is not None:
+                logger.info(f"[NovArchiveGPT] Cache hit: {image_hash[:12]}")
+                return {**cached, "cache_hit": True}
+            
+            image_b64 = base64.b64encode(image_data).decode("utf-8")
+            
             # Prompt optimized for vinyl record analysis (similar to NovArchive GPT)
             prompt = """You are an expert in vinyl record identification and cataloging (NovArchive specialist).
 
@@ -131,8 +155,8 @@ Return ONLY valid JSON with this structure:
             
             # P1-2: OpenAI Timeout + Fail-Fast
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",  # Using latest vision model
+                response = openai_gateway.chat_completion_sync(
+                    model=self.MODEL,  # Using latest vision model
                     messages=messages,
                     temperature=0.2,
                     max_tokens=1000,
@@ -171,7 +195,7 @@ Return ONLY valid JSON with this structure:
             metadata = data.get("metadata", {})
             visual_features = data.get("visual_features", {})
             
-            return {
+            result = {
                 "status": "ok",
                 "ocr_text": data.get("ocr_text", ""),
                 "artist": metadata.get("artist"),
@@ -190,6 +214,10 @@ Return ONLY valid JSON with this structure:
                 "source": "novarchive_gpt"
             }
             
+            # Only successful model responses are cached (never fallbacks)
+            recognition_cache.put(image_hash, self.MODEL, self.PROMPT_VERSION, result)
+            return result
+            
         except Exception as e:
             # Return fallback on any error
             return self._get_fallback_result(str(e))
@@ -2,29 +2,291 @@
 # UTF-8, English only
 # Records_AI v2 â€” OCR Engine with legacy compatibility shim
 
+"""
+Level-1 label OCR (no network):
+- find the centre label on a record photo (Hough circle) and crop it
+- unwrap the label's outer ring to polar coordinates so curved text
+  (label name, rim text) becomes straight lines
+- binarise each view (Otsu, dark text on white) and read it with
+  tesseract, keeping per-token confidences
+- ocr_image() is a plain function so it can run in the "ocr" process
+  pool; recognize() awaits it with a per-image timeout
+
+Without the tesseract binary (or on timeout / failure) the text falls back
+to the filename tokens the engine always produced.
+"""
+
+import asyncio
+import functools
+import logging
+import os
 import re
+import time
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from backend.core.executors import OCR_POOL, ExecutorSaturated, run_in_pool
+
+try:
+    import pytesseract
+    from pytesseract import Output
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "8"))
+OCR_MIN_TOKEN_CONFIDENCE = float(os.getenv("OCR_MIN_TOKEN_CONFIDENCE", "55"))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "1600"))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+# Label radius relative to the shorter image side: a label close-up fills
+# the frame, a whole record shows a label of roughly a third of it
+LABEL_MIN_RADIUS = 0.12
+LABEL_MAX_RADIUS = 0.5
+# Label radius relative to the record's (12": 50 / 150 mm)
+LABEL_IN_RECORD = (0.25, 0.5)
+LABEL_EDGE_CONTRAST = 25
+LABEL_MIN_READ_RADIUS = 300
+# Ring of the label unwrapped for curved text (fraction of its radius)
+RING_INNER, RING_OUTER = 0.55, 0.97
+
+
+@functools.lru_cache(maxsize=1)
+def tesseract_available() -> bool:
+    if not PYTESSERACT_AVAILABLE:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def filename_tokens(path: Path) -> str:
+    """The pre-OCR behaviour: alphanumeric tokens of the file name."""
+    return " ".join(re.findall(r"[A-Za-z0-9]+", path.stem)).strip()
+
+
+# ----------------------------------------------------------------------
+# Preprocessing
+
+def _centred_circle(gray: np.ndarray, min_radius: int, max_radius: int) -> Optional[Tuple[int, int, int]]:
+    height, width = gray.shape[:2]
+    circles = cv2.HoughCircles(
+        cv2.medianBlur(gray, 5), cv2.HOUGH_GRADIENT, dp=1.5, minDist=min(height, width),
+        param1=120, param2=40, minRadius=max(1, min_radius), maxRadius=max_radius,
+    )
+    if circles is None:
+        return None
+    for x, y, r in np.round(circles[0]).astype(int):
+        if abs(x - width / 2) < width * 0.25 and abs(y - height / 2) < height * 0.25:
+            return int(x), int(y), int(r)
+    return None
+
+
+def find_label_circle(gray: np.ndarray) -> Optional[Tuple[int, int, int]]:
+    """
+    (x, y, r) of the centre label, or None when no circle is near the centre.
+    The strongest centred circle is the record edge on a whole-record photo,
+    so a concentric circle of LABEL_IN_RECORD of its radius is preferred.
+    """
+    short = min(gray.shape[:2])
+    outer = _centred_circle(gray, int(short * LABEL_MIN_RADIUS), int(short * LABEL_MAX_RADIUS))
+    if outer is None:
+        return None
+    x, y, r = outer
+    top, left = max(0, y - r), max(0, x - r)
+    inner = _centred_circle(gray[top:y + r, left:x + r],
+                            int(r * LABEL_IN_RECORD[0]), int(r * LABEL_IN_RECORD[1]))
+    if inner is None:
+        return outer
+    inner = inner[0] + left, inner[1] + top, inner[2]
+    # Text on a label can vote for a circle too; a real label edge separates two tones
+    return inner if _edge_contrast(gray, inner) >= LABEL_EDGE_CONTRAST else outer
+
+
+def _edge_contrast(gray: np.ndarray, circle: Tuple[int, int, int]) -> float:
+    """Median intensity difference just inside vs just outside the circle."""
+    x, y, r = circle
+    inside, outside = np.zeros_like(gray), np.zeros_like(gray)
+    cv2.circle(inside, (x, y), int(r * 0.95), 255, -1)
+    cv2.circle(inside, (x, y), int(r * 0.85), 0, -1)
+    cv2.circle(outside, (x, y), int(r * 1.15), 255, -1)
+    cv2.circle(outside, (x, y), int(r * 1.05), 0, -1)
+    return abs(float(np.median(gray[inside > 0])) - float(np.median(gray[outside > 0])))
+
+
+def binarize(image: np.ndarray) -> np.ndarray:
+    """Otsu threshold with dark text on a white background."""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if cv2.countNonZero(binary) < binary.size / 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def unwrap_ring(gray: np.ndarray, circle: Tuple[int, int, int]) -> np.ndarray:
+    """
+    Outer label ring as a straight strip: text running clockwise along the
+    rim reads left to right. The first quarter is repeated at the end so
+    words crossing the seam are read whole once.
+    """
+    x, y, r = circle
+    circumference = int(2 * np.pi * r)
+    polar = cv2.warpPolar(gray, (r, circumference), (float(x), float(y)), r,
+                          cv2.WARP_POLAR_LINEAR + cv2.INTER_LINEAR)
+    # rows = angle, columns = radius; outward = up
+    ring = polar[:, int(r * RING_INNER):int(r * RING_OUTER)]
+    strip = cv2.rotate(ring, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return np.hstack([strip, strip[:, :circumference // 4]])
+
+
+def label_views(image: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+    """Binarised images to read: the (cropped) label, plus its unwrapped ring."""
+    height, width = image.shape[:2]
+    scale = min(1.0, OCR_MAX_SIDE / max(height, width))
+    if scale < 1.0:
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    circle = find_label_circle(gray)
+    if circle is None:
+        return [("full", binarize(gray))]
+
+    x, y, r = circle
+    crop = gray[max(0, y - r):y + r, max(0, x - r):x + r]
+    x, y = min(x, r), min(y, r)
+    # Small labels: upscale so glyphs reach the size tesseract reads best
+    factor = min(3.0, LABEL_MIN_READ_RADIUS / r)
+    if factor > 1.0:
+        crop = cv2.resize(crop, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+        x, y, r = round(x * factor), round(y * factor), round(r * factor)
+    ring = unwrap_ring(crop, (x, y, r))
+    label = crop.copy()
+    mask = np.zeros_like(label)
+    cv2.circle(mask, (x, y), r, 255, -1)
+    label[mask == 0] = 255
+    return [("label", binarize(label)), ("ring", binarize(ring))]
+
+
+# ----------------------------------------------------------------------
+# Recognition (runs in the OCR pool)
+
+def _read_tokens(view: np.ndarray, timeout: float) -> List[Dict[str, Any]]:
+    data = pytesseract.image_to_data(
+        view, lang=OCR_LANG, config="--psm 6", output_type=Output.DICT, timeout=max(1, int(np.ceil(timeout)))
+    )
+    tokens = []
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        confidence = float(data["conf"][i])
+        if word and confidence >= OCR_MIN_TOKEN_CONFIDENCE:
+            line = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            tokens.append({"text": word, "confidence": round(confidence, 1), "line": line})
+    return tokens
+
+
+def _lines(tokens: List[Dict[str, Any]]) -> List[str]:
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    for token in tokens:
+        lines.setdefault(token["line"], []).append(token["text"])
+    return [" ".join(words) for words in lines.values()]
+
+
+def ocr_image(file_path: str, timeout: float = OCR_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """
+    OCR one record photo. Picklable entry point for the process pool.
+
+    Returns:
+        {"text", "tokens": [{"text", "confidence", "view"}], "mean_confidence",
+         "engine": "tesseract" | "filename", "elapsed_ms", "timed_out", "error"?}
+    """
+    started = time.monotonic()
+    path = Path(file_path)
+    result: Dict[str, Any] = {
+        "text": "", "tokens": [], "mean_confidence": 0.0,
+        "engine": "filename", "elapsed_ms": 0.0, "timed_out": False,
+    }
+    try:
+        if tesseract_available():
+            image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError(f"Could not decode image: {path.name}")
+            lines, seen = [], set()
+            for name, view in label_views(image):
+                left = timeout - (time.monotonic() - started)
+                if left <= 0:
+                    result["timed_out"] = True
+                    break
+                tokens = _read_tokens(view, left)
+                result["tokens"].extend({"text": t["text"], "confidence": t["confidence"], "view": name} for t in tokens)
+                for line in _lines(tokens):
+                    if line.upper() not in seen:
+                        seen.add(line.upper())
+                        lines.append(line)
+            result["engine"] = "tesseract"
+            result["text"] = "\n".join(lines)
+    except RuntimeError as e:
+        # pytesseract raises RuntimeError("Tesseract process timeout")
+        result["timed_out"] = "timeout" in str(e).lower()
+        result["error"] = str(e)
+    except Exception as e:
+        result["error"] = str(e)
+
+    if result["tokens"]:
+        result["mean_confidence"] = round(
+            sum(t["confidence"] for t in result["tokens"]) / len(result["tokens"]), 1
+        )
+    if not result["text"]:
+        result["text"] = filename_tokens(path)
+        result["engine"] = "filename"
+    result["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
 
 
 class OCREngine:
     """
-    Minimal OCR engine.
+    Label OCR engine.
     Provides both:
-      - run_ocr(path)
-      - extract_text_from_image(path)  <-- legacy API compatibility
+      - recognize(path): label OCR in the OCR pool (async)
+      - run_ocr(path) / extract_text_from_image(path): legacy synchronous
+        API, kept on the cheap filename path (callers may be on the event
+        loop; a tesseract pass can take OCR_TIMEOUT_SECONDS)
     """
 
     def run_ocr(self, file_path: str) -> str:
         """
-        Main OCR function used by the new metadata engine.
+        Filename tokens of a record photo (legacy, cheap, blocking-safe).
+        Use recognize() for label OCR.
         """
         path = Path(file_path)
         if not path.exists():
             raise RuntimeError(f"OCR engine: file not found: {path}")
+        return filename_tokens(path)
 
-        # Minimal deterministic text extraction from filename
-        tokens = re.findall(r"[A-Za-z0-9]+", path.stem)
-        return " ".join(tokens).strip()
+    async def recognize(self, file_path: str, timeout: float = OCR_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """
+        ocr_image() in the OCR pool, bounded by `timeout` (plus pool startup
+        slack). A timed-out or rejected run falls back to filename tokens.
+        """
+        path = Path(file_path)
+        if not path.exists():
+            raise RuntimeError(f"OCR engine: file not found: {path}")
+        try:
+            return await asyncio.wait_for(run_in_pool(OCR_POOL, ocr_image, str(path), timeout), timeout + 2)
+        except (asyncio.TimeoutError, ExecutorSaturated) as e:
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            logger.warning(f"OCR {'timed out' if timed_out else 'pool saturated'} for {path.name}")
+            return {
+                "text": filename_tokens(path), "tokens": [], "mean_confidence": 0.0,
+                "engine": "filename", "elapsed_ms": timeout * 1000 if timed_out else 0.0,
+                "timed_out": timed_out, "error": type(e).__name__,
+            }
 
     # ---------------------------------------------------------
     # LEGACY SUPPORT (for analysis_service old import)
@@ -32,7 +294,7 @@ class OCREngine:
     def extract_text_from_image(self, file_path: str) -> str:
         """
         Legacy wrapper for backward compatibility.
-        Old code expects this function.
+        Old code expects this function (filename tokens, see run_ocr).
         """
         return self.run_ocr(file_path)
 
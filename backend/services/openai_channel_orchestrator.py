@@ -8,6 +8,8 @@ import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+from backend.services.openai_gateway import openai_gateway
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -39,11 +41,9 @@ class OpenAIChannelOrchestrator:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
             self.enabled = True
             logger.info("OpenAIChannelOrchestrator initialized with API key")
         else:
-            self.client = None
             self.enabled = False
             if not OPENAI_AVAILABLE:
                 logger.warning("OpenAI SDK not available")
@@ -97,7 +97,7 @@ class OpenAIChannelOrchestrator:
             prompt = self._build_prompt(record)
             
             # Call OpenAI
-            response = self.client.chat.completions.create(
+            response = openai_gateway.chat_completion_sync(
                 model=self.model,
                 messages=[
                     {
@@ -0,0 +1,438 @@
+# backend/services/openai_gateway.py
+# UTF-8, English only
+
+"""
+OpenAI Gateway
+Single async entry point for every OpenAI chat completion in the backend.
+
+All calls (from async routers or from sync services running in executor
+threads) are executed on one gateway event loop, so these limits are
+shared process-wide:
+
+- Concurrency: global semaphore + per-model semaphore
+- Token budget: tokens-per-minute bucket (estimated before the call,
+  corrected with response.usage afterwards)
+- Single-flight: identical in-flight requests share one upstream call
+- Retries: exponential backoff with full jitter, Retry-After honoured,
+  limited by a retry budget (retries may not exceed a share of traffic)
+- Deadlines: the caller's request deadline (backend.core.deadline) bounds
+  queueing, backoff and every attempt's timeout
+- Stage metrics: each call counts as one external call of the UPAP stage
+  running in the caller's context (backend.core.stage_metrics)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from backend.core.deadline import DeadlineExceeded, request_deadline
+from backend.core.stage_metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+try:
+    import openai
+    from openai import AsyncOpenAI
+    OPENAI_AVAILABLE = True
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+except ImportError:
+    OPENAI_AVAILABLE = False
+    RETRYABLE_ERRORS = ()
+    logger.warning("OpenAI SDK not available - install with: pip install openai")
+
+# Rough token cost of one image_url part (high detail, ~1024px)
+IMAGE_TOKEN_ESTIMATE = 765
+CHARS_PER_TOKEN = 4
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Tokens-per-minute budget. Used only from the gateway loop."""
+
+    def __init__(self, tokens_per_minute: float):
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float, deadline: Optional[float] = None) -> float:
+        """Wait until amount tokens are available. Returns tokens taken."""
+        amount = min(float(amount), self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return amount
+            wait = (amount - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise DeadlineExceeded("OpenAI token budget wait exceeds request deadline (timed out)")
+            await asyncio.sleep(wait)
+
+    def adjust(self, delta: float):
+        """Return (positive) or charge (negative) tokens after the fact."""
+        self._refill()
+        self.tokens = max(-self.capacity, min(self.capacity, self.tokens + delta))
+
+
+class RetryBudget:
+    """
+    Retries are allowed while retries stay below `ratio` of requests.
+
+    Each request deposits `ratio` tokens, each retry withdraws one; the
+    balance starts at (and is capped by) `min_reserve` so a quiet service
+    can still retry a few times.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_reserve: float = 10.0):
+        self.ratio = ratio
+        self.max_balance = min_reserve
+        self.balance = min_reserve
+
+    def record_request(self):
+        self.balance = min(self.max_balance, self.balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.balance >= 1.0:
+            self.balance -= 1.0
+            return True
+        return False
+
+
+class OpenAIGateway:
+    """
+    Process-wide OpenAI gateway.
+
+    Async callers: await openai_gateway.chat_completion(...)
+    Sync callers:  openai_gateway.chat_completion_sync(...)
+
+    Both accept the same keyword arguments as
+    client.chat.completions.create() and return its response object.
+    """
+
+    def __init__(self):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.base_url = os.getenv("OPENAI_BASE_URL") or None
+        self.enabled = OPENAI_AVAILABLE and bool(self.api_key)
+
+        self.max_concurrency = int(_env_float("OPENAI_GATEWAY_MAX_CONCURRENCY", 16))
+        self.per_model_concurrency = int(_env_float("OPENAI_GATEWAY_PER_MODEL_CONCURRENCY", 8))
+        self.tokens_per_minute = _env_float("OPENAI_GATEWAY_TPM", 200_000)
+        self.max_attempts = int(_env_float("OPENAI_GATEWAY_MAX_ATTEMPTS", 4))
+        self.backoff_base = _env_float("OPENAI_GATEWAY_BACKOFF_BASE", 0.5)
+        self.backoff_max = _env_float("OPENAI_GATEWAY_BACKOFF_MAX", 20.0)
+        self.retry_budget_ratio = _env_float("OPENAI_GATEWAY_RETRY_RATIO", 0.2)
+        self.retry_budget_reserve = _env_float("OPENAI_GATEWAY_RETRY_RESERVE", 10.0)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        """(Re)create loop-bound state. Only touched from the gateway loop."""
+        self._client = None
+        self._global_sem: Optional[asyncio.Semaphore] = None
+        self._model_sems: Dict[str, asyncio.Semaphore] = {}
+        self._bucket = TokenBucket(self.tokens_per_minute)
+        self._retry_budget = RetryBudget(self.retry_budget_ratio, self.retry_budget_reserve)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            "requests": 0,
+            "upstream_calls": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "retry_budget_exhausted": 0,
+            "rate_limited": 0,
+            "deadline_exceeded": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def configure(self, **overrides):
+        """
+        Override settings (api_key, base_url, max_concurrency, ...) and reset
+        limits. Intended for tests and scripts; call before traffic starts.
+        """
+        self.shutdown()
+        for key, value in overrides.items():
+            if not hasattr(self, key):
+                raise AttributeError(f"Unknown gateway setting: {key}")
+            setattr(self, key, value)
+        self.enabled = OPENAI_AVAILABLE and bool(self.api_key)
+        self._reset_state()
+
+    # ------------------------------------------------------------------
+    # Gateway loop
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None and self._loop.is_running():
+            return self._loop
+        with self._start_lock:
+            if self._loop is not None and self._loop.is_running():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name="openai-gateway", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread = loop, thread
+            return loop
+
+    def shutdown(self):
+        """Stop the gateway loop (tests / app shutdown)."""
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        client = self._client
+
+        async def close():
+            if client is not None:
+                await client.close()
+
+        if loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(close(), loop).result(timeout=5)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+        # Client and semaphores were bound to the stopped loop
+        self._client = None
+        self._global_sem = None
+        self._model_sems = {}
+        self._inflight = {}
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # retries are handled here, under the budget
+            )
+        return self._client
+
+    def _model_sem(self, model: str) -> asyncio.Semaphore:
+        sem = self._model_sems.get(model)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_model_concurrency)
+            self._model_sems[model] = sem
+        return sem
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def chat_completion(self, **kwargs) -> Any:
+        """Async chat completion (kwargs as for chat.completions.create)."""
+        deadline = request_deadline.get()
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute(kwargs, deadline), self._ensure_loop()
+        )
+        with external_call("openai"):
+            return await asyncio.wrap_future(future)
+
+    def chat_completion_sync(self, **kwargs) -> Any:
+        """Blocking chat completion for sync services (runs on the gateway loop)."""
+        deadline = request_deadline.get()
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute(kwargs, deadline), self._ensure_loop()
+        )
+        with external_call("openai"):
+            return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight_keys": len(self._inflight),
+            "tpm_available": round(self._bucket.tokens, 1),
+            "retry_budget": round(self._retry_budget.balance, 2),
+        }
+
+    # ------------------------------------------------------------------
+    # Execution (gateway loop only)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _request_key(kwargs: Dict[str, Any]) -> str:
+        payload = {k: v for k, v in kwargs.items() if k != "timeout"}
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def estimate_tokens(kwargs: Dict[str, Any]) -> int:
+        """Prompt tokens (chars/4 + fixed cost per image) + max_tokens."""
+        chars = 0
+        images = 0
+        for message in kwargs.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, str):
+                chars += len(content)
+            elif isinstance(content, list):
+                for part in content:
+                    if part.get("type") == "text":
+                        chars += len(part.get("text", ""))
+                    elif part.get("type") == "image_url":
+                        images += 1
+        return chars // CHARS_PER_TOKEN + images * IMAGE_TOKEN_ESTIMATE + int(kwargs.get("max_tokens") or 256)
+
+    async def _execute(self, kwargs: Dict[str, Any], deadline: Optional[float]) -> Any:
+        if not self.enabled:
+            raise RuntimeError("OpenAI gateway not available - check OPENAI_API_KEY")
+        if self._global_sem is None:
+            self._global_sem = asyncio.Semaphore(self.max_concurrency)
+
+        self._stats["requests"] += 1
+        key = self._request_key(kwargs)
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self._stats["coalesced"] += 1
+            return await self._await_with_deadline(asyncio.shield(existing), deadline)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call_with_retries(kwargs, deadline)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Followers retrieve it; avoid "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _await_with_deadline(self, awaitable, deadline: Optional[float]):
+        if deadline is None:
+            return await awaitable
+        left = deadline - time.monotonic()
+        if left <= 0:
+            self._stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("OpenAI request deadline exceeded (timed out)")
+        try:
+            return await asyncio.wait_for(awaitable, left)
+        except asyncio.TimeoutError:
+            self._stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded("OpenAI request deadline exceeded (timed out)")
+
+    def _attempt_timeout(self, kwargs: Dict[str, Any], deadline: Optional[float]) -> float:
+        timeout = float(kwargs.get("timeout") or 60.0)
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                self._stats["deadline_exceeded"] += 1
+                raise DeadlineExceeded("OpenAI request deadline exceeded (timed out)")
+            timeout = min(timeout, left)
+        return timeout
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = None
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is not None:
+            try:
+                if headers.get("retry-after-ms"):
+                    retry_after = float(headers["retry-after-ms"]) / 1000.0
+                elif headers.get("retry-after"):
+                    retry_after = float(headers["retry-after"])
+            except (TypeError, ValueError):
+                retry_after = None
+        # Full jitter
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def _call_with_retries(self, kwargs: Dict[str, Any], deadline: Optional[float]) -> Any:
+        model = kwargs.get("model", "default")
+        estimate = self.estimate_tokens(kwargs)
+        self._retry_budget.record_request()
+        attempt = 0
+
+        while True:
+            await self._await_with_deadline(self._global_sem.acquire(), deadline)
+            try:
+                await self._await_with_deadline(self._model_sem(model).acquire(), deadline)
+                try:
+                    charged = await self._bucket.acquire(estimate, deadline)
+                    call_kwargs = {**kwargs, "timeout": self._attempt_timeout(kwargs, deadline)}
+                    self._stats["upstream_calls"] += 1
+                    try:
+                        response = await self._get_client().chat.completions.create(**call_kwargs)
+                    except BaseException:
+                        # Failed attempts consumed nothing upstream (or unknown): refund
+                        self._bucket.adjust(charged)
+                        raise
+                    usage = getattr(response, "usage", None)
+                    if usage is not None and getattr(usage, "total_tokens", None):
+                        self._bucket.adjust(charged - usage.total_tokens)
+                        self._stats["prompt_tokens"] += usage.prompt_tokens or 0
+                        self._stats["completion_tokens"] += usage.completion_tokens or 0
+                    return response
+                finally:
+                    self._model_sem(model).release()
+            except RETRYABLE_ERRORS as error:
+                if OPENAI_AVAILABLE and isinstance(error, openai.RateLimitError):
+                    self._stats["rate_limited"] += 1
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    self._stats["errors"] += 1
+                    raise
+                if not self._retry_budget.try_spend():
+                    self._stats["retry_budget_exhausted"] += 1
+                    self._stats["errors"] += 1
+                    raise
+                delay = self._backoff(attempt, error)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    self._stats["deadline_exceeded"] += 1
+                    raise DeadlineExceeded(
+                        f"OpenAI request deadline exceeded after {type(error).__name__} (timed out)"
+                    ) from error
+                self._stats["retries"] += 1
+                logger.info(f"[OpenAIGateway] {type(error).__name__} on {model}, retry {attempt} in {delay:.2f}s")
+            except DeadlineExceeded:
+                raise
+            except Exception:
+                self._stats["errors"] += 1
+                raise
+            finally:
+                self._global_sem.release()
+            await asyncio.sleep(delay)
+
+
+# Global instance
+openai_gateway = OpenAIGateway()
@@ -11,6 +11,9 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+from backend.storage.append_only_store import AppendOnlyStore
+from backend.services.openai_gateway import openai_gateway
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -36,46 +39,41 @@ class OpenAILabelService:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
             self.enabled = True
             logger.info("OpenAILabelService initialized with API key")
         else:
-            self.client = None
             self.enabled = False
             if not OPENAI_AVAILABLE:
                 logger.warning("OpenAI SDK not available")
             elif not self.api_key:
                 logger.warning("OPENAI_API_KEY not set - service disabled")
         
-        # Cache setup
+        # Cache setup: append-only log + in-memory index (built on first use)
         self.cache_dir = Path(__file__).parent.parent.parent / "storage" / "openai_cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "image_hash_cache.json"
-        self._cache = self._load_cache()
+        self.cache_file = self.cache_dir / "image_hash_cache.jsonl"
+        self.legacy_cache_file = self.cache_dir / "image_hash_cache.json"
+        self._cache = AppendOnlyStore(self.cache_file)
+        self._migrate_legacy_cache()
         
         # Model configuration
         self.default_model = "gpt-4o-mini"  # Cheapest
         self.escalation_model = "gpt-4o"    # More expensive, only if needed
         self.confidence_threshold = 0.6       # Escalate if below this
     
-    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
-        """Load cache from disk."""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load cache: {e}")
-                return {}
-        return {}
-    
-    def _save_cache(self):
-        """Save cache to disk."""
+    def _migrate_legacy_cache(self):
+        """One-time import of the old whole-file JSON cache into the log."""
+        if not self.legacy_cache_file.exists() or self.cache_file.exists():
+            return
         try:
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(self._cache, f, indent=2)
+            with open(self.legacy_cache_file, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            for image_hash, result in legacy.items():
+                self._cache.put(image_hash, result)
+            self.legacy_cache_file.rename(self.legacy_cache_file.with_suffix(".json.migrated"))
+            logger.info(f"Migrated {len(legacy)} cache entries to {self.cache_file}")
         except Exception as e:
-            logger.warning(f"Failed to save cache: {e}")
+            logger.warning(f"Failed to migrate legacy cache: {e}")
     
     def _hash_image(self, image_bytes: bytes) -> str:
         """Generate SHA-256 hash of image bytes."""
@@ -126,9 +124,9 @@ class OpenAILabelService:
         
         # Check cache first
         image_hash = self._hash_image(image_bytes)
-        if image_hash in self._cache:
+        cached_result = self._cache.get(image_hash)
+        if cached_result is not None:
             logger.info(f"Cache hit for image hash: {image_hash[:16]}...")
-            cached_result = self._cache[image_hash].copy()
             cached_result["cached"] = True
             return cached_result
         
@@ -154,11 +152,13 @@ class OpenAILabelService:
                     logger.warning(f"Escalation failed, using default model result: {escalation_error}")
                     # Use default model result even if escalation fails
             
-            # Store in cache (only if no error)
+            # Store in cache (only if no error) - single-entry append
             if not result.get("error"):
                 result["cached"] = False
-                self._cache[image_hash] = result.copy()
-                self._save_cache()
+                try:
+                    self._cache.put(image_hash, result)
+                except Exception as cache_error:
+                    logger.warning(f"Failed to save cache entry: {cache_error}")
             
             logger.info(f"OpenAI analysis successful: {result.get('artist')} - {result.get('album')} (confidence: {confidence})")
             return result
@@ -182,7 +182,7 @@ class OpenAILabelService:
         """Call OpenAI Vision API with optimized settings."""
         base64_image = self._encode_image(image_bytes)
         
-        response = self.client.chat.completions.create(
+        response = openai_gateway.chat_completion_sync(
             model=model,
             messages=[
                 {
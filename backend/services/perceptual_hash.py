@@ -0,0 +1,170 @@
+# backend/services/perceptual_hash.py
+# UTF-8, English only
+
+"""
+Perceptual Image Hashing
+64-bit aHash / dHash / pHash (numpy + PIL) and a BK-tree for
+Hamming-distance nearest-neighbour search.
+
+Unlike a SHA-256 of encoded bytes, these hashes survive re-compression,
+resizing and small exposure changes: the same sleeve photographed twice
+lands within a few bits.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8                # 8x8 bits = 64-bit hashes
+PHASH_IMAGE_SIZE = 32        # DCT input size
+_RESAMPLE = Image.Resampling.LANCZOS
+
+ImageSource = Union[Image.Image, bytes, str, Path]
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis (rows = frequencies)."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0, :] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_IMAGE_SIZE)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def _grayscale(image: Image.Image, size: Tuple[int, int]) -> np.ndarray:
+    return np.asarray(image.convert("L").resize(size, _RESAMPLE), dtype=np.float64)
+
+
+def average_hash(image: Image.Image) -> int:
+    """aHash: 8x8 grayscale thumbnail, bit = pixel above mean."""
+    pixels = _grayscale(image, (HASH_SIZE, HASH_SIZE))
+    return _bits_to_int(pixels > pixels.mean())
+
+
+def difference_hash(image: Image.Image) -> int:
+    """dHash: 9x8 grayscale thumbnail, bit = pixel brighter than its left neighbour."""
+    pixels = _grayscale(image, (HASH_SIZE + 1, HASH_SIZE))
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """pHash: 32x32 DCT, bit = low-frequency coefficient above their median (DC excluded)."""
+    pixels = _grayscale(image, (PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE))
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    median = np.median(low.ravel()[1:])
+    return _bits_to_int(low > median)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+@dataclass(frozen=True)
+class ImageHashes:
+    phash: int
+    dhash: int
+    ahash: int
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"phash": f"{self.phash:016x}", "dhash": f"{self.dhash:016x}", "ahash": f"{self.ahash:016x}"}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "ImageHashes":
+        return cls(int(data["phash"], 16), int(data["dhash"], 16), int(data["ahash"], 16))
+
+
+def _open(source: ImageSource) -> Image.Image:
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        image = Image.open(BytesIO(source))
+    else:
+        image = Image.open(Path(source))
+    # Decode at reduced size when possible (JPEG draft mode): hashes only need 32x32
+    image.draft("L", (PHASH_IMAGE_SIZE * 4, PHASH_IMAGE_SIZE * 4))
+    return image
+
+
+def compute_hashes(source: ImageSource) -> ImageHashes:
+    """All three hashes for an image, path or encoded bytes."""
+    image = _open(source)
+    image.load()
+    return ImageHashes(
+        phash=perceptual_hash(image),
+        dhash=difference_hash(image),
+        ahash=average_hash(image),
+    )
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes (Hamming metric).
+
+    search(h, k) visits only subtrees whose edge distance d satisfies
+    |d - dist(h, node)| <= k (triangle inequality). Not thread-safe;
+    callers lock.
+    """
+
+    def __init__(self) -> None:
+        # Node: [hash, [item ids], {edge distance: child node}]
+        self._root: Optional[List[Any]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item_id: Any) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item_id], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item_id], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """(distance, item_id) pairs within max_distance, nearest first."""
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, item_id) for item_id in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            for edge, child in node[2].items():
+                if low <= edge <= high:
+                    stack.append(child)
+        results.sort(key=lambda pair: pair[0])
+        return results
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            for item_id in node[1]:
+                yield node[0], item_id
+            stack.extend(node[2].values())
@@ -0,0 +1,58 @@
+# backend/services/preview_events.py
+# UTF-8, English only
+
+"""
+Preview Events
+Publishes preview state transitions (UPLOADED -> AI_ANALYZED -> ENRICHED
+-> ARCHIVED) on the event bus, one topic per preview, for the SSE /
+WebSocket status streams in upap_preview_events_router.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from backend.core.event_bus import event_bus
+from backend.models.preview_record_db import PreviewRecordDB
+from backend.models.record_state import RecordState
+
+logger = logging.getLogger(__name__)
+
+# Streams close after these states (nothing further happens to the preview)
+TERMINAL_STATES = {RecordState.ARCHIVED.value}
+
+
+def preview_topic(preview_id: str) -> str:
+    return f"preview:{preview_id}"
+
+
+def _state_value(state: Any) -> Optional[str]:
+    return state.value if isinstance(state, RecordState) else state
+
+
+def preview_state_data(preview: PreviewRecordDB) -> Dict[str, Any]:
+    """Compact status payload; clients fetch the full preview once when it is ready."""
+    return {
+        "preview_id": preview.preview_id,
+        "state": _state_value(preview.state),
+        "confidence": preview.confidence,
+        "model_used": preview.model_used,
+        "artist": preview.artist,
+        "album": preview.album,
+        "record_id": preview.record_id,
+    }
+
+
+def publish_preview_state(preview: PreviewRecordDB, **extra: Any):
+    """Publish the preview's current state (call after commit)."""
+    try:
+        event_bus.publish(preview_topic(preview.preview_id), "state", {**preview_state_data(preview), **extra})
+    except Exception as e:
+        logger.warning(f"Preview event publish failed for {preview.preview_id}: {e}")
+
+
+def publish_preview_event(preview_id: str, event_type: str, data: Dict[str, Any]):
+    """Publish a non-state event (progress, error) for a preview."""
+    try:
+        event_bus.publish(preview_topic(preview_id), event_type, {"preview_id": preview_id, **data})
+    except Exception as e:
+        logger.warning(f"Preview event publish failed for {preview_id}: {e}")
@@ -0,0 +1,222 @@
+# backend/services/price_refresh.py
+# UTF-8, English only
+
+"""
+Price Refresh Scheduler
+Keeps the price store (backend.services.price_store) fresh in the
+background, so pricing reads never wait on Discogs.
+
+- Every PRICE_REFRESH_INTERVAL seconds, refreshes stale releases in
+  priority order (recently viewed, listed for sale, high value, oldest)
+- Each run spends at most PRICE_REFRESH_BUDGET Discogs requests, counted
+  as the upstream requests this refresh sent through the shared
+  discogs_client (retries and revalidations included; other threads'
+  Discogs calls are not)
+- Runs on a dedicated thread: a budgeted run takes minutes at the Discogs
+  rate limit and must not hold a recognition or enrichment worker
+- A failed release is backed off (next_refresh_at) instead of retried
+  every run
+- Started with the API (PRICE_REFRESH_INTERVAL=0 disables). Every API
+  process runs the loop, but each interval is one job in the shared job
+  queue (dedupe key = interval slot): the process that claims it runs the
+  refresh, the others skip, so the budget is global, not per process
+- Standalone: python -m backend.services.price_refresh --once --budget 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = float(os.getenv("PRICE_REFRESH_INTERVAL", "600"))
+REFRESH_BUDGET = int(os.getenv("PRICE_REFRESH_BUDGET", "200"))
+# Lease on one interval's run; another process may take it over after this
+LEASE_SECONDS = float(os.getenv("PRICE_REFRESH_LEASE_SECONDS", "900"))
+QUEUE_NAME = "price_refresh"
+
+# fetch(release_id) -> (listings, Discogs requests spent)
+FetchFn = Callable[[str], Tuple[List[Dict[str, Any]], int]]
+
+
+def fetch_from_discogs(release_id: str) -> Tuple[List[Dict[str, Any]], int]:
+    from backend.services.discogs_client import discogs_client
+    from backend.services.vinyl_pricing_service import vinyl_pricing_service
+
+    before = discogs_client.thread_upstream()
+    listings = vinyl_pricing_service.fetch_release_listings(release_id)
+    return listings, discogs_client.thread_upstream() - before
+
+
+class PriceRefreshScheduler:
+    """Budgeted refresh of stale prices."""
+
+    def __init__(self, store=None, fetch: Optional[FetchFn] = None,
+                 budget: int = REFRESH_BUDGET, interval: float = REFRESH_INTERVAL, queue=None):
+        self._store = store
+        self._queue = queue
+        self.fetch = fetch or fetch_from_discogs
+        self.budget = budget
+        self.interval = interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._totals = {"runs": 0, "refreshed": 0, "failed": 0, "requests": 0, "skipped": 0}
+        self._last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            from backend.services.price_store import price_store
+            self._store = price_store
+        return self._store
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            from backend.core.job_queue import JobQueue
+            self._queue = JobQueue(QUEUE_NAME, lease_seconds=LEASE_SECONDS, max_attempts=1)
+        return self._queue
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def refresh_due(self, budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Refresh stale releases in priority order until the request budget
+        is spent (blocking). Returns a summary of the run.
+        """
+        budget = self.budget if budget is None else budget
+        started = time.time()
+        run = {"refreshed": 0, "failed": 0, "requests": 0, "budget": budget, "remaining_due": 0}
+
+        due = self.store.due(limit=max(budget, 1))
+        for index, release_id in enumerate(due):
+            if run["requests"] >= budget:
+                run["remaining_due"] = len(due) - index
+                break
+            try:
+                listings, spent = self.fetch(release_id)
+            except Exception as e:
+                run["requests"] += 1
+                run["failed"] += 1
+                logger.warning(f"[PRICE_REFRESH] {release_id} failed: {e}")
+                self.store.mark_failed(release_id, str(e))
+                continue
+            run["requests"] += spent
+            self.store.save(release_id, listings)
+            run["refreshed"] += 1
+
+        run["seconds"] = round(time.time() - started, 3)
+        self._last_run = {**run, "finished_at": time.time()}
+        self._totals["runs"] += 1
+        for key in ("refreshed", "failed", "requests"):
+            self._totals[key] += run[key]
+        if run["refreshed"] or run["failed"]:
+            logger.info(f"[PRICE_REFRESH] {run}")
+        return run
+
+    def refresh_leased(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Run refresh_due for the current interval unless another process
+        already has (blocking). Returns the run summary, or None when the
+        interval's run belongs to another process.
+        """
+        slot = int((now or time.time()) // max(self.interval, 1))
+        self.queue.enqueue({"slot": slot}, dedupe_key=f"slot:{slot}")
+        jobs = self.queue.claim(self.owner, limit=1)
+        if not jobs:
+            self._totals["skipped"] += 1
+            return None
+        job = jobs[0]
+        try:
+            run = self.refresh_due()
+        except Exception as e:
+            self.queue.fail(job, str(e), retry=False)
+            raise
+        self.queue.complete(job)
+        return run
+
+    async def start(self):
+        """Run refresh_due every interval on the running loop (no-op when interval is 0)."""
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="price-refresh")
+        self._task = asyncio.get_running_loop().create_task(self._loop(), name="price-refresh")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # An in-flight run finishes in its thread; its lease covers a takeover
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "budget": self.budget,
+            "last_run": self._last_run,
+            **self._totals,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.refresh_leased)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[PRICE_REFRESH] Run failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+
+# Global instance
+price_refresh_scheduler = PriceRefreshScheduler()
+
+
+async def start_price_refresh():
+    """Start the background refresh (API startup)."""
+    await price_refresh_scheduler.start()
+
+
+async def stop_price_refresh():
+    await price_refresh_scheduler.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Market price refresh")
+    parser.add_argument("--once", action="store_true", help="Run one refresh and exit")
+    parser.add_argument("--budget", type=int, default=REFRESH_BUDGET, help="Discogs requests per run")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL or 600, help="Seconds between runs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    scheduler = PriceRefreshScheduler(budget=args.budget, interval=args.interval)
+    if args.once:
+        print(scheduler.refresh_due())
+        return 0
+    while True:
+        # Shares the interval lease with the API processes
+        print(scheduler.refresh_leased() or "run taken by another process")
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
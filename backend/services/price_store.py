@@ -0,0 +1,327 @@
+# backend/services/price_store.py
+# UTF-8, English only
+
+"""
+Price Store
+Persistent market prices (market_prices table) so reading a record's value
+is one indexed lookup instead of fresh Discogs calls.
+
+- Rows per (release_id, condition, currency) with min / median / max and
+  sample size, computed from marketplace listings in their own currency;
+  condition "" aggregates all listings
+- get() picks the row for the requested condition with the largest
+  sample, converting other currencies (FX_RATES) - one USD listing does
+  not outweigh forty in EUR - and falls back to the all-conditions row
+  (Goldmine multiplier); the answer carries fetched_at / age / stale
+- Unknown releases get a placeholder row, so the refresh scheduler
+  (backend.services.price_refresh) fetches them; views and listings feed
+  its priority order
+- price_lookups maps normalized "artist|album|catalog" to the release id,
+  which saves the Discogs search on later reads
+"""
+
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, func, inspect, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.db import engine as default_engine
+from backend.models.market_price_db import MarketPriceDB, PriceLookupDB
+from backend.services.vinyl_pricing_service import CONDITION_MULTIPLIERS
+
+logger = logging.getLogger(__name__)
+
+PRICES = MarketPriceDB.__table__
+LOOKUPS = PriceLookupDB.__table__
+
+MAX_AGE_SECONDS = float(os.getenv("PRICE_MAX_AGE_HOURS", "24")) * 3600
+# Listed-for-sale records are repriced more often
+LISTED_MAX_AGE_SECONDS = float(os.getenv("PRICE_LISTED_MAX_AGE_HOURS", "6")) * 3600
+# "Recently viewed" for refresh priority
+VIEW_WINDOW_SECONDS = float(os.getenv("PRICE_VIEW_WINDOW_HOURS", "72")) * 3600
+# last_viewed_at is written at most this often per release
+VIEW_WRITE_INTERVAL = float(os.getenv("PRICE_VIEW_WRITE_INTERVAL", "300"))
+FAILURE_BACKOFF_SECONDS = float(os.getenv("PRICE_FAILURE_BACKOFF_SECONDS", "3600"))
+
+# Units of USD per unit of currency (read-time conversion only)
+FX_RATES: Dict[str, float] = {"USD": 1.0, "EUR": 1.1, "GBP": 1.27, "JPY": 0.0067}
+FX_RATES.update(json.loads(os.getenv("PRICE_FX_RATES", "{}")))
+
+_CONDITION_CODE = re.compile(r"\(([A-Z+]+)")
+_TABLE_LOCK = threading.Lock()
+
+
+def lookup_key(artist: Optional[str], album: Optional[str], catalog_number: Optional[str] = None) -> str:
+    parts = (artist, album, catalog_number)
+    return "|".join(" ".join((p or "").lower().split()) for p in parts)[:255]
+
+
+def condition_code(text: Optional[str]) -> str:
+    """Discogs condition ("Very Good Plus (VG+)", "Near Mint (NM or M-)") -> Goldmine code."""
+    if not text:
+        return ""
+    if text in CONDITION_MULTIPLIERS:
+        return text
+    match = _CONDITION_CODE.search(text)
+    if not match:
+        return ""
+    code = {"F": "P"}.get(match.group(1), match.group(1))
+    return code if code in CONDITION_MULTIPLIERS else ""
+
+
+def summarize(listings: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Listings ({value, currency, condition}) -> one stats row per (condition, currency) plus "" rows."""
+    groups: Dict[Tuple[str, str], List[float]] = {}
+    for listing in listings:
+        try:
+            value = float(listing.get("value"))
+        except (TypeError, ValueError):
+            continue
+        currency = (listing.get("currency") or "USD").upper()
+        groups.setdefault(("", currency), []).append(value)
+        code = condition_code(listing.get("condition"))
+        if code:
+            groups.setdefault((code, currency), []).append(value)
+    return [
+        {
+            "condition": condition, "currency": currency,
+            "price_min": round(min(values), 2),
+            "price_median": round(statistics.median(values), 2),
+            "price_max": round(max(values), 2),
+            "sample_size": len(values),
+        }
+        for (condition, currency), values in sorted(groups.items())
+    ]
+
+
+class PriceStore:
+    """market_prices / price_lookups on the shared engine."""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self.engine = engine or default_engine
+        self._table_ready = False
+
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Unsupported database for price store: {dialect}")
+        self._insert = insert
+
+    def _ensure_tables(self):
+        # init_db() creates them at startup; this covers workers and tools
+        if self._table_ready:
+            return
+        with _TABLE_LOCK:
+            if self._table_ready:
+                return
+            for table in (PRICES, LOOKUPS):
+                try:
+                    table.create(bind=self.engine, checkfirst=True)
+                except SQLAlchemyError:
+                    if not inspect(self.engine).has_table(table.name):
+                        raise
+            self._table_ready = True
+
+    @staticmethod
+    def _max_age(listed: bool) -> float:
+        return LISTED_MAX_AGE_SECONDS if listed else MAX_AGE_SECONDS
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def resolve(self, key: str) -> Optional[str]:
+        self._ensure_tables()
+        with self.engine.connect() as conn:
+            return conn.execute(select(LOOKUPS.c.release_id).where(LOOKUPS.c.lookup_key == key)).scalar()
+
+    def remember(self, key: str, release_id: str):
+        self._ensure_tables()
+        stmt = self._insert(LOOKUPS).values(lookup_key=key, release_id=str(release_id), created_at=time.time())
+        with self.engine.begin() as conn:
+            conn.execute(stmt.on_conflict_do_update(index_elements=["lookup_key"], set_={"release_id": str(release_id)}))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, release_id: str, condition: Optional[str] = None, currency: str = "USD",
+            touch: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Stored prices for a release, or None when it was never fetched (a
+        placeholder row then queues it for the scheduler).
+        """
+        self._ensure_tables()
+        release_id, condition, currency = str(release_id), condition or "", currency.upper()
+        now = time.time()
+        with self.engine.connect() as conn:
+            rows = [dict(r._mapping) for r in conn.execute(select(PRICES).where(PRICES.c.release_id == release_id))]
+
+        if touch:
+            self._touch(release_id, rows, now)
+        fetched = [r for r in rows if r["fetched_at"] is not None]
+        if not fetched:
+            return None
+
+        def pick(cond: str) -> Optional[Dict[str, Any]]:
+            # Largest sample after conversion; the requested currency breaks ties
+            same = [r for r in fetched if r["condition"] == cond]
+            usable = [r for r in same if r["currency"] == currency or (r["currency"] in FX_RATES and r["sample_size"])]
+            if not usable:
+                return None
+            return max(usable, key=lambda r: (r["sample_size"] or 0, r["currency"] == currency))
+
+        row = pick(condition)
+        multiplier = 1.0
+        if row is None or not row["sample_size"]:
+            row = pick("") or fetched[0]
+            multiplier = CONDITION_MULTIPLIERS.get(condition, 1.0) if condition else 1.0
+        fx, out_currency = 1.0, row["currency"]
+        if row["currency"] != currency and row["currency"] in FX_RATES and currency in FX_RATES:
+            fx, out_currency = FX_RATES[row["currency"]] / FX_RATES[currency], currency
+
+        def price(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * multiplier * fx, 2)
+
+        listed = any(r["listed"] for r in rows)
+        age = now - row["fetched_at"]
+        return {
+            "release_id": release_id,
+            "condition": condition,
+            "currency": out_currency,
+            "price_low": price(row["price_min"]),
+            "price_median": price(row["price_median"]),
+            "price_high": price(row["price_max"]),
+            "sample_size": row["sample_size"],
+            "source": row["source"],
+            "derived_from_condition": row["condition"] if multiplier != 1.0 else None,
+            "converted_from": row["currency"] if fx != 1.0 else None,
+            "fetched_at": row["fetched_at"],
+            "age_seconds": round(age, 1),
+            "stale": age > self._max_age(listed),
+            "refresh_error": row["refresh_error"],
+        }
+
+    def _touch(self, release_id: str, rows: List[Dict[str, Any]], now: float):
+        """Record the view (throttled); unknown releases get a placeholder row to be fetched."""
+        try:
+            if not rows:
+                stmt = self._insert(PRICES).values(
+                    release_id=release_id, condition="", currency="USD", sample_size=0,
+                    listed=False, last_viewed_at=now,
+                )
+                with self.engine.begin() as conn:
+                    conn.execute(stmt.on_conflict_do_nothing())
+            elif max((r["last_viewed_at"] or 0) for r in rows) < now - VIEW_WRITE_INTERVAL:
+                with self.engine.begin() as conn:
+                    conn.execute(update(PRICES).where(PRICES.c.release_id == release_id).values(last_viewed_at=now))
+        except SQLAlchemyError as e:
+            logger.warning(f"[PriceStore] View update failed for {release_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def save(self, release_id: str, listings: Iterable[Dict[str, Any]], source: str = "discogs"):
+        """Replace a release's rows with fresh stats (keeps view / listed state)."""
+        self._ensure_tables()
+        release_id, now = str(release_id), time.time()
+        rows = summarize(listings) or [{
+            "condition": "", "currency": "USD", "price_min": None, "price_median": None,
+            "price_max": None, "sample_size": 0,
+        }]
+        with self.engine.begin() as conn:
+            state = conn.execute(
+                select(func.max(PRICES.c.last_viewed_at), func.max(case((PRICES.c.listed, 1), else_=0)))
+                .where(PRICES.c.release_id == release_id)
+            ).first()
+            conn.execute(delete(PRICES).where(PRICES.c.release_id == release_id))
+            conn.execute(PRICES.insert(), [{
+                **row, "release_id": release_id, "source": source, "fetched_at": now,
+                "last_viewed_at": state[0], "listed": bool(state[1]),
+                "refresh_error": None, "next_refresh_at": None,
+            } for row in rows])
+
+    def mark_failed(self, release_id: str, error: str, backoff: float = FAILURE_BACKOFF_SECONDS):
+        self._ensure_tables()
+        with self.engine.begin() as conn:
+            conn.execute(update(PRICES).where(PRICES.c.release_id == str(release_id)).values(
+                refresh_error=error[:1000], next_refresh_at=time.time() + backoff,
+            ))
+
+    def mark_listed(self, release_id: str, listed: bool = True):
+        """Listed for sale: refreshed first and more often."""
+        self._ensure_tables()
+        release_id = str(release_id)
+        with self.engine.begin() as conn:
+            updated = conn.execute(update(PRICES).where(PRICES.c.release_id == release_id).values(listed=listed))
+            if not updated.rowcount and listed:
+                conn.execute(self._insert(PRICES).values(
+                    release_id=release_id, condition="", currency="USD", sample_size=0, listed=True,
+                ).on_conflict_do_nothing())
+
+    # ------------------------------------------------------------------
+    # Scheduler support
+    # ------------------------------------------------------------------
+
+    def _stale_clause(self, now: float):
+        return and_(
+            or_(
+                PRICES.c.fetched_at.is_(None),
+                PRICES.c.fetched_at < now - MAX_AGE_SECONDS,
+                and_(PRICES.c.listed, PRICES.c.fetched_at < now - LISTED_MAX_AGE_SECONDS),
+            ),
+            or_(PRICES.c.next_refresh_at.is_(None), PRICES.c.next_refresh_at <= now),
+        )
+
+    def due(self, limit: int = 100, now: Optional[float] = None) -> List[str]:
+        """
+        Stale release ids in refresh order: recently viewed, then listed for
+        sale, then by value (median in USD via FX_RATES; unknown currencies
+        rank as 0), oldest first within a tier.
+        """
+        self._ensure_tables()
+        now = now or time.time()
+        viewed = func.max(case((PRICES.c.last_viewed_at >= now - VIEW_WINDOW_SECONDS, 1), else_=0))
+        listed = func.max(case((PRICES.c.listed, 1), else_=0))
+        usd_rate = case(*((PRICES.c.currency == code, rate) for code, rate in FX_RATES.items()), else_=0.0)
+        value = func.max(func.coalesce(PRICES.c.price_median, 0) * usd_rate)
+        oldest = func.min(func.coalesce(PRICES.c.fetched_at, 0))
+        stmt = (
+            select(PRICES.c.release_id)
+            .where(self._stale_clause(now))
+            .group_by(PRICES.c.release_id)
+            .order_by(viewed.desc(), listed.desc(), value.desc(), oldest.asc(), PRICES.c.release_id)
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(stmt)]
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_tables()
+        now = time.time()
+        with self.engine.connect() as conn:
+            releases = conn.execute(select(func.count(func.distinct(PRICES.c.release_id)))).scalar()
+            stale = conn.execute(
+                select(func.count(func.distinct(PRICES.c.release_id))).where(self._stale_clause(now))
+            ).scalar()
+            failing = conn.execute(
+                select(func.count(func.distinct(PRICES.c.release_id))).where(PRICES.c.refresh_error.is_not(None))
+            ).scalar()
+            lookups = conn.execute(select(func.count()).select_from(LOOKUPS)).scalar()
+        return {"releases": releases, "due": stale, "failing": failing, "lookups": lookups}
+
+
+# Global instance
+price_store = PriceStore()
@@ -0,0 +1,385 @@
+# backend/services/recognition_cache.py
+# UTF-8, English only
+
+"""
+Recognition Cache
+Persistent, content-addressed cache for vision recognition results.
+
+- Key: sha256(image bytes) + model + prompt version
+- Storage: SQLite in WAL mode (shared by every worker process on the instance)
+- Expiry: TTL per entry + size-based LRU eviction (by last access)
+- Lookups are plain reads: hit / miss counters and last-access times are
+  buffered in memory and written in one batch (every FLUSH_EVERY lookups,
+  FLUSH_INTERVAL_SECONDS, on put and on stats)
+- Counters: hits / misses / stores / evictions, persisted so that all
+  workers contribute to the same numbers, plus a running total of cached
+  bytes so writes never scan the table
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path("storage") / "cache" / "recognition_cache.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # 30 days
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64MB of cached payloads
+
+COUNTERS = ("hits", "misses", "stores", "evictions", "expired")
+# Running SUM(size_bytes), kept in recognition_cache_stats next to the counters
+TOTAL_BYTES = "total_bytes"
+
+# Buffered lookup stats are written after this many lookups / seconds
+FLUSH_EVERY = 64
+FLUSH_INTERVAL_SECONDS = 5.0
+# LRU eviction deletes oldest entries in batches of this size
+EVICT_BATCH = 64
+
+
+def image_sha256(data: bytes) -> str:
+    """Content address for an image."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class RecognitionCache:
+    """
+    SQLite-backed recognition cache.
+
+    A new connection is opened per operation: sqlite3 connections are not
+    shareable across threads, and opening one is cheap compared with the
+    vision call it replaces. WAL mode lets readers proceed while another
+    process writes.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path | str] = None,
+        ttl_seconds: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.db_path = Path(db_path or os.getenv("RECOGNITION_CACHE_PATH", DEFAULT_CACHE_PATH))
+        self.ttl_seconds = int(ttl_seconds if ttl_seconds is not None else
+                               os.getenv("RECOGNITION_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        self.max_bytes = int(max_bytes if max_bytes is not None else
+                             os.getenv("RECOGNITION_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.enabled = os.getenv("RECOGNITION_CACHE_ENABLED", "true").lower() != "false"
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+        # Lookup stats not yet written to the database
+        self._pending_lock = threading.Lock()
+        self._pending_counts: Dict[str, int] = {}
+        self._pending_touches: Dict[str, float] = {}
+        self._pending_expired: Set[str] = set()
+        self._pending_lookups = 0
+        self._last_flush = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Connection / schema
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS recognition_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        image_sha256 TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        prompt_version TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        size_bytes INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_recognition_cache_last_access "
+                    "ON recognition_cache (last_access)"
+                )
+                # TTL purge on put without a table scan
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_recognition_cache_created_at "
+                    "ON recognition_cache (created_at)"
+                )
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS recognition_cache_stats (
+                        name TEXT PRIMARY KEY,
+                        value INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO recognition_cache_stats (name, value) VALUES (?, 0)",
+                    [(name,) for name in COUNTERS]
+                )
+                # Caches created before the running total: one scan, once
+                conn.execute(
+                    "INSERT OR IGNORE INTO recognition_cache_stats (name, value) "
+                    "SELECT ?, COALESCE(SUM(size_bytes), 0) FROM recognition_cache",
+                    (TOTAL_BYTES,)
+                )
+            finally:
+                conn.close()
+            self._initialized = True
+
+    @staticmethod
+    def make_key(image_hash: str, model: str, prompt_version: str) -> str:
+        return f"{image_hash}:{model}:{prompt_version}"
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, amount: int = 1):
+        conn.execute(
+            "UPDATE recognition_cache_stats SET value = value + ? WHERE name = ?",
+            (amount, name)
+        )
+
+    # ------------------------------------------------------------------
+    # Buffered lookup stats
+    # ------------------------------------------------------------------
+
+    def _record_lookup(self, counter: str, touch: Optional[str] = None, expired: Optional[str] = None):
+        """Count a lookup in memory; write the batch when it is due."""
+        with self._pending_lock:
+            self._pending_counts[counter] = self._pending_counts.get(counter, 0) + 1
+            if touch is not None:
+                self._pending_touches[touch] = time.time()
+            if expired is not None:
+                self._pending_expired.add(expired)
+            self._pending_lookups += 1
+            due = (self._pending_lookups >= FLUSH_EVERY
+                   or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS)
+        if due:
+            self.flush()
+
+    def _take_pending(self) -> Tuple[Dict[str, int], Dict[str, float], Set[str]]:
+        with self._pending_lock:
+            pending = (self._pending_counts, self._pending_touches, self._pending_expired)
+            self._pending_counts, self._pending_touches, self._pending_expired = {}, {}, set()
+            self._pending_lookups = 0
+            self._last_flush = time.monotonic()
+        return pending
+
+    def _write_pending(self, conn: sqlite3.Connection, pending: Tuple[Dict[str, int], Dict[str, float], Set[str]]):
+        """Apply buffered stats inside the caller's write transaction."""
+        counts, touches, expired = pending
+        if touches:
+            conn.executemany(
+                "UPDATE recognition_cache SET last_access = MAX(last_access, ?) WHERE cache_key = ?",
+                [(at, key) for key, at in touches.items()]
+            )
+        if expired and self.ttl_seconds > 0:
+            cutoff = time.time() - self.ttl_seconds
+            removed = removed_bytes = 0
+            for key in expired:
+                row = conn.execute(
+                    "SELECT size_bytes FROM recognition_cache WHERE cache_key = ? AND created_at < ?",
+                    (key, cutoff)
+                ).fetchone()
+                if row is None:
+                    continue  # already purged or stored again
+                conn.execute("DELETE FROM recognition_cache WHERE cache_key = ?", (key,))
+                removed += 1
+                removed_bytes += row[0]
+            if removed:
+                self._bump(conn, "expired", removed)
+                self._bump(conn, TOTAL_BYTES, -removed_bytes)
+        for name, amount in counts.items():
+            self._bump(conn, name, amount)
+
+    def flush(self):
+        """Write buffered hit / miss counters and last-access times."""
+        pending = self._take_pending()
+        if not any(pending):
+            return
+        try:
+            self._ensure_schema()
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._write_pending(conn, pending)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"[RecognitionCache] flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, image_hash: str, model: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result (read only; stats are buffered).
+
+        Returns the cached dict, or None on miss / expiry / error.
+        """
+        if not self.enabled:
+            return None
+        key = self.make_key(image_hash, model, prompt_version)
+        try:
+            self._ensure_schema()
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT payload, created_at FROM recognition_cache WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"[RecognitionCache] get failed: {e}")
+            return None
+
+        if row is None:
+            self._record_lookup("misses")
+            return None
+        payload, created_at = row
+        if self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds:
+            # Deleted (and counted as expired) with the next batch
+            self._record_lookup("misses", expired=key)
+            return None
+        self._record_lookup("hits", touch=key)
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            logger.warning(f"[RecognitionCache] get failed: {e}")
+            return None
+
+    def put(self, image_hash: str, model: str, prompt_version: str, result: Dict[str, Any]):
+        """Store a result and evict least-recently-used entries over max_bytes."""
+        if not self.enabled:
+            return
+        key = self.make_key(image_hash, model, prompt_version)
+        now = time.time()
+        try:
+            payload = json.dumps(result, default=str)
+            self._ensure_schema()
+            pending = self._take_pending()
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                # Buffered touches first, so eviction sees recent accesses
+                self._write_pending(conn, pending)
+                previous = conn.execute(
+                    "SELECT size_bytes FROM recognition_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                conn.execute(
+                    """
+                    INSERT INTO recognition_cache
+                        (cache_key, image_sha256, model, prompt_version, payload,
+                         size_bytes, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(cache_key) DO UPDATE SET
+                        payload = excluded.payload,
+                        size_bytes = excluded.size_bytes,
+                        created_at = excluded.created_at,
+                        last_access = excluded.last_access
+                    """,
+                    (key, image_hash, model, prompt_version, payload, len(payload), now, now)
+                )
+                self._bump(conn, TOTAL_BYTES, len(payload) - (previous[0] if previous else 0))
+                self._bump(conn, "stores")
+                self._evict(conn)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"[RecognitionCache] put failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then LRU entries until under max_bytes."""
+        if self.ttl_seconds > 0:
+            cutoff = time.time() - self.ttl_seconds
+            count, size_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM recognition_cache WHERE created_at < ?",
+                (cutoff,)
+            ).fetchone()
+            if count:
+                conn.execute("DELETE FROM recognition_cache WHERE created_at < ?", (cutoff,))
+                self._bump(conn, "expired", count)
+                self._bump(conn, TOTAL_BYTES, -size_bytes)
+
+        total = conn.execute(
+            "SELECT value FROM recognition_cache_stats WHERE name = ?", (TOTAL_BYTES,)
+        ).fetchone()[0]
+        evicted = freed = 0
+        while total - freed > self.max_bytes:
+            rows = conn.execute(
+                "SELECT cache_key, size_bytes FROM recognition_cache ORDER BY last_access ASC LIMIT ?",
+                (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            for cache_key, size_bytes in rows:
+                if total - freed <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM recognition_cache WHERE cache_key = ?", (cache_key,))
+                freed += size_bytes
+                evicted += 1
+        if evicted:
+            self._bump(conn, "evictions", evicted)
+            self._bump(conn, TOTAL_BYTES, -freed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current size (aggregated across all workers)."""
+        self.flush()
+        try:
+            self._ensure_schema()
+            conn = self._connect()
+            try:
+                counters = dict(conn.execute(
+                    "SELECT name, value FROM recognition_cache_stats"
+                ).fetchall())
+                entries = conn.execute("SELECT COUNT(*) FROM recognition_cache").fetchone()[0]
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"[RecognitionCache] stats failed: {e}")
+            return {"enabled": self.enabled, "error": str(e)}
+
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "enabled": self.enabled,
+            "path": str(self.db_path),
+            "entries": entries,
+            "size_bytes": counters.get(TOTAL_BYTES, 0),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            **{name: counters.get(name, 0) for name in COUNTERS},
+            "hit_rate": round(counters.get("hits", 0) / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Remove every entry and reset counters."""
+        self._take_pending()
+        self._ensure_schema()
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM recognition_cache")
+            conn.execute("UPDATE recognition_cache_stats SET value = 0")
+        finally:
+            conn.close()
+
+
+# Global instance
+recognition_cache = RecognitionCache()
@@ -8,6 +8,8 @@ import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from backend.services.openai_gateway import openai_gateway
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -31,11 +33,9 @@ class OpenAIShippingService:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
             self.enabled = True
             logger.info("OpenAIShippingService initialized with API key")
         else:
-            self.client = None
             self.enabled = False
         
         self.model = "gpt-4o-mini"  # Cheapest model
@@ -70,7 +70,7 @@ class OpenAIShippingService:
         try:
             prompt = self._build_message_prompt(tracking_info, order_info)
             
-            response = self.client.chat.completions.create(
+            response = openai_gateway.chat_completion_sync(
                 model=self.model,
                 messages=[
                     {
@@ -144,7 +144,7 @@ Generate customer-friendly delay explanation. Return JSON:
 
 Return ONLY JSON."""
             
-            response = self.client.chat.completions.create(
+            response = openai_gateway.chat_completion_sync(
                 model=self.model,
                 messages=[
                     {
@@ -216,7 +216,7 @@ Return JSON:
 
 Return ONLY JSON."""
             
-            response = self.client.chat.completions.create(
+            response = openai_gateway.chat_completion_sync(
                 model=self.model,
                 messages=[
                     {
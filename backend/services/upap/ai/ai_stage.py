@@ -1,9 +1,17 @@
 class AIAnalysisStage:
     name = "ai"
+    inputs = ("ocr_text",)
+    outputs = ("ai_summary", "ai_status")
+    executor = "openai"
+    timeout = 60.0
 
     def run(self, context: dict) -> dict:
         # Placeholder AI analysis (no external calls)
         context["ai_summary"] = "AI analysis placeholder"
         context["ai_status"] = "done"
         print("[UPAP] AIAnalysisStage executed")
-        return context
\ No newline at end of file
+        return context
+
+
+# Name registered by UPAPEngine (UPAP_ENABLE_AI)
+AIStage = AIAnalysisStage
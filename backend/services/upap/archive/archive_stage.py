@@ -3,6 +3,8 @@
 
 class ArchiveStage:
     name = "archivestage"
+    inputs = ("record_id",)
+    outputs = ("archived",)
 
     def run(self, context: dict):
         record_id = context["record_id"]
@@ -10,5 +12,6 @@ class ArchiveStage:
         return {
             "status": "ok",
             "stage": "archive",
-            "record_id": record_id
+            "record_id": record_id,
+            "archived": True
         }
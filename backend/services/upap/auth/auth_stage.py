@@ -9,6 +9,8 @@ from backend.services.user_service import get_user_service
 
 class AuthStage(StageInterface):
     name = "auth"
+    inputs = ("email", "db")
+    outputs = ("user_id",)
 
     def validate_input(self, payload: Dict[str, Any]) -> None:
         email = payload.get("email")
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+UPAP Stage Graph
+DAG execution for UPAP stages.
+
+A stage declares (class attributes, see StageInterface):
+- inputs:          context keys it needs
+- optional_inputs: context keys it uses when present
+- outputs:         keys of its result merged into the shared context
+- executor:        pool name from backend.core.executors (None = asyncio.to_thread)
+- timeout:         seconds (None = no per-stage limit)
+- cacheable:       result may be memoized by input hash (pure stages only)
+
+Edges follow data: a stage depends on the stages producing its inputs.
+Inputs nobody produces must be in the initial context. Every stage starts
+as soon as its dependencies have finished, so independent stages run
+concurrently. The first failure or timeout cancels everything still
+running and is raised as StageFailed. Stages run in threads are recorded
+in backend.core.stage_metrics like UPAPEngine.run_stage calls.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.core.executors import get_executor, run_in_pool
+from backend.core.stage_metrics import stage_metrics
+
+logger = logging.getLogger(__name__)
+
+MEMO_MAX_ENTRIES = 1024
+
+
+class StageGraphError(ValueError):
+    """The graph is not executable (cycle, duplicate producer, missing input)."""
+
+
+class StageFailed(RuntimeError):
+    """A stage raised; the original exception is __cause__."""
+
+    def __init__(self, stage: str, message: str):
+        self.stage = stage
+        super().__init__(f"Stage '{stage}' failed: {message}")
+
+
+class StageTimeout(StageFailed):
+    """A stage ran past its timeout."""
+
+
+@dataclass(frozen=True)
+class StageNode:
+    name: str
+    stage: Any
+    inputs: Tuple[str, ...]
+    optional_inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    executor: Optional[str]
+    timeout: Optional[float]
+    cacheable: bool
+
+    @classmethod
+    def of(cls, stage: Any) -> "StageNode":
+        """Node for a stage instance or class (stages without declarations get empty ones)."""
+        return cls(
+            name=getattr(stage, "name", stage.__class__.__name__),
+            stage=stage,
+            inputs=tuple(getattr(stage, "inputs", ())),
+            optional_inputs=tuple(getattr(stage, "optional_inputs", ())),
+            outputs=tuple(getattr(stage, "outputs", ())),
+            executor=getattr(stage, "executor", None),
+            timeout=getattr(stage, "timeout", None),
+            cacheable=bool(getattr(stage, "cacheable", False)),
+        )
+
+
+class StageGraph:
+    """Dependency graph of stages, derived from declared inputs / outputs."""
+
+    def __init__(self, stages: Iterable[Any]):
+        self.nodes: Dict[str, StageNode] = {}
+        for stage in stages:
+            node = StageNode.of(stage)
+            self.nodes[node.name] = node
+
+        self.producers: Dict[str, List[str]] = {}
+        for node in self.nodes.values():
+            for key in node.outputs:
+                self.producers.setdefault(key, []).append(node.name)
+
+        self.dependencies: Dict[str, Set[str]] = {}
+        for node in self.nodes.values():
+            deps = set()
+            for key in node.inputs + node.optional_inputs:
+                deps.update(p for p in self.producers.get(key, ()) if p != node.name)
+            self.dependencies[node.name] = deps
+
+    @property
+    def external_inputs(self) -> List[str]:
+        """Required inputs no stage produces (the caller must supply them)."""
+        keys = {key for node in self.nodes.values() for key in node.inputs}
+        return sorted(key for key in keys if key not in self.producers)
+
+    def problems(self, provided: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Static checks; empty list = executable. With `provided` (initial
+        context keys), missing external inputs are reported too.
+        """
+        found = []
+        for node in self.nodes.values():
+            if not node.outputs:
+                found.append(f"Stage '{node.name}' declares no outputs")
+            if set(node.inputs) & set(node.outputs):
+                found.append(f"Stage '{node.name}' consumes its own output: "
+                             f"{sorted(set(node.inputs) & set(node.outputs))}")
+        for key, names in sorted(self.producers.items()):
+            if len(names) > 1:
+                found.append(f"Output '{key}' is produced by several stages: {sorted(names)}")
+        cycle = self._find_cycle()
+        if cycle:
+            found.append(f"Cycle: {' -> '.join(cycle)}")
+        if provided is not None:
+            missing = sorted(set(self.external_inputs) - set(provided))
+            if missing:
+                found.append(f"Inputs not provided and produced by no stage: {missing}")
+        return found
+
+    def validate(self, provided: Optional[Iterable[str]] = None):
+        """Raise StageGraphError listing every problem."""
+        found = self.problems(provided)
+        if found:
+            raise StageGraphError("; ".join(found))
+
+    def levels(self) -> List[List[str]]:
+        """Stages grouped by depth; stages in one group can run concurrently."""
+        depth: Dict[str, int] = {}
+
+        def visit(name: str, trail: Tuple[str, ...] = ()) -> int:
+            if name in trail:
+                raise StageGraphError(f"Cycle: {' -> '.join(trail + (name,))}")
+            if name not in depth:
+                depth[name] = 1 + max((visit(dep, trail + (name,)) for dep in self.dependencies[name]), default=-1)
+            return depth[name]
+
+        for name in self.nodes:
+            visit(name)
+        groups: Dict[int, List[str]] = {}
+        for name, level in depth.items():
+            groups.setdefault(level, []).append(name)
+        return [sorted(groups[level]) for level in sorted(groups)]
+
+    def _find_cycle(self) -> Optional[List[str]]:
+        state: Dict[str, int] = {}  # 1 = on stack, 2 = done
+        stack: List[str] = []
+
+        def dfs(name: str) -> Optional[List[str]]:
+            state[name] = 1
+            stack.append(name)
+            for dep in sorted(self.dependencies[name]):
+                if state.get(dep) == 1:
+                    return stack[stack.index(dep):] + [dep]
+                if dep not in state:
+                    cycle = dfs(dep)
+                    if cycle:
+                        return cycle
+            stack.pop()
+            state[name] = 2
+            return None
+
+        for name in sorted(self.nodes):
+            if name not in state:
+                cycle = dfs(name)
+                if cycle:
+                    return cycle
+        return None
+
+
+def input_hash(node: StageNode, inputs: Dict[str, Any]) -> str:
+    """Memo key: stage identity + canonical form of its inputs (bytes hashed as such)."""
+    sha = hashlib.sha256(f"{node.name}:{type(node.stage).__qualname__}".encode())
+    for key in sorted(inputs):
+        value = inputs[key]
+        sha.update(key.encode())
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            sha.update(b"b:" + bytes(value))
+        else:
+            sha.update(b"j:" + json.dumps(value, sort_keys=True, default=repr).encode())
+    return sha.hexdigest()
+
+
+class StageMemo:
+    """Bounded LRU of stage outputs keyed by input hash (thread-safe)."""
+
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = dict(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+async def _run_node(node: StageNode, context: Dict[str, Any], memo: Optional[StageMemo]) -> Tuple[Dict[str, Any], bool]:
+    inputs = {key: context[key] for key in node.inputs}
+    inputs.update({key: context[key] for key in node.optional_inputs if key in context})
+    if hasattr(node.stage, "validate_input"):
+        node.stage.validate_input(inputs)
+
+    key = input_hash(node, inputs) if memo is not None and node.cacheable else None
+    if key is not None:
+        cached = memo.get(key)
+        if cached is not None:
+            return cached, True
+
+    # Measured in the worker thread; process pools cannot report back here
+    run = node.stage.run
+    if node.executor is None or get_executor(node.executor).kind == "thread":
+        run = stage_metrics.instrument("upap", node.name, run)
+    if node.executor:
+        call = run_in_pool(node.executor, run, inputs)
+    else:
+        call = asyncio.to_thread(run, inputs)
+    result = await (asyncio.wait_for(call, node.timeout) if node.timeout else call)
+
+    missing = [k for k in node.outputs if k not in result]
+    if missing:
+        raise ValueError(f"result is missing declared outputs {missing}")
+    outputs = {k: result[k] for k in node.outputs}
+    if key is not None:
+        memo.put(key, outputs)
+    return outputs, False
+
+
+async def run_graph(
+    graph: StageGraph,
+    context: Dict[str, Any],
+    memo: Optional[StageMemo] = None,
+) -> Dict[str, Any]:
+    """
+    Execute every stage of `graph` on a copy of `context`.
+
+    Returns:
+        {"context": final context, "stages": {name: {"ms", "cached"}}}
+
+    Raises:
+        StageGraphError: invalid graph or missing external inputs
+        StageFailed / StageTimeout: first stage failure (the rest are cancelled)
+    """
+    graph.validate(provided=context.keys())
+    context = dict(context)
+    report: Dict[str, Dict[str, Any]] = {}
+    waiting = {name: set(deps) for name, deps in graph.dependencies.items()}
+    running: Dict[asyncio.Task, Tuple[str, float]] = {}
+
+    def start_ready():
+        for name in [n for n, deps in waiting.items() if not deps]:
+            del waiting[name]
+            task = asyncio.create_task(_run_node(graph.nodes[name], context, memo), name=f"upap-stage-{name}")
+            running[task] = (name, time.perf_counter())
+
+    try:
+        start_ready()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name, started = running.pop(task)
+                error = task.exception()
+                if isinstance(error, asyncio.TimeoutError):
+                    raise StageTimeout(name, f"timed out after {graph.nodes[name].timeout}s") from error
+                if error is not None:
+                    raise StageFailed(name, str(error)) from error
+                outputs, cached = task.result()
+                context.update(outputs)
+                report[name] = {"ms": round((time.perf_counter() - started) * 1000, 1), "cached": cached}
+                for deps in waiting.values():
+                    deps.discard(name)
+            start_ready()
+    finally:
+        # Failure or caller cancellation: stop whatever is still running
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    logger.info(f"[UPAP] DAG complete: {report}")
+    return {"context": context, "stages": report}
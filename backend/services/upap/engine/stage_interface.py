@@ -6,9 +6,12 @@ Base class for all UPAP pipeline stages.
 Each stage must:
 - validate_input(payload)
 - run(context)
+
+Stages run by the DAG executor (stage_graph) also declare their inputs,
+outputs, executor pool, timeout and whether results may be memoized.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 from abc import ABC, abstractmethod
 
 
@@ -24,6 +27,14 @@ class StageInterface(ABC):
 
     name: str = "UnnamedStage"
 
+    # DAG declarations (see backend/services/upap/engine/stage_graph.py)
+    inputs: Tuple[str, ...] = ()            # required context keys
+    optional_inputs: Tuple[str, ...] = ()   # used when present
+    outputs: Tuple[str, ...] = ()           # result keys merged into the context
+    executor: Optional[str] = None          # executors pool name; None = asyncio.to_thread
+    timeout: Optional[float] = None         # seconds
+    cacheable: bool = False                 # pure stage: memoize by input hash
+
     @abstractmethod
     def validate_input(self, payload: Dict[str, Any]) -> None:
         """
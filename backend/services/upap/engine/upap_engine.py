@@ -1,5 +1,7 @@
 from backend.services.upap.archive.archive_stage import ArchiveStage
 from backend.services.upap.publish.publish_stage import PublishStage
+from backend.services.upap.engine.stage_graph import StageGraph, StageMemo, run_graph
+from backend.core.stage_metrics import stage_metrics
 import os
 
 
@@ -11,12 +13,14 @@ class UPAPEngine:
     - run_stage(stage_name: str, context: dict) -> dict
     - run_archive(record_id: str) -> dict
     - run_publish(record_id: str) -> dict
+    - run_dag(context: dict, stages: list | None) -> dict  (async)
     
     See UPAP_ENGINE_CONTRACT.md for full contract documentation.
     """
     
     def __init__(self):
         self.stages = {}
+        self.memo = StageMemo()
 
         # ZORUNLU ÇEKİRDEK
         self.register_stage(ArchiveStage())
@@ -56,7 +60,8 @@ class UPAPEngine:
         """
         if stage_name not in self.stages:
             raise RuntimeError(f"Stage not registered: {stage_name}")
-        return self.stages[stage_name].run(context)
+        with stage_metrics.measure("upap", stage_name):
+            return self.stages[stage_name].run(context)
 
     def run_archive(self, record_id: str):
         """
@@ -82,6 +87,44 @@ class UPAPEngine:
         """
         return self.run_stage("publishstage", {"record_id": record_id})
 
+    def stage_graph(self, stages=None) -> StageGraph:
+        """
+        PUBLIC METHOD - Dependency graph of registered stages.
+        
+        Args:
+            stages: Stage names to include (default: all registered)
+            
+        Raises:
+            RuntimeError: If a named stage is not registered
+        """
+        names = list(self.stages) if stages is None else list(stages)
+        missing = [name for name in names if name not in self.stages]
+        if missing:
+            raise RuntimeError(f"Stage not registered: {', '.join(missing)}")
+        return StageGraph(self.stages[name] for name in names)
+
+    async def run_dag(self, context: dict, stages=None):
+        """
+        PUBLIC METHOD - Execute stages as a DAG (async).
+        
+        Stages whose declared inputs are satisfied run concurrently on
+        their executor, with per-stage timeouts; cacheable stages are
+        memoized by input hash.
+        
+        Args:
+            context: Initial context (external inputs of the graph)
+            stages: Stage names to run (default: all registered)
+            
+        Returns:
+            {"context": {...}, "stages": {name: {"ms": ..., "cached": ...}}}
+            
+        Raises:
+            RuntimeError: If a stage is not registered
+            StageGraphError: Invalid graph or missing inputs
+            StageFailed / StageTimeout: A stage failed (others cancelled)
+        """
+        return await run_graph(self.stage_graph(stages), context, memo=self.memo)
+
 
 # SINGLETON
 upap_engine = UPAPEngine()
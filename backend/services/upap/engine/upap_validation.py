@@ -17,6 +17,7 @@ from textwrap import indent
 from typing import Any, Dict, List, Tuple
 
 from backend.services.upap.engine.stage_interface import StageInterface
+from backend.services.upap.engine.stage_graph import StageGraph, StageGraphError
 
 # Stage sınıflarını doğrudan import ediyoruz
 from backend.services.upap.auth.auth_stage import AuthStage
@@ -28,6 +29,7 @@ from backend.services.upap.publish.publish_stage import PublishStage
 
 StageContractReport = Dict[str, Any]
 StageRuntimeReport = Dict[str, Any]
+GraphReport = Dict[str, Any]
 PipelineReport = Dict[str, Any]
 
 
@@ -115,7 +117,7 @@ def _validate_stage_contract(name: str, cls: type) -> StageContractReport:
             "pipeline": "UPAP",
             "stage": "validation",
             "schema": "pending_record",
-            "record_id": getattr(data, "id", None),
+            "record_id": None,
             "status": "PASS"
         })
     return {
@@ -231,6 +233,42 @@ def runtime_validate_all_stages() -> List[StageRuntimeReport]:
     return reports
 
 
+# --------------------------------------------------------------------------- #
+# Graph validation (static, DAG execution mode)                               #
+# --------------------------------------------------------------------------- #
+
+
+def validate_stage_graph(
+    stage_classes: Dict[str, type] | None = None,
+    provided: List[str] | None = None,
+) -> GraphReport:
+    """
+    Stage graph'ını çalıştırmadan doğrular (stage'ler instantiate edilmez):
+    - Her stage outputs beyan ediyor mu?
+    - Aynı output'u birden fazla stage üretiyor mu?
+    - Döngü var mı?
+    - provided verilirse: dışarıdan gelmesi gereken input'lar eksik mi?
+
+    Puanlama: 100 - 20 * problem (0 altına düşmesin)
+    """
+    classes = STAGE_CLASSES if stage_classes is None else stage_classes
+    graph = StageGraph(classes.values())
+    problems = graph.problems(provided)
+    try:
+        levels = graph.levels()
+    except StageGraphError:
+        levels = []
+
+    return {
+        "stages": list(graph.nodes),
+        "dependencies": {name: sorted(deps) for name, deps in graph.dependencies.items()},
+        "external_inputs": graph.external_inputs,
+        "levels": levels,
+        "problems": problems,
+        "score": max(0, 100 - 20 * len(problems)),
+    }
+
+
 # --------------------------------------------------------------------------- #
 # Report assembly & pretty-print                                              #
 # --------------------------------------------------------------------------- #
@@ -239,6 +277,7 @@ def runtime_validate_all_stages() -> List[StageRuntimeReport]:
 def build_pipeline_report() -> PipelineReport:
     contract_reports = validate_all_stage_contracts()
     runtime_reports = runtime_validate_all_stages()
+    graph_report = validate_stage_graph()
 
     def _avg(scores: List[int]) -> int:
         return int(round(sum(scores) / len(scores))) if scores else 0
@@ -250,6 +289,7 @@ def build_pipeline_report() -> PipelineReport:
     return {
         "contract_reports": contract_reports,
         "runtime_reports": runtime_reports,
+        "graph_report": graph_report,
         "contract_avg": contract_avg,
         "runtime_avg": runtime_avg,
         "overall_score": overall,
@@ -288,6 +328,19 @@ def _print_runtime_section(runtime_reports: List[StageRuntimeReport]) -> None:
         print()
 
 
+def _print_graph_section(graph_report: GraphReport) -> None:
+    print(">> Stage graph (DAG execution mode)")
+    for name, deps in graph_report["dependencies"].items():
+        print(f"  - {name} <- {', '.join(deps) or '<context>'}")
+    print(f"    external inputs:      {', '.join(graph_report['external_inputs']) or '<none>'}")
+    for i, level in enumerate(graph_report["levels"]):
+        print(f"    level {i}:              {', '.join(level)}")
+    print(f"    score:                {graph_report['score']}")
+    for problem in graph_report["problems"]:
+        print(f"      - {problem}")
+    print()
+
+
 def main() -> None:
     report = build_pipeline_report()
 
@@ -295,6 +348,7 @@ def main() -> None:
 
     _print_contract_section(report["contract_reports"])
     _print_runtime_section(report["runtime_reports"])
+    _print_graph_section(report["graph_report"])
 
     print(f">> OVERALL PIPELINE SCORE: {report['overall_score']} / 100")
     print()
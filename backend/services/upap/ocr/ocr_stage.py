@@ -1,5 +1,8 @@
 class OCRStage:
     name = "ocr"
+    inputs = ("file_path",)
+    outputs = ("ocr_text", "ocr_status")
+    timeout = 30.0
 
     def run(self, context: dict) -> dict:
         # Placeholder OCR (no external lookup)
@@ -3,6 +3,10 @@ from backend.services.upap.process.fuzzy_matcher import FuzzyMatcher
 
 class ProcessStage:
     name = "process"
+    inputs = ("ocr_text",)
+    optional_inputs = ("candidate_titles",)
+    outputs = ("normalized_ocr_text", "matches")
+    cacheable = True
 
     def validate_input(self, context: dict):
         if "ocr_text" not in context:
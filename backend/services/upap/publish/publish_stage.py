@@ -3,6 +3,9 @@ from backend.services.upap.archive.archive_store import is_archived
 
 class PublishStage:
     name = "publishstage"
+    # "archived" orders publish after archive in a DAG run
+    inputs = ("record_id", "archived")
+    outputs = ("published",)
 
     def run(self, context: dict):
         record_id = context["record_id"]
@@ -13,5 +16,6 @@ class PublishStage:
         return {
             "status": "ok",
             "stage": "publish",
-            "record_id": record_id
+            "record_id": record_id,
+            "published": True
         }
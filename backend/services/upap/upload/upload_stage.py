@@ -35,6 +35,8 @@ class UploadStage(StageInterface):
     UPAP Upload Stage
     """
     name = "upload"
+    inputs = ("file_bytes", "filename", "user_id")
+    outputs = ("saved_to", "size_bytes")
 
     def validate_input(self, payload: Dict[str, Any]) -> None:
         if "file_bytes" not in payload:
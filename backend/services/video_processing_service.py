@@ -10,9 +10,20 @@ import tempfile
 import numpy as np
 from uuid import uuid4
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple, Union
 import io
 
+# Frames scored per video, spread evenly over its whole length
+SAMPLE_FRAMES = int(os.getenv("VIDEO_SAMPLE_FRAMES", "24"))
+# Focus is measured on grayscale frames downscaled to this longest side
+SCORE_MAX_SIDE = int(os.getenv("VIDEO_SCORE_MAX_SIDE", "480"))
+# Stop sampling once a frame is this sharp (Laplacian variance at SCORE_MAX_SIDE; 0 = score every sample)
+FOCUS_THRESHOLD = float(os.getenv("VIDEO_FOCUS_THRESHOLD", "150"))
+# Extra frames scored around the best sample (0 = coarse pass only)
+REFINE_FRAMES = int(os.getenv("VIDEO_REFINE_FRAMES", "6"))
+# Gaps longer than this are seeked; shorter ones are decoded through with grab()
+SEEK_MIN_GAP_SECONDS = 1.0
+
 
 class VideoProcessingService:
     """
@@ -49,8 +60,28 @@ class VideoProcessingService:
         temp_video.close()
         
         try:
-            # Open video
-            cap = cv2.VideoCapture(temp_video.name)
+            return self.extract_best_frame_from_path(temp_video.name, video_filename)
+        finally:
+            # Cleanup temporary video file
+            try:
+                os.unlink(temp_video.name)
+            except:
+                pass
+    
+    def extract_best_frame_from_path(
+        self,
+        video_path: Union[str, Path],
+        video_filename: Optional[str] = None
+    ) -> Tuple[str, dict]:
+        """
+        Same as extract_best_frame for a video already on disk (e.g. an
+        upload spooled in chunks), so the video never has to be in memory.
+        """
+        video_path = str(video_path)
+        video_filename = video_filename or os.path.basename(video_path)
+        
+        cap = cv2.VideoCapture(video_path)
+        try:
             if not cap.isOpened():
                 raise RuntimeError("Could not open video file")
             
@@ -59,74 +90,130 @@ class VideoProcessingService:
             fps = cap.get(cv2.CAP_PROP_FPS) or 30
             duration = total_frames / fps if fps > 0 else 0
             
-            # Extract frames and calculate focus measure
-            best_frame = None
-            best_score = -1
-            best_frame_number = 0
-            frame_count = 0
+            best_frame, best_score, best_frame_number, sampling = self.sample_best_frame(cap, total_frames, fps)
+        finally:
+            cap.release()
+        
+        if best_frame is None:
+            raise RuntimeError("Could not extract any frame from video")
+        
+        # Save best frame as JPEG
+        jpeg_filename = f"{uuid4().hex}_frame.jpg"
+        jpeg_path = self.storage_dir / jpeg_filename
+        cv2.imwrite(str(jpeg_path), best_frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        
+        metadata = {
+            "video_filename": video_filename,
+            "video_size_bytes": os.path.getsize(video_path),
+            "total_frames": total_frames,
+            "fps": fps,
+            "duration_seconds": duration,
+            "best_frame_number": best_frame_number,
+            "focus_score": float(best_score),
+            "frames_scored": sampling["frames_scored"],
+            "early_stop": sampling["early_stop"],
+            "jpeg_path": str(jpeg_path),
+            "jpeg_size_bytes": os.path.getsize(jpeg_path)
+        }
+        
+        return str(jpeg_path), metadata
+    
+    def sample_positions(self, total_frames: int, samples: int = SAMPLE_FRAMES) -> List[int]:
+        """Evenly spaced frame numbers over the whole video (centre of each slot)."""
+        if total_frames <= 0:
+            return []
+        samples = max(1, min(samples, total_frames))
+        step = total_frames / samples
+        return sorted({min(total_frames - 1, int(step * i + step / 2)) for i in range(samples)})
+    
+    def focus_score(self, frame: np.ndarray) -> float:
+        """Laplacian variance of a grayscale copy downscaled to SCORE_MAX_SIDE."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        longest = max(gray.shape[:2])
+        if longest > SCORE_MAX_SIDE:
+            factor = SCORE_MAX_SIDE / longest
+            gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    
+    def sample_best_frame(
+        self,
+        cap: "cv2.VideoCapture",
+        total_frames: int,
+        fps: float,
+        samples: int = SAMPLE_FRAMES,
+        threshold: float = FOCUS_THRESHOLD,
+        refine: int = REFINE_FRAMES
+    ) -> Tuple[Optional[np.ndarray], float, int, dict]:
+        """
+        Score up to `samples` frames spread over the video, then `refine`
+        more around the best one, and return (best_frame, score,
+        frame_number, info). Far positions are reached by seeking
+        (CAP_PROP_POS_FRAMES; the decoder restarts at the preceding
+        keyframe); near ones by grab(), which skips color conversion.
+        Stops at the first frame scoring >= threshold (0 disables early
+        stop). Streams without a frame count are read sequentially, one
+        sample every 0.5 s.
+        """
+        state = {"frame": None, "score": -1.0, "number": 0, "scored": 0, "early_stop": False}
+        
+        def consider(frame: np.ndarray, number: int) -> bool:
+            """Score one frame; True once it is good enough to stop."""
+            state["scored"] += 1
+            score = self.focus_score(frame)
+            if score > state["score"]:
+                state.update(frame=frame, score=score, number=number)
+            if threshold and score >= threshold:
+                state["early_stop"] = True
+            return state["early_stop"]
+        
+        positions = self.sample_positions(total_frames, samples)
+        if positions:
+            seek_gap = max(2, int(fps * SEEK_MIN_GAP_SECONDS))
+            current = 0  # next frame read() would return
             
-            # Sample frames (every 0.5 seconds or at least 10 frames)
-            frame_interval = max(1, int(fps * 0.5)) if fps > 0 else 1
-            sample_count = min(30, total_frames // frame_interval) if total_frames > 0 else 30
+            def visit(targets: List[int]) -> bool:
+                nonlocal current
+                for target in targets:
+                    if target < current or target - current > seek_gap:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                    else:
+                        while current < target and cap.grab():
+                            current += 1
+                    ret, frame = cap.read()
+                    current = target + 1
+                    if ret and consider(frame, target):
+                        return True
+                return False
             
-            while True:
+            if not visit(positions) and refine and state["frame"] is not None and len(positions) > 1:
+                # Focus changes over seconds: look between the best sample's neighbours
+                step = total_frames / len(positions)
+                low = max(0, int(state["number"] - step))
+                high = min(total_frames - 1, int(state["number"] + step))
+                window = high - low
+                nearby = {low + int(window * (i + 1) / (refine + 1)) for i in range(refine)}
+                visit(sorted(nearby - set(positions)))
+        else:
+            interval = max(1, int(fps * 0.5))
+            frame_number = 0
+            while state["scored"] < samples:
                 ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Sample frames for efficiency
-                if frame_count % frame_interval == 0 or frame_count < 10:
-                    # Calculate Laplacian variance (focus measure)
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-                    
-                    if laplacian_var > best_score:
-                        best_score = laplacian_var
-                        best_frame = frame.copy()
-                        best_frame_number = frame_count
-                
-                frame_count += 1
-                
-                # Limit sampling
-                if frame_count >= sample_count * frame_interval:
+                if not ret or consider(frame, frame_number):
                     break
-            
-            cap.release()
-            
-            # If no frame found, try to read first frame
-            if best_frame is None:
-                cap = cv2.VideoCapture(temp_video.name)
-                ret, best_frame = cap.read()
-                cap.release()
-                
-                if not ret:
-                    raise RuntimeError("Could not extract any frame from video")
-            
-            # Save best frame as JPEG
-            jpeg_filename = f"{uuid4().hex}_frame.jpg"
-            jpeg_path = self.storage_dir / jpeg_filename
-            cv2.imwrite(str(jpeg_path), best_frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-            
-            metadata = {
-                "video_filename": video_filename,
-                "video_size_bytes": len(video_bytes),
-                "total_frames": total_frames,
-                "fps": fps,
-                "duration_seconds": duration,
-                "best_frame_number": best_frame_number,
-                "focus_score": float(best_score),
-                "jpeg_path": str(jpeg_path),
-                "jpeg_size_bytes": os.path.getsize(jpeg_path)
-            }
-            
-            return str(jpeg_path), metadata
-            
-        finally:
-            # Cleanup temporary video file
-            try:
-                os.unlink(temp_video.name)
-            except:
-                pass
+                skipped = 0
+                while skipped < interval - 1 and cap.grab():
+                    skipped += 1
+                frame_number += skipped + 1
+        
+        # Frame count can be wrong (variable frame rate, truncated files)
+        if state["frame"] is None and positions:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = cap.read()
+            if ret:
+                state.update(frame=frame, score=self.focus_score(frame), number=0)
+        
+        info = {"frames_scored": state["scored"], "early_stop": state["early_stop"]}
+        return state["frame"], state["score"], state["number"], info
     
     def is_video_file(self, filename: str) -> bool:
         """Check if file is a video based on extension."""
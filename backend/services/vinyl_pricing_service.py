@@ -2,14 +2,16 @@
 """
 Vinyl Pricing Service
 Fetches market prices from Discogs and calculates condition-based values.
+Discogs calls go through the shared discogs_client (pooled, rate limited,
+cached); prices are kept in the price store and refreshed in the background.
 """
 
-import requests
-import time
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional
 import os
 
+from backend.services.discogs_client import discogs_client
+
 logger = logging.getLogger(__name__)
 
 # Discogs API Token (from environment - optional, graceful degradation)
@@ -19,7 +21,6 @@ if not DISCOGS_TOKEN:
         "DISCOGS_TOKEN not set - vinyl pricing features will be unavailable. "
         "Set it in Cloud Run environment variables or Secret Manager."
     )
-DISCOGS_BASE_URL = "https://api.discogs.com"
 
 
 # Goldmine Condition Multipliers
@@ -43,15 +44,7 @@ class VinylPricingService:
     
     def __init__(self):
         self.enabled = bool(DISCOGS_TOKEN)
-        if self.enabled:
-            self.headers = {
-                "Authorization": f"Discogs token={DISCOGS_TOKEN}",
-                "User-Agent": "RecordsAI/1.0"
-            }
-        else:
-            self.headers = {
-                "User-Agent": "RecordsAI/1.0"
-            }
+        if not self.enabled:
             logger.warning("VinylPricingService initialized without DISCOGS_TOKEN - pricing features disabled")
     
     def get_market_prices(
@@ -59,10 +52,16 @@ class VinylPricingService:
         artist: str, 
         album: str, 
         catalog_number: Optional[str] = None,
-        label: Optional[str] = None
+        label: Optional[str] = None,
+        condition: Optional[str] = None,
+        currency: str = "USD"
     ) -> Dict:
         """
-        Fetch market prices from Discogs marketplace.
+        Market prices from the price store (backend.services.price_store).
+        
+        Known releases are one indexed lookup, refreshed in the background by
+        the price refresh scheduler; only a release never priced before is
+        searched and fetched from Discogs inline.
         
         Returns:
         {
@@ -71,82 +70,85 @@ class VinylPricingService:
             "price_median": float,
             "currency": "USD",
             "source": "discogs",
-            "url": str
+            "url": str,
+            "sample_size": int,
+            "release_id": str,
+            "fetched_at": float,      # epoch seconds
+            "age_seconds": float,
+            "stale": bool             # older than the refresh max age
         }
         """
+        from backend.services.price_store import lookup_key, price_store
+
         try:
-            # Search for release
-            release_id = self._search_release(artist, album, catalog_number, label)
-            if not release_id:
-                return self._empty_pricing()
-            
-            # Get marketplace statistics
-            stats = self._get_marketplace_stats(release_id)
-            if not stats:
-                return self._empty_pricing()
-            
-            # Extract prices from marketplace stats
-            prices = stats.get("prices", [])
-            
-            # If no prices in stats, try to get from marketplace listings
-            if not prices:
-                prices = self._get_marketplace_listings(release_id)
-            
-            if not prices:
-                # If still no prices, return release info but no pricing
-                return {
-                    **self._empty_pricing(),
-                    "release_id": release_id,
-                    "url": f"https://www.discogs.com/release/{release_id}",
-                    "note": "No marketplace prices available"
-                }
-            
-            # Convert to USD if needed and extract values
-            price_values = []
-            currency = "USD"
-            
-            for price_item in prices:
-                value = price_item.get("value") if isinstance(price_item, dict) else price_item
-                if value:
-                    try:
-                        price_value = float(value)
-                        price_currency = price_item.get("currency", "USD") if isinstance(price_item, dict) else "USD"
-                        
-                        # Currency conversion (approximate rates)
-                        if price_currency == "USD":
-                            price_values.append(price_value)
-                        elif price_currency == "EUR":
-                            price_values.append(price_value * 1.1)
-                        elif price_currency == "GBP":
-                            price_values.append(price_value * 1.27)
-                        elif price_currency == "JPY":
-                            price_values.append(price_value * 0.0067)
-                        else:
-                            price_values.append(price_value)  # Assume USD
-                    except (ValueError, TypeError):
-                        continue
-            
-            if not price_values:
-                return self._empty_pricing()
-            
-            price_low = min(price_values)
-            price_high = max(price_values)
-            price_median = sorted(price_values)[len(price_values) // 2]
-            
-            return {
-                "price_low": round(price_low, 2),
-                "price_high": round(price_high, 2),
-                "price_median": round(price_median, 2),
-                "currency": currency,
-                "source": "discogs",
-                "url": f"https://www.discogs.com/release/{release_id}",
-                "sample_size": len(price_values)
-            }
+            key = lookup_key(artist, album, catalog_number)
+            release_id = price_store.resolve(key)
+            if release_id:
+                stored = price_store.get(release_id, condition, currency)
+                if stored:
+                    return self._pricing_from_store(stored)
+            else:
+                # Search for release
+                release_id = self._search_release(artist, album, catalog_number, label)
+                if not release_id:
+                    return self._empty_pricing()
+                price_store.remember(key, release_id)
+
+            # Never priced: fetch once inline, the scheduler keeps it fresh
+            price_store.save(release_id, self.fetch_release_listings(release_id))
+            return self._pricing_from_store(price_store.get(release_id, condition, currency))
             
         except Exception as e:
-            print(f"[PricingService] Error fetching prices: {e}")
+            logger.warning(f"[PricingService] Error fetching prices: {e}")
             return self._empty_pricing()
     
+    def fetch_release_listings(self, release_id: str) -> List[Dict]:
+        """
+        Marketplace listings of a release as {value, currency, condition}.
+        Raises on a failed request (the refresh scheduler backs off).
+        """
+        params = {
+            "status": "For Sale",
+            "per_page": 50
+        }
+        response = discogs_client.get(f"/marketplace/listings/release/{release_id}", params)
+        if response.status_code != 200:
+            raise RuntimeError(f"Discogs listings returned status {response.status_code}")
+        
+        listings = []
+        for listing in response.json().get("listings", []):
+            price_obj = listing.get("price")
+            if price_obj:
+                listings.append({**price_obj, "condition": listing.get("condition")})
+        return listings
+    
+    def _pricing_from_store(self, stored: Dict) -> Dict:
+        """Price store answer -> pricing dict (staleness metadata included)."""
+        release_id = stored["release_id"]
+        meta = {
+            "release_id": release_id,
+            "url": f"https://www.discogs.com/release/{release_id}",
+            "fetched_at": stored["fetched_at"],
+            "age_seconds": stored["age_seconds"],
+            "stale": stored["stale"],
+        }
+        if not stored["sample_size"]:
+            # Release known, but no marketplace prices
+            return {**self._empty_pricing(), **meta, "note": "No marketplace prices available"}
+        
+        return {
+            "price_low": stored["price_low"],
+            "price_high": stored["price_high"],
+            "price_median": stored["price_median"],
+            "currency": stored["currency"],
+            "source": stored["source"],
+            "sample_size": stored["sample_size"],
+            "condition": stored["condition"] or None,
+            "derived_from_condition": stored["derived_from_condition"],
+            "converted_from": stored["converted_from"],
+            **meta,
+        }
+    
     def _search_release(self, artist: str, album: str, catalog_number: Optional[str] = None, label: Optional[str] = None) -> Optional[str]:
         """Search Discogs for release ID with improved matching."""
         try:
@@ -155,7 +157,6 @@ class VinylPricingService:
             if catalog_number:
                 query += f" {catalog_number}"
             
-            url = f"{DISCOGS_BASE_URL}/database/search"
             params = {
                 "q": query,
                 "type": "release",
@@ -167,7 +168,7 @@ class VinylPricingService:
                 params["artist"] = artist
                 params["release_title"] = album
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = discogs_client.get("/database/search", params)
             if response.status_code != 200:
                 print(f"[PricingService] Search returned status {response.status_code}")
                 return None
@@ -182,8 +183,7 @@ class VinylPricingService:
                     "type": "release",
                     "per_page": 5
                 }
-                time.sleep(1)  # Rate limiting
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = discogs_client.get("/database/search", params)
                 if response.status_code == 200:
                     data = response.json()
                     results = data.get("results", [])
@@ -198,36 +198,10 @@ class VinylPricingService:
             print(f"[PricingService] Search error: {e}")
             return None
     
-    def _get_marketplace_stats(self, release_id: str) -> Optional[Dict]:
-        """Get marketplace statistics for a release."""
-        try:
-            # Try marketplace stats endpoint
-            url = f"{DISCOGS_BASE_URL}/marketplace/stats/{release_id}"
-            response = requests.get(url, headers=self.headers, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            
-            # Fallback: Get release details and extract price info
-            release_details = self._get_release_details(release_id)
-            if release_details:
-                # Try to get prices from release page or estimate
-                return {
-                    "prices": [],
-                    "release_info": release_details
-                }
-            
-            return None
-            
-        except Exception as e:
-            print(f"[PricingService] Marketplace stats error: {e}")
-            return None
-    
     def _get_release_details(self, release_id: str) -> Optional[Dict]:
         """Get detailed release information from Discogs."""
         try:
-            url = f"{DISCOGS_BASE_URL}/releases/{release_id}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = discogs_client.get(f"/releases/{release_id}")
             
             if response.status_code == 200:
                 return response.json()
@@ -280,33 +254,6 @@ class VinylPricingService:
             print(f"[PricingService] Get release info error: {e}")
             return {"status": "error", "message": str(e)}
     
-    def _get_marketplace_listings(self, release_id: str) -> list:
-        """Get marketplace listings for a release (alternative method)."""
-        try:
-            # Discogs marketplace listings endpoint
-            url = f"{DISCOGS_BASE_URL}/marketplace/listings/release/{release_id}"
-            params = {
-                "status": "For Sale",
-                "per_page": 50
-            }
-            
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                listings = data.get("listings", [])
-                prices = []
-                for listing in listings:
-                    price_obj = listing.get("price")
-                    if price_obj:
-                        prices.append(price_obj)
-                return prices
-            
-            return []
-            
-        except Exception as e:
-            print(f"[PricingService] Marketplace listings error: {e}")
-            return []
-    
     def _empty_pricing(self) -> Dict:
         """Return empty pricing structure."""
         return {
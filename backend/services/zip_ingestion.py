@@ -0,0 +1,337 @@
+# backend/services/zip_ingestion.py
+# UTF-8, English only
+
+"""
+Streaming ZIP Ingestion
+Processes uploaded ZIP archives without holding them in memory:
+
+- spool_upload: copy the upload to a temp file in chunks (size-capped)
+- scan_members: read the central directory only and enforce limits on
+  member count, per-member and total uncompressed size, and compression
+  ratio (zip bombs) before any member is decompressed
+- ZipBatch: members are decompressed one at a time inside a bounded
+  worker pool (ZIP_INGEST_WORKERS threads shared by all batches, at most
+  ZIP_INGEST_CONCURRENCY members in flight per batch); per-item results
+  are recorded as they complete and can be streamed by index
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from backend.core.file_validation import sanitize_filename
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif")
+
+MAX_UPLOAD_BYTES = int(os.getenv("ZIP_MAX_UPLOAD_BYTES", str(1024 * 1024 * 1024)))       # 1 GB on disk
+MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", "500"))
+MAX_MEMBER_BYTES = int(os.getenv("ZIP_MAX_MEMBER_BYTES", str(50 * 1024 * 1024)))          # 50 MB each
+MAX_TOTAL_BYTES = int(os.getenv("ZIP_MAX_TOTAL_BYTES", str(2 * 1024 * 1024 * 1024)))      # 2 GB expanded
+MAX_COMPRESSION_RATIO = float(os.getenv("ZIP_MAX_COMPRESSION_RATIO", "100"))
+WORKERS = int(os.getenv("ZIP_INGEST_WORKERS", "4"))
+CONCURRENCY = int(os.getenv("ZIP_INGEST_CONCURRENCY", "4"))
+MAX_ACTIVE_BATCHES = int(os.getenv("ZIP_MAX_ACTIVE_BATCHES", "4"))
+BATCH_TTL_SECONDS = float(os.getenv("ZIP_BATCH_TTL_SECONDS", "3600"))
+SPOOL_DIR = os.getenv("ZIP_SPOOL_DIR") or None
+CHUNK_SIZE = 1024 * 1024
+
+
+class ZipLimitExceeded(ValueError):
+    """Archive rejected before processing (routers map this to 400 / 413)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+@dataclass(frozen=True)
+class ZipMember:
+    index: int
+    name: str           # path inside the archive
+    filename: str       # sanitized, unique name used when saving
+    file_size: int
+    compress_size: int
+
+
+async def spool_upload(upload, max_bytes: int = MAX_UPLOAD_BYTES, suffix: str = ".zip") -> Path:
+    """
+    Copy an UploadFile to a temp file in CHUNK_SIZE pieces (also used for
+    video uploads, which OpenCV can only open from a path).
+
+    Raises:
+        ZipLimitExceeded: (413) upload larger than max_bytes
+    """
+    fd, name = tempfile.mkstemp(prefix="upload_spool_", suffix=suffix, dir=SPOOL_DIR)
+    path = Path(name)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise ZipLimitExceeded(f"Upload exceeds {max_bytes} bytes", status_code=413)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def scan_members(
+    path: Path,
+    max_members: int = MAX_MEMBERS,
+    max_member_bytes: int = MAX_MEMBER_BYTES,
+    max_total_bytes: int = MAX_TOTAL_BYTES,
+    max_ratio: float = MAX_COMPRESSION_RATIO,
+) -> List[ZipMember]:
+    """
+    Image members of the archive, validated from the central directory
+    (nothing is decompressed here).
+
+    Raises:
+        ZipLimitExceeded: invalid archive or a limit is exceeded
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            infos = archive.infolist()
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ZipLimitExceeded(f"Invalid ZIP archive: {e}")
+
+    files = [info for info in infos if not info.is_dir()]
+    if len(files) > max_members:
+        raise ZipLimitExceeded(f"ZIP has {len(files)} entries (limit {max_members})", status_code=413)
+
+    members = []
+    total = 0
+    for info in files:
+        name = info.filename
+        base = name.rsplit("/", 1)[-1]
+        if not base.lower().endswith(IMAGE_EXTENSIONS) or base.startswith("._") or name.startswith("__MACOSX/"):
+            continue
+        if info.flag_bits & 0x1:
+            raise ZipLimitExceeded(f"Encrypted ZIP member not supported: {name}")
+        if info.file_size > max_member_bytes:
+            raise ZipLimitExceeded(f"ZIP member too large: {name} ({info.file_size} bytes)", status_code=413)
+        # Small members cannot do damage whatever their ratio
+        if info.file_size > CHUNK_SIZE and info.file_size > max_ratio * max(info.compress_size, 1):
+            raise ZipLimitExceeded(f"Suspicious compression ratio for {name}")
+        total += info.file_size
+        if total > max_total_bytes:
+            raise ZipLimitExceeded(f"ZIP expands to more than {max_total_bytes} bytes", status_code=413)
+        index = len(members)
+        members.append(ZipMember(
+            index=index,
+            name=name,
+            # Unique per batch: members in different folders may share a name
+            filename=f"{index:04d}_{sanitize_filename(base, default='image.jpg')}",
+            file_size=info.file_size,
+            compress_size=info.compress_size,
+        ))
+    return members
+
+
+def read_member(archive: zipfile.ZipFile, member: ZipMember, max_bytes: int = MAX_MEMBER_BYTES) -> bytes:
+    """Decompress one member, enforcing the size cap on actual output (headers can lie)."""
+    limit = min(max_bytes, member.file_size)
+    chunks = []
+    size = 0
+    with archive.open(member.name) as stream:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                raise ZipLimitExceeded(f"ZIP member {member.name} expands beyond its declared size")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+# Shared by all batches: bounds decompression + per-item pipeline threads
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="zip-ingest")
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# Per-member work: (file_bytes, filename) -> result dict (blocking; runs in the pool)
+MemberProcessor = Callable[[bytes, str], Dict[str, Any]]
+
+
+@dataclass(eq=False)
+class ZipBatch:
+    """One ingested archive; results are appended in completion order."""
+
+    id: str
+    owner: str
+    archive_name: str
+    path: Path
+    members: List[ZipMember]
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    status: str = "running"
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    failed: int = 0
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    _task: Optional[asyncio.Task] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.members)
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.id,
+            "archive": self.archive_name,
+            "status": self.status,
+            "total": self.total,
+            "completed": len(self.results),
+            "failed": self.failed,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    async def _record(self, item: Dict[str, Any]):
+        async with self._changed:
+            self.results.append(item)
+            self._changed.notify_all()
+
+    async def run(self, processor: MemberProcessor, concurrency: int = CONCURRENCY):
+        """Fan members out to the pool, `concurrency` at a time; always cleans up the spool file."""
+        loop = asyncio.get_running_loop()
+        pending = iter(self.members)
+        archive = zipfile.ZipFile(self.path)
+
+        def work(member: ZipMember) -> Dict[str, Any]:
+            # ZipFile reads through a locked shared handle; decompression runs in parallel
+            return processor(read_member(archive, member), member.filename)
+
+        async def consume():
+            for member in pending:
+                started = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(_get_pool(), work, member)
+                    item = {"index": member.index, "member": member.name, "status": "ok", "result": result}
+                except Exception as e:
+                    logger.warning(f"[ZIP_INGEST] {self.id} member {member.name} failed: {e}")
+                    self.failed += 1
+                    item = {"index": member.index, "member": member.name, "status": "error", "error": str(e)}
+                item["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                await self._record(item)
+
+        try:
+            await asyncio.gather(*(consume() for _ in range(max(1, min(concurrency, self.total)))))
+            self.status = "completed"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"[ZIP_INGEST] Batch {self.id} failed: {e}", exc_info=True)
+            self.status = "failed"
+        finally:
+            archive.close()
+            self.path.unlink(missing_ok=True)
+            self.finished_at = time.time()
+            async with self._changed:
+                self._changed.notify_all()
+            logger.info(f"[ZIP_INGEST] Batch {self.id} {self.status}: {len(self.results)}/{self.total} items, {self.failed} failed")
+
+    async def stream(self, after: int = -1) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """(position, item) for results after position `after`, as they complete."""
+        position = after + 1
+        while True:
+            async with self._changed:
+                while position >= len(self.results) and not self.done:
+                    await self._changed.wait()
+                ready = self.results[position:]
+            for item in ready:
+                yield position, item
+                position += 1
+            if self.done and position >= len(self.results):
+                return
+
+
+class ZipBatchRegistry:
+    """In-process batches by id (results live on the instance that received the ZIP)."""
+
+    def __init__(self, max_active: int = MAX_ACTIVE_BATCHES, ttl_seconds: float = BATCH_TTL_SECONDS):
+        self.max_active = max_active
+        self.ttl_seconds = ttl_seconds
+        self._batches: Dict[str, ZipBatch] = {}
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        for batch_id in [b.id for b in self._batches.values() if b.finished_at and b.finished_at < cutoff]:
+            del self._batches[batch_id]
+
+    def active(self) -> int:
+        return sum(1 for b in self._batches.values() if not b.done)
+
+    def start(
+        self,
+        owner: str,
+        archive_name: str,
+        path: Path,
+        members: List[ZipMember],
+        processor: MemberProcessor,
+        concurrency: int = CONCURRENCY,
+    ) -> ZipBatch:
+        """
+        Register a batch and start processing it in the background.
+
+        Raises:
+            ZipLimitExceeded: (429) too many batches running on this instance
+        """
+        self._expire()
+        if self.active() >= self.max_active:
+            raise ZipLimitExceeded("Too many ZIP batches in progress, retry later", status_code=429)
+        batch = ZipBatch(id=str(uuid.uuid4()), owner=owner, archive_name=archive_name, path=path, members=members)
+        self._batches[batch.id] = batch
+        batch._task = asyncio.create_task(batch.run(processor, concurrency), name=f"zip-batch-{batch.id}")
+        return batch
+
+    def get(self, batch_id: str, owner: Optional[str] = None) -> Optional[ZipBatch]:
+        self._expire()
+        batch = self._batches.get(batch_id)
+        if batch is None or (owner is not None and batch.owner != owner):
+            return None
+        return batch
+
+    def stats(self) -> Dict[str, Any]:
+        return {"batches": len(self._batches), "active": self.active(), "max_active": self.max_active}
+
+
+# Global instance
+zip_batches = ZipBatchRegistry()
@@ -0,0 +1,306 @@
+# UTF-8, English only
+
+"""
+Append-Only Key/Value Store
+Bitcask-style log with an in-memory hash index.
+
+- Writes: one JSON line appended per put/delete (O(1), independent of store size)
+- Reads: index maps key -> (offset, length); value read with one seek
+- Startup: index is built lazily on first access, not at construction
+- Concurrency: appends are serialized by a thread lock plus an advisory file
+  lock (fcntl where available), so several processes can share one log.
+  Each process catches up on entries appended by others before reading.
+- Crash safety: a torn last line (partial write) is ignored when indexing
+- Compaction: live entries are rewritten to a temp file and atomically
+  swapped in with os.replace(); other processes detect the new file and
+  rebuild their index.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: thread lock only
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Compact automatically once dead bytes exceed this share of the log ...
+COMPACTION_DEAD_RATIO = 0.5
+# ... and the log is at least this big
+COMPACTION_MIN_BYTES = 1024 * 1024
+
+# _read_entry(): index does not match the file on disk
+_STALE = object()
+
+
+class AppendOnlyStore:
+    """
+    Persistent dict-like store backed by an append-only JSON-lines log.
+
+    Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        auto_compact: bool = True,
+        fsync: bool = False
+    ):
+        """
+        Initialize store (does not touch the log until first use).
+
+        Args:
+            path: Log file path (created on first write)
+            auto_compact: Compact when dead bytes dominate the log
+            fsync: fsync after every append (durable against power loss,
+                   slower; default relies on the OS page cache)
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.auto_compact = auto_compact
+        self.fsync = fsync
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._indexed_end = 0
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._live_bytes = 0
+
+    # ------------------------------------------------------------------
+    # Locking / indexing
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive advisory lock shared by all processes using this log."""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _stat(self) -> Optional[os.stat_result]:
+        try:
+            return os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+    def _reset_index(self):
+        self._index = {}
+        self._indexed_end = 0
+        self._live_bytes = 0
+        self._file_id = None
+
+    def _refresh(self):
+        """
+        Bring the index up to date with the log on disk.
+
+        First call builds the full index; later calls only scan bytes
+        appended since the last scan (by this or another process). A
+        replaced file (compaction elsewhere) triggers a full rebuild.
+        """
+        st = self._stat()
+        if st is None:
+            self._reset_index()
+            return
+
+        file_id = (st.st_dev, st.st_ino)
+        if self._file_id != file_id or st.st_size < self._indexed_end:
+            self._reset_index()
+            self._file_id = file_id
+
+        if st.st_size > self._indexed_end:
+            self._scan_from(self._indexed_end)
+
+    def _scan_from(self, start: int):
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn tail (writer crashed mid-append or still writing)
+                    break
+                length = len(line)
+                try:
+                    entry = json.loads(line)
+                    key = entry["k"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping corrupt log line at offset {offset} in {self.path}")
+                    offset += length
+                    continue
+
+                previous = self._index.pop(key, None)
+                if previous is not None:
+                    self._live_bytes -= previous[1]
+                if not entry.get("d"):
+                    self._index[key] = (offset, length)
+                    self._live_bytes += length
+                offset += length
+            self._indexed_end = offset
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return value for key (reads one log entry from disk)."""
+        with self._lock:
+            self._refresh()
+            entry = self._read_entry(key)
+            if entry is _STALE:
+                # Another process compacted / replaced the log between our
+                # refresh and the read: rebuild the index and read again
+                # while holding the file lock, so it cannot move again
+                with self._file_lock():
+                    self._reset_index()
+                    self._refresh()
+                    entry = self._read_entry(key)
+            if entry is None or entry is _STALE:
+                return default
+            return entry.get("v", default)
+
+    def _read_entry(self, key: str) -> Any:
+        """
+        Read the indexed entry for key: None if the key is not indexed,
+        _STALE if the file on disk is not the one that was indexed or the
+        entry at the offset belongs to another key.
+        """
+        location = self._index.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if (st.st_dev, st.st_ino) != self._file_id:
+                    return _STALE
+                f.seek(offset)
+                entry = json.loads(f.read(length))
+        except FileNotFoundError:
+            return _STALE
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read entry {key} from {self.path}: {e}")
+            return _STALE
+        if not isinstance(entry, dict) or entry.get("k") != key:
+            return _STALE
+        return entry
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def keys(self) -> Iterator[str]:
+        with self._lock:
+            self._refresh()
+            return iter(list(self._index.keys()))
+
+    def put(self, key: str, value: Any):
+        """Append one entry. Cost does not depend on the number of entries."""
+        self._append({"k": key, "v": value})
+
+    def delete(self, key: str):
+        """Append a tombstone for key."""
+        with self._lock:
+            self._refresh()
+            if key not in self._index:
+                return
+        self._append({"k": key, "d": True})
+
+    def _append(self, entry: Dict[str, Any]):
+        line = (json.dumps(entry, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        with self._lock, self._file_lock():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Index entries appended by other processes before ours
+            self._refresh()
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                offset = os.fstat(fd).st_size
+                os.write(fd, line)
+                if self.fsync:
+                    os.fsync(fd)
+                st = os.fstat(fd)
+            finally:
+                os.close(fd)
+
+            self._file_id = (st.st_dev, st.st_ino)
+            # Our own line is the only one appended while we hold the lock
+            if offset == self._indexed_end:
+                previous = self._index.pop(entry["k"], None)
+                if previous is not None:
+                    self._live_bytes -= previous[1]
+                if not entry.get("d"):
+                    self._index[entry["k"]] = (offset, len(line))
+                    self._live_bytes += len(line)
+                self._indexed_end = offset + len(line)
+            else:
+                self._refresh()
+
+            if self.auto_compact and self._should_compact():
+                self._compact_locked()
+
+    def _should_compact(self) -> bool:
+        total = self._indexed_end
+        if total < COMPACTION_MIN_BYTES:
+            return False
+        return (total - self._live_bytes) / total > COMPACTION_DEAD_RATIO
+
+    def compact(self):
+        """Rewrite the log with live entries only (atomic swap)."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        if not self.path.exists():
+            return
+        tmp_path = self.path.with_name(self.path.name + ".compact")
+        new_index: Dict[str, Tuple[int, int]] = {}
+        offset = 0
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+            for key, (old_offset, length) in self._index.items():
+                src.seek(old_offset)
+                line = src.read(length)
+                dst.write(line)
+                new_index[key] = (offset, length)
+                offset += length
+            dst.flush()
+            os.fsync(dst.fileno())
+        before = self._indexed_end
+        os.replace(tmp_path, self.path)
+
+        st = os.stat(self.path)
+        self._index = new_index
+        self._indexed_end = offset
+        self._live_bytes = offset
+        self._file_id = (st.st_dev, st.st_ino)
+        logger.info(f"Compacted {self.path}: {before} -> {offset} bytes, {len(new_index)} keys")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            return {
+                "path": str(self.path),
+                "keys": len(self._index),
+                "log_bytes": self._indexed_end,
+                "live_bytes": self._live_bytes,
+                "dead_bytes": self._indexed_end - self._live_bytes,
+            }
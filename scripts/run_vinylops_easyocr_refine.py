@@ -1,9 +1,12 @@
 import os
-import time
+import sys
 import json
-import requests
 import pandas as pd
 from difflib import SequenceMatcher
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # ====================================================
 # VinylOps - EasyOCR Refinement with Discogs Matching
@@ -18,11 +21,11 @@ if not DISCOGS_TOKEN:
         "Set it with: export DISCOGS_TOKEN=your_token_here"
     )
 
-BASE_URL = "https://api.discogs.com/database/search"
-HEADERS = {
-    "Authorization": f"Discogs token={DISCOGS_TOKEN}",
-    "User-Agent": "VinylOps/1.0"
-}
+# Shared client: pooled connections, waits on X-Discogs-Ratelimit-Remaining,
+# caches searches on disk (re-runs only hit Discogs for new rows)
+from backend.services.discogs_client import DiscogsClient  # noqa: E402
+
+client = DiscogsClient(token=DISCOGS_TOKEN, timeout=25)
 
 INPUT_FILE = "canonical/inventory_easyocr.parquet"
 OUTPUT_FILE = "canonical/inventory_easyocr_refined.parquet"
@@ -31,16 +34,13 @@ OUTPUT_FILE = "canonical/inventory_easyocr_refined.parquet"
 def discogs_search(artist: str, title: str):
     """Try direct Discogs search first, then fuzzy fallback."""
     params = {"artist": artist, "release_title": title, "type": "release", "per_page": 5}
-    r = requests.get(BASE_URL, headers=HEADERS, params=params, timeout=25)
-    data = r.json().get("results", [])
+    data = client.get("/database/search", params).json().get("results", [])
 
     if not data:
         # Fuzzy fallback
         query = f"{artist} {title}"
         params = {"q": query, "type": "release", "per_page": 5}
-        time.sleep(1)
-        r = requests.get(BASE_URL, headers=HEADERS, params=params, timeout=25)
-        data = r.json().get("results", [])
+        data = client.get("/database/search", params).json().get("results", [])
         print(f"[INFO] Fuzzy search fallback for: {query}")
 
     return data
@@ -95,8 +95,6 @@ def main():
         row.update(refined)
         refined_rows.append(row)
 
-        time.sleep(1.2)  # respect Discogs rate limits
-
     refined_df = pd.DataFrame(refined_rows)
     refined_df.to_parquet(OUTPUT_FILE, index=False)
     print(f"✅ Created: {OUTPUT_FILE} with {len(refined_df)} entries")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Archive-add enrichment latency benchmark: serial vs concurrent vs background.
+
+Stubbed providers with injected delays stand in for the real lookups:
+- pricing:     up to 4 Discogs calls (search, fuzzy search, stats,
+               listings), --discogs-ms each
+- lyrics:      lyrics.ovh, --lyrics-ms with a heavy tail (1 in 10 calls
+               hangs for --tail-ms, cut by the provider deadline)
+- sheet_music: link generation, a few ms
+
+Each save archives a record and then enriches it:
+- serial:     the lookups one after another inside the request
+- sync:       ArchiveEnrichment.enrich (concurrent, per-provider deadlines)
+- background: ArchiveEnrichment.start; the response does not wait, the
+              enrichment completes afterwards ("ready" column)
+
+Usage:
+    python tests/benchmarks/bench_archive_enrichment.py [--saves 40] [--discogs-ms 250]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.core.executors import OPENAI_POOL, run_in_pool  # noqa: E402
+from backend.services.archive_enrichment import ArchiveEnrichment, EnrichmentProvider  # noqa: E402
+from backend.services.upap.engine.upap_engine import UPAPEngine  # noqa: E402
+
+
+def make_providers(args, rng: random.Random):
+    def pricing(fields):
+        for _ in range(rng.randint(2, 4)):
+            time.sleep(args.discogs_ms / 1000)
+        return {"price_median": 24.0}
+
+    def lyrics(fields):
+        tail = rng.random() < 0.1
+        time.sleep((args.tail_ms if tail else args.lyrics_ms) / 1000)
+        return {"lyrics_links": []}
+
+    def sheet_music(fields):
+        time.sleep(0.005)
+        return {"sheet_music_links": []}
+
+    return (
+        EnrichmentProvider("pricing", pricing, timeout=4 * args.discogs_ms / 1000 + 0.5),
+        EnrichmentProvider("lyrics", lyrics, timeout=args.lyrics_ms * 3 / 1000),
+        EnrichmentProvider("sheet_music", sheet_music, timeout=1.0),
+    )
+
+
+async def run(mode: str, args) -> dict:
+    rng = random.Random(7)
+    providers = make_providers(args, rng)
+    enrichment = ArchiveEnrichment(providers)
+    engine = UPAPEngine()
+    latencies, ready = [], []
+
+    async def save(i: int):
+        record_id = f"bench-{mode}-{i}"
+        fields = {"artist": "PINK FLOYD", "album": f"ANIMALS {i}"}
+        started = time.perf_counter()
+        engine.run_archive(record_id)
+        if mode == "serial":
+            for provider in providers:
+                await run_in_pool(OPENAI_POOL, provider.fn, fields)
+        elif mode == "sync":
+            await enrichment.enrich(record_id, fields)
+        else:
+            enrichment.start(record_id, fields)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if mode == "background":
+            await enrichment.enrich(record_id, fields)  # joins the running task
+        ready.append((time.perf_counter() - started) * 1000)
+
+    for batch in range(0, args.saves, args.concurrency):
+        await asyncio.gather(*(save(i) for i in range(batch, min(batch + args.concurrency, args.saves))))
+
+    latencies.sort()
+    partial = enrichment.stats()["by_status"].get("partial", 0)
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "ready_p50": statistics.median(ready),
+        "partial": partial,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--saves", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--discogs-ms", type=float, default=250)
+    parser.add_argument("--lyrics-ms", type=float, default=300)
+    parser.add_argument("--tail-ms", type=float, default=5000)
+    args = parser.parse_args()
+
+    print(f"{args.saves} saves, {args.concurrency} at a time; Discogs call {args.discogs_ms:.0f} ms, "
+          f"lyrics {args.lyrics_ms:.0f} ms (10% hang {args.tail_ms:.0f} ms)")
+    print(f"{'mode':>10} | {'response p50':>12} | {'response p95':>12} | {'ready p50':>9} | partial")
+    print("-" * 64)
+    for mode in ("serial", "sync", "background"):
+        result = asyncio.run(run(mode, args))
+        print(f"{mode:>10} | {result['p50']:>10.0f}ms | {result['p95']:>10.0f}ms | "
+              f"{result['ready_p50']:>7.0f}ms | {result['partial'] if mode != 'serial' else '-'}")
+
+
+if __name__ == "__main__":
+    main()
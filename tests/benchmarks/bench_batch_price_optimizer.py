@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Nightly price optimization benchmark on a synthetic inventory.
+
+A stubbed model (--latency-ms per call plus --per-record-ms per record,
+token usage estimated from the real prompt) stands in for OpenAI.
+Reports how many records the old single-call path covered, then
+records/second, model share and cost per 1k records of the batch
+optimizer, and the effect of resuming from a checkpoint.
+
+Usage:
+    python tests/benchmarks/bench_batch_price_optimizer.py [--records 50000] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.commerce.auto_pricing_service import AutoPricingService, output_token_budget  # noqa: E402
+from backend.services.commerce.batch_price_optimizer import BatchPriceOptimizer  # noqa: E402
+
+
+def make_inventory(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"rec-{i:06d}",
+            "artist": f"Artist {rng.randint(1, 5000)}",
+            "album": f"Album {rng.randint(1, 20000)}",
+            # Most records are cheap, a few are worth a lot
+            "price": round(min(rng.lognormvariate(3.0, 0.8), 2000), 2),
+            "condition": rng.choice(["M", "NM", "VG+", "VG", "G+"]),
+            "days_on_market": rng.randint(0, 180),
+            "views": int(rng.expovariate(1 / 40)),
+        }
+        for i in range(n)
+    ]
+
+
+def make_model(args, failures: float = 0.0, seed: int = 1):
+    prompt = AutoPricingService()._build_pricing_prompt
+    rng = random.Random(seed)
+    calls = {"count": 0}
+
+    async def complete(records, competitor_prices=None, sales_metrics=None):
+        calls["count"] += 1
+        await asyncio.sleep((args.latency_ms + args.per_record_ms * len(records)) / 1000)
+        if rng.random() < failures:
+            raise RuntimeError("stub model timeout")
+        return {
+            "recommendations": [
+                {"record_id": r["id"], "recommended_price": round(r["price"] * 1.03, 2),
+                 "strategy": "increase", "reasoning": "stub"}
+                for r in records
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt(records, competitor_prices, sales_metrics)) // 4 + 20,
+                # ~45 tokens per recommendation object
+                "completion_tokens": min(45 * len(records) + 20, output_token_budget(len(records))),
+            },
+        }
+
+    return complete, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--per-record-ms", type=float, default=10)
+    args = parser.parse_args()
+    # Injected chunk failures are expected
+    logging.getLogger("backend.services.commerce.batch_price_optimizer").setLevel(logging.ERROR)
+
+    inventory = make_inventory(args.records)
+    sales_metrics = {r["id"]: {"views": r["views"], "days_on_market": r["days_on_market"]} for r in inventory}
+    print(f"{args.records} records; stub model {args.latency_ms:.0f} ms + {args.per_record_ms:.0f} ms/record, "
+          f"{args.concurrency} chunks in flight")
+    print(f"old path: one call with records[:10] -> {10 / args.records:.4%} of the inventory priced")
+    print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, concurrency in (("sequential", 1), ("parallel", args.concurrency)):
+            if label == "sequential" and args.records > 5000:
+                continue
+            complete, calls = make_model(args)
+            optimizer = BatchPriceOptimizer(complete, concurrency=concurrency, checkpoint_dir=tmp)
+            result = asyncio.run(optimizer.optimize(inventory, sales_metrics=sales_metrics))
+            stats = result["stats"]
+            print(f"{label:>10}: {stats['records_per_second']:>8.0f} records/s | {stats['seconds']:>6.1f} s | "
+                  f"rules {stats['rules']}, model {stats['model']} in {calls['count']} calls | "
+                  f"${stats['cost_per_1k_records']:.4f} per 1k records (${stats['cost_usd']:.2f} total)")
+
+        # Interrupted run (5% of chunks fail), then resume
+        complete, _ = make_model(args, failures=0.05)
+        first = asyncio.run(BatchPriceOptimizer(complete, concurrency=args.concurrency, checkpoint_dir=tmp)
+                            .optimize(inventory, sales_metrics=sales_metrics, run_id="bench"))
+        complete, calls = make_model(args)
+        second = asyncio.run(BatchPriceOptimizer(complete, concurrency=args.concurrency, checkpoint_dir=tmp)
+                             .optimize(inventory, sales_metrics=sales_metrics, run_id="bench"))
+        print(f"{'resume':>10}: first run left {len(first['unoptimized'])} unpriced; rerun resumed "
+              f"{second['stats']['resumed']}, sent {second['stats']['model']} records in {calls['count']} calls "
+              f"({second['stats']['seconds']:.1f} s), unpriced now {len(second['unoptimized'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Library grid benchmark: original covers vs 320px derivatives.
+
+Builds a storage tree with N distinct camera-sized covers (default 100,
+one library page) and loads the page's images through an in-process ASGI
+app, 6 at a time like a browser does per host:
+- original: full JPEGs from the /storage static mount (what library.html
+  rendered before), then a revisit answered by the static ETag (304)
+- derivative cold: first request per cover renders the 320px WebP
+- derivative warm: new visitor, served from the disk cache
+- derivative revisit: unversioned URLs revalidate (304, no body)
+- derivative immutable: versioned URLs are not requested again at all
+
+Usage:
+    python tests/benchmarks/bench_derivatives.py [--records 100] [--size 3000x2250] [--concurrency 6]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# Queue every render (the app answers 429 past the image pool's capacity)
+os.environ.setdefault("UPAP_IMAGE_QUEUE", "256")
+
+from backend.api.v1 import media_router  # noqa: E402
+from backend.services.derivative_service import DerivativeService  # noqa: E402
+
+
+def make_covers(root: Path, count: int, width: int, height: int) -> list:
+    """Distinct textured covers (photo-like JPEG sizes)."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        small = rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8)
+        image = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+        image = cv2.add(image, rng.integers(0, 24, image.shape, dtype=np.uint8))
+        cv2.circle(image, (width // 2, height // 2), height // 3, (20, 20, 20), -1)
+        path = root / "archive" / f"user{i % 7}" / f"cover_{i:03d}.jpg"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(path), image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        paths.append(path)
+    return paths
+
+
+async def load_page(client: httpx.AsyncClient, urls: list, concurrency: int, etags: dict = None) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, sizes, statuses = [], [], []
+
+    async def fetch(url):
+        headers = {"Accept": "image/avif,image/webp,*/*"}
+        if etags and url in etags:
+            headers["If-None-Match"] = etags[url]
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(response.content))
+        statuses.append(response.status_code)
+        return url, response.headers.get("etag")
+
+    started = time.perf_counter()
+    tags = dict(await asyncio.gather(*(fetch(url) for url in urls)))
+    latencies.sort()
+    return {
+        "requests": len(urls),
+        "bytes": sum(sizes),
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "page_ms": (time.perf_counter() - started) * 1000,
+        "statuses": sorted(set(statuses)),
+        "etags": tags,
+    }
+
+
+async def run(args):
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Path(tmp) / "storage"
+        covers = make_covers(storage, args.records, width, height)
+        service = DerivativeService(source_root=storage, cache_dir=storage / "derivatives")
+        media_router.derivative_service = service
+
+        app = FastAPI()
+        app.include_router(media_router.router)
+        app.mount("/storage", StaticFiles(directory=str(storage)), name="storage")
+
+        originals = [f"/storage/{p.relative_to(storage).as_posix()}" for p in covers]
+        unversioned = [f"/api/v1/media/derivative?path={p}&w=320&format=auto" for p in originals]
+
+        rows = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            first = await load_page(client, originals, args.concurrency)
+            rows.append(("original", first))
+            rows.append(("original revisit (304)", await load_page(client, originals, args.concurrency, first["etags"])))
+
+            cold = await load_page(client, unversioned, args.concurrency)
+            rows.append(("derivative cold", cold))
+            rows.append(("derivative warm", await load_page(client, unversioned, args.concurrency)))
+            rows.append(("derivative revisit (304)", await load_page(client, unversioned, args.concurrency, cold["etags"])))
+            rows.append(("derivative immutable", {"requests": 0, "bytes": 0, "p50": 0.0, "p95": 0.0,
+                                                  "page_ms": 0.0, "statuses": []}))
+
+    print(f"{args.records} covers at {width}x{height}, {args.concurrency} concurrent requests")
+    print(f"{'mode':>24} | {'requests':>8} | {'page KB':>9} | {'p50 ms':>7} | {'p95 ms':>7} | {'page ms':>8} | status")
+    print("-" * 86)
+    for name, row in rows:
+        print(f"{name:>24} | {row['requests']:>8} | {row['bytes'] / 1024:>9.0f} | {row['p50']:>7.1f} | "
+              f"{row['p95']:>7.1f} | {row['page_ms']:>8.0f} | {','.join(map(str, row['statuses']))}")
+    print(f"derivative stats: {service.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100)
+    parser.add_argument("--size", default="3000x2250", help="WIDTHxHEIGHT of the originals")
+    parser.add_argument("--concurrency", type=int, default=6)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Detection merge micro-benchmark: pairwise vs grid-indexed merging.
+
+Random candidate boxes on a 4000x3000 photo, 10% from AI vision and the
+rest from Hough (records 150-450 px, many overlapping duplicates):
+- pairwise: the previous _merge_detections (every CV box against every
+  AI box; CV duplicates are not removed at all)
+- brute NMS: greedy NMS comparing each box with every kept box
+- grid NMS / grid WBF: backend.services.detection_merge
+
+Usage:
+    python tests/benchmarks/bench_detection_merge.py [--sizes 10,100,1000] [--repeat 20]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.detection_merge import (  # noqa: E402
+    iou,
+    merge_order,
+    non_max_suppression,
+    weighted_box_fusion,
+)
+
+THRESHOLD = 0.3
+
+
+def candidates(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    ai, cv = [], []
+    for i in range(n):
+        size = rng.randint(150, 450)
+        det = {
+            "bbox": {"x": rng.randint(0, 4000 - size), "y": rng.randint(0, 3000 - size), "width": size, "height": size},
+            "confidence": round(rng.uniform(0.5, 0.95), 2),
+        }
+        (ai if i % 10 == 0 else cv).append(det)
+    return ai, cv
+
+
+def pairwise(ai, cv):
+    merged = list(ai)
+    for cv_det in cv:
+        if not any(iou(cv_det["bbox"], ai_det["bbox"]) > THRESHOLD for ai_det in ai):
+            merged.append(cv_det)
+    merged.sort(key=lambda x: x.get("confidence", 0), reverse=True)
+    return merged
+
+
+def brute_nms(ai, cv):
+    detections = ai + cv
+    ai_ids = {id(d) for d in ai}
+    kept = []
+    for i in merge_order(detections, priority=lambda d: id(d) in ai_ids):
+        if all(iou(detections[i]["bbox"], k["bbox"]) <= THRESHOLD for k in kept):
+            kept.append(detections[i])
+    return kept
+
+
+def grid(merge):
+    def run(ai, cv):
+        ai_ids = {id(d) for d in ai}
+        return merge(ai + cv, THRESHOLD, priority=lambda d: id(d) in ai_ids)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    methods = [
+        ("pairwise", pairwise),
+        ("brute NMS", brute_nms),
+        ("grid NMS", grid(non_max_suppression)),
+        ("grid WBF", grid(weighted_box_fusion)),
+    ]
+    print(f"{'boxes':>5} | {'method':>9} | {'kept':>5} | {'ms/merge':>9}")
+    print("-" * 38)
+    for n in (int(s) for s in args.sizes.split(",")):
+        ai, cv = candidates(n)
+        for name, method in methods:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                kept = method(ai, cv)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            print(f"{n:>5} | {name:>9} | {len(kept):>5} | {elapsed * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
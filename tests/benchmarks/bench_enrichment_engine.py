@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Metadata enrichment throughput benchmark: serial worker vs EnrichmentEngine.
+
+Local stub sources with injected latency stand in for the catalogues:
+- discogs:     --discogs-ms per call (limit --discogs-concurrency)
+- musicbrainz: --mb-ms per call, --mb-rate requests/s, one at a time
+
+Modes:
+- serial:      the old EnrichmentWorker loop: one record at a time, the
+               sources one after another, then sleep(0.2)
+- engine cold: all records queued as backfill, empty cache
+- engine warm: the same records again (persistent cache)
+- interactive: lookups submitted while the backfill queue is full;
+               latency with priority vs. behind the backfill (FIFO)
+
+Usage:
+    python tests/benchmarks/bench_enrichment_engine.py [--records 60] [--mb-rate 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.enrichment_engine import (  # noqa: E402
+    BACKFILL, INTERACTIVE, EnrichmentCache, EnrichmentEngine, EnrichmentSource,
+)
+
+
+def make_sources(args):
+    def discogs(query):
+        time.sleep(args.discogs_ms / 1000)
+        return {"label": "Harvest", "year": "1977", "catalog_number": query["title"]}
+
+    def musicbrainz(query):
+        time.sleep(args.mb_ms / 1000)
+        return {"country": "GB"}
+
+    return (
+        EnrichmentSource("discogs", discogs, concurrency=args.discogs_concurrency),
+        EnrichmentSource("musicbrainz", musicbrainz, concurrency=1, rate=args.mb_rate),
+    )
+
+
+def run_serial(args, sources) -> float:
+    started = time.perf_counter()
+    for i in range(args.records):
+        query = {"artist": "Artist", "title": f"Album {i}", "catalog_number": ""}
+        for source in sources:
+            source.fn(query)
+        time.sleep(0.2)
+    return time.perf_counter() - started
+
+
+async def run_engine(args, engine) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(engine.submit("Artist", f"Album {i}", priority=BACKFILL) for i in range(args.records)))
+    return time.perf_counter() - started
+
+
+async def run_interactive(args, engine, priority: int) -> list:
+    backfill = [engine.submit("Artist", f"Queued {i}", priority=BACKFILL) for i in range(args.records)]
+    latencies = []
+    for i in range(5):
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        await engine.enrich("Artist", f"Interactive {i}", priority=priority)
+        latencies.append((time.perf_counter() - started) * 1000)
+    await asyncio.gather(*backfill)
+    await engine.stop()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--discogs-ms", type=float, default=150)
+    parser.add_argument("--discogs-concurrency", type=int, default=4)
+    parser.add_argument("--mb-ms", type=float, default=200)
+    parser.add_argument("--mb-rate", type=float, default=5.0)
+    args = parser.parse_args()
+    sources = make_sources(args)
+
+    print(f"{args.records} records; discogs {args.discogs_ms:.0f} ms x{args.discogs_concurrency}, "
+          f"musicbrainz {args.mb_ms:.0f} ms at {args.mb_rate:g}/s; {args.workers} workers")
+    print(f"{'mode':>12} | {'seconds':>8} | {'records/s':>9}")
+    print("-" * 36)
+
+    if args.records <= 100:
+        elapsed = run_serial(args, sources)
+        print(f"{'serial':>12} | {elapsed:>8.2f} | {args.records / elapsed:>9.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EnrichmentCache(Path(tmp) / "enrichment.sqlite3")
+        for mode in ("engine cold", "engine warm"):
+            engine = EnrichmentEngine(sources, workers=args.workers, cache=cache)
+            elapsed = asyncio.run(run_engine(args, engine))
+            print(f"{mode:>12} | {elapsed:>8.2f} | {args.records / elapsed:>9.1f}")
+
+        print()
+        print(f"interactive lookups while {args.records} backfill records are queued:")
+        for label, priority in (("priority", INTERACTIVE), ("fifo", BACKFILL)):
+            cache.clear()
+            engine = EnrichmentEngine(sources, workers=args.workers, cache=cache)
+            latencies = asyncio.run(run_interactive(args, engine, priority))
+            print(f"{label:>12} | mean {statistics.mean(latencies):>7.0f} ms | max {max(latencies):>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
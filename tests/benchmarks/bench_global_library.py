@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+GlobalLibraryService lookup benchmark.
+
+Compares the original linear scans with the indexed service at growing
+library sizes:
+- add_or_get of a new record (fingerprint lookup + insert)
+- get_by_id
+- search_text (selective query)
+
+Usage:
+    python tests/benchmarks/bench_global_library.py [--max 1000000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.global_library_service import GlobalLibraryService  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+SAMPLES = 20
+SCAN_SAMPLES = 3
+
+LABELS = ["Blue Note", "Columbia", "Impulse!", "Prestige", "Riverside", "Verve", "ECM", "Atlantic"]
+
+
+def _metadata(i: int):
+    return {
+        "artist": f"Artist {i % 5000}",
+        "album": f"Album {i}",
+        "label": LABELS[i % len(LABELS)],
+        "year": 1950 + i % 70,
+        "catalog_number": f"CAT-{i:07d}",
+    }
+
+
+class ScanLibrary(GlobalLibraryService):
+    """Original behaviour: linear scans over _records."""
+
+    def _find_by_fingerprint(self, fingerprint):
+        for rec in self._records:
+            if rec["fingerprint"] == fingerprint:
+                return rec
+        return None
+
+    def get_by_id(self, record_id):
+        for rec in self._records:
+            if rec["id"] == record_id:
+                return rec
+        return None
+
+    def search_text(self, query, limit=20):
+        q = query.strip().lower()
+        results = []
+        for rec in self._records:
+            meta = rec.get("metadata", {})
+            haystack = " ".join(
+                self._normalize_value(meta.get(k))
+                for k in ("artist", "album", "title", "label", "catalog_number", "barcode")
+            )
+            if q in haystack:
+                results.append(rec)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+def _fill_scan(library: ScanLibrary, size: int):
+    # Bulk load without the O(n^2) dedupe of add_or_get
+    for i in range(size):
+        meta = _metadata(i)
+        library._records.append({
+            "id": i + 1,
+            "fingerprint": library._build_fingerprint(meta),
+            "metadata": meta,
+            "source": "bench",
+            "created_at": 0.0,
+        })
+    library._next_id = size + 1
+
+
+def _time(fn, samples: int) -> float:
+    timings = []
+    for n in range(samples):
+        start = time.perf_counter()
+        fn(n)
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / len(timings) * 1000
+
+
+def bench(library, size: int, samples: int):
+    add = _time(lambda n: library.add_or_get(_metadata(size + n)), samples)
+    by_id = _time(lambda n: library.get_by_id(size - n), samples)
+    # Selective query that matches near the end of the library
+    search = _time(lambda n: library.search_text(f"cat-{size - 1 - n:07d}"), samples)
+    return add, by_id, search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max", type=int, default=SIZES[-1], help="largest library size")
+    args = parser.parse_args()
+
+    print(f"{'records':>10} | {'path':>7} | {'add_or_get (ms)':>15} | {'get_by_id (ms)':>14} | {'search (ms)':>11} | {'build (s)':>9}")
+    print("-" * 82)
+    for size in (s for s in SIZES if s <= args.max):
+        scan = ScanLibrary()
+        start = time.perf_counter()
+        _fill_scan(scan, size)
+        build = time.perf_counter() - start
+        add, by_id, search = bench(scan, size, SCAN_SAMPLES)
+        print(f"{size:>10,} | {'scan':>7} | {add:>15.3f} | {by_id:>14.3f} | {search:>11.3f} | {build:>9.1f}")
+        del scan
+
+        indexed = GlobalLibraryService()
+        start = time.perf_counter()
+        for i in range(size):
+            indexed.add_or_get(_metadata(i), source="bench")
+        build = time.perf_counter() - start
+        add, by_id, search = bench(indexed, size, SAMPLES)
+        print(f"{size:>10,} | {'indexed':>7} | {add:>15.3f} | {by_id:>14.3f} | {search:>11.3f} | {build:>9.1f}")
+        del indexed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Image enhancement benchmark: whole-image pipeline vs tiled engine.
+
+Blurry synthetic JPEGs at 1MP, 12MP and 48MP; each path runs in a fresh
+subprocess so peak RSS is per run:
+- legacy: the previous enhance_image (PIL decode, full-resolution
+  float64 Laplacian, bilateral filter and sharpen on the whole image,
+  timeout checked only at the end, two JPEG encodes, re-detection of the
+  encoded result)
+- engine: ImageEnhancementService.enhance_image (reduced decode capped at
+  ENHANCE_MAX_OUTPUT_SIDE, plan by blur level, tiles with a cooperative
+  deadline, one encode)
+
+The deadline is disabled for both (--timeout) so every operation is timed.
+
+Usage:
+    python tests/benchmarks/bench_image_enhancement.py [--sizes 1,12,48] [--blur 4] [--timeout 600]
+"""
+
+import argparse
+import json
+import math
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+OPS = ["decode", "analyze", "upscale", "denoise", "sharpen", "encode", "redetect"]
+
+
+def synth(megapixels: int, blur: float, seed: int = 0) -> bytes:
+    width = int(math.sqrt(megapixels * 1e6 * 4 / 3))
+    height = int(width * 3 / 4)
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (height // 24 + 1, width // 24 + 1, 3), dtype=np.uint8)
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
+    cv2.circle(image, (width // 2, height // 2), height // 3, (20, 20, 20), -1)
+    image = cv2.GaussianBlur(image, (0, 0), blur * math.sqrt(megapixels))
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def legacy(data: bytes, timeout: float) -> dict:
+    """The previous enhance_image, timed per operation."""
+    timings = {}
+
+    def timed(name, fn):
+        started = time.perf_counter()
+        result = fn()
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+        return result
+
+    def detect(payload: bytes) -> float:
+        img = Image.open(BytesIO(payload)).convert("RGB")
+        return cv2.Laplacian(cv2.cvtColor(np.array(img), cv2.COLOR_RGB2GRAY), cv2.CV_64F).var()
+
+    start = time.time()
+    img = timed("decode", lambda: Image.open(BytesIO(data)).convert("RGB"))
+    variance = timed("analyze", lambda: detect(data))
+    width, height = img.size
+    if width < 1024:
+        img = timed("upscale", lambda: img.resize((width * 2, height * 2), Image.LANCZOS))
+    if variance < 100:
+        img = timed("denoise", lambda: Image.fromarray(cv2.bilateralFilter(np.array(img), d=9, sigmaColor=75, sigmaSpace=75)))
+    img = timed("sharpen", lambda: ImageEnhance.Sharpness(img).enhance(1.3))
+    timed_out = time.time() - start > timeout
+
+    def encode():
+        for _ in range(2):  # saved to disk and again to bytes
+            buffer = BytesIO()
+            img.save(buffer, format="JPEG", quality=95)
+        return buffer.getvalue()
+
+    if not timed_out:
+        payload = timed("encode", encode)
+        timed("redetect", lambda: detect(payload))
+    return {"timings": timings, "output": list(img.size), "timed_out": timed_out}
+
+
+def engine(data: bytes, timeout: float) -> dict:
+    from backend.services.image_enhancement_service import ImageEnhancementService
+
+    result = ImageEnhancementService().enhance_image(data, timeout=timeout)
+    timings = {key[:-3]: value for key, value in result["timings"].items()}
+    output = None
+    if result["enhanced"]:
+        decoded = cv2.imdecode(np.frombuffer(result["enhanced_image_bytes"], np.uint8), cv2.IMREAD_COLOR)
+        output = [decoded.shape[1], decoded.shape[0]]
+    return {"timings": timings, "output": output, "timed_out": result.get("error") == "Enhancement timeout"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1,12,48", help="megapixels")
+    parser.add_argument("--blur", type=float, default=4.0, help="Gaussian sigma per megapixel^0.5")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        data = Path(args.run[1]).read_bytes()
+        start = time.perf_counter()
+        result = (legacy if args.run[0] == "legacy" else engine)(data, args.timeout)
+        result["total_ms"] = (time.perf_counter() - start) * 1000
+        result["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(result))
+        return
+
+    header = " | ".join(f"{op:>8}" for op in OPS)
+    print(f"{'input':>5} | {'path':>6} | {header} | {'total':>8} | {'RSS MB':>6} | output")
+    print("-" * (len(header) + 52))
+    with tempfile.TemporaryDirectory() as tmp:
+        for megapixels in (int(s) for s in args.sizes.split(",")):
+            path = Path(tmp) / f"photo_{megapixels}mp.jpg"
+            path.write_bytes(synth(megapixels, args.blur))
+            for mode in ("legacy", "engine"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--run", mode, str(path), "--timeout", str(args.timeout)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                cells = " | ".join(
+                    f"{result['timings'][op]:>8.0f}" if op in result["timings"] else f"{'-':>8}" for op in OPS
+                )
+                output = "x".join(map(str, result["output"])) if result["output"] else "original"
+                print(f"{megapixels:>3}MP | {mode:>6} | {cells} | {result['total_ms']:>8.0f} | "
+                      f"{result['peak_rss_mb']:>6.0f} | {output}")
+    print("(times in ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Multi-record detection benchmark: legacy vs single-decode pipeline.
+
+Synthetic table-top photos with 2-20 records (dark discs with grooves
+and a label on a light background). Per image:
+- legacy: cv2.imread, Hough on the full-resolution image, then every
+  crop re-opens the file with PIL, and crops are recognized one by one
+- new: one decode shared by detection and crops, Hough on the pyramid
+  level that fits MULTI_RECORD_DETECTION_MAX_SIDE, crops encoded from
+  the buffer, recognition fanned out map_concurrent (bounded)
+
+Recognition is simulated with a sleep (GPT latency); AI vision detection
+is disabled so both paths crop only what Hough finds.
+
+Usage:
+    python tests/benchmarks/bench_multi_record.py [--records 2,5,10,20] [--size 1600x1200] [--recognition-ms 300]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.multi_record_detection_service import MultiRecordDetectionService  # noqa: E402
+
+
+def synth(records: int, width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Records on a jittered grid, radius 0.42 of the cell."""
+    rng = random.Random(seed)
+    image = np.full((height, width, 3), (200, 190, 170), np.uint8)
+    cols = int(np.ceil(np.sqrt(records * width / height)))
+    rows = int(np.ceil(records / cols))
+    cell_w, cell_h = width // cols, height // rows
+    cell = min(cell_w, cell_h)
+    radius = int(cell * 0.42)
+    for i in range(records):
+        cx = (i % cols) * cell_w + cell_w // 2 + rng.randint(-cell // 20, cell // 20)
+        cy = (i // cols) * cell_h + cell_h // 2 + rng.randint(-cell // 20, cell // 20)
+        cv2.circle(image, (cx, cy), radius, (20, 20, 20), -1)
+        for k in range(3, 10):
+            cv2.circle(image, (cx, cy), radius * k // 10, (35, 35, 35), 1)
+        cv2.circle(image, (cx, cy), radius // 3, tuple(rng.randint(40, 255) for _ in range(3)), -1)
+    noise = np.random.default_rng(seed).normal(0, 2, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def legacy(path: Path, recognize) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    image = cv2.imread(str(path))
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape
+    circles = cv2.HoughCircles(
+        gray, cv2.HOUGH_GRADIENT, dp=1, minDist=int(min(width, height) * 0.3),
+        param1=50, param2=30, minRadius=100, maxRadius=max(width, height) // 2,
+    )
+    circles = [] if circles is None else np.round(circles[0, :]).astype("int").tolist()
+    timings["detect"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    crops = []
+    for i, (x, y, r) in enumerate(circles):
+        img = Image.open(path).convert("RGB")
+        box = (max(0, x - r), max(0, y - r), min(width, x + r), min(height, y + r))
+        crop_path = path.parent / f"{path.stem}_legacy_{i}.jpg"
+        img.crop(box).save(str(crop_path), "JPEG", quality=90)
+        crops.append(crop_path.read_bytes())
+    timings["crop"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for crop in crops:
+        recognize(crop)
+    timings["recognize"] = time.perf_counter() - start
+    timings["found"] = len(circles)
+    return timings
+
+
+def single_decode(service: MultiRecordDetectionService, path: Path, recognize) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    records = service.detect_records_in_image(str(path), path.read_bytes())
+    timings["detect+crop"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    service.map_concurrent(lambda record: recognize(record.pop("crop_bytes")), records)
+    timings["recognize"] = time.perf_counter() - start
+    timings["found"] = len(records)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", default="2,5,10,20")
+    parser.add_argument("--size", default="1600x1200", help="WIDTHxHEIGHT")
+    parser.add_argument("--recognition-ms", type=float, default=300.0)
+    parser.add_argument("--skip-legacy", action="store_true", help="full-resolution Hough takes seconds per image")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    def recognize(crop: bytes):
+        time.sleep(args.recognition_ms / 1000)
+
+    service = MultiRecordDetectionService()
+    service._detect_with_ai_vision = lambda image_path, raw_bytes=None: []
+
+    print(f"{width}x{height} images, recognition {args.recognition_ms:.0f} ms per crop (times in ms)")
+    print(f"{'records':>7} | {'path':>6} | {'found':>5} | {'detect':>8} | {'crop':>7} | {'recognize':>9} | {'total':>8}")
+    print("-" * 69)
+    with tempfile.TemporaryDirectory() as tmp:
+        for records in (int(n) for n in args.records.split(",")):
+            path = Path(tmp) / f"records_{records}.jpg"
+            cv2.imwrite(str(path), synth(records, width, height), [cv2.IMWRITE_JPEG_QUALITY, 92])
+
+            if not args.skip_legacy:
+                t = legacy(path, recognize)
+                total = t["detect"] + t["crop"] + t["recognize"]
+                print(f"{records:>7} | {'legacy':>6} | {t['found']:>5} | {t['detect'] * 1000:>8.0f} | "
+                      f"{t['crop'] * 1000:>7.0f} | {t['recognize'] * 1000:>9.0f} | {total * 1000:>8.0f}")
+
+            t = single_decode(service, path, recognize)
+            total = t["detect+crop"] + t["recognize"]
+            print(f"{records:>7} | {'new':>6} | {t['found']:>5} | {t['detect+crop'] * 1000:>8.0f} | "
+                  f"{'(incl)':>7} | {t['recognize'] * 1000:>9.0f} | {total * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Level-1 OCR benchmark: filename tokens vs label OCR.
+
+Renders a fixture set of record photos named like phone uploads
+(IMG_0001.jpg ...): dark disc, coloured label with the label name along
+the rim, "ARTIST - TITLE", catalog number and year printed straight, a
+slight rotation and exposure change per photo. A quarter of them print
+artist and title on separate lines (not resolvable by the regex parser).
+Each record goes through the Level-1 stage of AIPipeline:
+- filename: OCREngine.run_ocr, the legacy sync path (file name tokens)
+- ocr: OCREngine.recognize in the "ocr" process pool (per-image timeout)
+then _parse_metadata / _calculate_confidence. A record below
+HIGH_CONFIDENCE escalates to the paid GPT vision call.
+
+Reports OCR latency, wall time, escalation rate and correct artists.
+
+Usage:
+    python tests/benchmarks/bench_ocr.py [--records 48] [--timeout 8]
+"""
+
+import argparse
+import asyncio
+import math
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services import ocr_engine  # noqa: E402
+from backend.services.ai_pipeline import AIPipeline  # noqa: E402
+
+CATALOG = [
+    ("PINK FLOYD", "ANIMALS", "HARVEST", "SHVL 815", "1977"),
+    ("THE BEATLES", "HELP", "PARLOPHONE", "PCS 3071", "1965"),
+    ("MILES DAVIS", "KIND OF BLUE", "COLUMBIA", "CL 1355", "1959"),
+    ("DAVID BOWIE", "LOW", "RCA VICTOR", "PL 12030", "1977"),
+    ("JONI MITCHELL", "BLUE", "REPRISE", "MS 2038", "1971"),
+    ("KRAFTWERK", "RADIO ACTIVITY", "CAPITOL", "ST 11457", "1975"),
+    ("NICK DRAKE", "PINK MOON", "ISLAND", "ILPS 9184", "1972"),
+    ("TALKING HEADS", "REMAIN IN LIGHT", "SIRE", "SRK 6095", "1980"),
+]
+
+
+def _rim_text(image, text, center, radius, start_deg):
+    step = math.degrees(18 / radius)
+    for i, char in enumerate(text):
+        angle = start_deg + i * step
+        tile = np.zeros((64, 64), np.uint8)
+        cv2.putText(tile, char, (18, 46), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 255, 2)
+        tile = cv2.warpAffine(tile, cv2.getRotationMatrix2D((32, 32), -(angle + 90), 1), (64, 64))
+        cx = int(center[0] + radius * math.cos(math.radians(angle)))
+        cy = int(center[1] + radius * math.sin(math.radians(angle)))
+        image[cy - 32:cy + 32, cx - 32:cx + 32][tile > 128] = (245, 245, 245)
+
+
+def render(index: int, split_title: bool) -> np.ndarray:
+    artist, title, label, catalog, year = CATALOG[index % len(CATALOG)]
+    rng = np.random.default_rng(index)
+    image = np.full((1500, 2000, 3), 190, np.uint8)
+    center, label_radius = (1000, 750), 250
+    cv2.circle(image, center, 700, (18, 18, 18), -1)
+    cv2.circle(image, center, label_radius, tuple(int(c) for c in rng.integers(30, 110, 3)), -1)
+    _rim_text(image, f"{label} RECORDS", center, label_radius - 35, 200)
+    lines = [artist, title] if split_title else [f"{artist} - {title}"]
+    lines += [catalog, year]
+    for row, line in enumerate(lines):
+        size = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.75, 2)[0]
+        cv2.putText(image, line, (center[0] - size[0] // 2, center[1] - 10 + row * 36),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.75, (245, 245, 245), 2)
+    rotation = cv2.getRotationMatrix2D(center, float(rng.uniform(-8, 8)), 1.0)
+    image = cv2.warpAffine(image, rotation, (2000, 1500), borderValue=(190, 190, 190))
+    return cv2.convertScaleAbs(image, alpha=float(rng.uniform(0.85, 1.1)), beta=float(rng.uniform(-15, 15)))
+
+
+async def level_one(mode: str, paths: list, timeout: float) -> dict:
+    pipeline = AIPipeline()
+    latencies, escalated, correct = [], 0, 0
+
+    async def one(path: Path, truth: str):
+        nonlocal escalated, correct
+        started = time.perf_counter()
+        if mode == "filename":
+            text = ocr_engine.filename_tokens(path)
+        else:
+            text = (await ocr_engine.ocr_engine.recognize(str(path), timeout))["text"]
+        latencies.append((time.perf_counter() - started) * 1000)
+        metadata = await pipeline._parse_metadata({"text": text})
+        if pipeline._calculate_confidence(metadata) < AIPipeline.HIGH_CONFIDENCE:
+            escalated += 1
+        elif metadata.get("artist") == truth:
+            correct += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(path, truth) for path, truth in paths))
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "wall_s": time.perf_counter() - started,
+        "escalation_rate": escalated / len(paths),
+        "resolved_correct": correct,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=48)
+    parser.add_argument("--timeout", type=float, default=ocr_engine.OCR_TIMEOUT_SECONDS)
+    args = parser.parse_args()
+
+    modes = ["filename"]
+    if ocr_engine.tesseract_available():
+        modes.append("ocr")
+    else:
+        print("tesseract binary not found: the ocr mode would fall back to filename tokens, skipped")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.records):
+            path = Path(tmp) / f"IMG_{i + 1:04d}.jpg"
+            cv2.imwrite(str(path), render(i, split_title=i % 4 == 3), [cv2.IMWRITE_JPEG_QUALITY, 88])
+            paths.append((path, CATALOG[i % len(CATALOG)][0]))
+
+        print(f"{args.records} record photos (2000x1500), {args.records // 4} with artist/title on separate lines")
+        print(f"{'mode':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'wall s':>7} | {'GPT escalation':>14} | resolved correctly")
+        print("-" * 78)
+        for mode in modes:
+            result = asyncio.run(level_one(mode, paths, args.timeout))
+            print(f"{mode:>8} | {result['p50']:>8.1f} | {result['p95']:>8.1f} | {result['wall_s']:>7.2f} | "
+                  f"{result['escalation_rate']:>14.0%} | {result['resolved_correct']}/{args.records}")
+
+
+if __name__ == "__main__":
+    main()
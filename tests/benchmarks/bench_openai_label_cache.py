@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+OpenAILabelService cache write benchmark.
+
+Compares the cost of one cache-miss write at growing cache sizes:
+- legacy: rewrite the whole JSON file with indent=2 (old behaviour)
+- append-only: AppendOnlyStore.put (one appended line)
+
+Usage:
+    python tests/benchmarks/bench_openai_label_cache.py [--max 100000]
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.storage.append_only_store import AppendOnlyStore  # noqa: E402
+
+SIZES = [100, 1_000, 10_000, 100_000]
+SAMPLES = 20
+LEGACY_SAMPLES = 3
+
+
+def _entry(i: int):
+    key = hashlib.sha256(str(i).encode()).hexdigest()
+    value = {
+        "artist": f"Artist {i}",
+        "album": f"Album {i}",
+        "label": "Blue Note",
+        "year": 1960 + i % 40,
+        "catalog_number": f"BLP-{i:05d}",
+        "format": "LP",
+        "confidence": 0.85,
+        "error": None,
+        "model_used": "gpt-4o-mini",
+        "cached": False,
+    }
+    return key, value
+
+
+def bench_legacy(workdir: Path, size: int) -> float:
+    cache_file = workdir / f"legacy_{size}.json"
+    cache = dict(_entry(i) for i in range(size))
+    timings = []
+    for n in range(LEGACY_SAMPLES):
+        key, value = _entry(size + n)
+        start = time.perf_counter()
+        cache[key] = value
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / len(timings)
+
+
+def bench_append_only(workdir: Path, size: int) -> float:
+    store = AppendOnlyStore(workdir / f"aol_{size}.jsonl")
+    for i in range(size):
+        store.put(*_entry(i))
+    timings = []
+    for n in range(SAMPLES):
+        key, value = _entry(size + n)
+        start = time.perf_counter()
+        store.put(key, value)
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max", type=int, default=SIZES[-1], help="largest cache size")
+    args = parser.parse_args()
+
+    sizes = [s for s in SIZES if s <= args.max]
+    print(f"{'entries':>10} | {'legacy write (ms)':>18} | {'append-only write (ms)':>22}")
+    print("-" * 58)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for size in sizes:
+            legacy = bench_legacy(workdir, size)
+            aol = bench_append_only(workdir, size)
+            print(f"{size:>10,} | {legacy * 1000:>18.3f} | {aol * 1000:>22.3f}")
+
+
+if __name__ == "__main__":
+    main()
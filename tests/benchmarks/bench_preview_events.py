@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Preview status benchmark: client polling vs server push.
+
+Simulates N uploads whose AI pipeline finishes after a random 1-8 s
+(scaled by --scale) and counts the SQL statements spent by clients
+waiting for the result:
+- poll: GET /preview/{id} every second; each request is an auth user
+  lookup plus a preview read (what get_current_user + get_preview_v2 do)
+- push: one auth lookup plus one snapshot read per stream, then state
+  transitions arrive through the event bus
+
+Also reports how long after the pipeline's commit the client noticed.
+
+Usage:
+    python tests/benchmarks/bench_preview_events.py [--previews 200] [--scale 0.25]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.core.event_bus import EventBus  # noqa: E402
+from backend.models.preview_record_db import PreviewRecordDB  # noqa: E402
+from backend.models.record_state import RecordState  # noqa: E402
+from backend.models.user import User  # noqa: E402
+from backend.services.preview_events import preview_topic  # noqa: E402
+
+POLL_INTERVAL = 1.0
+PIPELINE_SECONDS = (1.0, 8.0)
+
+
+class Harness:
+    def __init__(self, db_path: Path, previews: int, scale: float, seed: int = 1):
+        self.engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        with self.engine.begin() as conn:
+            conn.execute(CreateTable(User.__table__))  # users declares ix_users_email twice
+        PreviewRecordDB.__table__.create(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.scale = scale
+        self.bus = EventBus(backend="local", max_per_owner=previews)
+        self.client_queries = 0
+
+        with self.Session() as db:
+            db.add(User(email="bench@example.com", password_hash="x", role="user", is_active=True))
+            db.commit()
+            self.user_id = db.query(User).first().id
+        rng = random.Random(seed)
+        self.durations = [rng.uniform(*PIPELINE_SECONDS) * scale for _ in range(previews)]
+
+        @event.listens_for(self.engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if conn.info.get("client"):
+                self.client_queries += 1
+
+    def reset(self, ids):
+        with self.Session() as db:
+            db.execute(PreviewRecordDB.__table__.delete())
+            for preview_id in ids:
+                db.add(PreviewRecordDB(
+                    preview_id=preview_id, user_id=str(self.user_id), state=RecordState.UPLOADED,
+                    file_path="x.jpg", canonical_image_path="x.jpg",
+                ))
+            db.commit()
+        self.client_queries = 0
+
+    def _client_request(self, preview_id: str) -> str:
+        """Auth user lookup + preview read, as one API request does."""
+        with self.Session() as db:
+            db.connection().info["client"] = True
+            try:
+                db.query(User).filter(User.id == self.user_id).first()
+                preview = db.query(PreviewRecordDB).filter(
+                    PreviewRecordDB.preview_id == preview_id,
+                    PreviewRecordDB.user_id == str(self.user_id),
+                ).first()
+                return preview.state.value
+            finally:
+                db.connection().info.pop("client", None)
+
+    def _finish(self, preview_id: str):
+        with self.Session() as db:
+            db.execute(
+                update(PreviewRecordDB)
+                .where(PreviewRecordDB.preview_id == preview_id)
+                .values(state=RecordState.AI_ANALYZED)
+            )
+            db.commit()
+
+    async def pipeline(self, preview_id: str, duration: float, push: bool, done_at: dict):
+        await asyncio.sleep(duration)
+        await asyncio.to_thread(self._finish, preview_id)
+        done_at[preview_id] = time.perf_counter()
+        if push:
+            self.bus.publish(preview_topic(preview_id), "state", {"state": RecordState.AI_ANALYZED.value})
+
+    async def poll_client(self, preview_id: str, seen_at: dict):
+        while True:
+            state = await asyncio.to_thread(self._client_request, preview_id)
+            if state != RecordState.UPLOADED.value:
+                seen_at[preview_id] = time.perf_counter()
+                return
+            await asyncio.sleep(POLL_INTERVAL * self.scale)
+
+    async def push_client(self, preview_id: str, seen_at: dict):
+        sub = self.bus.subscribe(preview_topic(preview_id), owner=str(self.user_id))
+        try:
+            state = await asyncio.to_thread(self._client_request, preview_id)
+            while state == RecordState.UPLOADED.value:
+                event = await sub.next(15)
+                if event is not None:
+                    state = event.data["state"]
+            seen_at[preview_id] = time.perf_counter()
+        finally:
+            sub.close()
+
+    async def run(self, mode: str):
+        ids = [f"p{i}" for i in range(len(self.durations))]
+        self.reset(ids)
+        done_at, seen_at = {}, {}
+        client = self.poll_client if mode == "poll" else self.push_client
+        await asyncio.gather(
+            *(client(pid, seen_at) for pid in ids),
+            *(self.pipeline(pid, d, mode == "push", done_at) for pid, d in zip(ids, self.durations)),
+        )
+        lag = [(seen_at[pid] - done_at[pid]) / self.scale for pid in ids]
+        return self.client_queries / len(ids), statistics.mean(lag), max(lag)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--previews", type=int, default=200)
+    parser.add_argument("--scale", type=float, default=0.25, help="time compression (0.25 = 4x faster)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Harness(Path(tmp) / "bench.db", args.previews, args.scale)
+        print(f"{args.previews} previews, pipeline {PIPELINE_SECONDS[0]:.0f}-{PIPELINE_SECONDS[1]:.0f} s, "
+              f"poll every {POLL_INTERVAL:.0f} s (times below in unscaled seconds)")
+        print(f"{'mode':>5} | {'queries/preview':>15} | {'mean lag (s)':>12} | {'max lag (s)':>11}")
+        print("-" * 54)
+        for mode in ("poll", "push"):
+            per_preview, mean_lag, max_lag = asyncio.run(harness.run(mode))
+            print(f"{mode:>5} | {per_preview:>15.1f} | {mean_lag:>12.3f} | {max_lag:>11.3f}")
+        harness.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Sales dashboard benchmark on synthetic history: in-memory scan vs SQL rollups.
+
+--sales synthetic sales over --years years, --users sellers, four
+channels. Modes:
+- in-memory: the previous SalesAnalyticsService path: a list of sale
+             dicts with ISO timestamps, parsed and filtered on every
+             dashboard call
+- rollups:   SalesStore on a temporary SQLite file: bulk import, the cost
+             of one incremental sale (sale row + three rollup upserts),
+             and dashboards for 7 / 30 / 365 days, all users and one user
+
+Usage:
+    python tests/benchmarks/bench_sales_rollups.py [--sales 1000000] [--repeat 5]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.commerce.sales_store import SalesStore  # noqa: E402
+
+CHANNELS = ("ebay", "discogs", "shopify", "etsy")
+WINDOWS = (7, 30, 365)
+
+
+def make_sales(n: int, years: float, users: int, seed: int = 42):
+    rng = random.Random(seed)
+    now = time.time()
+    span = years * 365 * 86400
+    for i in range(n):
+        yield {
+            "record_id": f"rec-{rng.randint(1, max(1, n // 2)):07d}",
+            "channel": rng.choice(CHANNELS),
+            "user_id": f"user-{rng.randint(1, users):03d}",
+            "price": round(min(rng.lognormvariate(3.0, 0.8), 2000), 2),
+            # Business grows: more recent sales than old ones
+            "sold_at": now - span * (1 - rng.random() ** 0.7),
+        }
+
+
+def legacy_dashboard(sales, listings, days):
+    """The removed in-memory get_dashboard_metrics (ISO parsing on every call)."""
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    recent_sales = [s for s in sales if datetime.fromisoformat(s["timestamp"]) >= cutoff_date]
+    recent_listings = [l for l in listings if datetime.fromisoformat(l["listed_at"]) >= cutoff_date]
+    total_sales = len(recent_sales)
+    total_revenue = sum(s["price"] for s in recent_sales)
+    revenue_by_platform = defaultdict(float)
+    for sale in recent_sales:
+        revenue_by_platform[sale["platform"]] += sale["price"]
+    active_listings = len([l for l in recent_listings if l["status"] == "active"])
+    record_sales = defaultdict(lambda: {"count": 0, "revenue": 0.0})
+    for sale in recent_sales:
+        record_sales[sale["record_id"]]["count"] += 1
+        record_sales[sale["record_id"]]["revenue"] += sale["price"]
+    top = sorted(({"record_id": rid, "sales": d["count"], "revenue": d["revenue"]} for rid, d in record_sales.items()),
+                 key=lambda x: x["revenue"], reverse=True)[:10]
+    return {"total_sales": total_sales, "total_revenue": round(total_revenue, 2),
+            "revenue_by_platform": dict(revenue_by_platform), "active_listings": active_listings,
+            "top_performing_records": top}
+
+
+def timed(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--single-sales", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.sales} sales over {args.years:g} years, {args.users} users, {len(CHANNELS)} channels")
+    legacy = [
+        {"record_id": s["record_id"], "platform": s["channel"], "price": s["price"], "currency": "USD",
+         "listing_id": None, "timestamp": datetime.utcfromtimestamp(s["sold_at"]).isoformat()}
+        for s in make_sales(args.sales, args.years, args.users)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'sales.db'}", connect_args={"check_same_thread": False})
+        store = SalesStore(engine)
+        started = time.perf_counter()
+        store.import_sales(make_sales(args.sales, args.years, args.users), batch_size=20000)
+        elapsed = time.perf_counter() - started
+        print(f"rollups: import {elapsed:.1f} s ({args.sales / elapsed:,.0f} sales/s)")
+
+        print(f"{'days':>5} | {'in-memory ms':>12} | {'rollups ms':>10} | {'rollups, one user':>17} | {'speedup':>7} | sales in window")
+        print("-" * 80)
+        for days in WINDOWS:
+            legacy_ms, legacy_result = timed(lambda: legacy_dashboard(legacy, [], days), max(1, args.repeat // 2))
+            rollup_ms, result = timed(lambda: store.dashboard(days=days), args.repeat)
+            user_ms, _ = timed(lambda: store.dashboard(days=days, user_id="user-001"), args.repeat)
+            print(f"{days:>5} | {legacy_ms:>12.1f} | {rollup_ms:>10.1f} | {user_ms:>17.1f} | "
+                  f"{legacy_ms / rollup_ms:>6.0f}x | {result['total_sales']} (in-memory {legacy_result['total_sales']})")
+
+        latencies = []
+        for i, sale in enumerate(make_sales(args.single_sales, 0.01, args.users, seed=7)):
+            started = time.perf_counter()
+            store.record_sale(sale["record_id"], sale["channel"], sale["price"], user_id=sale["user_id"])
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        print(f"rollups: record_sale p50 {latencies[len(latencies) // 2]:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms (sale row + day/week/month upserts)")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Video best-frame benchmark: sequential decode vs seek-based sampling.
+
+Generates record videos (10 s, 60 s and 5 min by default; a slow focus
+pull, sharp for one second at 80% of the runtime) and runs each path in a
+fresh subprocess so peak RSS is per run:
+- legacy: upload read into memory, written to a temp file, frames decoded
+  in sequence (every 0.5 s, first 30 samples = first 15 s only)
+- seek: upload spooled to disk in 1 MB chunks, 24 evenly spaced frames
+  reached by seeking, refined around the best one, scored downscaled,
+  early stop at the threshold
+
+Usage:
+    python tests/benchmarks/bench_video_sampling.py [--durations 10,60,300] [--size 1280x720]
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+FPS = 30
+SHARP_AT = 0.8
+SHARP_SECONDS = 1.0
+FOCUS_RAMP_SECONDS = 15.0
+
+
+def scene(width: int, height: int) -> np.ndarray:
+    yy, xx = np.mgrid[0:height, 0:width]
+    image = np.dstack([xx * 120 / width + 60, yy * 100 / height + 80, np.full((height, width), 150.0)]).astype(np.uint8)
+    center, radius = (width // 2, height // 2), int(height * 0.42)
+    cv2.circle(image, center, radius, (25, 25, 25), -1)
+    for k in range(4, 10):
+        cv2.circle(image, center, radius * k // 10, (45, 45, 45), 1)
+    cv2.circle(image, center, radius // 3, (40, 90, 200), -1)
+    cv2.putText(image, "SIDE A  33 1/3", (center[0] - radius // 4, center[1] - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, height / 900, (240, 240, 240), 2)
+    cv2.putText(image, "CAT-1234", (center[0] - radius // 5, center[1] + 40),
+                cv2.FONT_HERSHEY_SIMPLEX, height / 1100, (240, 240, 240), 2)
+    return image
+
+
+def generate(path: Path, seconds: int, width: int, height: int):
+    """Focus pull: sharp for SHARP_SECONDS, blur grows over FOCUS_RAMP_SECONDS either side."""
+    base = scene(width, height)
+    levels = [base] + [cv2.GaussianBlur(base, (0, 0), sigma) for sigma in (1, 2, 3, 4, 6, 8)]
+    peak = seconds * FPS * SHARP_AT
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, (width, height))
+    for i in range(seconds * FPS):
+        distance = max(0.0, abs(i - peak) / FPS - SHARP_SECONDS / 2)
+        level = min(len(levels) - 1, int(np.ceil(distance / FOCUS_RAMP_SECONDS * (len(levels) - 1))))
+        out.write(np.roll(levels[level], int(20 * np.sin(i / 17)), axis=1))
+    out.release()
+
+
+def legacy(video_bytes: bytes) -> dict:
+    """The sequential sampler extract_best_frame used before seeking."""
+    temp_video = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    temp_video.write(video_bytes)
+    temp_video.close()
+    try:
+        cap = cv2.VideoCapture(temp_video.name)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        best_score, best_frame_number, frame_count = -1, 0, 0
+        frame_interval = max(1, int(fps * 0.5))
+        sample_count = min(30, total_frames // frame_interval) if total_frames > 0 else 30
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame_count % frame_interval == 0 or frame_count < 10:
+                laplacian_var = cv2.Laplacian(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+                if laplacian_var > best_score:
+                    best_score, best_frame_number = laplacian_var, frame_count
+            frame_count += 1
+            if frame_count >= sample_count * frame_interval:
+                break
+        cap.release()
+        return {"best_frame_number": best_frame_number, "frames_decoded": frame_count}
+    finally:
+        os.unlink(temp_video.name)
+
+
+def run_one(mode: str, path: Path) -> dict:
+    start = time.perf_counter()
+    if mode == "legacy":
+        result = legacy(path.read_bytes())
+    else:
+        from backend.services.video_processing_service import VideoProcessingService
+
+        service = VideoProcessingService()
+        service.storage_dir = Path(tempfile.mkdtemp())
+        spooled = Path(tempfile.mkstemp(suffix=".mp4")[1])
+        with open(path, "rb") as upload, open(spooled, "wb") as out:
+            shutil.copyfileobj(upload, out, 1024 * 1024)
+        try:
+            _, metadata = service.extract_best_frame_from_path(spooled, path.name)
+        finally:
+            spooled.unlink()
+            shutil.rmtree(service.storage_dir)
+        result = {key: metadata[key] for key in ("best_frame_number", "frames_scored", "early_stop")}
+    result["seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss survives fork+exec on Linux (it would report the parent's peak)
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def frame_focus(path: Path, number: int) -> float:
+    from backend.services.video_processing_service import video_processing_service
+
+    cap = cv2.VideoCapture(str(path))
+    cap.set(cv2.CAP_PROP_POS_FRAMES, number)
+    ret, frame = cap.read()
+    cap.release()
+    return video_processing_service.focus_score(frame) if ret else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--durations", default="10,60,300")
+    parser.add_argument("--size", default="1280x720", help="WIDTHxHEIGHT")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_one(args.run[0], Path(args.run[1]))))
+        return
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    print(f"{width}x{height} @ {FPS} fps, sharpest second at {SHARP_AT:.0%} of the runtime")
+    print(f"{'video':>6} | {'MB':>6} | {'mode':>6} | {'wall (s)':>8} | {'peak RSS (MB)':>13} | "
+          f"{'best frame':>10} | {'focus vs sharpest':>17}")
+    print("-" * 85)
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in (int(d) for d in args.durations.split(",")):
+            path = Path(tmp) / f"video_{seconds}s.mp4"
+            generate(path, seconds, width, height)
+            sharpest = frame_focus(path, int(seconds * FPS * SHARP_AT))
+            for mode in ("legacy", "seek"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--run", mode, str(path)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(out.strip().splitlines()[-1])
+                focus = frame_focus(path, result["best_frame_number"]) / sharpest
+                print(f"{seconds:>5}s | {path.stat().st_size / 1e6:>6.1f} | {mode:>6} | {result['seconds']:>8.2f} | "
+                      f"{result['peak_rss_mb']:>13.0f} | {result['best_frame_number']:>10} | {focus:>17.0%}")
+
+if __name__ == "__main__":
+    main()
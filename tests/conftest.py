@@ -0,0 +1,27 @@
+"""
+Shared test setup: the repo root on sys.path (tests import backend.*
+without env tweaks) and a file-backed SQLite engine per test.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def engine(db_url):
+    """SQLite file shared by threads (asyncio.to_thread, worker pools) and processes."""
+    engine = create_engine(db_url, connect_args={"check_same_thread": False, "timeout": 30})
+    yield engine
+    engine.dispose()
@@ -0,0 +1,61 @@
+"""
+Fake channel connectors for stock sync tests and benchmarks.
+
+Each connector implements delist_listing(listing_id, idempotency_key)
+like backend.services.channels.*: `latency` seconds per call, the first
+`fail_next` calls fail (retryable), `hang` blocks calls until the event
+is set, and `enabled=False` answers like a connector without
+credentials (non-retryable). A key that already succeeded answers
+success again without a second delist, as real channel APIs do for
+idempotent requests. Records every call, its key and peak concurrency.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class FakeConnector:
+    def __init__(self, name: str, latency: float = 0.0, fail_next: int = 0,
+                 hang: Optional[threading.Event] = None, enabled: bool = True):
+        self.name = name
+        self.latency = latency
+        self.fail_next = fail_next
+        self.hang = hang
+        self.enabled = enabled
+
+        self.lock = threading.Lock()
+        self.calls = []
+        self.delisted = {}  # idempotency key -> listing id
+        self.active = 0
+        self.peak = 0
+
+    def delist_listing(self, listing_id: str, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        with self.lock:
+            self.calls.append((time.monotonic(), listing_id, idempotency_key))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            failing = self.fail_next > 0
+            self.fail_next -= failing
+        try:
+            if not self.enabled:
+                return {"success": False, "listing_id": listing_id, "retryable": False,
+                        "error": f"{self.name} connector not enabled"}
+            if self.hang is not None:
+                self.hang.wait()
+            time.sleep(self.latency)
+            if failing:
+                return {"success": False, "listing_id": listing_id, "retryable": True,
+                        "error": f"{self.name} 503"}
+            with self.lock:
+                self.delisted.setdefault(idempotency_key, listing_id)
+            return {"success": True, "listing_id": listing_id, "error": None, "retryable": False}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    @property
+    def keys(self):
+        return [key for _, _, key in self.calls]
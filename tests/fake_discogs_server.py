@@ -0,0 +1,128 @@
+"""
+Local fake Discogs API server for client tests.
+
+Serves GET /database/search, /releases/{id}, /marketplace/stats/{id} and
+/marketplace/listings/release/{id} with canned JSON, a strong ETag (304 on If-None-Match) and the
+X-Discogs-Ratelimit headers of a moving one-minute window of `limit`
+requests. Over the limit (or for the next `reject_next` requests) it
+answers 429 with Retry-After. Records the client port of every request
+so connection reuse can be checked.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeDiscogsServer:
+    def __init__(self, latency: float = 0.0, limit: int = 60, retry_after: float = 0.05):
+        self.latency = latency
+        self.limit = limit
+        self.retry_after = retry_after
+        self.reject_next = 0
+
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.not_modified = 0
+        self.rate_limited = 0
+        self.paths = []
+        self.client_ports = set()
+        self._window = []
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def body_for(self, path: str, query: dict) -> dict:
+        if path == "/database/search":
+            q = query.get("q", [""])[0]
+            return {"results": [{"id": 1000 + len(q), "title": q.upper(), "artist": q}]}
+        if path.startswith("/releases/"):
+            release_id = path.rsplit("/", 1)[1]
+            return {"id": int(release_id), "title": "ANIMALS", "year": 1977}
+        if path.startswith("/marketplace/stats/"):
+            return {"lowest_price": {"value": 18.5, "currency": "USD"}, "num_for_sale": 12}
+        if path.startswith("/marketplace/listings/release/"):
+            return {"listings": [
+                {"condition": "Near Mint (NM or M-)", "price": {"value": 30.0, "currency": "USD"}},
+                {"condition": "Very Good Plus (VG+)", "price": {"value": 20.0, "currency": "USD"}},
+                {"condition": "Very Good Plus (VG+)", "price": {"value": 24.0, "currency": "USD"}},
+                {"condition": "Very Good (VG)", "price": {"value": 10.0, "currency": "EUR"}},
+            ]}
+        return None
+
+    def start(self) -> "FakeDiscogsServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None, headers=None):
+                data = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                now = time.monotonic()
+                with fake.lock:
+                    fake.calls += 1
+                    fake.paths.append(url.path)
+                    fake.client_ports.add(self.client_address[1])
+                    fake._window = [t for t in fake._window if now - t < 60]
+                    limited = len(fake._window) >= fake.limit or fake.reject_next > 0
+                    fake.reject_next = max(0, fake.reject_next - 1)
+                    if limited:
+                        fake.rate_limited += 1
+                    else:
+                        fake._window.append(now)
+                    remaining = max(0, fake.limit - len(fake._window))
+                rate_headers = {
+                    "X-Discogs-Ratelimit": str(fake.limit),
+                    "X-Discogs-Ratelimit-Used": str(fake.limit - remaining),
+                    "X-Discogs-Ratelimit-Remaining": str(remaining),
+                }
+                if limited:
+                    self._reply(429, {"message": "You are making requests too quickly."},
+                                {**rate_headers, "Retry-After": str(fake.retry_after)})
+                    return
+
+                time.sleep(fake.latency)
+                body = fake.body_for(url.path, parse_qs(url.query))
+                if body is None:
+                    self._reply(404, {"message": "Resource not found."}, rate_headers)
+                    return
+                etag = '"%s"' % hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    with fake.lock:
+                        fake.not_modified += 1
+                    self._reply(304, None, {**rate_headers, "ETag": etag})
+                    return
+                self._reply(200, body, {**rate_headers, "ETag": etag})
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
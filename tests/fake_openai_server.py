@@ -0,0 +1,124 @@
+"""
+Local fake OpenAI server for gateway tests.
+
+Serves POST /v1/chat/completions with a canned completion. Simulates the
+upstream's rate limiting: 429 + retry-after-ms when more than
+`max_concurrency` requests are in flight, or for the first
+`rate_limit_first` requests.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    def __init__(
+        self,
+        latency: float = 0.05,
+        max_concurrency: int = 1000,
+        rate_limit_first: int = 0,
+        retry_after_ms: int = 20,
+    ):
+        self.latency = latency
+        self.max_concurrency = max_concurrency
+        self.rate_limit_first = rate_limit_first
+        self.retry_after_ms = retry_after_ms
+
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.in_flight_by_model = defaultdict(int)
+        self.peak_by_model = defaultdict(int)
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (deadline/timeout)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                model = request.get("model", "unknown")
+
+                with fake.lock:
+                    fake.calls += 1
+                    limited = (
+                        fake.calls <= fake.rate_limit_first
+                        or fake.in_flight >= fake.max_concurrency
+                    )
+                    if limited:
+                        fake.rate_limited += 1
+                    else:
+                        fake.in_flight += 1
+                        fake.in_flight_by_model[model] += 1
+                        fake.peak_by_model[model] = max(
+                            fake.peak_by_model[model], fake.in_flight_by_model[model]
+                        )
+
+                if limited:
+                    self._reply(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                        {"retry-after-ms": str(fake.retry_after_ms)},
+                    )
+                    return
+
+                try:
+                    time.sleep(fake.latency)
+                    self._reply(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": '{"ok": true}'},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {"prompt_tokens": 50, "completion_tokens": 10, "total_tokens": 60},
+                    })
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+                        fake.in_flight_by_model[model] -= 1
+                        fake.completed += 1
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,133 @@
+"""
+AppendOnlyStore tests: single-entry appends, lazy index, torn-tail
+recovery, compaction and concurrent writers from several processes.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.storage.append_only_store import AppendOnlyStore  # noqa: E402
+
+
+def test_put_get_overwrite_delete(tmp_path):
+    store = AppendOnlyStore(tmp_path / "cache.jsonl")
+    store.put("a", {"artist": "A"})
+    store.put("b", {"artist": "B"})
+    store.put("a", {"artist": "A2"})
+    store.delete("b")
+
+    assert store.get("a") == {"artist": "A2"}
+    assert store.get("b") is None
+    assert "b" not in store
+    assert len(store) == 1
+
+    # One line per operation: nothing is rewritten
+    lines = (tmp_path / "cache.jsonl").read_text().splitlines()
+    assert len(lines) == 4
+
+
+def test_index_is_lazy_and_rebuilt_from_log(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    writer = AppendOnlyStore(path)
+    for i in range(50):
+        writer.put(f"k{i}", {"n": i})
+
+    reader = AppendOnlyStore(path)
+    assert reader._index == {}  # nothing read at construction
+    assert reader.get("k42") == {"n": 42}
+    assert len(reader) == 50
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    store = AppendOnlyStore(path)
+    store.put("ok", {"v": 1})
+    with open(path, "ab") as f:
+        f.write(b'{"k":"torn","v":{"v":')  # crash mid-append
+
+    fresh = AppendOnlyStore(path)
+    assert fresh.get("ok") == {"v": 1}
+    assert fresh.get("torn") is None
+
+
+def test_compaction_keeps_live_entries(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    store = AppendOnlyStore(path, auto_compact=False)
+    for round_ in range(5):
+        for i in range(20):
+            store.put(f"k{i}", {"round": round_})
+    store.delete("k0")
+    before = path.stat().st_size
+
+    store.compact()
+
+    assert path.stat().st_size < before
+    assert len(path.read_text().splitlines()) == 19
+    assert store.get("k5") == {"round": 4}
+    # Another process/instance sees the compacted file
+    other = AppendOnlyStore(path)
+    assert other.get("k19") == {"round": 4}
+    assert other.get("k0") is None
+
+
+def test_reader_sees_other_writers_after_compaction(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    a = AppendOnlyStore(path, auto_compact=False)
+    b = AppendOnlyStore(path, auto_compact=False)
+    a.put("x", 1)
+    assert b.get("x") == 1
+    a.put("x", 2)
+    a.compact()
+    a.put("y", 3)
+    assert b.get("x") == 2
+    assert b.get("y") == 3
+
+
+def test_get_rereads_when_log_is_compacted_after_refresh(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    a = AppendOnlyStore(path, auto_compact=False)
+    b = AppendOnlyStore(path, auto_compact=False)
+    for i in range(20):
+        a.put(f"k{i}", {"n": i})
+    a.put("k0", {"n": "new"})
+    assert b.get("k5") == {"n": 5}
+
+    # Compaction by another process lands right after b's refresh
+    a.compact()
+    real_refresh = b._refresh
+    calls = []
+    b._refresh = lambda: calls.append(1) if len(calls) == 0 else real_refresh()
+
+    assert b.get("k5") == {"n": 5}  # stale offset now points at another key
+    assert b.get("k0") == {"n": "new"}
+
+
+def _writer(path: str, worker: int, count: int):
+    store = AppendOnlyStore(path)
+    for i in range(count):
+        store.put(f"w{worker}-{i}", {"worker": worker, "i": i, "pad": "x" * 64})
+
+
+def test_concurrent_process_writers_do_not_corrupt(tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(path, w, 200)) for w in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=120)
+        assert proc.exitcode == 0
+
+    for line in Path(path).read_text().splitlines():
+        json.loads(line)
+    store = AppendOnlyStore(path)
+    assert len(store) == 800
+    assert store.get("w3-199")["i"] == 199
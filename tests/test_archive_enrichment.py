@@ -0,0 +1,94 @@
+"""
+Archive enrichment tests with stubbed providers: concurrent fan-out,
+per-provider deadlines with partial results, skipped providers,
+background mode returning before the lookups finish, and persisted state
+read by another instance.
+"""
+
+import asyncio
+import time
+
+from backend.services.archive_enrichment import ArchiveEnrichment, EnrichmentProvider
+
+FIELDS = {"artist": "PINK FLOYD", "album": "ANIMALS", "catalog_number": "SHVL 815"}
+
+
+def _provider(name, delay, timeout=1.0, fail=False, requires=("artist",)):
+    def lookup(fields):
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} upstream down")
+        return {"source": name, "artist": fields["artist"]}
+    return EnrichmentProvider(name, lookup, timeout, requires)
+
+
+def test_providers_run_concurrently(engine):
+    enrichment = ArchiveEnrichment([_provider("pricing", 0.3), _provider("lyrics", 0.3), _provider("sheet_music", 0.3)],
+                                   engine=engine)
+    started = time.perf_counter()
+    state = asyncio.run(enrichment.enrich("rec-1", FIELDS))
+
+    assert time.perf_counter() - started < 0.55  # serial would be 0.9 s
+    assert state["status"] == "complete" and state["finished_at"] is not None
+    assert set(state["enrichment"]) == {"pricing", "lyrics", "sheet_music"}
+    assert all(p["status"] == "ok" and p["ms"] >= 250 for p in state["providers"].values())
+
+
+def test_deadline_and_failure_leave_partial_results(engine):
+    enrichment = ArchiveEnrichment([
+        _provider("pricing", 2.0, timeout=0.2),
+        _provider("lyrics", 0.05, fail=True),
+        _provider("sheet_music", 0.05),
+        _provider("credits", 0.05, requires=("artist", "matrix_info")),
+    ], engine=engine)
+
+    async def timed():
+        started = time.perf_counter()
+        return await enrichment.enrich("rec-2", FIELDS), time.perf_counter() - started
+
+    state, elapsed = asyncio.run(timed())
+    assert elapsed < 0.5  # the hung pricing call is abandoned, not awaited
+    assert state["status"] == "partial"
+    assert state["providers"]["pricing"]["status"] == "timeout"
+    assert state["providers"]["lyrics"] == {**state["providers"]["lyrics"], "status": "error", "error": "lyrics upstream down"}
+    assert state["providers"]["credits"] == {"status": "skipped", "reason": "missing matrix_info"}
+    assert list(state["enrichment"]) == ["sheet_music"]
+
+
+def test_background_mode_returns_before_lookups(engine):
+    enrichment = ArchiveEnrichment([_provider("pricing", 0.3), _provider("lyrics", 0.05)], engine=engine)
+
+    async def scenario():
+        started = time.perf_counter()
+        pending = enrichment.start("rec-3", FIELDS)
+        returned_after = time.perf_counter() - started
+        assert enrichment.start("rec-3", FIELDS)["status"] == "pending"  # not started twice
+        assert enrichment.stats()["running"] == 1
+
+        await asyncio.sleep(0.15)
+        midway = enrichment.get("rec-3")
+        final = await enrichment.enrich("rec-3", FIELDS)  # joins the running task
+        return returned_after, pending, midway, final
+
+    returned_after, pending, midway, final = asyncio.run(scenario())
+    assert returned_after < 0.05 and pending["status"] == "pending"
+    assert midway["providers"]["lyrics"]["status"] == "ok" and midway["providers"]["pricing"]["status"] == "pending"
+    assert final["status"] == "complete" and set(final["enrichment"]) == {"pricing", "lyrics"}
+    assert enrichment.stats() == {"records": 1, "running": 0, "by_status": {"complete": 1}}
+
+
+def test_state_is_persisted_for_other_workers(engine):
+    providers = [_provider("pricing", 0.3), _provider("lyrics", 0.05)]
+    enrichment = ArchiveEnrichment(providers, engine=engine)
+    other = ArchiveEnrichment(providers, engine=engine)  # another worker / after a restart
+
+    async def scenario():
+        enrichment.start("rec-4", FIELDS)
+        await asyncio.sleep(0.15)
+        midway = other.get("rec-4")
+        return midway, await enrichment.enrich("rec-4", FIELDS)
+
+    midway, final = asyncio.run(scenario())
+    assert midway["status"] == "pending" and midway["providers"]["lyrics"]["status"] == "ok"
+    assert other.get("rec-4") == final
+    assert other.get("rec-missing") is None and other.stats()["records"] == 0
@@ -0,0 +1,139 @@
+"""
+Batch price optimizer tests with a stubbed model: every record gets a
+recommendation (not just the first ten), rules price the long tail
+without model calls, chunks respect the token budget and run with
+bounded concurrency, and a checkpointed run resumes after failures.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.commerce.auto_pricing_service import AutoPricingService, output_token_budget  # noqa: E402
+from backend.services.commerce.batch_price_optimizer import (  # noqa: E402
+    BatchPriceOptimizer, chunk_records, rule_recommendation,
+)
+
+
+def _inventory(n):
+    # Every 4th record is clear-cut for the rules (recent listing), the rest need the model
+    return [
+        {"id": f"rec-{i:05d}", "artist": "Artist", "album": f"Album {i}", "price": 40.0 + i % 7,
+         "condition": "VG+", "days_on_market": 3 if i % 4 == 0 else 14, "views": 25}
+        for i in range(n)
+    ]
+
+
+class StubModel:
+    def __init__(self, fail_chunks=(), delay=0.01):
+        self.fail_chunks, self.delay = set(fail_chunks), delay
+        self.calls, self.active, self.peak = [], 0, 0
+
+    async def __call__(self, records, competitor_prices=None, sales_metrics=None):
+        call = len(self.calls)
+        self.calls.append([r["id"] for r in records])
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if call in self.fail_chunks:
+                raise RuntimeError("model timeout")
+            prompt = AutoPricingService()._build_pricing_prompt(records, competitor_prices, sales_metrics)
+            return {
+                "recommendations": [
+                    {"record_id": r["id"], "recommended_price": r["price"] + 1, "strategy": "increase",
+                     "reasoning": "stub"} for r in records
+                ],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": output_token_budget(len(records))},
+            }
+        finally:
+            self.active -= 1
+
+
+def test_rules_cover_the_long_tail():
+    assert rule_recommendation({"id": 1, "price": 30, "days_on_market": 2})["strategy"] == "hold"
+    slow = rule_recommendation({"id": 2, "price": 30, "days_on_market": 45, "views": 3})
+    assert slow["strategy"] == "decrease" and slow["recommended_price"] == 27.9
+    hot = rule_recommendation({"id": 3, "price": 30}, {"days_on_market": 10, "views": 150})
+    assert hot["strategy"] == "increase" and hot["recommended_price"] == 32.4
+    assert rule_recommendation({"id": 4, "price": 8, "days_on_market": 20, "views": 40})["reasoning"].startswith("long tail")
+    assert rule_recommendation({"id": 5, "price": 60, "days_on_market": 20, "views": 40}) is None
+
+
+def test_chunks_respect_token_budget():
+    records = _inventory(500)
+    chunks = chunk_records(records, prompt_tokens=800, output_tokens=1250)
+    assert [r["id"] for chunk in chunks for r in chunk] == [r["id"] for r in records]
+    prompt = AutoPricingService()._build_pricing_prompt
+    assert all(len(prompt(chunk, None, None)) // 4 <= 800 for chunk in chunks)
+    assert max(len(c) for c in chunks) == 20 and len(chunks) == 25  # (1250 - 50) / 60 records per answer
+
+
+def test_whole_inventory_is_priced_in_parallel_chunks(tmp_path):
+    model = StubModel()
+    optimizer = BatchPriceOptimizer(model, concurrency=3, prompt_tokens=1000, checkpoint_dir=tmp_path)
+    result = asyncio.run(optimizer.optimize(_inventory(400)))
+
+    stats = result["stats"]
+    assert len(result["recommendations"]) == 400 and result["unoptimized"] == []
+    assert stats["rules"] == 100 and stats["model"] == 300
+    assert sum(len(c) for c in model.calls) == 300 and model.peak == 3
+    assert stats["records_per_second"] > 0 and stats["cost_per_1k_records"] > 0
+    by_id = {r["record_id"]: r for r in result["recommendations"]}
+    assert by_id["rec-00000"]["source"] == "rules" and by_id["rec-00399"]["source"] == "model"
+    assert by_id["rec-00399"]["recommended_price"] == by_id["rec-00399"]["current_price"] + 1
+
+
+def test_checkpointed_run_resumes(tmp_path):
+    records = _inventory(200)
+    first_model = StubModel(fail_chunks={1, 3})
+    optimizer = BatchPriceOptimizer(first_model, concurrency=1, prompt_tokens=600, checkpoint_dir=tmp_path)
+    first = asyncio.run(optimizer.optimize(records, run_id="nightly-test"))
+    failed = set(first_model.calls[1]) | set(first_model.calls[3])
+    assert set(first["unoptimized"]) == failed and first["error"] == "model timeout; model timeout"
+    [path] = tmp_path.glob("nightly-test-*.jsonl")
+
+    # Rerun: only the failed chunks' records go to the model
+    second_model = StubModel()
+    optimizer._complete_chunk = second_model
+    second = asyncio.run(optimizer.optimize(records, run_id="nightly-test"))
+    assert {rid for call in second_model.calls for rid in call} == failed
+    assert second["unoptimized"] == [] and second["stats"]["resumed"] == 150 - len(failed)
+    assert len({r["record_id"] for r in second["recommendations"]}) == 200
+
+    # A torn last line (killed mid-write) is ignored
+    with path.open("a") as f:
+        f.write('{"recommendations": [{"record_id"')
+    third = asyncio.run(optimizer.optimize(records, run_id="nightly-test"))
+    assert third["stats"]["resumed"] == 150 and third["stats"]["chunks"] == 0
+    assert re.fullmatch(r"rec-\d{5}", third["recommendations"][0]["record_id"])
+
+
+def test_checkpoints_are_per_user_and_record_set(tmp_path):
+    optimizer = BatchPriceOptimizer(StubModel(), prompt_tokens=1000, checkpoint_dir=tmp_path)
+    user_a = [{"id": "userA-1", "price": 50.0, "days_on_market": 14, "views": 25}]
+    user_b = [{"id": "userB-7", "price": 50.0, "days_on_market": 14, "views": 25}]
+    asyncio.run(optimizer.optimize(user_a, run_id="nightly-2026-01-31", user_id="a"))
+
+    # Same run_id, another user: nothing of user A's run comes back
+    other = asyncio.run(optimizer.optimize(user_b, run_id="nightly-2026-01-31", user_id="b"))
+    assert [r["record_id"] for r in other["recommendations"]] == ["userB-7"] and other["stats"]["resumed"] == 0
+    # Same user and records a day later: views and days moved on, the run still resumes
+    later = asyncio.run(optimizer.optimize([{**user_a[0], "views": 31, "days_on_market": 15}],
+                                           run_id="nightly-2026-01-31", user_id="a"))
+    assert later["stats"]["resumed"] == 1 and len(optimizer.complete_chunk.calls) == 2
+    # A changed price is priced again, not served stale from the checkpoint
+    changed = asyncio.run(optimizer.optimize([{**user_a[0], "price": 60.0}], run_id="nightly-2026-01-31", user_id="a"))
+    assert changed["stats"]["resumed"] == 0 and changed["recommendations"][0]["current_price"] == 60.0
+    assert len(list(tmp_path.glob("*.jsonl"))) == 2
+
+    # Records without an id are reported, not priced under their list index
+    result = asyncio.run(optimizer.optimize([{"price": 50.0}, *user_b]))
+    assert result["missing_id"] == [0] and [r["record_id"] for r in result["recommendations"]] == ["userB-7"]
@@ -0,0 +1,137 @@
+"""
+Image derivative tests: width snapping and content-addressed keys,
+single-flight rendering under concurrent requests, path validation, and
+the media endpoint's ETag / 304 / Cache-Control handling.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.api.v1 import media_router  # noqa: E402
+from backend.services.derivative_service import DerivativeError, DerivativeService  # noqa: E402
+
+
+def _cover(path: Path, size=(1600, 1200), color=(30, 60, 200)) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, color).save(path, "JPEG", quality=90)
+    return path
+
+
+@pytest.fixture
+def service(tmp_path):
+    return DerivativeService(source_root=tmp_path / "storage", cache_dir=tmp_path / "storage" / "derivatives",
+                             widths=(160, 320, 640))
+
+
+def test_keys_follow_content_and_width_snaps(service, tmp_path):
+    source = _cover(tmp_path / "storage" / "archive" / "u1" / "a.jpg")
+    copy = _cover(tmp_path / "storage" / "archive" / "u2" / "b.jpg")
+
+    assert [service.snap_width(w) for w in (1, 160, 200, 5000)] == [160, 160, 320, 640]
+    first = service.describe(source, 300, "webp")
+    assert first.width == 320 and first.content_type == "image/webp"
+    # Same bytes, different path: same derivative
+    assert service.describe(copy, 320, "webp").etag == first.etag
+    assert service.describe(source, 320, "jpeg").etag != first.etag
+
+    rendered = service.get(source, 300, "webp")
+    with Image.open(rendered.path) as img:
+        assert img.format == "WEBP" and img.size == (320, 240)
+
+    _cover(source, color=(200, 30, 30))
+    assert service.describe(source, 320, "webp").etag != first.etag
+
+
+def test_concurrent_requests_render_once(service, tmp_path, monkeypatch):
+    source = _cover(tmp_path / "storage" / "archive" / "u1" / "a.jpg")
+    render = service._render
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_render(*args):
+        calls.append(args)
+        started.set()
+        release.wait(5)
+        render(*args)
+
+    monkeypatch.setattr(service, "_render", slow_render)
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(service.get, source, 320, "jpeg") for _ in range(8)]
+        started.wait(5)
+        for _ in range(500):
+            if service.stats()["coalesced"] == 7:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        results = {f.result().path for f in futures}
+
+    assert len(calls) == 1 and len(results) == 1
+    assert service.stats()["generated"] == 1
+    assert not list(results.pop().parent.glob("*.tmp"))
+
+
+def test_rejects_paths_outside_storage(service, tmp_path):
+    _cover(tmp_path / "secret.jpg")
+    (tmp_path / "storage" / "notes.txt").parent.mkdir(parents=True, exist_ok=True)
+    (tmp_path / "storage" / "notes.txt").write_text("x")
+
+    for path, status in (("../secret.jpg", 400), ("notes.txt", 400), ("archive/missing.jpg", 404)):
+        with pytest.raises(DerivativeError) as error:
+            service.resolve_source(path)
+        assert error.value.status_code == status
+
+
+def test_endpoint_etag_and_cache_control(service, tmp_path, monkeypatch):
+    _cover(tmp_path / "storage" / "archive" / "u1" / "a.jpg")
+    monkeypatch.setattr(media_router, "derivative_service", service)
+    app = FastAPI()
+    app.include_router(media_router.router)
+    client = TestClient(app)
+
+    url = service.url("/storage/archive/u1/a.jpg", 320)
+    first = client.get(url, headers={"Accept": "image/avif,image/webp,*/*"})
+    assert first.status_code == 200 and first.headers["content-type"] == "image/webp"
+    assert first.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert first.headers["vary"] == "Accept"
+    assert Image.open(BytesIO(first.content)).size == (320, 240)
+
+    etag = first.headers["etag"]
+    again = client.get(url, headers={"Accept": "image/webp", "If-None-Match": f'"other", W/{etag}'})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+
+    jpeg = client.get("/api/v1/media/derivative", params={"path": "archive/u1/a.jpg", "w": 160, "format": "jpeg"})
+    assert jpeg.headers["content-type"] == "image/jpeg" and jpeg.headers["cache-control"] == "public, no-cache"
+    assert "vary" not in jpeg.headers
+
+    assert client.get("/api/v1/media/derivative", params={"path": "../../etc/passwd.jpg"}).status_code == 400
+    assert service.stats()["generated"] == 2
+
+
+def test_url_batch_returns_immutable_versions(service, tmp_path, monkeypatch):
+    _cover(tmp_path / "storage" / "archive" / "u1" / "a.jpg")
+    monkeypatch.setattr(media_router, "derivative_service", service)
+    app = FastAPI()
+    app.include_router(media_router.router)
+    client = TestClient(app)
+
+    paths = ["/storage/archive/u1/a.jpg", "/storage/archive/u1/missing.jpg", "https://img.example/x.jpg"]
+    urls = client.post("/api/v1/media/derivative-urls", json={"paths": paths, "widths": [320, 640]}).json()["urls"]
+    assert urls["/storage/archive/u1/a.jpg"]["320"] == service.url(paths[0], 320)
+    assert urls[paths[1]] is None and urls[paths[2]] is None
+
+    response = client.get(urls[paths[0]]["640"], headers={"Accept": "image/webp"})
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
@@ -0,0 +1,112 @@
+"""
+Detection merge engine tests: grid-indexed NMS matches a brute-force
+greedy pass, priority and tie-breaking are deterministic, weighted box
+fusion, and the multi-record service merge.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import backend.services.multi_record_detection_service as detection_module  # noqa: E402
+from backend.services.detection_merge import (  # noqa: E402
+    iou,
+    merge_order,
+    non_max_suppression,
+    weighted_box_fusion,
+)
+
+
+def _det(x, y, w, h, confidence=0.7, method="hough_circles", **extra):
+    return {"bbox": {"x": x, "y": y, "width": w, "height": h}, "confidence": confidence,
+            "detection_method": method, **extra}
+
+
+def _random_boxes(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        _det(rng.randint(0, 4000), rng.randint(0, 3000), rng.randint(20, 400), rng.randint(20, 400),
+             confidence=rng.choice([0.5, 0.6, 0.7, 0.8]), record_id=f"cv-{i}")
+        for i in range(n)
+    ]
+
+
+def test_iou():
+    assert iou({"x": 0, "y": 0, "width": 10, "height": 10}, {"x": 5, "y": 0, "width": 10, "height": 10}) == 50 / 150
+    assert iou({"x": 0, "y": 0, "width": 10, "height": 10}, {"x": 10, "y": 0, "width": 10, "height": 10}) == 0
+    assert iou({"x": 0, "y": 0, "width": 0, "height": 0}, {}) == 0
+
+
+def test_grid_nms_matches_brute_force_and_is_deterministic():
+    boxes = _random_boxes(1000)
+
+    kept = []
+    for i in merge_order(boxes):
+        if all(iou(boxes[i]["bbox"], boxes[k]["bbox"]) <= 0.3 for k in kept):
+            kept.append(i)
+    expected = [boxes[i]["record_id"] for i in kept]
+
+    assert [d["record_id"] for d in non_max_suppression(boxes, 0.3)] == expected
+    # Any cell size gives the same answer; only the number of comparisons changes
+    assert [d["record_id"] for d in non_max_suppression(boxes, 0.3, cell_size=37)] == expected
+
+    # Without ties the input order is irrelevant
+    for i, box in enumerate(boxes):
+        box["confidence"] = 0.5 + i / 10000
+    expected = [d["record_id"] for d in non_max_suppression(boxes, 0.3)]
+    shuffled = list(boxes)
+    random.Random(1).shuffle(shuffled)
+    assert [d["record_id"] for d in non_max_suppression(shuffled, 0.3)] == expected
+
+
+def test_priority_and_ties():
+    ai = _det(100, 100, 400, 400, confidence=0.6, method="ai_vision_sherlock", record_id="ai-0")
+    cv_dup = _det(110, 105, 390, 400, confidence=0.9, record_id="cv-0")
+    cv_twin_a = _det(1000, 100, 300, 300, record_id="cv-1")
+    cv_twin_b = _det(1005, 100, 300, 300, record_id="cv-2")
+    cv_alone = _det(2000, 100, 300, 300, record_id="cv-3")
+    detections = [cv_dup, cv_twin_a, cv_twin_b, cv_alone, ai]
+
+    is_ai = lambda d: d["detection_method"].startswith("ai_")  # noqa: E731
+    assert [d["record_id"] for d in non_max_suppression(detections, 0.3, priority=is_ai)] == [
+        "ai-0", "cv-1", "cv-3"
+    ]
+    # Without priority the more confident CV box wins
+    assert non_max_suppression(detections, 0.3)[0]["record_id"] == "cv-0"
+
+
+def test_weighted_box_fusion():
+    detections = [
+        _det(100, 100, 200, 200, confidence=0.9, method="ai_vision_sherlock", record_id="ai-0"),
+        _det(130, 100, 200, 200, confidence=0.3, record_id="cv-0"),
+        _det(900, 900, 50, 50, confidence=0.5, record_id="cv-1"),
+    ]
+    fused, alone = weighted_box_fusion(detections, 0.3)
+    assert fused["record_id"] == "ai-0"
+    assert fused["bbox"] == {"x": 108, "y": 100, "width": 200, "height": 200}  # 100*0.75 + 130*0.25 = 107.5
+    assert fused["confidence"] == 0.6
+    assert fused["fused_count"] == 2
+    assert fused["fused_methods"] == ["ai_vision_sherlock", "hough_circles"]
+    assert alone is detections[2]
+    assert "bbox" in detections[0] and detections[0]["bbox"]["x"] == 100  # inputs untouched
+
+
+def test_service_merge_prefers_ai_and_dedupes_circles(monkeypatch):
+    service = detection_module.MultiRecordDetectionService()
+    ai = [_det(0, 0, 500, 500, confidence=0.5, method="ai_vision_sherlock", record_id="ai-0")]
+    cv = [
+        _det(10, 10, 480, 480, confidence=0.7, record_id="cv-0"),
+        _det(1000, 0, 500, 500, confidence=0.7, record_id="cv-1"),
+        _det(1020, 10, 490, 490, confidence=0.7, record_id="cv-2"),
+    ]
+    assert [d["record_id"] for d in service._merge_detections(ai, cv)] == ["cv-1", "ai-0"]
+
+    monkeypatch.setattr(detection_module, "MERGE_STRATEGY", "wbf")
+    merged = service._merge_detections(ai, cv)
+    assert [(d["record_id"], d["fused_count"]) for d in merged] == [("cv-1", 2), ("ai-0", 2)]
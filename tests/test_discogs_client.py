@@ -0,0 +1,128 @@
+"""
+Discogs client tests against a local fake Discogs server: connection
+reuse, TTL cache and ETag revalidation, single-flight coalescing, the
+token bucket following X-Discogs-Ratelimit-Remaining, 429 retries, and
+per-thread upstream counts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.discogs_client import DiscogsClient, DiscogsRateLimited  # noqa: E402
+from fake_discogs_server import FakeDiscogsServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    fake = FakeDiscogsServer().start()
+    yield fake
+    fake.stop()
+
+
+def _client(server, tmp_path, **overrides) -> DiscogsClient:
+    settings = {"base_url": server.base_url, "token": "test-token", "cache_dir": tmp_path / "cache"}
+    settings.update(overrides)
+    return DiscogsClient(**settings)
+
+
+def test_reuses_connections_and_caches(server, tmp_path):
+    client = _client(server, tmp_path)
+    for i in range(5):
+        response = client.get("/database/search", {"q": f"pink floyd {i}", "type": "release"})
+        assert response.status_code == 200 and response.json()["results"]
+    assert len(server.client_ports) == 1  # one keep-alive connection
+
+    cached = client.get("/database/search", {"type": "release", "q": "pink floyd 0"})
+    assert cached.from_cache and cached.json()["results"][0]["title"] == "PINK FLOYD 0"
+    assert server.calls == 5
+
+    # The disk cache survives the client (new process, same cache dir)
+    fresh = _client(server, tmp_path)
+    assert fresh.get("/database/search", {"q": "pink floyd 1", "type": "release"}).from_cache
+    assert fresh.get("/users/someone/collection/folders").status_code == 404  # never cached
+    assert fresh.get("/users/someone/collection/folders").from_cache is False
+    assert server.calls == 7
+
+
+def test_stale_entry_revalidated_with_etag(server, tmp_path):
+    client = _client(server, tmp_path)
+    first = client.get("/releases/249504", ttl=1)
+    assert first.status_code == 200 and not first.from_cache
+
+    time.sleep(1.1)
+    second = client.get("/releases/249504", ttl=1)
+    assert server.not_modified == 1 and second.from_cache
+    assert second.json() == first.json()
+    assert client.stats()["revalidated"] == 1
+
+
+def test_concurrent_identical_gets_coalesce(server, tmp_path):
+    server.latency = 0.2
+    client = _client(server, tmp_path, cache_dir=None)
+    results = []
+
+    def fetch():
+        results.append(client.get("/marketplace/stats/249504").json())
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.calls == 1 and len(results) == 8
+    assert all(r["num_for_sale"] == 12 for r in results)
+    assert client.stats()["coalesced"] == 7
+
+    async def fan_out():
+        return await asyncio.gather(*(client.aget("/releases/1"), client.aget("/releases/2")))
+
+    assert [r.json()["id"] for r in asyncio.run(fan_out())] == [1, 2]
+
+
+def test_limiter_follows_remaining_header(server, tmp_path):
+    server.limit = 3
+    client = _client(server, tmp_path, cache_dir=None, rate_limit=60)
+    for i in range(3):
+        client.get("/releases/%d" % i)
+    # The server reported Remaining: 0 and a limit of 3/min -> next token in 20 s
+    assert client.limiter.limit == 3 and client.limiter.tokens < 1
+    with pytest.raises(DiscogsRateLimited):
+        client.get("/releases/99", max_wait=0.5)
+    assert server.calls == 3 and server.rate_limited == 0
+
+
+def test_429_is_retried_after_retry_after(server, tmp_path):
+    client = _client(server, tmp_path, cache_dir=None)
+    server.reject_next, server.retry_after = 1, 0.3
+
+    started = time.perf_counter()
+    assert client.get("/releases/1").json()["id"] == 1
+    assert time.perf_counter() - started >= 0.3
+    assert server.rate_limited == 1 and client.stats()["rate_limited"] == 1
+
+    server.reject_next, server.retry_after = 1, 5
+    with pytest.raises(DiscogsRateLimited):
+        client.get("/releases/2", max_wait=1)  # Retry-After beyond the caller's budget
+
+
+def test_upstream_requests_are_counted_per_thread(server, tmp_path):
+    client = _client(server, tmp_path, cache_dir=None)
+    server.reject_next, server.retry_after = 1, 0.05
+    client.get("/releases/1")  # 429 + retry: two upstream requests
+
+    other = threading.Thread(target=client.get, args=("/releases/2",))
+    other.start()
+    other.join()
+    assert client.thread_upstream() == 2 and client.stats()["upstream"] == 3
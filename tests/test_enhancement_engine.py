@@ -0,0 +1,111 @@
+"""
+Enhancement engine tests: tiled output equals a whole-image pass, plan
+selection by blur level, decode capped at the recognition resolution,
+the cooperative deadline, and a single JPEG encode per enhancement.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import backend.services.image_enhancement_service as enhancement_module  # noqa: E402
+from backend.core.deadline import request_deadline, set_deadline  # noqa: E402
+from backend.services.enhancement_engine import (  # noqa: E402
+    EnhancementPlan,
+    EnhancementTimeout,
+    decode_for_recognition,
+    laplacian_variance,
+    plan_enhancement,
+    run_tiled,
+)
+from backend.services.image_enhancement_service import ImageEnhancementService  # noqa: E402
+
+
+def _photo(width, height, blur=0.0, seed=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
+    cv2.circle(image, (width // 2, height // 2), min(width, height) // 3, (20, 20, 20), -1)
+    return cv2.GaussianBlur(image, (0, 0), blur) if blur else image
+
+
+def _jpeg(image: np.ndarray) -> bytes:
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+
+def test_laplacian_variance_matches_float64():
+    gray = cv2.cvtColor(_photo(300, 200, blur=1.5), cv2.COLOR_BGR2GRAY)
+    assert laplacian_variance(gray) == pytest.approx(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def test_tiles_match_whole_image_pass():
+    image = _photo(640, 500, blur=3)
+    plan = EnhancementPlan(denoise=True, sharpen_amount=1.0, sharpen_sigma=1.5)
+    timings = {}
+    tiled = run_tiled(image, plan, tile_rows=64, timings=timings)
+    whole = run_tiled(image, plan, tile_rows=10_000)
+    assert np.array_equal(tiled, whole)
+    assert set(timings) == {"denoise_ms", "sharpen_ms"}
+
+
+def test_plan_picks_cheapest_ops():
+    def ops(width, variance):
+        return plan_enhancement(width, width, variance, 1024, 100, max_side=2048).ops
+
+    assert ops(3000, 500) == []
+    assert ops(3000, 80) == ["sharpen"]
+    assert ops(3000, 10) == ["denoise", "sharpen"]
+    assert ops(512, 500) == ["upscale", "sharpen"]
+    assert plan_enhancement(1500, 800, 500, 1024, 100, max_side=2048).scale == 1.0
+    # Upscale never exceeds what recognition consumes
+    assert plan_enhancement(900, 1500, 500, 1024, 100, max_side=2048).scale == pytest.approx(2048 / 1500)
+
+
+def test_decode_is_capped_at_recognition_size():
+    data = _jpeg(_photo(4800, 3600))
+    image = decode_for_recognition(data, (4800, 3600), max_side=1000)
+    assert image.shape[:2] == (750, 1000)
+    assert decode_for_recognition(data, (4800, 3600), max_side=5000).shape[:2] == (3600, 4800)
+
+
+def test_enhance_image_encodes_once_and_respects_deadline(tmp_path, monkeypatch):
+    service = ImageEnhancementService()
+    data = _jpeg(_photo(3000, 2000, blur=4))
+
+    encodes = []
+    real_encode = enhancement_module.encode_jpeg
+    monkeypatch.setattr(enhancement_module, "encode_jpeg", lambda image: encodes.append(1) or real_encode(image))
+    monkeypatch.setattr(service, "detect_low_quality", lambda *a, **k: pytest.fail("re-detected"))
+
+    result = service.enhance_image(data, target_dir=tmp_path, record_id="r1")
+    assert result["enhanced"] is True and encodes == [1]
+    assert result["operations"] == ["denoise", "sharpen"]
+    assert Path(result["enhanced_image_path"]).read_bytes() == result["enhanced_image_bytes"]
+    assert cv2.imdecode(np.frombuffer(result["enhanced_image_bytes"], np.uint8), cv2.IMREAD_COLOR).shape[:2] == (
+        1365, 2048
+    )
+    assert result["quality_improvement"] > 0
+    assert {"decode_ms", "analyze_ms", "denoise_ms", "sharpen_ms", "encode_ms"} <= set(result["timings"])
+
+    # Budget gone before the first tile: original is used
+    result = service.enhance_image(data, timeout=0)
+    assert result["enhanced"] is False and result["error"] == "Enhancement timeout"
+
+    # The request's own deadline is honoured too
+    token = set_deadline(0.0)
+    try:
+        assert service.enhance_image(data)["error"] == "Enhancement timeout"
+    finally:
+        request_deadline.reset(token)
+
+    with pytest.raises(EnhancementTimeout):
+        run_tiled(_photo(64, 64), EnhancementPlan(sharpen_amount=0.5), deadline=0.0)
@@ -0,0 +1,134 @@
+"""
+Enrichment engine tests with stubbed sources: parallel fan-out and
+field-level merge, per-source concurrency and rate limits, the
+persistent TTL cache across engine instances, and interactive lookups
+taken ahead of queued backfill.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.enrichment_engine import (  # noqa: E402
+    BACKFILL, INTERACTIVE, EnrichmentCache, EnrichmentEngine, EnrichmentSource, cache_key, merge,
+)
+
+
+class Stub:
+    """Blocking source stub recording calls and peak concurrency."""
+
+    def __init__(self, result, delay=0.05, fail=False):
+        self.result, self.delay, self.fail = result, delay, fail
+        self.calls, self.active, self.peak = [], 0, 0
+        self.lock = threading.Lock()
+
+    def __call__(self, query):
+        with self.lock:
+            self.calls.append((time.monotonic(), query["title"]))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("upstream down")
+            return self.result(query) if callable(self.result) else self.result
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _engine(tmp_path, *sources, workers=4):
+    return EnrichmentEngine(sources, workers=workers, cache=EnrichmentCache(tmp_path / "enrichment.sqlite3"))
+
+
+def test_fan_out_and_merge_policy(tmp_path):
+    discogs = Stub({"label": "Harvest", "year": "1977", "country": "UK", "format": "Vinyl"}, delay=0.3)
+    musicbrainz = Stub({"label": "EMI", "country": "GB", "musicbrainz_id": "mb-1"}, delay=0.3)
+    broken = Stub(None, delay=0.05, fail=True)
+    engine = _engine(tmp_path, EnrichmentSource("discogs", discogs), EnrichmentSource("musicbrainz", musicbrainz),
+                     EnrichmentSource("broken", broken))
+
+    async def scenario():
+        started = time.perf_counter()
+        result = await engine.enrich("Pink Floyd", "Animals", "SHVL 815")
+        return result, time.perf_counter() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.55  # sources in parallel, serial would be 0.65 s
+    assert result["key"] == cache_key("PINK FLOYD", "animals", "shvl-815") == "pink floyd|animals|shvl815"
+    # Source order wins per field, FIELD_PRIORITY prefers MusicBrainz for country
+    assert result["metadata"] == {"label": "Harvest", "year": "1977", "country": "GB", "format": "Vinyl",
+                                  "musicbrainz_id": "mb-1"}
+    assert result["field_sources"]["label"] == "discogs" and result["field_sources"]["country"] == "musicbrainz"
+    assert result["sources"]["broken"] == {"status": "error", "error": "upstream down"}
+
+    assert merge({"a": {"x": ""}, "b": {"x": 1}}, ["a", "b"], {}) == ({"x": 1}, {"x": "b"})
+
+
+def test_per_source_concurrency_and_rate(tmp_path):
+    wide = Stub(lambda q: {"label": q["title"]}, delay=0.1)
+    narrow = Stub(lambda q: {"year": "1977"}, delay=0.02)
+    engine = _engine(tmp_path, EnrichmentSource("wide", wide, concurrency=3),
+                     EnrichmentSource("narrow", narrow, concurrency=1, rate=20.0), workers=8)
+
+    async def scenario():
+        return await asyncio.gather(*(engine.enrich("Artist", f"Album {i}") for i in range(8)))
+
+    results = asyncio.run(scenario())
+    assert [r["metadata"]["label"] for r in results] == [f"Album {i}" for i in range(8)]
+    assert wide.peak == 3 and narrow.peak == 1
+    gaps = [b[0] - a[0] for a, b in zip(narrow.calls, narrow.calls[1:])]
+    assert min(gaps) >= 0.045  # 20 requests/s
+
+
+def test_persistent_cache_and_ttl(tmp_path):
+    found = Stub({"label": "Harvest"})
+    missing = Stub(None)
+    sources = (EnrichmentSource("discogs", found), EnrichmentSource("musicbrainz", missing),
+               EnrichmentSource("short", Stub({"genre": "Rock"}), ttl=0.2))
+
+    first = asyncio.run(_engine(tmp_path, *sources).enrich("Pink Floyd", "Animals"))
+    assert {n: s["status"] for n, s in first["sources"].items()} == {"discogs": "ok", "musicbrainz": "empty", "short": "ok"}
+
+    # A new engine (new process) reuses the SQLite cache, empty answers included
+    second = asyncio.run(_engine(tmp_path, *sources).enrich("pink  floyd", "ANIMALS"))
+    assert {n: s["status"] for n, s in second["sources"].items()} == {
+        "discogs": "cached", "musicbrainz": "cached_empty", "short": "cached"}
+    assert second["metadata"] == first["metadata"] and len(found.calls) == len(missing.calls) == 1
+
+    time.sleep(0.25)
+    third = asyncio.run(_engine(tmp_path, *sources).enrich("Pink Floyd", "Animals"))
+    assert third["sources"]["short"]["status"] == "ok" and third["sources"]["discogs"]["status"] == "cached"
+
+
+def test_interactive_jumps_backfill_queue(tmp_path):
+    source = Stub(lambda q: {"label": q["title"]}, delay=0.05)
+    engine = _engine(tmp_path, EnrichmentSource("discogs", source, concurrency=1), workers=1)
+
+    async def scenario():
+        backfill = [engine.submit("Artist", f"Backfill {i}", priority=BACKFILL) for i in range(10)]
+        await asyncio.sleep(0.01)  # the worker has taken the first backfill job
+        interactive = await engine.enrich("Artist", "Interactive", priority=INTERACTIVE)
+        done_before = sum(f.done() for f in backfill)
+        # Same key again while queued at BACKFILL: promoted, not run twice
+        promoted = engine.submit("Artist", "Backfill 9", priority=BACKFILL)
+        await engine.enrich("Artist", "Backfill 9", priority=INTERACTIVE)
+        await asyncio.gather(*backfill)
+        stats = engine.stats()
+        await engine.stop()
+        return interactive, done_before, promoted is backfill[9], stats
+
+    interactive, done_before, shared, stats = asyncio.run(scenario())
+    order = [title for _, title in source.calls]
+    assert interactive["metadata"] == {"label": "Interactive"}
+    assert done_before <= 1 and order.index("Interactive") <= 1
+    assert shared and order.count("Backfill 9") == 1 and order.index("Backfill 9") <= 3
+    assert stats["processed"] == {"interactive": 2, "backfill": 9} and stats["queued"] == 0
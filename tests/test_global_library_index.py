@@ -0,0 +1,99 @@
+"""
+GlobalLibraryService index tests: fingerprint/id lookups, trigram search
+parity with a full scan, ranking, reindexing and concurrent add_or_get.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.global_library_service import GlobalLibraryService  # noqa: E402
+
+RECORDS = [
+    {"artist": "Miles Davis", "album": "Kind of Blue", "label": "Columbia", "catalog_number": "CL 1355"},
+    {"artist": "John Coltrane", "album": "Blue Train", "label": "Blue Note", "catalog_number": "BLP 1577"},
+    {"artist": "Blue Mitchell", "album": "Blue's Moods", "label": "Riverside", "catalog_number": "RLP 336"},
+    {"artist": "Art Blakey", "album": "Moanin'", "label": "Blue Note", "catalog_number": "BLP 4003"},
+    {"artist": "Nina Simone", "album": "Pastel Blues", "label": "Philips", "year": 1965},
+]
+
+
+def _library() -> GlobalLibraryService:
+    library = GlobalLibraryService()
+    for meta in RECORDS:
+        library.add_or_get(dict(meta))
+    return library
+
+
+def _scan(library: GlobalLibraryService, query: str):
+    """Reference: the original linear substring scan."""
+    q = query.strip().lower()
+    return {
+        rec["id"] for rec in library.list_all()
+        if q in " ".join(
+            library._normalize_value(rec["metadata"].get(k))
+            for k in ("artist", "album", "title", "label", "catalog_number", "barcode")
+        )
+    }
+
+
+def test_fingerprint_and_id_lookups():
+    library = _library()
+    again = library.add_or_get(dict(RECORDS[1]), additional_fields={"file_path": "x.jpg"})
+
+    assert again["id"] == 2
+    assert library.get_by_id(2)["file_path"] == "x.jpg"
+    assert library.search_by_metadata(RECORDS[3])["id"] == 4
+    assert library.get_by_fingerprint(again["fingerprint"]) is again
+    assert library.get_by_id(99) is None
+    assert len(library.list_all()) == len(RECORDS)
+
+
+def test_search_matches_full_scan():
+    library = _library()
+    for query in ("blue", "BLP", "lp 1", "davis kind", "e", "bl", "zzz", "s b", "1965"):
+        found = {rec["id"] for rec in library.search_text(query, limit=100)}
+        assert found == _scan(library, query), query
+
+
+def test_search_ranking_prefers_exact_and_prefix_field_matches():
+    library = _library()
+    results = library.search_text("blue note")
+    assert [r["id"] for r in results] == [2, 4]
+
+    # Artist/album prefix (2, 3) first; album word and label prefix (1, 4, 5) tie, by id
+    assert [r["id"] for r in library.search_text("blue")] == [2, 3, 1, 4, 5]
+    assert [r["id"] for r in library.search_text("blue", limit=2)] == [2, 3]
+
+
+def test_metadata_replacement_is_reindexed():
+    library = _library()
+    library.add_or_get(dict(RECORDS[0]), additional_fields={"metadata": {"artist": "Bill Evans"}})
+
+    assert [r["id"] for r in library.search_text("bill evans")] == [1]
+    assert library.search_text("kind of blue") == []
+
+
+def test_concurrent_add_or_get_deduplicates():
+    library = GlobalLibraryService()
+    ids = []
+
+    def worker():
+        for i in range(200):
+            ids.append(library.add_or_get({"artist": f"Artist {i % 50}", "album": "Same"})["id"])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(library.list_all()) == 50
+    assert len(set(ids)) == 50
+    assert {r["id"] for r in library.search_text("artist 4", limit=100)} == _scan(library, "artist 4")
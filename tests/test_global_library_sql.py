@@ -0,0 +1,127 @@
+"""
+SQLGlobalLibraryService tests (SQLite): durable insert-or-get, field
+merging, bulk upsert, search parity with the in-memory library, LRU and
+concurrent adds of the same release.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.global_library_service import (  # noqa: E402
+    GlobalLibraryService,
+    SQLGlobalLibraryService,
+)
+
+KIND_OF_BLUE = {"artist": "Miles Davis", "album": "Kind of Blue", "label": "Columbia", "catalog_number": "CL 1355"}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'library.db'}", connect_args={"check_same_thread": False}
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_add_or_get_is_durable_and_merges_fields(engine):
+    library = SQLGlobalLibraryService(engine=engine)
+    first = library.add_or_get(dict(KIND_OF_BLUE), additional_fields={"file_path": "a.jpg"})
+    again = library.add_or_get(dict(KIND_OF_BLUE), additional_fields={"price_median": 42.0})
+
+    assert again["id"] == first["id"]
+    assert again["file_path"] == "a.jpg" and again["price_median"] == 42.0
+
+    # New instance (cold start): same row, merged fields
+    reopened = SQLGlobalLibraryService(engine=engine)
+    record = reopened.get_by_id(first["id"])
+    assert record["fingerprint"] == first["fingerprint"]
+    assert record["metadata"]["album"] == "Kind of Blue"
+    assert record["price_median"] == 42.0
+    assert reopened.search_by_metadata(KIND_OF_BLUE)["id"] == first["id"]
+    assert reopened.get_by_id(999) is None
+
+
+def test_bulk_upsert_counts_and_batching(engine):
+    library = SQLGlobalLibraryService(engine=engine)
+    library.add_or_get(dict(KIND_OF_BLUE))
+
+    entries = [{"artist": f"Artist {i}", "album": f"Album {i}"} for i in range(25)]
+    entries.append({"metadata": dict(KIND_OF_BLUE), "additional_fields": {"price_median": 30.0}})
+    entries.append({"artist": "Artist 3", "album": "Album 3"})  # already imported by batch 1
+    entries.append({"artist": "Artist 26", "album": "Album 26", "year": None})
+    entries.append({"artist": "Artist 26", "album": "Album 26"})  # duplicate within the batch
+
+    counts = library.bulk_upsert(entries, batch_size=10)
+
+    assert counts == {"inserted": 26, "updated": 1, "unchanged": 1}
+    assert len(library.list_all()) == 27
+    assert library.search_by_metadata(KIND_OF_BLUE)["price_median"] == 30.0
+    assert library.bulk_upsert(entries[:5]) == {"inserted": 0, "updated": 0, "unchanged": 5}
+
+
+def test_search_matches_in_memory_library(engine):
+    records = [
+        KIND_OF_BLUE,
+        {"artist": "John Coltrane", "album": "Blue Train", "label": "Blue Note"},
+        {"artist": "Blue Mitchell", "album": "Blue's Moods", "label": "Riverside"},
+        {"artist": "Art Blakey", "album": "Moanin'", "label": "Blue Note"},
+        {"artist": "Nina Simone", "album": "Pastel Blues", "label": "Philips"},
+        {"artist": "100% Vinyl", "album": "under_score"},
+    ]
+    sql_library = SQLGlobalLibraryService(engine=engine)
+    memory_library = GlobalLibraryService()
+    for meta in records:
+        sql_library.add_or_get(dict(meta))
+        memory_library.add_or_get(dict(meta))
+
+    for query in ("blue", "blue note", "BL", "0%", "r_s", "missing"):
+        assert [r["id"] for r in sql_library.search_text(query)] == \
+            [r["id"] for r in memory_library.search_text(query)], query
+
+
+def test_search_ranks_all_matches_before_limit(engine):
+    library = SQLGlobalLibraryService(engine=engine)
+    # Many weak (substring) matches with low ids, the exact match last
+    library.bulk_upsert([{"artist": f"Artist {i}", "album": f"Rebluesy {i}"} for i in range(1200)])
+    exact = library.add_or_get({"artist": "Blues"})
+
+    results = library.search_text("blues", limit=5)
+    assert results[0]["id"] == exact["id"]
+    assert [r["id"] for r in results[1:]] == [1, 2, 3, 4]
+
+
+def test_lru_is_bounded(engine):
+    library = SQLGlobalLibraryService(engine=engine, lru_size=3)
+    ids = [library.add_or_get({"artist": f"A{i}"})["id"] for i in range(6)]
+    assert len(library._lru) == 3
+    # Evicted entries are read through from the table
+    assert library.get_by_id(ids[0])["metadata"] == {"artist": "A0"}
+
+
+def test_concurrent_add_or_get_creates_one_row(engine):
+    libraries = [SQLGlobalLibraryService(engine=engine) for _ in range(4)]
+    ids = []
+
+    def worker(library):
+        for i in range(20):
+            ids.append(library.add_or_get({"artist": f"Artist {i % 5}", "album": "Same"})["id"])
+
+    threads = [threading.Thread(target=worker, args=(lib,)) for lib in libraries]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(ids)) == 5
+    assert len(libraries[0].list_all()) == 5
@@ -0,0 +1,206 @@
+"""
+Durable job queue tests (SQLite): idempotent enqueue, retries with
+backoff into the dead-letter state, lease-expiry recovery after a worker
+process is killed mid-job, a failed vision call retrying the AI pipeline
+job, and worker pool throughput at 1/4/16 workers.
+"""
+
+import asyncio
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+from backend.core.job_queue import JobQueue, JobWorkerPool
+from backend.models.preview_record_db import PreviewRecordDB
+from backend.models.record_state import RecordState
+from backend.services import ai_pipeline as ai_pipeline_module
+from backend.services.novarchive_gpt_service import novarchive_gpt_service
+
+
+def _run_pool(queue, handler, concurrency, until, timeout=60.0):
+    async def main():
+        pool = JobWorkerPool(queue, handler, concurrency=concurrency, poll_interval=0.05)
+        await pool.start()
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        await pool.stop(timeout=5)
+        return pool
+
+    return asyncio.run(main())
+
+
+def test_enqueue_dedupe_claim_complete(engine):
+    queue = JobQueue("test", engine=engine)
+    job_id = queue.enqueue({"preview_id": "p1"}, dedupe_key="p1")
+    assert job_id is not None
+    assert queue.enqueue({"preview_id": "p1"}, dedupe_key="p1") is None
+    # Same key in another queue is a different job
+    assert JobQueue("other", engine=engine).enqueue({"x": 1}, dedupe_key="p1") is not None
+
+    jobs = queue.claim("w1", limit=5)
+    assert [j.id for j in jobs] == [job_id]
+    assert jobs[0].payload == {"preview_id": "p1"} and jobs[0].attempts == 1
+    # Leased: invisible to other workers
+    assert queue.claim("w2") == []
+
+    assert queue.complete(jobs[0]) is True
+    assert queue.stats()["succeeded"] == 1
+    assert queue.complete(jobs[0]) is False
+
+
+def test_failures_back_off_then_dead_letter(engine):
+    queue = JobQueue("test", engine=engine, max_attempts=3, backoff_base=0.05, backoff_max=0.1)
+    queue.enqueue({"n": 1})
+
+    for attempt in range(1, 4):
+        job = None
+        deadline = time.monotonic() + 2
+        while job is None and time.monotonic() < deadline:
+            claimed = queue.claim("w1")
+            job = claimed[0] if claimed else None
+        assert job is not None and job.attempts == attempt
+        state = queue.fail(job, f"boom {attempt}")
+        assert state == ("dead" if attempt == 3 else "queued")
+        if attempt < 3:
+            # Not visible again until its backoff elapses
+            assert queue.claim("w1") == []
+
+    assert queue.stats()["dead"] == 1
+    [dead] = queue.dead_letters()
+    assert dead["attempts"] == 3 and dead["last_error"] == "boom 3"
+
+    assert queue.retry_dead(dead["id"]) is True
+    assert queue.claim("w1")[0].attempts == 1
+
+
+def test_killed_worker_job_is_recovered_after_lease_expiry(engine, db_url):
+    queue = JobQueue("test", engine=engine, lease_seconds=1.0)
+    job_id = queue.enqueue({"preview_id": "p-crash"})
+
+    # A separate worker process claims the job, then dies without finishing
+    script = textwrap.dedent(f"""
+        import sys, time
+        sys.path.insert(0, {str(ROOT_DIR)!r})
+        from sqlalchemy import create_engine
+        from backend.core.job_queue import JobQueue
+        queue = JobQueue("test", engine=create_engine({db_url!r}), lease_seconds=1.0)
+        print(queue.claim("doomed")[0].id, flush=True)
+        time.sleep(60)
+    """)
+    proc = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True)
+    try:
+        assert proc.stdout.readline().strip() == job_id
+    finally:
+        proc.kill()
+        proc.wait()
+
+    # Still leased by the dead worker
+    assert queue.claim("w1") == []
+
+    handled = []
+
+    async def handler(payload):
+        handled.append(payload["preview_id"])
+
+    _run_pool(queue, handler, concurrency=2, until=lambda: handled, timeout=10)
+    assert handled == ["p-crash"]
+    stats = queue.stats()
+    assert stats["succeeded"] == 1 and stats["running"] == 0
+
+
+def test_final_attempt_lease_expiry_is_dead_lettered(engine):
+    queue = JobQueue("test", engine=engine, lease_seconds=0.05, max_attempts=1)
+    queue.enqueue({"n": 1})
+    assert len(queue.claim("doomed")) == 1
+    time.sleep(0.1)
+    assert queue.claim("w1") == []
+    assert queue.reap() == 1
+    assert queue.stats()["dead"] == 1
+
+
+def test_failed_vision_call_retries_the_pipeline_job(engine, tmp_path, monkeypatch):
+    PreviewRecordDB.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    image = tmp_path / "cover.jpg"
+    image.write_bytes(b"not a jpeg")
+    with Session() as db:
+        db.add(PreviewRecordDB(preview_id="p-vision", file_path=str(image),
+                               canonical_image_path=str(image), user_id="u1"))
+        db.commit()
+
+    pipeline = ai_pipeline_module.AIPipeline()
+    calls = []
+
+    async def no_ocr(preview):
+        return {"text": "", "text_regions": [], "model": "ocr+text"}
+
+    def vision(file_path, raw_bytes):
+        calls.append(file_path)
+        if len(calls) == 1:
+            return novarchive_gpt_service._get_fallback_result("OpenAI API timeout (30s)")
+        return {"artist": "Pink Floyd", "album": "Animals", "confidence": 0.9}
+
+    monkeypatch.setattr(ai_pipeline_module, "SessionLocal", Session)
+    monkeypatch.setattr(ai_pipeline_module.pipeline_logger, "log_file", tmp_path / "pipeline.log")
+    monkeypatch.setattr(pipeline, "_extract_ocr_and_text", no_ocr)
+    monkeypatch.setattr(novarchive_gpt_service, "analyze_vinyl_record", vision)
+
+    async def handler(payload):
+        await pipeline.run_ai_pipeline(payload["preview_id"])
+
+    queue = JobQueue("ai_pipeline", engine=engine, max_attempts=3, backoff_base=0.05, backoff_max=0.1)
+    queue.enqueue({"preview_id": "p-vision"}, dedupe_key="p-vision")
+    pool = _run_pool(queue, handler, concurrency=1, until=lambda: queue.stats()["succeeded"], timeout=10)
+
+    # The fallback failed the first attempt instead of saving OCR-only metadata
+    assert len(calls) == 2 and pool.failed == 1 and queue.stats()["succeeded"] == 1
+    with Session() as db:
+        preview = db.get(PreviewRecordDB, "p-vision")
+        assert preview.state == RecordState.AI_ANALYZED and preview.artist == "Pink Floyd"
+
+
+def test_worker_pool_concurrency_scales(engine, capsys):
+    jobs_per_run = 120
+    results = {}
+    peaks = {}
+
+    for workers in (1, 4, 16):
+        queue = JobQueue(f"bench-{workers}", engine=engine)
+        for i in range(jobs_per_run):
+            queue.enqueue({"n": i}, dedupe_key=str(i))
+        seen = []
+        in_flight = 0
+        peak = 0
+
+        async def handler(payload):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.02)  # I/O-bound job (model call)
+            in_flight -= 1
+            seen.append(payload["n"])
+
+        start = time.perf_counter()
+        _run_pool(queue, handler, concurrency=workers, until=lambda: len(seen) >= jobs_per_run)
+        elapsed = time.perf_counter() - start
+
+        # Every job exactly once, never more than `workers` at a time
+        assert sorted(seen) == list(range(jobs_per_run))
+        assert peak <= workers
+        assert queue.stats()["succeeded"] == jobs_per_run
+        results[workers] = jobs_per_run / elapsed
+        peaks[workers] = peak
+
+    with capsys.disabled():
+        print("\njob queue throughput (jobs/s): " + ", ".join(f"{w} workers={r:.0f}" for w, r in results.items()))
+    # Wall-clock ratios are noisy on shared CI hosts: assert on the
+    # concurrency the pool actually reached instead
+    assert peaks[1] == 1
+    assert peaks[16] > peaks[4] > 1
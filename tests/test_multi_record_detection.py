@@ -0,0 +1,96 @@
+"""
+Multi-record detection tests: Hough on a downscaled pyramid level with
+full-resolution coordinates, a single decode shared by detection and
+crops, and bounded in-order per-crop fan-out.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import backend.services.multi_record_detection_service as detection_module  # noqa: E402
+from backend.services.multi_record_detection_service import MultiRecordDetectionService  # noqa: E402
+
+
+def _records_image(centers, radius, size=(2400, 3200)):
+    """Light background with dark discs, grooves and a label (like a table-top photo)."""
+    image = np.full((*size, 3), (200, 190, 170), np.uint8)
+    for cx, cy in centers:
+        cv2.circle(image, (cx, cy), radius, (20, 20, 20), -1)
+        for k in range(4, 10):
+            cv2.circle(image, (cx, cy), radius * k // 10, (35, 35, 35), 1)
+        cv2.circle(image, (cx, cy), radius // 3, (60, 120, 220), -1)
+    noise = np.random.default_rng(0).normal(0, 4, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def test_cv_detection_runs_downscaled_and_maps_back():
+    centers = [(800, 600), (2400, 600), (800, 1800), (2400, 1800)]
+    image = _records_image(centers, radius=500)
+    service = MultiRecordDetectionService()
+
+    small, scale = service._pyramid_level(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    assert max(small.shape) <= detection_module.DETECTION_MAX_SIDE and scale == 0.25
+
+    detections = service._detect_with_cv(image)
+    assert len(detections) == 4
+    for cx, cy in centers:
+        bbox = next(
+            d["bbox"] for d in detections
+            if abs(d["bbox"]["x"] + d["bbox"]["width"] / 2 - cx) < 40
+            and abs(d["bbox"]["y"] + d["bbox"]["height"] / 2 - cy) < 40
+        )
+        assert abs(bbox["width"] - 1000) < 60
+        assert all(type(v) is int for v in bbox.values())
+
+
+def test_image_is_decoded_once_and_crops_come_from_memory(tmp_path, monkeypatch):
+    image = _records_image([(800, 1200), (2400, 1200)], radius=600)
+    ok, encoded = cv2.imencode(".jpg", image)
+    raw = encoded.tobytes()
+    path = tmp_path / "two.jpg"
+    path.write_bytes(raw)
+
+    decodes = []
+    real_imdecode = cv2.imdecode
+    monkeypatch.setattr(detection_module.cv2, "imdecode", lambda *a: decodes.append(1) or real_imdecode(*a))
+    monkeypatch.setattr(detection_module.cv2, "imread", lambda *a: (_ for _ in ()).throw(AssertionError("re-read")))
+    service = MultiRecordDetectionService()
+    monkeypatch.setattr(service, "_detect_with_ai_vision", lambda image_path, raw_bytes=None: [])
+
+    records = service.detect_records_in_image(str(path), raw)
+
+    assert len(decodes) == 1
+    assert [r["detection_method"] for r in records] == ["hough_circles"] * 2
+    for record in records:
+        assert Path(record["crop_path"]).read_bytes() == record["crop_bytes"]
+        crop = real_imdecode(np.frombuffer(record["crop_bytes"], np.uint8), cv2.IMREAD_COLOR)
+        assert crop.shape[:2] == (record["crop_bbox"]["height"], record["crop_bbox"]["width"])
+
+
+def test_map_concurrent_is_bounded_and_ordered():
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def recognize(n):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.02 * (n % 3))
+        with lock:
+            state["in_flight"] -= 1
+        return n * n
+
+    service = MultiRecordDetectionService()
+    assert service.map_concurrent(recognize, list(range(12)), max_concurrency=3) == [n * n for n in range(12)]
+    assert 1 < state["peak"] <= 3
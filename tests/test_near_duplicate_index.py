@@ -0,0 +1,115 @@
+"""
+Perceptual hash and near-duplicate index tests: robustness to
+re-compression/resizing, BK-tree search parity with brute force,
+persistence, and the upload short-circuit lookup.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.near_duplicate_index import NearDuplicateIndex  # noqa: E402
+from backend.services.perceptual_hash import BKTree, compute_hashes, hamming_distance  # noqa: E402
+
+
+def _sleeve(seed: int, size: int = 600) -> Image.Image:
+    """Synthetic cover: random shapes on a gradient."""
+    rng = random.Random(seed)
+    gradient = np.linspace(0, 255, size, dtype=np.uint8)
+    base = np.stack([np.tile(gradient, (size, 1))] * 3, axis=-1)
+    image = Image.fromarray(base)
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x0, y0 = rng.randint(0, size - 100), rng.randint(0, size - 100)
+        x1, y1 = x0 + rng.randint(40, 250), y0 + rng.randint(40, 250)
+        color = tuple(rng.randint(0, 255) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=color)
+    return image
+
+
+def _jpeg(image: Image.Image, quality: int) -> bytes:
+    buf = BytesIO()
+    image.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def test_hashes_survive_recompression_resize_and_exposure():
+    original = _sleeve(1)
+    base = compute_hashes(_jpeg(original, 95))
+
+    variants = [
+        _jpeg(original, 40),
+        _jpeg(original.resize((310, 310)), 80),
+        _jpeg(ImageEnhance.Brightness(original).enhance(1.15), 85),
+    ]
+    for data in variants:
+        hashes = compute_hashes(data)
+        assert hamming_distance(base.phash, hashes.phash) <= 8
+        assert hamming_distance(base.dhash, hashes.dhash) <= 12
+
+    other = compute_hashes(_jpeg(_sleeve(2), 95))
+    assert hamming_distance(base.phash, other.phash) > 8
+
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    # Clusters of near neighbours
+    values += [v ^ (1 << rng.randrange(64)) for v in values[:200]]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    assert len(tree) == len(values)
+
+    for query in values[:50] + [rng.getrandbits(64) for _ in range(10)]:
+        for k in (0, 3, 10):
+            expected = sorted(i for i, v in enumerate(values) if hamming_distance(v, query) <= k)
+            assert sorted(i for _, i in tree.search(query, k)) == expected
+
+
+def test_index_persists_and_short_circuits(tmp_path):
+    path = tmp_path / "near_duplicate_index.jsonl"
+    index = NearDuplicateIndex(path)
+    cover = _sleeve(3)
+    index.add("rec-1", compute_hashes(_jpeg(cover, 95)), {"artist": "Miles Davis", "album": "Kind of Blue", "notes": "x"})
+    index.add("rec-2", compute_hashes(_jpeg(_sleeve(4), 95)), {"artist": "Other"})
+
+    # Another process / restart: rebuilt from the log
+    reopened = NearDuplicateIndex(path)
+    hashes, match = reopened.lookup(_jpeg(cover.resize((400, 400)), 60))
+
+    assert hashes is not None
+    assert match["record_id"] == "rec-1"
+    assert match["metadata"] == {"artist": "Miles Davis", "album": "Kind of Blue"}
+    assert reopened.stats()["records"] == 2
+
+    # Unrelated image, undecodable bytes
+    assert reopened.lookup(_jpeg(_sleeve(5), 95))[1] is None
+    assert reopened.lookup(b"not an image") == (None, None)
+
+
+def test_find_similar_within_distance_and_readd(tmp_path):
+    index = NearDuplicateIndex(tmp_path / "idx.jsonl")
+    cover = _sleeve(6)
+    hashes = compute_hashes(_jpeg(cover, 95))
+    index.add("rec-1", hashes, {"artist": "A"})
+
+    assert [m["record_id"] for m in index.find_similar(hashes, max_distance=0)] == ["rec-1"]
+
+    # Re-adding a record with a different cover replaces its hashes
+    index.add("rec-1", compute_hashes(_jpeg(_sleeve(8), 95)), {"artist": "A"})
+    assert index.find_similar(hashes, max_distance=4) == []
+    assert NearDuplicateIndex(tmp_path / "idx.jsonl").find_similar(hashes, max_distance=4) == []
@@ -0,0 +1,152 @@
+"""
+OpenAI gateway tests against a local fake OpenAI server: throughput under
+429s, single-flight coalescing, retry budget, request deadlines and
+per-model concurrency limits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import openai  # noqa: E402
+
+from backend.core.deadline import DeadlineExceeded, request_deadline, set_deadline  # noqa: E402
+from backend.services.openai_gateway import OpenAIGateway  # noqa: E402
+from fake_openai_server import FakeOpenAIServer  # noqa: E402
+
+
+def _messages(text: str):
+    return [{"role": "user", "content": text}]
+
+
+@pytest.fixture
+def server():
+    fake = FakeOpenAIServer().start()
+    yield fake
+    fake.stop()
+
+
+def _gateway(server, **overrides) -> OpenAIGateway:
+    gateway = OpenAIGateway()
+    settings = {
+        "api_key": "sk-test",
+        "base_url": server.base_url,
+        "backoff_base": 0.01,
+        "backoff_max": 0.5,
+    }
+    settings.update(overrides)
+    gateway.configure(**settings)
+    return gateway
+
+
+async def _fan_out(gateway, prompts, model="gpt-4o-mini"):
+    return await asyncio.gather(
+        *(gateway.chat_completion(model=model, messages=_messages(p), max_tokens=10) for p in prompts),
+        return_exceptions=True,
+    )
+
+
+def test_throughput_under_rate_limiting(server):
+    server.latency = 0.05
+    server.max_concurrency = 4
+    gateway = _gateway(
+        server,
+        max_concurrency=8,
+        max_attempts=20,
+        retry_budget_ratio=1.0,
+        retry_budget_reserve=200.0,
+    )
+    prompts = [f"record {i}" for i in range(60)]
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(_fan_out(gateway, prompts))
+        elapsed = time.perf_counter() - start
+    finally:
+        gateway.shutdown()
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert not errors, errors[:3]
+    assert server.completed == len(prompts)
+    assert server.rate_limited > 0
+    stats = gateway.stats()
+    assert stats["rate_limited"] == server.rate_limited
+    assert stats["completion_tokens"] == 10 * len(prompts)
+    print(
+        f"\n{len(prompts)} requests in {elapsed:.2f}s "
+        f"({len(prompts) / elapsed:.1f} req/s), {server.rate_limited} upstream 429s retried"
+    )
+
+
+def test_identical_inflight_prompts_are_coalesced(server):
+    server.latency = 0.3
+    gateway = _gateway(server)
+    try:
+        results = asyncio.run(_fan_out(gateway, ["same cover"] * 10))
+    finally:
+        gateway.shutdown()
+
+    assert all(r.choices[0].message.content == '{"ok": true}' for r in results)
+    assert server.calls == 1
+    assert gateway.stats()["coalesced"] == 9
+
+
+def test_retry_budget_limits_retries(server):
+    server.rate_limit_first = 1000
+    gateway = _gateway(server, max_attempts=10, retry_budget_ratio=0.0, retry_budget_reserve=2.0)
+    try:
+        with pytest.raises(openai.RateLimitError):
+            gateway.chat_completion_sync(model="gpt-4o-mini", messages=_messages("x"))
+    finally:
+        gateway.shutdown()
+
+    # First attempt + the two retries the budget allows
+    assert server.calls == 3
+    stats = gateway.stats()
+    assert stats["retries"] == 2
+    assert stats["retry_budget_exhausted"] == 1
+
+
+def test_request_deadline_bounds_the_call(server):
+    server.latency = 2.0
+    gateway = _gateway(server)
+    token = set_deadline(0.3)
+    try:
+        start = time.perf_counter()
+        with pytest.raises(DeadlineExceeded, match="timed out"):
+            gateway.chat_completion_sync(model="gpt-4o-mini", messages=_messages("slow"))
+        elapsed = time.perf_counter() - start
+    finally:
+        request_deadline.reset(token)
+        gateway.shutdown()
+
+    assert elapsed < 1.5
+    assert gateway.stats()["deadline_exceeded"] == 1
+
+
+def test_per_model_concurrency_limit(server):
+    server.latency = 0.1
+    gateway = _gateway(server, max_concurrency=16, per_model_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(
+            _fan_out(gateway, [f"a{i}" for i in range(6)], model="gpt-4o"),
+            _fan_out(gateway, [f"b{i}" for i in range(6)], model="gpt-4o-mini"),
+        )
+
+    try:
+        asyncio.run(run())
+    finally:
+        gateway.shutdown()
+
+    assert server.completed == 12
+    assert server.peak_by_model["gpt-4o"] <= 2
+    assert server.peak_by_model["gpt-4o-mini"] <= 2
@@ -0,0 +1,192 @@
+"""
+Preview status push tests: event bus replay and limits, and the SSE /
+WebSocket endpoints (snapshot, live transitions, heartbeat,
+Last-Event-ID resume, 404 and connection limits).
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import backend.api.v1.upap_preview_events_router as events_router
+from backend.api.v1.auth_middleware import get_current_user_stream
+from backend.core.event_bus import EventBus, SubscriptionClosed, SubscriptionLimitExceeded
+from backend.db import get_db
+from backend.models.preview_record_db import PreviewRecordDB
+from backend.models.record_state import RecordState
+from backend.services.preview_events import preview_topic
+
+
+def test_bus_delivers_and_resumes_after_last_event_id():
+    async def scenario():
+        bus = EventBus(backend="local", buffer_size=3)
+        sub = bus.subscribe("t", owner="u1")
+        first = bus.publish("t", "state", {"state": "uploaded"})
+        bus.publish("other", "state", {})
+        assert (await sub.next(1)).id == first.id
+        assert await sub.next(0.01) is None  # heartbeat timeout
+        sub.close()
+
+        events = [bus.publish("t", "state", {"n": n}) for n in range(4)]
+        resumed = bus.subscribe("t", last_event_id=events[1].id)
+        assert [e.data["n"] for e in resumed.replay] == [2, 3]
+        # Fell out of the buffer: caller must send a snapshot
+        assert bus.subscribe("t", last_event_id=first.id).replay is None
+        assert bus.subscribe("t").replay is None
+
+    asyncio.run(scenario())
+
+
+def test_bus_limits_and_slow_subscribers():
+    async def scenario():
+        bus = EventBus(backend="local", max_subscriptions=3, max_per_owner=2)
+        a = bus.subscribe("t", owner="u1")
+        bus.subscribe("t", owner="u1")
+        with pytest.raises(SubscriptionLimitExceeded):
+            bus.subscribe("t", owner="u1")
+        bus.subscribe("t", owner="u2")
+        with pytest.raises(SubscriptionLimitExceeded):
+            bus.subscribe("t", owner="u3")
+        a.close()
+        a.close()
+        slow = bus.subscribe("t", owner="u1")
+        assert bus.stats()["subscriptions"] == 3
+
+        for n in range(slow.queue.maxsize + 1):
+            bus.publish("t", "progress", {"n": n})
+        await asyncio.sleep(0)
+        with pytest.raises(SubscriptionClosed):
+            await slow.next(1)
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    PreviewRecordDB.__table__.create(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(PreviewRecordDB(
+            preview_id="p1", user_id="7", state=RecordState.UPLOADED,
+            file_path="a.jpg", canonical_image_path="a.jpg",
+        ))
+        db.commit()
+
+    bus = EventBus(backend="local", max_per_owner=2)
+    monkeypatch.setattr(events_router, "event_bus", bus)
+    monkeypatch.setattr(events_router, "HEARTBEAT_SECONDS", 0.05)
+
+    def session():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(events_router.router)
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_current_user_stream] = lambda: SimpleNamespace(id=7)
+    with TestClient(app) as test_client:
+        test_client.bus = bus
+        test_client.app_under_test = app
+        yield test_client
+
+
+@pytest.fixture
+def sse(client):
+    """httpx client against a live server (TestClient buffers whole responses)."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(client.app_under_test, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10) as http:
+        http.bus = client.bus
+        yield http
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def _sse_events(lines):
+    """Parse SSE lines into (id, event, data) tuples and heartbeat markers."""
+    event = {}
+    for line in lines:
+        if line.startswith(": ping"):
+            yield "ping"
+        elif line.startswith("id: "):
+            event["id"] = line[4:]
+        elif line.startswith("event: "):
+            event["event"] = line[7:]
+        elif line.startswith("data: "):
+            event["data"] = json.loads(line[6:])
+        elif line == "" and "event" in event:
+            yield event.get("id"), event["event"], event["data"]
+            event = {}
+
+
+def test_sse_snapshot_transitions_heartbeat_and_resume(sse):
+    url = "/api/v1/upap/preview/p1/events"
+    topic = preview_topic("p1")
+    with sse.stream("GET", url) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(resp.iter_lines())
+
+        assert next(events) == (None, "state", {
+            "preview_id": "p1", "state": "uploaded", "confidence": 0.0, "model_used": None,
+            "artist": None, "album": None, "record_id": None,
+        })
+        assert next(events) == "ping"
+
+        analyzed = sse.bus.publish(topic, "state", {"preview_id": "p1", "state": "ai_analyzed"})
+        item = next(events)
+        while item == "ping":
+            item = next(events)
+        assert item == (analyzed.id, "state", {"preview_id": "p1", "state": "ai_analyzed"})
+
+    # Reconnect: only what was missed, then the terminal state ends the stream
+    sse.bus.publish(topic, "progress", {"stage": "enrich"})
+    sse.bus.publish(topic, "state", {"state": "archived", "record_id": "r1"})
+    with sse.stream("GET", url, headers={"Last-Event-ID": analyzed.id}) as resp:
+        replayed = [e for e in _sse_events(resp.iter_lines()) if e != "ping"]
+    assert [(t, d.get("stage") or d.get("state")) for _, t, d in replayed] == [
+        ("progress", "enrich"), ("state", "archived")
+    ]
+    assert sse.bus.stats()["subscriptions"] == 0
+
+
+def test_sse_unknown_preview_and_connection_limit(sse):
+    assert sse.get("/api/v1/upap/preview/missing/events").status_code == 404
+    assert sse.bus.stats()["subscriptions"] == 0
+
+    with sse.stream("GET", "/api/v1/upap/preview/p1/events"), \
+            sse.stream("GET", "/api/v1/upap/preview/p1/events"):
+        resp = sse.get("/api/v1/upap/preview/p1/events")
+        assert resp.status_code == 429
+        assert "Retry-After" in resp.headers
+
+
+def test_websocket_stream(client, monkeypatch):
+    monkeypatch.setattr(events_router, "get_current_user_stream", lambda **kwargs: SimpleNamespace(id=7))
+    with client.websocket_connect("/api/v1/upap/preview/p1/ws") as ws:
+        assert ws.receive_json()["data"]["state"] == "uploaded"
+        event = client.bus.publish(preview_topic("p1"), "state", {"state": "archived"})
+        message = ws.receive_json()
+        while message["type"] == "ping":
+            message = ws.receive_json()
+        assert message == {"id": event.id, "type": "state", "data": {"state": "archived"}}
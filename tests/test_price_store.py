@@ -0,0 +1,169 @@
+"""
+Price store tests (SQLite): per-condition / per-currency rows with
+condition and FX fallbacks, staleness metadata, refresh priority order
+within the request budget, and pricing reads served from the store
+without Discogs calls (local fake Discogs server).
+"""
+
+import time
+
+import pytest
+from sqlalchemy import update
+
+from backend.services import price_store as price_store_module
+from backend.services import vinyl_pricing_service as pricing_module
+from backend.services.discogs_client import DiscogsClient
+from backend.services.price_refresh import PriceRefreshScheduler
+from backend.services.price_store import PRICES, PriceStore, condition_code, lookup_key
+from fake_discogs_server import FakeDiscogsServer
+
+LISTINGS = [
+    {"condition": "Near Mint (NM or M-)", "value": 30.0, "currency": "USD"},
+    {"condition": "Very Good Plus (VG+)", "value": 20.0, "currency": "USD"},
+    {"condition": "Very Good Plus (VG+)", "value": 24.0, "currency": "USD"},
+    {"condition": "Very Good (VG)", "value": 10.0, "currency": "EUR"},
+]
+
+
+@pytest.fixture
+def store(engine):
+    return PriceStore(engine)
+
+
+def _age(store, release_id, seconds):
+    with store.engine.begin() as conn:
+        conn.execute(update(PRICES).where(PRICES.c.release_id == release_id).values(fetched_at=time.time() - seconds))
+
+
+def test_condition_and_currency_fallbacks(store):
+    assert condition_code("Very Good Plus (VG+)") == "VG+" and condition_code("Fair (F)") == "P"
+    assert lookup_key(" Pink  Floyd", "Animals", None) == "pink floyd|animals|"
+    assert store.get("249504") is None  # never fetched: placeholder queued
+    assert store.due() == ["249504"]
+
+    store.save("249504", LISTINGS)
+    vg_plus = store.get("249504", "VG+")
+    assert (vg_plus["price_low"], vg_plus["price_median"], vg_plus["price_high"]) == (20.0, 22.0, 24.0)
+    assert vg_plus["sample_size"] == 2 and vg_plus["derived_from_condition"] is None
+    assert vg_plus["stale"] is False and vg_plus["age_seconds"] < 5
+
+    # No G+ listings: USD all-conditions row times the Goldmine multiplier
+    g_plus = store.get("249504", "G+")
+    assert g_plus["derived_from_condition"] == "" and g_plus["price_median"] == round(24.0 * 0.5, 2)
+
+    # Only EUR listings in VG: converted at FX_RATES
+    vg = store.get("249504", "VG", currency="USD")
+    assert vg["converted_from"] == "EUR" and vg["price_median"] == round(10.0 * 1.1, 2)
+    assert store.get("249504", "VG", currency="EUR")["price_median"] == 10.0
+    # One USD listing against three in EUR: the larger sample wins after conversion
+    store.save("1", [{"condition": "Mint (M)", "value": 99.0, "currency": "USD"},
+                     *({"condition": "Mint (M)", "value": v, "currency": "EUR"} for v in (40.0, 50.0, 60.0))])
+    mint = store.get("1", "M", currency="USD")
+    assert mint["converted_from"] == "EUR" and mint["sample_size"] == 3 and mint["price_median"] == 55.0
+    assert store.due() == []
+
+
+def test_staleness_metadata(store):
+    store.save("1", LISTINGS)
+    _age(store, "1", 25 * 3600)
+    stale = store.get("1")
+    assert stale["stale"] is True and stale["age_seconds"] >= 25 * 3600
+
+    store.save("2", LISTINGS)
+    _age(store, "2", 7 * 3600)
+    assert store.get("2")["stale"] is False
+    store.mark_listed("2")  # listed for sale: 6 h max age
+    assert store.get("2")["stale"] is True
+    assert store.due() == ["2", "1"]  # both viewed; listed first
+
+
+def test_refresh_priority_and_budget(store):
+    now = time.time()
+    for release_id, value in (("cheap", 5.0), ("rare", 300.0), ("listed", 15.0), ("viewed", 8.0)):
+        store.save(release_id, [{"value": value, "currency": "USD", "condition": "NM"}])
+        _age(store, release_id, 48 * 3600)
+    store.mark_listed("listed")
+    with store.engine.begin() as conn:
+        conn.execute(update(PRICES).values(last_viewed_at=None))
+        conn.execute(update(PRICES).where(PRICES.c.release_id == "viewed").values(last_viewed_at=now))
+    assert store.due() == ["viewed", "listed", "rare", "cheap"]
+
+    fetched = []
+
+    def fetch(release_id):
+        fetched.append(release_id)
+        if release_id == "listed":
+            raise RuntimeError("Discogs listings returned status 500")
+        return [{"value": 9.0, "currency": "USD", "condition": "NM"}], 2
+
+    scheduler = PriceRefreshScheduler(store=store, fetch=fetch, budget=5)
+    run = scheduler.refresh_due()
+    assert fetched == ["viewed", "listed", "rare"]  # 2 + 1 + 2 requests, budget 5
+    assert run == {**run, "refreshed": 2, "failed": 1, "requests": 5, "remaining_due": 1}
+    assert store.get("listed", touch=False)["refresh_error"].endswith("status 500")
+    assert store.due() == ["cheap"]  # the failed release is backed off
+
+    scheduler.refresh_due()
+    assert fetched[-1] == "cheap" and store.due() == []
+    assert scheduler.stats()["runs"] == 2 and scheduler.stats()["requests"] == 7
+
+
+def test_refresh_runs_once_per_interval_across_processes(store):
+    from backend.core.job_queue import JobQueue
+
+    store.save("r1", [{"value": 9.0, "currency": "USD", "condition": "NM"}])
+    _age(store, "r1", 48 * 3600)
+    fetched = []
+
+    def fetch(release_id):
+        fetched.append(release_id)
+        return [{"value": 9.0, "currency": "USD", "condition": "NM"}], 1
+
+    # Two API processes: separate schedulers, one jobs table
+    first, second = (
+        PriceRefreshScheduler(store=store, fetch=fetch, interval=600,
+                              queue=JobQueue("price_refresh", engine=store.engine, max_attempts=1))
+        for _ in range(2)
+    )
+    second.owner = "other-host:1"
+    now = time.time()
+    assert first.refresh_leased(now=now)["refreshed"] == 1
+    assert second.refresh_leased(now=now) is None and second.stats()["skipped"] == 1
+    assert fetched == ["r1"]
+
+    _age(store, "r1", 48 * 3600)
+    assert second.refresh_leased(now=now + 600)["refreshed"] == 1  # next interval
+
+
+def test_value_priority_compares_currencies_in_usd(store):
+    # 2000 JPY (~13 USD) must not outrank 50 EUR (~55 USD)
+    store.save("yen", [{"value": 2000.0, "currency": "JPY", "condition": "NM"}])
+    store.save("euro", [{"value": 50.0, "currency": "EUR", "condition": "NM"}])
+    store.save("dollar", [{"value": 20.0, "currency": "USD", "condition": "NM"}])
+    for release_id in ("yen", "euro", "dollar"):
+        _age(store, release_id, 48 * 3600)
+    with store.engine.begin() as conn:
+        conn.execute(update(PRICES).values(last_viewed_at=None))
+    assert store.due() == ["euro", "dollar", "yen"]
+
+
+def test_pricing_reads_come_from_the_store(store, tmp_path, monkeypatch):
+    server = FakeDiscogsServer().start()
+    try:
+        client = DiscogsClient(base_url=server.base_url, token="test-token", cache_dir=tmp_path / "cache")
+        monkeypatch.setattr(pricing_module, "discogs_client", client)
+        monkeypatch.setattr(price_store_module, "price_store", store)
+        service = pricing_module.VinylPricingService()
+
+        first = service.get_market_prices("Pink Floyd", "Animals", catalog_number="SHVL 815")
+        assert first["source"] == "discogs" and first["sample_size"] == 3  # USD listings
+        assert first["price_median"] == 24.0 and first["stale"] is False
+        calls = server.calls
+
+        for condition in (None, "VG+", "NM"):
+            again = service.get_market_prices("PINK FLOYD", "Animals", catalog_number="shvl 815", condition=condition)
+            assert again["release_id"] == first["release_id"] and again["fetched_at"] == first["fetched_at"]
+        assert again["price_median"] == 30.0
+        assert server.calls == calls  # no Discogs calls after the first read
+    finally:
+        server.stop()
@@ -0,0 +1,144 @@
+"""
+Recognition cache tests: content addressing, TTL, LRU eviction, counters,
+cross-process sharing, and NovArchiveGPTService integration.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services import novarchive_gpt_service as gpt_module  # noqa: E402
+from backend.services.recognition_cache import RecognitionCache, image_sha256  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path) -> RecognitionCache:
+    return RecognitionCache(db_path=tmp_path / "cache.sqlite3", ttl_seconds=3600, max_bytes=10_000)
+
+
+def test_hit_miss_and_key_components(cache):
+    digest = image_sha256(b"cover-bytes")
+
+    assert cache.get(digest, "gpt-4o-mini", "v1") is None
+    cache.put(digest, "gpt-4o-mini", "v1", {"artist": "Miles Davis"})
+
+    assert cache.get(digest, "gpt-4o-mini", "v1") == {"artist": "Miles Davis"}
+    # Model and prompt version are part of the key
+    assert cache.get(digest, "gpt-4o", "v1") is None
+    assert cache.get(digest, "gpt-4o-mini", "v2") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["stores"] == 1
+    assert stats["hit_rate"] == 0.25
+
+
+def test_ttl_expiry(tmp_path):
+    cache = RecognitionCache(db_path=tmp_path / "ttl.sqlite3", ttl_seconds=1, max_bytes=10_000)
+    cache.put("abc", "m", "v1", {"artist": "X"})
+    assert cache.get("abc", "m", "v1") is not None
+    time.sleep(1.1)
+    assert cache.get("abc", "m", "v1") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = RecognitionCache(db_path=tmp_path / "lru.sqlite3", ttl_seconds=0, max_bytes=300)
+    payload = {"notes": "x" * 80}
+    for key in ("a", "b", "c"):
+        cache.put(key, "m", "v1", payload)
+        time.sleep(0.01)
+    # Touch "a" so "b" becomes least recently used
+    assert cache.get("a", "m", "v1") is not None
+    cache.put("d", "m", "v1", payload)
+
+    assert cache.get("b", "m", "v1") is None
+    assert cache.get("a", "m", "v1") is not None
+    assert cache.get("d", "m", "v1") is not None
+    stats = cache.stats()
+    assert stats["evictions"] >= 1
+    assert stats["size_bytes"] <= 300
+
+
+def test_lookups_are_reads_and_size_is_a_running_total(tmp_path):
+    db_path = tmp_path / "reads.sqlite3"
+    cache = RecognitionCache(db_path=db_path, ttl_seconds=0, max_bytes=500)
+    for i in range(8):
+        cache.put(f"k{i}", "m", "v1", {"notes": "x" * (20 + i * 10)})
+    cache.put("k7", "m", "v1", {"notes": "short"})  # overwrite shrinks the total
+
+    conn = sqlite3.connect(str(db_path))
+    before = conn.execute("SELECT name, value FROM recognition_cache_stats ORDER BY name").fetchall()
+    for i in range(5):
+        cache.get(f"k{i}", "m", "v1")
+    # Buffered: nothing written by the lookups themselves
+    assert conn.execute("SELECT name, value FROM recognition_cache_stats ORDER BY name").fetchall() == before
+
+    stats = cache.stats()
+    actual = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM recognition_cache").fetchone()[0]
+    conn.close()
+    assert stats["hits"] + stats["misses"] == 5
+    assert stats["evictions"] >= 1
+    assert stats["size_bytes"] == actual <= 500
+
+
+def _store_in_child(db_path: str):
+    RecognitionCache(db_path=db_path).put("shared", "m", "v1", {"artist": "From child"})
+
+
+def test_shared_across_processes(tmp_path):
+    db_path = str(tmp_path / "shared.sqlite3")
+    child = multiprocessing.get_context("spawn").Process(target=_store_in_child, args=(db_path,))
+    child.start()
+    child.join(timeout=60)
+    assert child.exitcode == 0
+
+    assert RecognitionCache(db_path=db_path).get("shared", "m", "v1") == {"artist": "From child"}
+
+
+def test_service_calls_openai_once_per_image(cache, monkeypatch):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        content = '{"metadata": {"artist": "Nina Simone", "album": "Pastel Blues"}, "confidence": 0.9}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    service = gpt_module.NovArchiveGPTService()
+    service.enabled = True
+    monkeypatch.setattr(gpt_module, "openai_gateway", SimpleNamespace(chat_completion_sync=create))
+    monkeypatch.setattr(gpt_module, "recognition_cache", cache)
+
+    first = service.analyze_vinyl_record(raw_bytes=b"same-image")
+    second = service.analyze_vinyl_record(raw_bytes=b"same-image")
+    service.analyze_vinyl_record(raw_bytes=b"other-image")
+
+    assert len(calls) == 2
+    assert first["artist"] == second["artist"] == "Nina Simone"
+    assert second["cache_hit"] is True
+    assert "cache_hit" not in first
+
+
+def test_service_does_not_cache_fallbacks(cache, monkeypatch):
+    def create(**kwargs):
+        raise RuntimeError("Request timed out")
+
+    service = gpt_module.NovArchiveGPTService()
+    service.enabled = True
+    monkeypatch.setattr(gpt_module, "openai_gateway", SimpleNamespace(chat_completion_sync=create))
+    monkeypatch.setattr(gpt_module, "recognition_cache", cache)
+
+    assert service.analyze_vinyl_record(raw_bytes=b"img")["source"] == "fallback"
+    assert cache.stats()["stores"] == 0
@@ -0,0 +1,114 @@
+"""
+Sales store tests (SQLite): window cover with month / week / day
+rollups, dashboards from the rollups matching a brute-force pass over
+the raw sales (all users and per user), listing matching for days to
+sale and conversion, incremental rollup updates per sale, and repeated
+sale events for a listing being no-ops.
+"""
+
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+
+from backend.services.commerce.sales_store import (
+    LISTINGS, ROLLUPS, SALES, SalesStore, cover, day_start,
+)
+
+NOW = datetime(2026, 3, 15, 18, 30, tzinfo=timezone.utc).timestamp()
+DAY = 86400
+
+
+@pytest.fixture
+def store(engine):
+    return SalesStore(engine)
+
+
+def _days(span):
+    period, start = span
+    start = date.fromisoformat(start)
+    if period == "month":
+        return ((start.replace(day=28) + timedelta(days=4)).replace(day=1) - start).days
+    return 7 if period == "week" else 1
+
+
+def test_cover_uses_largest_rollups():
+    spans = cover(date(2026, 1, 1), date(2026, 3, 15))
+    assert spans == [("month", "2026-01-01"), ("month", "2026-02-01"), ("day", "2026-03-01"),
+                     ("week", "2026-03-02"), ("week", "2026-03-09")]
+    for start, end in [(date(2025, 12, 20), date(2026, 3, 15)), (date(2026, 3, 14), date(2026, 3, 15))]:
+        assert sum(_days(s) for s in cover(start, end)) == (end - start).days + 1
+    assert len(cover(date(2025, 3, 16), date(2026, 3, 15))) < 20  # a year in under 20 rows
+
+
+def test_dashboard_matches_raw_sales(store):
+    rng = random.Random(7)
+    sales = [
+        {"record_id": f"rec-{rng.randint(1, 40)}", "channel": rng.choice(["ebay", "discogs", "etsy"]),
+         "user_id": rng.choice(["u1", "u2"]), "price": round(rng.uniform(5, 80), 2),
+         "sold_at": NOW - rng.uniform(0, 120) * DAY}
+        for _ in range(3000)
+    ]
+    assert store.import_sales(sales, batch_size=700) == 3000
+
+    for days in (1, 7, 30, 90):
+        since = day_start(date(2026, 3, 15) - timedelta(days=days - 1))
+        for user_id in (None, "u2"):
+            window = [s for s in sales if s["sold_at"] >= since and user_id in (None, s["user_id"])]
+            by_channel, by_record = defaultdict(float), defaultdict(float)
+            for s in window:
+                by_channel[s["channel"]] += s["price"]
+                by_record[s["record_id"]] += s["price"]
+            top = sorted(by_record.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+            metrics = store.dashboard(days=days, user_id=user_id, now=NOW)
+            assert metrics["total_sales"] == len(window)
+            assert metrics["total_revenue"] == pytest.approx(sum(by_channel.values()), abs=0.01)
+            assert metrics["revenue_by_platform"] == pytest.approx(by_channel, abs=0.01)
+            assert [(r["record_id"], r["revenue"]) for r in metrics["top_performing_records"]] == \
+                [(rid, pytest.approx(rev, abs=0.01)) for rid, rev in top]
+
+    # Totals come from the rollups alone
+    with store.engine.begin() as conn:
+        conn.execute(delete(SALES))
+    metrics = store.dashboard(days=90, now=NOW)
+    assert metrics["total_sales"] > 0 and metrics["top_performing_records"] == []
+
+
+def test_sales_update_rollups_and_match_listings(store):
+    store.record_listing("rec-1", "discogs", "D-1", 30.0, listed_at=NOW - 10 * DAY, user_id="u1")
+    store.record_listing("rec-2", "ebay", "E-2", 20.0, listed_at=NOW - 4 * DAY, user_id="u1")
+    store.record_listing("rec-3", "ebay", "E-3", 25.0, listed_at=NOW - 2 * DAY, user_id="u1")
+    assert not store.record_listing("rec-3", "ebay", "E-3", 25.0, user_id="u1")  # already known
+
+    by_id = store.record_sale("rec-1", "discogs", 30.0, listing_id="D-1", user_id="u1", sold_at=NOW)
+    by_record = store.record_sale("rec-2", "ebay", 22.0, user_id="u1", sold_at=NOW)
+    assert by_id["days_to_sale"] == pytest.approx(10) and by_record["listing_id"] == "E-2"
+
+    metrics = store.dashboard(days=30, user_id="u1", now=NOW)
+    assert metrics["total_sales"] == 2 and metrics["conversion_rate"] == pytest.approx(66.67)
+    assert metrics["average_days_to_sale"] == 7.0 and metrics["average_sale_price"] == 26.0
+    assert metrics["sales_velocity"]["trend"] == "up" and store.dashboard(days=30, user_id="u2", now=NOW)["total_sales"] == 0
+
+    with store.engine.connect() as conn:
+        statuses = dict(conn.execute(select(LISTINGS.c.listing_id, LISTINGS.c.status)).all())
+        rollups = conn.execute(select(ROLLUPS).where(ROLLUPS.c.channel == "ebay")).all()
+    assert statuses == {"D-1": "sold", "E-2": "sold", "E-3": "active"}
+    # One row per period for ebay: listings in the same week / month, sale today
+    assert {(r.period, r.sales, r.listings) for r in rollups if r.period != "day"} == {("week", 1, 2), ("month", 1, 2)}
+
+
+def test_repeated_sale_event_is_a_noop(store):
+    store.record_listing("rec-1", "ebay", "E-1", 30.0, listed_at=NOW - 3 * DAY, user_id="u1")
+    first = store.record_sale("rec-1", "ebay", 30.0, listing_id="E-1", user_id="u1", sold_at=NOW)
+    repeat = store.record_sale("rec-1", "ebay", 30.0, listing_id="E-1", user_id="u1", sold_at=NOW + 60)
+    assert not first["duplicate"] and repeat["duplicate"] and repeat["id"] == first["id"]
+
+    metrics = store.dashboard(days=7, now=NOW)
+    assert metrics["total_sales"] == 1 and metrics["total_revenue"] == 30.0
+    with store.engine.connect() as conn:
+        assert conn.execute(select(SALES.c.id)).all() == [(first["id"],)]
+        sales = [r.sales for r in conn.execute(select(ROLLUPS)).all() if r.sales]
+    assert sales == [1, 1, 1]  # day, week, month
@@ -0,0 +1,119 @@
+"""
+UPAP stage graph tests: edges from declared inputs/outputs, concurrent
+execution of independent stages, per-stage timeout cancelling the rest,
+memoization by input hash, static validation, and UPAPEngine.run_dag.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.upap.engine.stage_graph import (  # noqa: E402
+    StageGraph, StageGraphError, StageMemo, StageTimeout, run_graph,
+)
+from backend.services.upap.engine.upap_engine import UPAPEngine  # noqa: E402
+from backend.services.upap.engine.upap_validation import validate_stage_graph  # noqa: E402
+
+
+class _Stage:
+    def __init__(self, name, inputs=(), outputs=(), delay=0.0, timeout=None, cacheable=False):
+        self.name, self.inputs, self.outputs = name, tuple(inputs), tuple(outputs)
+        self.delay, self.timeout, self.cacheable = delay, timeout, cacheable
+        self.calls = 0
+        self.active = []
+
+    def run(self, context):
+        self.calls += 1
+        self.active.append(threading.get_ident())
+        time.sleep(self.delay)
+        return {key: f"{self.name}({','.join(str(context[k]) for k in self.inputs)})" for key in self.outputs}
+
+
+def _pipeline(delay=0.2):
+    return [
+        _Stage("ocr", ["file_path"], ["ocr_text"], delay),
+        _Stage("vision", ["file_path"], ["vision"], delay),
+        _Stage("merge", ["ocr_text", "vision"], ["metadata"]),
+    ]
+
+
+def test_independent_stages_run_concurrently():
+    graph = StageGraph(_pipeline())
+    assert graph.levels() == [["ocr", "vision"], ["merge"]]
+    assert graph.external_inputs == ["file_path"]
+
+    started = time.perf_counter()
+    result = asyncio.run(run_graph(graph, {"file_path": "a.jpg"}))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.35  # sequential would be 0.4 s
+    assert result["context"]["metadata"] == "merge(ocr(a.jpg),vision(a.jpg))"
+    assert set(result["stages"]) == {"ocr", "vision", "merge"}
+
+
+def test_timeout_cancels_running_stages():
+    slow = _Stage("vision", ["file_path"], ["vision"], delay=0.5)
+    stuck = _Stage("ocr", ["file_path"], ["ocr_text"], delay=0.5, timeout=0.05)
+    merge = _Stage("merge", ["ocr_text", "vision"], ["metadata"])
+
+    started = time.perf_counter()
+    with pytest.raises(StageTimeout) as error:
+        asyncio.run(run_graph(StageGraph([slow, stuck, merge]), {"file_path": "a.jpg"}))
+    assert error.value.stage == "ocr"
+    assert time.perf_counter() - started < 0.9
+    assert merge.calls == 0
+
+
+def test_cacheable_stage_memoized_by_input_hash():
+    process = _Stage("process", ["ocr_text"], ["normalized"], cacheable=True)
+    graph = StageGraph([process])
+    memo = StageMemo()
+
+    first = asyncio.run(run_graph(graph, {"ocr_text": "PINK FLOYD"}, memo))
+    second = asyncio.run(run_graph(graph, {"ocr_text": "PINK FLOYD"}, memo))
+    asyncio.run(run_graph(graph, {"ocr_text": "THE BEATLES"}, memo))
+
+    assert process.calls == 2
+    assert first["stages"]["process"]["cached"] is False and second["stages"]["process"]["cached"] is True
+    assert second["context"]["normalized"] == "process(PINK FLOYD)"
+    assert memo.stats() == {"entries": 2, "hits": 1, "misses": 2}
+
+
+def test_static_validation():
+    cycle = StageGraph([_Stage("a", ["y"], ["x"]), _Stage("b", ["x"], ["y"])])
+    assert any(p.startswith("Cycle:") for p in cycle.problems())
+    with pytest.raises(StageGraphError):
+        cycle.levels()
+
+    duplicate = StageGraph([_Stage("a", [], ["x"]), _Stage("b", [], ["x"]), _Stage("c", ["z"], [])])
+    problems = duplicate.problems(provided=[])
+    assert "Output 'x' is produced by several stages: ['a', 'b']" in problems
+    assert "Stage 'c' declares no outputs" in problems
+    assert "Inputs not provided and produced by no stage: ['z']" in problems
+
+    with pytest.raises(StageGraphError):
+        asyncio.run(run_graph(StageGraph(_pipeline()), {}))
+
+    report = validate_stage_graph()
+    assert report["problems"] == [] and report["score"] == 100
+    assert report["dependencies"]["publishstage"] == ["archivestage"]
+
+
+def test_engine_runs_archive_then_publish():
+    engine = UPAPEngine()
+    result = asyncio.run(engine.run_dag({"record_id": "rec-dag-1"}, stages=["publishstage", "archivestage"]))
+    assert result["context"]["archived"] is True and result["context"]["published"] is True
+    assert engine.stage_graph(["archivestage", "publishstage"]).levels() == [["archivestage"], ["publishstage"]]
+
+    with pytest.raises(RuntimeError):
+        engine.stage_graph(["missing"])
@@ -0,0 +1,93 @@
+"""
+Stage metrics tests: histogram percentile accuracy, what one measured
+stage records (wall, CPU, I/O, external calls incl. nested steps),
+UPAPEngine.run_stage instrumentation, and the dump / report round trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.core.stage_metrics import (  # noqa: E402
+    HdrHistogram, StageMetrics, external_call, format_report, record_external_call, stage_metrics,
+)
+from backend.services.upap.engine.upap_engine import UPAPEngine  # noqa: E402
+
+
+def _stage(snapshot, component, stage):
+    return next(s for s in snapshot["stages"] if s["component"] == component and s["stage"] == stage)
+
+
+def test_histogram_percentiles_within_one_percent():
+    rng = random.Random(7)
+    values = [int(rng.lognormvariate(10, 1.5)) for _ in range(20000)]
+    histogram = HdrHistogram()
+    for value in values:
+        histogram.record(value)
+
+    values.sort()
+    for p in (50, 90, 99, 99.9):
+        exact = values[int(p / 100 * len(values) + 0.5) - 1]
+        assert abs(histogram.percentile(p) - exact) <= exact * 0.01 + 1
+    assert histogram.percentile(100) == values[-1] and histogram.min == values[0]
+    assert len(histogram.counts) < 2000
+
+    small = HdrHistogram()
+    for value in range(1, 101):
+        small.record(value)
+    assert small.percentile(50) == 50 and small.percentile(99) == 99
+
+    merged = HdrHistogram.from_dict(json.loads(json.dumps(small.to_dict())))
+    merged.merge(small)
+    assert merged.count == 200 and merged.percentile(50) == 50
+
+
+def test_measure_records_time_io_and_external_calls(tmp_path):
+    metrics = StageMetrics()
+    with metrics.measure("upap", "ocr"):
+        deadline = time.thread_time() + 0.05
+        while time.thread_time() < deadline:
+            pass
+        (tmp_path / "out.bin").write_bytes(b"x" * 200_000)
+        with external_call("openai"):
+            time.sleep(0.02)
+        with metrics.measure("upap", "ocr.parse"):
+            record_external_call("discogs", 5.0)
+    record_external_call("openai", 1.0)  # outside any stage: ignored
+
+    snapshot = metrics.snapshot()
+    ocr = _stage(snapshot, "upap", "ocr")["metrics"]
+    assert ocr["wall_ms"]["count"] == 1 and ocr["wall_ms"]["max"] >= 70
+    assert 45 <= ocr["cpu_ms"]["max"] <= ocr["wall_ms"]["max"]
+    assert ocr["write_bytes"]["max"] >= 200_000
+    assert ocr["external_calls"]["max"] == 2  # own call + nested step's call
+    assert ocr["external_ms"]["max"] >= 25
+
+    parse = _stage(snapshot, "upap", "ocr.parse")["metrics"]
+    assert parse["external_calls"]["max"] == 1 and parse["external_ms"]["max"] == 5.0
+
+
+def test_run_stage_and_dag_are_instrumented(tmp_path):
+    stage_metrics.reset()
+    engine = UPAPEngine()
+    for i in range(3):
+        engine.run_stage("archivestage", {"record_id": f"rec-metrics-{i}"})
+    asyncio.run(engine.run_dag({"record_id": "rec-metrics-dag"}, stages=["archivestage", "publishstage"]))
+
+    snapshot = stage_metrics.snapshot()
+    assert _stage(snapshot, "upap", "archivestage")["metrics"]["wall_ms"]["count"] == 4
+    assert _stage(snapshot, "upap", "publishstage")["metrics"]["cpu_ms"]["count"] == 1
+
+    path = stage_metrics.dump(tmp_path / "stage_metrics.json")
+    report = format_report(json.loads(path.read_text()), ["wall_ms", "external_calls"])
+    assert "archivestage" in report and "external_calls" in report and "cpu_ms" not in report
+    stage_metrics.reset()
@@ -0,0 +1,161 @@
+"""
+Stock sync tests with fake connectors (tests/fake_channel_connectors.py)
+on a SQLite outbox: the delist fan-out runs all channels concurrently, a
+hanging or failing channel is cut off at its deadline and retried with
+backoff under the same idempotency key until the record is fully
+delisted, repeated sale events are no-ops, and disabled channels (or
+exhausted retries) are dead-lettered and counted apart from fully
+delisted sales.
+"""
+
+import asyncio
+import threading
+import time
+
+from backend.core.job_queue import JobQueue, JobWorkerPool
+from backend.core.stage_metrics import stage_metrics
+from backend.services.commerce.stock_sync_service import StockSyncService, delist_key
+from fake_channel_connectors import FakeConnector
+
+LISTINGS = {"ebay": "E-1", "discogs": "D-1", "shopify": "S-1", "etsy": "T-1"}
+
+
+def _service(engine, connectors, deadline=0.5):
+    outbox = JobQueue("stock_delist", engine=engine, max_attempts=4, backoff_base=0.05, backoff_max=0.1)
+    return StockSyncService(connectors={c.name: c for c in connectors}, outbox=outbox, deadline=deadline)
+
+
+def _fully_delisted_count():
+    for entry in stage_metrics.snapshot()["stages"]:
+        if (entry["component"], entry["stage"]) == ("commerce", "time_to_fully_delisted"):
+            return entry["metrics"]["wall_ms"]["count"]
+    return 0
+
+
+def test_fan_out_is_concurrent(engine):
+    connectors = [FakeConnector(name, latency=0.3) for name in LISTINGS]
+    service = _service(engine, connectors)
+    before = _fully_delisted_count()
+
+    started = time.perf_counter()
+    result = asyncio.run(service.handle_sale("rec-1", "ebay", LISTINGS))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.6  # serial would be 0.9 s
+    assert sorted(result["delisted_platforms"]) == ["discogs", "etsy", "shopify"] and result["success"]
+    assert connectors[0].calls == []  # sold there, nothing to delist
+    assert connectors[1].keys == [delist_key("rec-1", "discogs", "D-1")]
+    assert 300 <= result["time_to_delisted_ms"] < 600 and _fully_delisted_count() == before + 1
+    assert service.outbox.stats()["succeeded"] == 3
+
+
+def test_hanging_channel_hits_deadline_then_retries(engine):
+    release = threading.Event()
+    slow = FakeConnector("discogs", hang=release)
+    flaky = FakeConnector("shopify", fail_next=2)
+    fast = FakeConnector("etsy", latency=0.05)
+    service = _service(engine, [FakeConnector("ebay"), slow, flaky, fast], deadline=0.3)
+    before = _fully_delisted_count()
+
+    async def scenario():
+        started = time.perf_counter()
+        result = await service.handle_sale("rec-2", "ebay", LISTINGS)
+        elapsed = time.perf_counter() - started
+        release.set()
+        pool = JobWorkerPool(service.outbox, service.run_delist_job, concurrency=2, poll_interval=0.05)
+        await pool.start()
+        deadline = time.monotonic() + 10
+        while service.outbox.outstanding("delist:rec-2:") and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await pool.stop(timeout=5)
+        return result, elapsed
+
+    result, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.5  # bounded by the deadline, not the hang
+    assert result["delisted_platforms"] == ["etsy"] and not result["success"]
+    assert sorted(result["pending_platforms"]) == ["discogs", "shopify"]
+    assert result["results"]["discogs"]["error"].startswith("Timed out")
+    assert result["time_to_delisted_ms"] is None
+
+    # Retries reuse the idempotency key; the timed-out call went through, the retry is not a second delist
+    assert set(slow.keys) == {delist_key("rec-2", "discogs", "D-1")} and len(slow.delisted) == 1
+    assert len(flaky.calls) == 3 and len(set(flaky.keys)) == 1
+    assert service.outbox.outstanding("delist:rec-2:") == 0
+    assert _fully_delisted_count() == before + 1 and service.counters["timeouts"] == 1
+
+
+def test_repeated_sale_event_is_a_noop(engine):
+    connectors = [FakeConnector(name) for name in LISTINGS]
+    service = _service(engine, connectors)
+
+    first = asyncio.run(service.handle_sale("rec-3", "discogs", LISTINGS))
+    second = asyncio.run(service.handle_sale("rec-3", "discogs", LISTINGS))
+    assert first["success"] and not second["success"]
+    assert {r["status"] for r in second["results"].values()} == {"duplicate"}
+    assert sum(len(c.calls) for c in connectors) == 3 and service.counters["duplicates"] == 3
+
+
+def test_disabled_channel_is_dead_lettered(engine):
+    disabled = FakeConnector("etsy", enabled=False)
+    service = _service(engine, [FakeConnector("ebay"), FakeConnector("discogs"), FakeConnector("shopify"), disabled])
+
+    result = asyncio.run(service.handle_sale("rec-4", "shopify", LISTINGS))
+    assert result["results"]["etsy"]["status"] == "dead" and result["pending_platforms"] == []
+    assert result["time_to_delisted_ms"] is None  # not fully delisted while a delist is dead
+    assert service.counters["dead_lettered"] == 1 and service.outbox.outstanding("delist:rec-4:") == 0
+    assert service.outbox.claim("worker", 10) == [] and len(disabled.calls) == 1
+
+    # Once the channel is configured, the dead letter is retried by hand
+    disabled.enabled = True
+    [dead] = service.outbox.dead_letters()
+    assert service.outbox.retry_dead(dead["id"])
+    [job] = service.outbox.claim("worker", 10)
+    asyncio.run(service.run_delist_job(job.payload))
+    service.outbox.complete(job)
+    assert service.outbox.outstanding("delist:rec-4:") == 0 and service.counters["fully_delisted"] == 1
+
+
+def test_retries_exhausted_in_worker_count_as_dead_lettered(engine):
+    failing = FakeConnector("discogs", fail_next=100)
+    service = _service(engine, [FakeConnector("ebay"), failing, FakeConnector("shopify"), FakeConnector("etsy")])
+    before = _fully_delisted_count()
+
+    async def scenario():
+        result = await service.handle_sale("rec-5", "ebay", LISTINGS)
+        pool = JobWorkerPool(service.outbox, service.run_delist_job, concurrency=2, poll_interval=0.05,
+                             on_failed=service.on_delist_failed)
+        await pool.start()
+        deadline = time.monotonic() + 10
+        while service.outbox.outstanding("delist:rec-5:") and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await pool.stop(timeout=5)
+        return result
+
+    result = asyncio.run(scenario())
+    assert result["pending_platforms"] == ["discogs"]
+    assert len(failing.calls) == 4 and service.outbox.dead("delist:rec-5:") == 1
+    assert service.counters["dead_lettered"] == 1 and service.counters["fully_delisted"] == 0
+    assert _fully_delisted_count() == before
+
+
+def test_connector_disabled_before_retry_is_dead_lettered_at_once(engine):
+    flaky = FakeConnector("shopify", fail_next=1)
+    service = _service(engine, [FakeConnector("ebay"), FakeConnector("discogs"), flaky, FakeConnector("etsy")])
+
+    async def scenario():
+        result = await service.handle_sale("rec-6", "ebay", LISTINGS)
+        flaky.enabled = False  # credentials removed after the sale
+        pool = JobWorkerPool(service.outbox, service.run_delist_job, concurrency=2, poll_interval=0.05,
+                             on_failed=service.on_delist_failed)
+        await pool.start()
+        deadline = time.monotonic() + 10
+        while service.outbox.outstanding("delist:rec-6:") and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        await pool.stop(timeout=5)
+        return result
+
+    result = asyncio.run(scenario())
+    assert result["pending_platforms"] == ["shopify"]
+    [dead] = service.outbox.dead_letters()
+    assert dead["attempts"] == 2 and len(flaky.calls) == 2  # not retried up to max_attempts
+    assert service.counters["dead_lettered"] == 1
@@ -0,0 +1,226 @@
+"""
+Executor offload + backpressure tests for the UPAP upload endpoint.
+
+Offline load test: concurrent uploads run blocking image/OpenAI work while
+/health is probed; /health p99 must stay flat because the blocking work
+runs in the bounded pools, not on the event loop. A saturated pool must
+answer 429 with Retry-After.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from PIL import Image
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.core import executors  # noqa: E402
+from backend.core.executors import BoundedExecutor, ExecutorSaturated  # noqa: E402
+
+BLOCKING_AI_SECONDS = 0.4
+BLOCKING_IMAGE_SECONDS = 0.2
+TEST_EMAIL = "load@example.com"
+
+
+def _jpeg_bytes() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), color=(120, 40, 40)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def _make_app(*routers):
+    """Minimal app: exception handlers, /health and the given routers."""
+    from fastapi import FastAPI
+    from backend.core.error_handler import register_exception_handlers
+
+    app = FastAPI()
+    register_exception_handlers(app)
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    for router in routers:
+        app.include_router(router)
+    return app
+
+
+@pytest.fixture
+def upload_app(monkeypatch, tmp_path):
+    """v1 upload router with auth stubbed and blocking services simulated."""
+    try:
+        from backend.api.v1.upap_upload_router import router
+    except SyntaxError as exc:
+        pytest.skip(f"upap_upload_router not importable on this interpreter: {exc}")
+    from backend.api.v1.auth_middleware import get_current_user
+    from backend.services.novarchive_gpt_service import novarchive_gpt_service
+    from backend.services.image_enhancement_service import image_enhancement_service
+
+    # Uploads write to storage/ relative to cwd
+    monkeypatch.chdir(tmp_path)
+
+    def slow_analyze(file_path=None, raw_bytes=None):
+        time.sleep(BLOCKING_AI_SECONDS)
+        return {"artist": "Test Artist", "album": "Test Album", "confidence": 0.9}
+
+    def slow_enhance(*args, **kwargs):
+        time.sleep(BLOCKING_IMAGE_SECONDS)
+        return {"enhanced": False}
+
+    monkeypatch.setattr(novarchive_gpt_service, "analyze_vinyl_record", slow_analyze)
+    monkeypatch.setattr(image_enhancement_service, "enhance_image", slow_enhance)
+
+    # Pin pool sizes so the test does not depend on the host CPU count
+    monkeypatch.setitem(
+        executors.POOL_CONFIG,
+        executors.IMAGE_POOL,
+        {"max_workers": 4, "max_queue": 16, "kind": "thread"},
+    )
+
+    app = _make_app(router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(
+        id="load-test-user", email=TEST_EMAIL
+    )
+    executors.shutdown_executors(wait=True)
+    yield app
+    executors.shutdown_executors(wait=True)
+
+
+@pytest.fixture
+def offload_app():
+    """Standalone app whose endpoint blocks via the openai pool."""
+    from fastapi import APIRouter
+
+    router = APIRouter()
+
+    @router.post("/api/v1/upap/upload")
+    async def blocking_upload():
+        result = await executors.run_in_pool(
+            executors.OPENAI_POOL, lambda: time.sleep(BLOCKING_AI_SECONDS) or "done"
+        )
+        return {"status": "ok", "artist": "Test Artist", "result": result}
+
+    executors.shutdown_executors(wait=True)
+    yield _make_app(router)
+    executors.shutdown_executors(wait=True)
+
+
+async def _upload(client: httpx.AsyncClient, payload: bytes) -> httpx.Response:
+    return await client.post(
+        "/api/v1/upap/upload",
+        files={"file": ("cover.jpg", payload, "image/jpeg")},
+        data={"email": TEST_EMAIL},
+    )
+
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        resp = await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        assert resp.status_code == 200
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+def _p99(samples: list[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def test_bounded_executor_rejects_when_full():
+    pool = BoundedExecutor(name="t", max_workers=1, max_queue=1)
+    try:
+        first = pool.submit(time.sleep, 0.2)
+        second = pool.submit(time.sleep, 0.0)
+        with pytest.raises(ExecutorSaturated) as exc_info:
+            pool.submit(time.sleep, 0.0)
+        assert exc_info.value.pool == "t"
+        first.result()
+        second.result()
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        assert stats["in_flight"] == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize("app_fixture", ["offload_app", "upload_app"])
+def test_health_p99_stays_flat_during_uploads(app_fixture, request):
+    upload_app = request.getfixturevalue(app_fixture)
+    payload = _jpeg_bytes()
+    concurrent_uploads = 8
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=upload_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Baseline: idle server
+            idle_stop = asyncio.Event()
+            idle_probe = asyncio.create_task(_probe_health(client, idle_stop))
+            await asyncio.sleep(0.3)
+            idle_stop.set()
+            idle = await idle_probe
+
+            # Under load: uploads in flight
+            busy_stop = asyncio.Event()
+            busy_probe = asyncio.create_task(_probe_health(client, busy_stop))
+            uploads = await asyncio.gather(
+                *[_upload(client, payload) for _ in range(concurrent_uploads)]
+            )
+            busy_stop.set()
+            busy = await busy_probe
+            return idle, busy, uploads
+
+    idle, busy, uploads = asyncio.run(scenario())
+
+    assert all(resp.status_code == 200 for resp in uploads), [r.text for r in uploads]
+    assert all(resp.json().get("artist") == "Test Artist" for resp in uploads)
+
+    idle_p99 = _p99(idle)
+    busy_p99 = _p99(busy)
+    print(
+        f"\n/health idle p50={statistics.median(idle) * 1000:.1f}ms p99={idle_p99 * 1000:.1f}ms | "
+        f"during {concurrent_uploads} uploads p50={statistics.median(busy) * 1000:.1f}ms "
+        f"p99={busy_p99 * 1000:.1f}ms ({len(busy)} probes)"
+    )
+    # On-loop blocking would push p99 to >= BLOCKING_AI_SECONDS
+    assert len(busy) >= 5
+    assert busy_p99 < BLOCKING_AI_SECONDS / 2
+
+
+@pytest.mark.parametrize("app_fixture", ["offload_app", "upload_app"])
+def test_saturated_pool_returns_429(app_fixture, request, monkeypatch):
+    upload_app = request.getfixturevalue(app_fixture)
+    monkeypatch.setitem(
+        executors.POOL_CONFIG,
+        executors.OPENAI_POOL,
+        {"max_workers": 1, "max_queue": 0, "kind": "thread"},
+    )
+    payload = _jpeg_bytes()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=upload_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[_upload(client, payload) for _ in range(4)])
+
+    responses = asyncio.run(scenario())
+    codes = sorted(resp.status_code for resp in responses)
+
+    assert 200 in codes
+    assert 429 in codes
+    rejected = next(resp for resp in responses if resp.status_code == 429)
+    assert rejected.headers.get("Retry-After")
+    assert rejected.json()["error_type"] == "server_busy"
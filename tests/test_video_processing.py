@@ -0,0 +1,90 @@
+"""
+Video frame sampling tests: evenly spaced seek positions over the whole
+video, best-frame selection on downscaled frames, early stop at the focus
+threshold, and extraction from a spooled path.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.services.video_processing_service import VideoProcessingService  # noqa: E402
+
+FPS = 10
+
+
+def _video(path: Path, seconds: int, sharp_at: int) -> Path:
+    """Blurred record shot; only frames sharp_at..sharp_at+4 are in focus."""
+    w, h = 320, 240
+    base = np.full((h, w, 3), 170, np.uint8)
+    cv2.circle(base, (w // 2, h // 2), 100, (25, 25, 25), -1)
+    cv2.circle(base, (w // 2, h // 2), 35, (40, 90, 200), -1)
+    cv2.putText(base, "CAT-1234", (w // 2 - 40, h // 2 + 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, (w, h))
+    for i in range(seconds * FPS):
+        frame = base.copy()
+        cv2.putText(frame, str(i), (5, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+        out.write(frame if sharp_at <= i < sharp_at + 5 else cv2.GaussianBlur(frame, (15, 15), 0))
+    out.release()
+    return path
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = VideoProcessingService()
+    service.storage_dir = tmp_path / "frames"
+    service.storage_dir.mkdir()
+    return service
+
+
+def test_sample_positions_cover_whole_video(service):
+    assert service.sample_positions(1000, 4) == [125, 375, 625, 875]
+    assert service.sample_positions(3, 24) == [0, 1, 2]
+    assert service.sample_positions(0, 24) == []
+
+
+def test_best_frame_found_late_in_video(service, tmp_path):
+    # The old sampler only looked at the first 15 s
+    path = _video(tmp_path / "long.mp4", seconds=30, sharp_at=262)
+    cap = cv2.VideoCapture(str(path))
+    try:
+        frame, score, number, info = service.sample_best_frame(cap, 300, FPS, samples=30, threshold=0, refine=0)
+    finally:
+        cap.release()
+    assert 262 <= number < 267
+    assert info == {"frames_scored": 30, "early_stop": False}
+    assert frame.shape == (240, 320, 3)
+
+
+def test_early_stop_and_extract_from_path(service, tmp_path):
+    path = _video(tmp_path / "clip.mp4", seconds=6, sharp_at=0)
+    cap = cv2.VideoCapture(str(path))
+    try:
+        _, sharp, _, _ = service.sample_best_frame(cap, 60, FPS, samples=12, threshold=0, refine=0)
+    finally:
+        cap.release()
+
+    jpeg_path, metadata = service.extract_best_frame_from_path(path, "clip.mp4")
+    assert metadata["total_frames"] == 60 and metadata["video_size_bytes"] == path.stat().st_size
+    assert Path(jpeg_path).parent == service.storage_dir and cv2.imread(jpeg_path) is not None
+
+    cap = cv2.VideoCapture(str(path))
+    try:
+        _, score, number, info = service.sample_best_frame(cap, 60, FPS, samples=12, threshold=sharp * 0.9)
+    finally:
+        cap.release()
+    assert number == 2 and score >= sharp * 0.9
+    assert info == {"frames_scored": 1, "early_stop": True}
+
+    # Bytes entry point still works (temp file removed afterwards)
+    _, metadata = service.extract_best_frame(path.read_bytes(), "clip.mp4")
+    assert metadata["video_filename"] == "clip.mp4"
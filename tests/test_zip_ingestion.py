@@ -0,0 +1,174 @@
+"""
+Streaming ZIP ingestion tests: central-directory limits (member count,
+size, compression ratio), sanitized member names, bounded parallel
+processing, result streaming with resume, and the batch endpoints.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import sys
+import threading
+import time
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import backend.api.v1.upap_preview_router as preview_router  # noqa: E402
+from backend.api.v1.auth_middleware import get_current_user, get_current_user_stream  # noqa: E402
+from backend.services.zip_ingestion import (  # noqa: E402
+    ZipBatch,
+    ZipBatchRegistry,
+    ZipLimitExceeded,
+    scan_members,
+)
+
+
+def _zip(path: Path, members: dict, compression=zipfile.ZIP_DEFLATED) -> Path:
+    with zipfile.ZipFile(path, "w", compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return path
+
+
+def test_scan_filters_and_sanitizes_members(tmp_path):
+    path = _zip(tmp_path / "a.zip", {
+        "covers/a.jpg": b"a" * 10,
+        "other/a.jpg": b"b" * 10,
+        "../../etc/evil.png": b"c",
+        "notes.txt": b"skip",
+        "__MACOSX/covers/._a.jpg": b"skip",
+        "covers/": b"",
+    })
+    members = scan_members(path)
+    assert [m.name for m in members] == ["covers/a.jpg", "other/a.jpg", "../../etc/evil.png"]
+    assert [m.filename for m in members] == ["0000_a.jpg", "0001_a.jpg", "0002_evil.png"]
+
+
+@pytest.mark.parametrize("members, limits, status", [
+    ({f"{i}.jpg": b"x" for i in range(6)}, {"max_members": 5}, 413),
+    ({"big.jpg": b"x" * 5000}, {"max_member_bytes": 4000}, 413),
+    ({"a.jpg": b"x" * 3000, "b.jpg": b"x" * 3000}, {"max_total_bytes": 5000}, 413),
+    ({"bomb.jpg": b"\0" * (4 * 1024 * 1024)}, {}, 400),
+])
+def test_scan_enforces_limits(tmp_path, members, limits, status):
+    path = _zip(tmp_path / "limits.zip", members)
+    with pytest.raises(ZipLimitExceeded) as exc:
+        scan_members(path, **limits)
+    assert exc.value.status_code == status
+
+
+def test_scan_rejects_non_zip(tmp_path):
+    path = tmp_path / "bad.zip"
+    path.write_bytes(b"not a zip")
+    with pytest.raises(ZipLimitExceeded):
+        scan_members(path)
+
+
+def test_batch_runs_members_in_parallel_and_streams(tmp_path):
+    path = _zip(tmp_path / "batch.zip", {f"{i}.jpg": bytes([i]) * 100 for i in range(12)})
+    members = scan_members(path)
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def processor(data: bytes, filename: str):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.05)
+        with lock:
+            state["in_flight"] -= 1
+        if filename.startswith("0003_"):
+            raise RuntimeError("unreadable")
+        return {"filename": filename, "size": len(data), "byte": data[0]}
+
+    async def scenario():
+        batch = ZipBatch(id="b1", owner="u", archive_name="batch.zip", path=path, members=members)
+        streamed = []
+
+        async def consume():
+            async for position, item in batch.stream():
+                streamed.append((position, item))
+
+        start = time.perf_counter()
+        await asyncio.gather(batch.run(processor, concurrency=4), consume())
+        elapsed = time.perf_counter() - start
+
+        resumed = [position async for position, _ in batch.stream(after=9)]
+        return batch, streamed, elapsed, resumed
+
+    batch, streamed, elapsed, resumed = asyncio.run(scenario())
+
+    assert batch.status == "completed" and batch.failed == 1
+    assert [p for p, _ in streamed] == list(range(12))
+    items = {item["index"]: item for _, item in streamed}
+    assert items[3]["status"] == "error" and items[3]["error"] == "unreadable"
+    assert items[5]["result"] == {"filename": "0005_5.jpg", "size": 100, "byte": 5}
+    assert 1 < state["peak"] <= 4
+    assert elapsed < 12 * 0.05
+    assert resumed == [10, 11]
+    # Spool file is removed once the batch finishes
+    assert not path.exists()
+
+
+def test_registry_limits_active_batches(tmp_path):
+    async def scenario():
+        registry = ZipBatchRegistry(max_active=1)
+        release = threading.Event()
+        path = _zip(tmp_path / "r.zip", {"a.jpg": b"x"})
+        first = registry.start("u", "r.zip", path, scan_members(path), lambda d, n: release.wait(5))
+        with pytest.raises(ZipLimitExceeded) as exc:
+            registry.start("u", "r.zip", path, [], lambda d, n: None)
+        assert exc.value.status_code == 429
+        assert registry.get(first.id, owner="someone-else") is None
+        release.set()
+        await first._task
+        assert registry.active() == 0
+
+    asyncio.run(scenario())
+
+
+def test_zip_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        preview_router, "process_file_sync",
+        lambda data, filename, user_email, detect_multiple=True: {"filename": filename, "user": user_email},
+    )
+    monkeypatch.setattr(preview_router, "zip_batches", ZipBatchRegistry())
+    app = FastAPI()
+    app.include_router(preview_router.router)
+    user = SimpleNamespace(email="collector@example.com")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_stream] = lambda: user
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for i in range(3):
+            archive.writestr(f"sleeves/{i}.jpg", b"img")
+    with TestClient(app) as client:
+        # Aggregate mode on the existing endpoint
+        resp = client.post("/upap/process/process/preview", files={"file": ("s.zip", buf.getvalue(), "application/zip")})
+        assert resp.status_code == 200
+        assert [r["filename"] for r in resp.json()["results"]] == ["0000_0.jpg", "0001_1.jpg", "0002_2.jpg"]
+
+        # Streaming mode: batch id, then per-item events
+        resp = client.post("/upap/process/process/preview/zip", files={"file": ("s.zip", buf.getvalue(), "application/zip")})
+        assert resp.status_code == 202
+        body = resp.json()
+        assert body["total"] == 3
+        events = client.get(body["events_url"]).text
+        assert events.count("event: item") == 3 and "event: done" in events
+        summary = client.get(body["status_url"]).json()
+        assert summary["status"] == "completed" and len(summary["results"]) == 3
+
+        resp = client.post("/upap/process/process/preview/zip", files={"file": ("s.zip", b"garbage", "application/zip")})
+        assert resp.status_code == 400
+        assert client.get("/upap/process/process/preview/batch/missing").status_code == 404